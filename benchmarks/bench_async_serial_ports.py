@@ -0,0 +1,110 @@
+"""测量多个 AsyncSerialSession 共用一个事件循环线程时的回显往返延迟与线程数（POSIX 伪终端）。
+
+每个伪终端主端由同一事件循环的读回调回显数据，各会话同时发送并等待回显，
+按轮统计全部端口往返完成的耗时与单端口往返延迟，并与每端口一个接收线程的
+SerialManager 对比打开后的进程线程数。
+
+用法：python benchmarks/bench_async_serial_ports.py [--ports 100] [--rounds 50] [--size 32]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import Mock
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from utils.async_serial_session import AsyncSerialSession
+from utils.serial_manager import SerialManager
+
+
+def percentile(values, ratio):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+def echo(master):
+    try:
+        data = os.read(master, 65536)
+    except BlockingIOError:
+        return
+    os.write(master, data)
+
+
+async def round_trip(session, payload):
+    started = time.perf_counter()
+    await session.send(payload)
+    received = 0
+    while received < len(payload):
+        received += len(await session.read())
+    return (time.perf_counter() - started) * 1000
+
+
+async def measure_async(pairs, rounds, size):
+    loop = asyncio.get_running_loop()
+    sessions = [AsyncSerialSession(port_monitor=Mock()) for _ in pairs]
+    for session, (master, slave) in zip(sessions, pairs):
+        os.set_blocking(master, False)
+        loop.add_reader(master, echo, master)
+        await session.open(os.ttyname(slave))
+    threads = threading.active_count()
+    payload = b"x" * size
+    latencies, round_times = [], []
+    try:
+        for _ in range(rounds):
+            started = time.perf_counter()
+            latencies.extend(await asyncio.gather(*(round_trip(session, payload) for session in sessions)))
+            round_times.append((time.perf_counter() - started) * 1000)
+    finally:
+        for session, (master, _slave) in zip(sessions, pairs):
+            loop.remove_reader(master)
+            await session.close()
+    return threads, latencies, round_times
+
+
+def measure_thread_count(pairs):
+    managers = [SerialManager(port_monitor=Mock()) for _ in pairs]
+    try:
+        for manager, (_master, slave) in zip(managers, pairs):
+            manager.open(os.ttyname(slave))
+        return threading.active_count()
+    finally:
+        for manager in managers:
+            manager.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ports", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--size", type=int, default=32)
+    args = parser.parse_args()
+    if not hasattr(os, "openpty"):
+        print("当前平台不支持伪终端，跳过基准测试")
+        return 0
+    pairs = [os.openpty() for _ in range(args.ports)]
+    try:
+        baseline = threading.active_count()
+        threads, latencies, round_times = asyncio.run(measure_async(pairs, args.rounds, args.size))
+        manager_threads = measure_thread_count(pairs)
+    finally:
+        for master, slave in pairs:
+            os.close(master)
+            os.close(slave)
+    print(f"端口数: {args.ports}  轮数: {args.rounds}  每帧字节: {args.size}")
+    print(f"AsyncSerialSession 打开后线程数: {threads}（基线 {baseline}）")
+    print(f"SerialManager 打开后线程数: {manager_threads}")
+    print(f"单端口往返中位延迟: {statistics.median(latencies):.3f} ms  P99: {percentile(latencies, 0.99):.3f} ms")
+    print(f"全部端口一轮中位耗时: {statistics.median(round_times):.3f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,66 @@
+"""测量各接收分帧解码器按串口读取块大小增量解码的吞吐。
+
+每种解码器对同一批编码后的帧按固定块大小切分并逐块送入，统计每秒解码的帧数与字节数。
+
+用法：python benchmarks/bench_frame_decoder.py [--frames 20000] [--size 32] [--chunk 4096]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from utils.frame_decoder import (CobsDecoder, DelimiterDecoder, LengthPrefixedDecoder, ModbusRtuDecoder,
+                                 SlipDecoder, modbus_crc16)
+
+
+def cobs_encode(data):
+    output, block = bytearray(), bytearray()
+    for byte in data:
+        if byte:
+            block.append(byte)
+            if len(block) == 254:
+                output += bytes([255]) + block
+                block.clear()
+        else:
+            output += bytes([len(block) + 1]) + block
+            block.clear()
+    return bytes(output + bytes([len(block) + 1]) + block) + b"\x00"
+
+
+def encoders(size):
+    text = bytes(48 + index % 10 for index in range(size))
+    binary = bytes(index % 256 for index in range(size))
+    return (
+        ("分隔符", DelimiterDecoder(b"\r\n"), text + b"\r\n"),
+        ("长度前缀", LengthPrefixedDecoder(2), size.to_bytes(2, "big") + binary),
+        ("SLIP", SlipDecoder(), binary.replace(b"\xdb", b"\xdb\xdd").replace(b"\xc0", b"\xdb\xdc") + b"\xc0"),
+        ("COBS", CobsDecoder(), cobs_encode(binary)),
+        ("Modbus RTU", ModbusRtuDecoder(115200), binary[:size - 2] + modbus_crc16(binary[:size - 2]).to_bytes(2, "little")),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=20000)
+    parser.add_argument("--size", type=int, default=32)
+    parser.add_argument("--chunk", type=int, default=4096)
+    args = parser.parse_args()
+    print(f"帧数: {args.frames}  帧长 {args.size} 字节  读取块 {args.chunk} 字节")
+    for name, decoder, frame in encoders(args.size):
+        stream = frame * args.frames
+        started = time.perf_counter()
+        count = 0
+        for offset in range(0, len(stream), args.chunk):
+            count += len(decoder.feed(stream[offset:offset + args.chunk], 0))
+        elapsed = time.perf_counter() - started
+        print(f"{name}: {count / elapsed:,.0f} 帧/秒  {len(stream) / elapsed / 1e6:.1f} MB/秒")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
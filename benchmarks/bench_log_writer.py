@@ -0,0 +1,131 @@
+"""比较批量日志写入器与逐条写入实现的吞吐量和生产者侧锁等待。
+
+生产者线程模拟界面线程持续调用 ``write``，统计总吞吐量（MB/s）、单次 ``write``
+调用耗时的中位数与 P99（反映与写入线程的锁争用），以及写入线程取锁次数。
+
+用法：python benchmarks/bench_log_writer.py [--lines 200000] [--line-bytes 64] [--producers 1]
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from utils.log_writer import LogWriter
+
+
+class CountingCondition:
+    """包装 threading.Condition，统计写入线程的取锁次数。"""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self.writer_acquisitions = 0
+        self.writer_thread = None
+
+    def __enter__(self):
+        self._condition.__enter__()
+        if threading.current_thread() is self.writer_thread:
+            self.writer_acquisitions += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._condition.__exit__(*exc_info)
+
+    def wait(self, timeout=None):
+        return self._condition.wait(timeout)
+
+    def notify(self):
+        self._condition.notify()
+
+
+class LegacyLogWriter(LogWriter):
+    """改造前的实现：写入时编码计数，写入线程每次取锁只取出并写入一项。"""
+
+    def write(self, text, generation=None):
+        size = len(text.encode("utf-8"))
+        with self._condition:
+            if self._stopped:
+                return False
+            if self._pending_bytes + size > self.max_pending_bytes:
+                self._dropped_bytes += size
+                return False
+            self._queue.append(("write", text, size, generation))
+            self._pending_bytes += size
+            self._condition.notify()
+            return True
+
+    def _run(self):
+        stream = None
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._condition.wait()
+                command, value, size, _generation = self._queue.popleft()
+                self._pending_bytes -= size
+            if command == "open":
+                stream = Path(value).open("a", encoding="utf-8")
+            elif command == "write" and stream:
+                stream.write(value)
+            elif command in ("close", "stop") and stream:
+                stream.close()
+                stream = None
+            if command == "stop":
+                return
+
+
+def run(writer_class, path, lines, line_bytes, producers):
+    condition = CountingCondition()
+    # 以只读属性替换条件变量，写入线程启动时即使用计数版本。
+    instrumented = type(writer_class.__name__, (writer_class,), {"_condition": property(lambda _self: condition, lambda _self, _value: None)})
+    writer = instrumented(max_pending_bytes=1 << 40)
+    condition.writer_thread = writer._thread
+    text = ("x" * (line_bytes - 1)) + "\n"
+    durations = [[] for _ in range(producers)]
+
+    def produce(samples):
+        clock = time.perf_counter_ns
+        for _ in range(lines // producers):
+            start = clock()
+            writer.write(text)
+            samples.append(clock() - start)
+
+    writer.open(path)
+    started = time.perf_counter()
+    threads = [threading.Thread(target=produce, args=(samples,)) for samples in durations]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    writer.stop(timeout=60)
+    elapsed = time.perf_counter() - started
+    samples = sorted(value for group in durations for value in group)
+    return {
+        "mb_s": lines * line_bytes / elapsed / 1e6,
+        "median_us": statistics.median(samples) / 1000,
+        "p99_us": samples[int(len(samples) * 0.99)] / 1000,
+        "acquisitions": condition.writer_acquisitions,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=200_000)
+    parser.add_argument("--line-bytes", type=int, default=64)
+    parser.add_argument("--producers", type=int, default=1)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        for name, writer_class in (("逐条写入", LegacyLogWriter), ("批量写入", LogWriter)):
+            result = run(writer_class, str(Path(directory) / f"{writer_class.__name__}.log"), args.lines, args.line_bytes, args.producers)
+            print(f"{name}: {result['mb_s']:8.1f} MB/s  write 中位数 {result['median_us']:6.2f} us  "
+                  f"P99 {result['p99_us']:7.2f} us  写入线程取锁 {result['acquisitions']} 次")
+
+
+if __name__ == "__main__":
+    main()
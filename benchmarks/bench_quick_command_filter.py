@@ -0,0 +1,83 @@
+"""测量快捷指令库在大量指令下的索引构建与逐字输入检索延迟。
+
+依次输入若干查询的每个前缀，分别统计增量检索（在上次结果中筛选）、冷检索
+（每次扫描全部检索键）与未建索引时逐条拼接并转换小写的扫描耗时中位数与 P99。
+
+用法：python benchmarks/bench_quick_command_filter.py [--commands 10000] [--groups 40] [--rounds 20]
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from utils.quick_command_library import QuickCommandLibrary, normalize_command
+
+
+QUERIES = ("at+cfun=1", "01 03 00", "hex 10", "读取 温度", "reset")
+WORDS = ("读取", "设置", "温度", "湿度", "版本", "复位", "校准", "状态", "网络", "电源")
+
+
+def make_groups(commands, groups, seed=1):
+    generator = random.Random(seed)
+    result = [{"name": f"分组{index}", "commands": []} for index in range(groups)]
+    for index in range(commands):
+        if generator.random() < 0.3:
+            data = " ".join(f"{generator.randrange(256):02X}" for _ in range(generator.randint(4, 12)))
+            mode = "HEX"
+        else:
+            data = f"AT+{generator.choice(('CFUN', 'CSQ', 'CGATT', 'RESET', 'GMR'))}={generator.randrange(100)}\r\n"
+            mode = "TEXT"
+        name = f"{generator.choice(WORDS)}{generator.choice(WORDS)}{index}"
+        result[index % groups]["commands"].append(normalize_command({"name": name, "data": data, "mode": mode}))
+    return result
+
+
+def naive_filter(groups, query):
+    terms = query.casefold().split()
+    return [[row for row, command in enumerate(group["commands"])
+             if all(term in f"{command['name']}\0{command['data']}\0{command['mode']}".casefold() for term in terms)]
+            for group in groups]
+
+
+def measure(rounds, search):
+    samples = []
+    for _ in range(rounds):
+        for query in QUERIES:
+            for length in range(1, len(query) + 1):
+                start = time.perf_counter_ns()
+                search(query[:length])
+                samples.append(time.perf_counter_ns() - start)
+    samples.sort()
+    return statistics.median(samples) / 1e6, samples[int(len(samples) * 0.99)] / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commands", type=int, default=10_000)
+    parser.add_argument("--groups", type=int, default=40)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    groups = make_groups(args.commands, args.groups)
+
+    start = time.perf_counter()
+    library = QuickCommandLibrary(groups)
+    print(f"{args.commands} 条指令 / {args.groups} 个分组，建立索引 {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    def cold(query):
+        library._invalidate()
+        return library.filter(query)
+
+    for name, search in (("增量检索", library.filter), ("冷检索", cold), ("无索引扫描", lambda query: naive_filter(groups, query))):
+        median, p99 = measure(args.rounds, search)
+        print(f"{name}: 每次输入中位数 {median:7.3f} ms  P99 {p99:7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""测量 SerialManager 从写入到接收回调的延迟（POSIX 伪终端）。
+
+用法：python benchmarks/bench_receive_latency.py [--samples 500] [--size 16]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from utils.serial_manager import SerialManager
+
+
+def percentile(values, ratio):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+def measure(samples, size):
+    master, slave = os.openpty()
+    manager = SerialManager()
+    received = threading.Event()
+    state = {"expected": size, "buffered": 0, "arrived": 0.0}
+
+    def on_receive(data):
+        state["buffered"] += len(data)
+        if state["buffered"] >= state["expected"]:
+            state["arrived"] = time.perf_counter()
+            received.set()
+
+    manager.set_receive_callback(on_receive)
+    latencies = []
+    try:
+        if not manager.open(os.ttyname(slave), baudrate=115200):
+            raise RuntimeError("无法打开伪终端")
+        payload = b"x" * size
+        for _ in range(samples):
+            received.clear()
+            state["buffered"] = 0
+            started = time.perf_counter()
+            os.write(master, payload)
+            if not received.wait(1.0):
+                raise RuntimeError("等待接收回调超时")
+            latencies.append((state["arrived"] - started) * 1000)
+            time.sleep(0.002)
+    finally:
+        manager.close()
+        os.close(master)
+        os.close(slave)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=500)
+    parser.add_argument("--size", type=int, default=16)
+    args = parser.parse_args()
+    if not hasattr(os, "openpty"):
+        print("当前平台不支持伪终端，跳过基准测试")
+        return 0
+    latencies = measure(args.samples, args.size)
+    print(f"样本数: {len(latencies)}  每帧字节: {args.size}")
+    print(f"中位延迟: {statistics.median(latencies):.3f} ms")
+    print(f"P99 延迟: {percentile(latencies, 0.99):.3f} ms")
+    print(f"最大延迟: {max(latencies):.3f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,58 @@
+"""比较 ReceiveTextSegmenter 逐行迭代与整批处理的吞吐量（MB/s）。
+
+用法：python benchmarks/bench_receive_segmenter.py [--batch-kib 256] [--rounds 50]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from utils.receive_data_utils import ReceiveTextSegmenter
+
+
+def build_batch(size):
+    """构造由短行、空行和 CRLF 混合组成的接收批次。"""
+    lines = ["OK\r\n", "+CSQ: 23,99\r\n", "\r\n", "temp=25.1 hum=40\n", "\n", "AT\r"]
+    text, index = [], 0
+    total = 0
+    while total < size:
+        line = lines[index % len(lines)]
+        text.append(line)
+        total += len(line)
+        index += 1
+    return "".join(text)[:size]
+
+
+def measure(label, process, text, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        process(text)
+    elapsed = time.perf_counter() - started
+    throughput = len(text.encode("utf-8")) * rounds / elapsed / (1024 * 1024)
+    print(f"{label:<24}{throughput:>10.1f} MB/s  {elapsed / rounds * 1000:>8.3f} ms/批")
+    return throughput
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-kib", type=int, default=256)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+    text = build_batch(args.batch_kib * 1024)
+    iterating, batching = ReceiveTextSegmenter(), ReceiveTextSegmenter()
+    if "".join(iterating.iter_segments(text)) != batching.segment(text):
+        raise AssertionError("整批处理结果与逐行迭代不一致")
+    print(f"批大小: {args.batch_kib} KiB  轮数: {args.rounds}")
+    baseline = measure("iter_segments + join", lambda value: "".join(iterating.iter_segments(value)), text, args.rounds)
+    batched = measure("segment", batching.segment, text, args.rounds)
+    print(f"加速比: {batched / baseline:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
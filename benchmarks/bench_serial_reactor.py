@@ -0,0 +1,74 @@
+"""对比每端口接收线程与共享反应器两种模式下多串口接收的线程数与耗时（POSIX 伪终端）。
+
+每个伪终端主端连续写入若干块数据，统计全部数据进入各会话接收缓冲所需时间，
+以及打开全部串口后的进程线程数。
+
+用法：python benchmarks/bench_serial_reactor.py [--ports 64] [--blocks 50] [--size 4096]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import Mock
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from utils.byte_ring import ByteRingBuffer
+from utils.serial_manager import SerialManager
+from utils.serial_reactor import SerialReactor
+
+
+def measure(ports, blocks, size, reactor):
+    pairs = [os.openpty() for _ in range(ports)]
+    managers = []
+    try:
+        for _master, slave in pairs:
+            manager = SerialManager(port_monitor=Mock(), reactor=reactor)
+            manager.set_receive_sink(ByteRingBuffer(blocks * size))
+            if not manager.open(os.ttyname(slave)):
+                raise RuntimeError("无法打开伪终端")
+            managers.append(manager)
+        threads = threading.active_count()
+        payload = b"x" * size
+        expected = ports * blocks * size
+        started = time.perf_counter()
+        for _ in range(blocks):
+            for master, _slave in pairs:
+                os.write(master, payload)
+        deadline = time.monotonic() + 10
+        while sum(len(manager.receive_sink) for manager in managers) < expected:
+            if time.monotonic() > deadline:
+                raise RuntimeError("等待接收超时")
+            time.sleep(0.001)
+        return threads, (time.perf_counter() - started) * 1000
+    finally:
+        for manager in managers:
+            manager.close()
+        for master, slave in pairs:
+            os.close(master)
+            os.close(slave)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ports", type=int, default=64)
+    parser.add_argument("--blocks", type=int, default=50)
+    parser.add_argument("--size", type=int, default=4096)
+    args = parser.parse_args()
+    if not hasattr(os, "openpty"):
+        print("当前平台不支持伪终端，跳过基准测试")
+        return 0
+    print(f"端口数: {args.ports}  每端口 {args.blocks} 块 × {args.size} 字节")
+    for name, reactor in (("每端口接收线程", None), ("共享反应器", SerialReactor())):
+        threads, elapsed = measure(args.ports, args.blocks, args.size, reactor)
+        print(f"{name}: 线程数 {threads}  全部接收耗时 {elapsed:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,82 @@
+"""对比不同流水线深度下请求/应答事务的吞吐与延迟（POSIX 伪终端）。
+
+伪终端主端由应答线程对每行请求回复一行应答，按指定深度提交全部事务并等待
+完成，统计每秒完成的事务数以及事务延迟的中位数与 P99。
+
+用法：python benchmarks/bench_transactions.py [--count 2000] [--depths 1 4 16]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import Mock
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from utils.serial_manager import SerialManager
+from utils.transaction_engine import ReplyMatcher, TransactionEngine
+
+
+def respond(master, stop):
+    buffer = b""
+    os.set_blocking(master, False)
+    while not stop.is_set():
+        try:
+            buffer += os.read(master, 65536)
+        except BlockingIOError:
+            time.sleep(0.0001)
+            continue
+        lines = buffer.split(b"\n")
+        buffer = lines.pop()
+        if lines:
+            os.write(master, b"".join(b"OK " + line + b"\n" for line in lines))
+
+
+def measure(count, depth):
+    master, slave = os.openpty()
+    stop = threading.Event()
+    responder = threading.Thread(target=respond, args=(master, stop), daemon=True)
+    responder.start()
+    manager = SerialManager(port_monitor=Mock())
+    engine = TransactionEngine(manager, pipeline_depth=depth)
+    manager.set_receive_callback(engine.feed, with_timestamp=True)
+    try:
+        if not manager.open(os.ttyname(slave)):
+            raise RuntimeError("无法打开伪终端")
+        matcher = ReplyMatcher.delimiter(b"\n")
+        started = time.perf_counter()
+        futures = [engine.request(f"READ {index}\n".encode(), matcher, timeout=5.0) for index in range(count)]
+        for future in futures:
+            future.result(30)
+        return count / (time.perf_counter() - started), engine.stats()
+    finally:
+        stop.set()
+        manager.close()
+        responder.join(1.0)
+        os.close(master)
+        os.close(slave)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--depths", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+    if not hasattr(os, "openpty"):
+        print("当前平台不支持伪终端，跳过基准测试")
+        return 0
+    print(f"事务数: {args.count}")
+    for depth in args.depths:
+        rate, stats = measure(args.count, depth)
+        print(f"流水线深度 {depth}: {rate:.0f} 事务/秒  延迟中位数 {stats['latency_median_ms']:.3f} ms"
+              f"  P99 {stats['latency_p99_ms']:.3f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
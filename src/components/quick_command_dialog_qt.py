@@ -1,27 +1,54 @@
 """Qt 快捷指令编辑对话框。"""
 
 from PySide6.QtWidgets import (QDialog, QDialogButtonBox, QFormLayout, QLineEdit,
-                               QPlainTextEdit, QComboBox, QMessageBox)
+                               QPlainTextEdit, QComboBox, QMessageBox, QSpinBox)
 
 from utils.hex_utils import HexUtils
+from utils.quick_command_library import DEFAULT_REPLY_TIMEOUT_MS, MAX_REPLY_RETRIES, normalize_reply
 from utils.send_data_utils import SendDataUtils
+from utils.transaction_engine import ReplyMatcher
 
 
 class QuickCommandDialog(QDialog):
+    # 应答匹配类型的显示名称，None 表示普通发送、不等待应答。
+    REPLY_TYPES = ((None, "不等待应答"), ("delimiter", "分隔符"), ("regex", "正则表达式"), ("length", "固定字节数"))
+
     def __init__(self, parent=None, command=None):
         super().__init__(parent); self.setWindowTitle("编辑指令" if command else "添加指令")
         self.name_text, self.data_text, self.mode_combo = QLineEdit(), QPlainTextEdit(), QComboBox(); self.mode_combo.addItems(["TEXT", "HEX"])
+        self.reply_combo, self.reply_value_text, self.reply_timeout_spin, self.reply_retries_spin = QComboBox(), QLineEdit(), QSpinBox(), QSpinBox()
+        for kind, label in self.REPLY_TYPES: self.reply_combo.addItem(label, kind)
+        self.reply_value_text.setPlaceholderText("如 \\r\\n、OK\\r\\n$ 或 8"); self.reply_timeout_spin.setRange(1, 600000); self.reply_timeout_spin.setSuffix(" ms"); self.reply_timeout_spin.setValue(DEFAULT_REPLY_TIMEOUT_MS); self.reply_retries_spin.setRange(0, MAX_REPLY_RETRIES)
+        self.reply_combo.currentIndexChanged.connect(self._update_reply_fields)
         layout = QFormLayout(self); layout.addRow("指令名称:", self.name_text); layout.addRow("指令内容:", self.data_text); layout.addRow("发送模式:", self.mode_combo)
+        layout.addRow("应答匹配:", self.reply_combo); layout.addRow("匹配内容:", self.reply_value_text); layout.addRow("应答超时:", self.reply_timeout_spin); layout.addRow("超时重试:", self.reply_retries_spin)
         buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel); buttons.button(QDialogButtonBox.Ok).setText("确定"); buttons.button(QDialogButtonBox.Cancel).setText("取消"); buttons.accepted.connect(self._accept); buttons.rejected.connect(self.reject); layout.addRow(buttons)
         if command: self.name_text.setText(command.get("name", "")); self.data_text.setPlainText(command.get("data", command.get("command", ""))); self.mode_combo.setCurrentText(command.get("mode", "TEXT"))
+        reply = normalize_reply(command.get("reply")) if command else None
+        if reply: self.reply_combo.setCurrentIndex(self.reply_combo.findData(reply["type"])); self.reply_value_text.setText(reply["value"]); self.reply_timeout_spin.setValue(reply["timeout_ms"]); self.reply_retries_spin.setValue(reply["retries"])
+        self._update_reply_fields()
+    def _update_reply_fields(self):
+        enabled = self.reply_combo.currentData() is not None
+        for widget in (self.reply_value_text, self.reply_timeout_spin, self.reply_retries_spin): widget.setEnabled(enabled)
+    def _reply(self):
+        if self.reply_combo.currentData() is None: return None
+        return {"type": self.reply_combo.currentData(), "value": self.reply_value_text.text(), "timeout_ms": self.reply_timeout_spin.value(), "retries": self.reply_retries_spin.value()}
     def _accept(self):
         data = self.data_text.toPlainText()
         if not self.name_text.text().strip() or not data.strip(): QMessageBox.warning(self, "输入错误", "指令名称和内容不能为空"); return
         if self.mode_combo.currentText() == "HEX" and not HexUtils.validate_hex_format(data): QMessageBox.warning(self, "输入错误", HexUtils.get_format_error_message()); return
+        reply = self._reply()
+        if reply:
+            try:
+                if not normalize_reply(reply): raise ValueError("匹配内容不能为空，固定字节数须为正整数")
+                ReplyMatcher.from_config(reply)
+            except ValueError as error: QMessageBox.warning(self, "输入错误", str(error)); return
         self.accept()
     def get_command(self):
         data = self.data_text.toPlainText()
         mode = self.mode_combo.currentText()
         if mode == "TEXT":
             data = SendDataUtils.normalize_text_newlines(data)
-        return {"name": self.name_text.text().strip(), "data": data, "command": data, "mode": mode}
+        command = {"name": self.name_text.text().strip(), "data": data, "command": data, "mode": mode}
+        if self._reply(): command["reply"] = normalize_reply(self._reply())
+        return command
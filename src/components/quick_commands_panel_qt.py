@@ -1,88 +1,134 @@
-"""Qt 快捷指令分组、编辑和发送面板。"""
+"""Qt 快捷指令分组、检索、编辑和发送面板。"""
 
-from PySide6.QtCore import Qt, Signal
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt, Signal
 from PySide6.QtGui import QFont
-from PySide6.QtWidgets import (QHeaderView, QInputDialog, QMenu, QMessageBox, QTabWidget,
-                               QAbstractItemView, QTableWidget, QTableWidgetItem, QVBoxLayout, QWidget)
+from PySide6.QtWidgets import (QHeaderView, QInputDialog, QLineEdit, QMenu, QMessageBox, QTabWidget,
+                               QAbstractItemView, QTableView, QVBoxLayout, QWidget)
 
 from .quick_command_dialog_qt import QuickCommandDialog
 
 
-class CommandTable(QTableWidget):
-    rows_reordered = Signal()
+class QuickCommandModel(QAbstractTableModel):
+    """显示快捷指令库中一个分组的表格模型，可按检索结果只显示匹配行。
+
+    单元格文本在视图请求时生成；未检索时编辑只通知受影响的行，大分组无需重建表格。
+    """
+
+    HEADERS = ("名称", "数据")
+
+    def __init__(self, library, group_index, parent=None):
+        super().__init__(parent); self.library, self.group_index, self._visible = library, group_index, None
+        library.add_listener(self._on_library_changed)
+    def detach(self): self.library.remove_listener(self._on_library_changed)
+    @property
+    def filtering(self): return self._visible is not None
+    def set_filter(self, rows):
+        """rows 为匹配的分组行号列表，None 表示显示全部。"""
+        self.beginResetModel(); self._visible = rows; self.endResetModel()
+    def source_row(self, row): return self._visible[row] if self._visible is not None else row
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.group_index >= len(self.library): return 0
+        return len(self._visible) if self._visible is not None else self.library.command_count(self.group_index)
+    def columnCount(self, parent=QModelIndex()): return 0 if parent.isValid() else 2
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole: return None
+        return self.HEADERS[section] if orientation == Qt.Horizontal else section + 1
+    def flags(self, index):
+        # 检索时显示的行号与分组行号不一致，不允许拖动排序；放下位置由 CommandTable 处理。
+        if not index.isValid(): return Qt.ItemIsDropEnabled
+        return super().flags(index) | Qt.ItemIsDragEnabled if self._visible is None else super().flags(index)
+    def supportedDropActions(self): return Qt.MoveAction | Qt.CopyAction
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid() or index.row() >= self.rowCount(): return None
+        command = self.library.command(self.group_index, self.source_row(index.row()))
+        if index.column() == 0: return command["name"]
+        return ("[H] " if command["mode"] == "HEX" else "[T] ") + command["data"].replace("\n", "\\n").replace("\r", "\\r")
+    def _on_library_changed(self, change, group_index, row):
+        # 检索时由面板重新检索并整体替换可见行；分组列表整体变化时面板重建页签。
+        if group_index != self.group_index or self._visible is not None: return
+        if change == "inserted": self.beginInsertRows(QModelIndex(), row, row); self.endInsertRows()
+        elif change == "removed": self.beginRemoveRows(QModelIndex(), row, row); self.endRemoveRows()
+        elif change == "updated": self.dataChanged.emit(self.index(row, 0), self.index(row, 1), [Qt.DisplayRole])
+        elif change == "group_reset": self.beginResetModel(); self.endResetModel()
+
+
+class CommandTable(QTableView):
+    rows_moved = Signal(int, int)
 
     def __init__(self, parent=None):
-        super().__init__(0, 2, parent)
+        super().__init__(parent)
         self.setSelectionMode(QAbstractItemView.SingleSelection)
         self.setDragEnabled(True); self.setAcceptDrops(True); self.setDropIndicatorShown(True)
         self.setDragDropMode(QAbstractItemView.InternalMove)
 
+    def selected_row(self):
+        selected = self.selectionModel().selectedRows()
+        return selected[0].row() if len(selected) == 1 else -1
+
     def dropEvent(self, event):
         if event.source() is not self:
             super().dropEvent(event)
             return
-        selected = self.selectionModel().selectedRows()
-        if len(selected) != 1:
+        source = self.selected_row()
+        if source < 0 or self.model().filtering:
             event.ignore()
             return
-        source = selected[0].row()
         target = self.indexAt(event.position().toPoint()).row()
         if target < 0:
-            target = self.rowCount()
+            target = self.model().rowCount()
         if target == source or target == source + 1:
             event.acceptProposedAction()
             return
-        self._move_row(source, target)
-        event.acceptProposedAction()
-        self.rows_reordered.emit()
-
-    def _move_row(self, source, target):
-        items = [self.takeItem(source, column) for column in range(self.columnCount())]
-        self.removeRow(source)
-        if target > source:
-            target -= 1
-        self.insertRow(target)
-        for column, item in enumerate(items):
-            self.setItem(target, column, item)
-        self.selectRow(target)
+        # 接受为复制动作，避免视图在放下后按移动动作再删除源行。
+        event.setDropAction(Qt.CopyAction)
+        event.accept()
+        self.rows_moved.emit(source, target)
 
 
 class QuickCommandsPanel(QWidget):
     def __init__(self, config_manager, main_window=None, parent=None):
-        super().__init__(parent); self.config_manager, self.main_window = config_manager, main_window; self.group_notebook = QTabWidget(); self.group_notebook.setDocumentMode(True); self.group_notebook.setFont(QFont(self.font().family(), 7)); self.group_notebook.setMovable(True); self.group_notebook.tabBar().setContextMenuPolicy(Qt.CustomContextMenu); self.group_notebook.tabBar().customContextMenuRequested.connect(self._group_menu); self.group_notebook.tabBar().tabMoved.connect(self._save_group_order)
-        layout = QVBoxLayout(self); layout.setContentsMargins(0, 0, 0, 0); layout.addWidget(self.group_notebook); self._load_groups()
-    def _groups(self): return self.config_manager.get_quick_command_groups()
+        super().__init__(parent); self.config_manager, self.main_window = config_manager, main_window; self.library = config_manager.get_quick_command_library(); self.group_notebook = QTabWidget(); self.group_notebook.setDocumentMode(True); self.group_notebook.setFont(QFont(self.font().family(), 7)); self.group_notebook.setMovable(True); self.group_notebook.tabBar().setContextMenuPolicy(Qt.CustomContextMenu); self.group_notebook.tabBar().customContextMenuRequested.connect(self._group_menu); self.group_notebook.tabBar().tabMoved.connect(self._save_group_order)
+        self.search_edit = QLineEdit(); self.search_edit.setFont(QFont(self.font().family(), 7)); self.search_edit.setPlaceholderText("搜索名称、数据或模式"); self.search_edit.setClearButtonEnabled(True); self.search_edit.textChanged.connect(lambda _text: self._apply_filter())
+        layout = QVBoxLayout(self); layout.setContentsMargins(0, 0, 0, 0); layout.addWidget(self.search_edit); layout.addWidget(self.group_notebook); self._load_groups()
+        self.library.add_listener(self._on_library_changed); self.destroyed.connect(lambda _obj=None, library=self.library, listener=self._on_library_changed: library.remove_listener(listener))
     def _load_groups(self):
+        current = self.group_notebook.currentIndex()
         while self.group_notebook.count():
             page = self.group_notebook.widget(0)
             self.group_notebook.removeTab(0)
-            page.deleteLater()
-        groups = self._groups()
-        if not groups: groups = [{"name": "默认", "commands": []}]; self.config_manager.set_quick_command_groups(groups)
-        for index, group in enumerate(groups): self._create_group_tab(index, group)
-    def _create_group_tab(self, index, group):
-        table = CommandTable(); compact_font = QFont(table.font().family(), 7); table.setFont(compact_font); table.horizontalHeader().setFont(compact_font); table.verticalHeader().setDefaultSectionSize(22); table.setHorizontalHeaderLabels(["名称", "数据"]); table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Fixed); table.setColumnWidth(0, 75); table.horizontalHeader().setStretchLastSection(True); table.verticalHeader().setVisible(False); table.setSelectionBehavior(QTableWidget.SelectRows); table.setEditTriggers(QTableWidget.NoEditTriggers); table.itemDoubleClicked.connect(lambda _item, table=table: self._send_command(table)); table.setContextMenuPolicy(Qt.CustomContextMenu); table.customContextMenuRequested.connect(lambda pos, table=table: self._command_menu(table, pos)); table.rows_reordered.connect(lambda table=table: self._save_command_order(table)); self._fill_table(table, group)
-        self.group_notebook.addTab(table, group.get("name", "默认"))
-    def _fill_table(self, table, group):
-        table.setRowCount(0)
-        for command in group.get("commands", []):
-            row = table.rowCount(); table.insertRow(row); data = str(command.get("data", command.get("command", ""))); prefix = "[H] " if command.get("mode") == "HEX" else "[T] "; name_item = QTableWidgetItem(command.get("name", "")); name_item.setData(Qt.UserRole, command); table.setItem(row, 0, name_item); table.setItem(row, 1, QTableWidgetItem(prefix + data.replace("\n", "\\n").replace("\r", "\\r")))
+            page.model().detach(); page.deleteLater()
+        # 空库添加默认分组时会经 reset 通知重建页签。
+        if not len(self.library): self.library.add_group("默认")
+        if self.group_notebook.count(): return
+        for index in range(len(self.library)): self._create_group_tab(index)
+        self.group_notebook.setCurrentIndex(min(max(current, 0), self.group_notebook.count() - 1)); self._apply_filter()
+    def _create_group_tab(self, index):
+        table = CommandTable(); table.setModel(QuickCommandModel(self.library, index, table)); compact_font = QFont(table.font().family(), 7); table.setFont(compact_font); table.horizontalHeader().setFont(compact_font); table.verticalHeader().setDefaultSectionSize(22); table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Fixed); table.setColumnWidth(0, 75); table.horizontalHeader().setStretchLastSection(True); table.verticalHeader().setVisible(False); table.setSelectionBehavior(QAbstractItemView.SelectRows); table.setEditTriggers(QAbstractItemView.NoEditTriggers); table.doubleClicked.connect(lambda _index, table=table: self._send_command(table)); table.setContextMenuPolicy(Qt.CustomContextMenu); table.customContextMenuRequested.connect(lambda pos, table=table: self._command_menu(table, pos)); table.rows_moved.connect(lambda source, target, table=table: self._save_command_order(table, source, target))
+        self.group_notebook.addTab(table, self.library.group_name(index))
+    def _apply_filter(self):
+        """按搜索框内容筛选各分组，页签显示匹配数量。"""
+        matches = self.library.filter(self.search_edit.text())
+        for index in range(self.group_notebook.count()):
+            table = self.group_notebook.widget(index); table.model().set_filter(None if matches is None else matches[index]); name = self.library.group_name(index)
+            self.group_notebook.setTabText(index, name if matches is None else f"{name} ({len(matches[index])})")
+    def _on_library_changed(self, change, _group_index, _row):
+        if change == "reset": self._load_groups()
+        elif change == "group_moved":
+            # 页签已由标签栏移动，按新位置更新各模型对应的分组。
+            for index in range(self.group_notebook.count()): self.group_notebook.widget(index).model().group_index = index
+            self._apply_filter()
+        elif self.search_edit.text().strip(): self._apply_filter()
     def _current_index(self): return self.group_notebook.currentIndex()
     def _current_table(self): return self.group_notebook.currentWidget()
+    def _selected_command_row(self, table):
+        row = table.selected_row(); return table.model().source_row(row) if row >= 0 else -1
     def _save_group_order(self, source, target):
         """按页签索引移动，允许历史配置中存在同名分组。"""
-        groups = self._groups()
-        if not (0 <= source < len(groups) and 0 <= target < len(groups)):
-            return
-        group = groups.pop(source)
-        groups.insert(target, group)
-        self.config_manager.set_quick_command_groups(groups)
-    def _save_command_order(self, table):
+        self.library.move_group(source, target)
+    def _save_command_order(self, table, source, target):
         index = self.group_notebook.indexOf(table)
         if index < 0: return
-        groups = self._groups()
-        groups[index]["commands"] = [table.item(row, 0).data(Qt.UserRole) for row in range(table.rowCount())]
-        self.config_manager.set_quick_command_groups(groups)
+        table.selectRow(self.library.move_command(index, source, target))
     def _group_menu(self, pos):
         index = self.group_notebook.tabBar().tabAt(pos); menu = QMenu(self); add = menu.addAction("新建分组"); add.triggered.connect(self._add_group)
         if index >= 0:
@@ -90,32 +136,34 @@ class QuickCommandsPanel(QWidget):
         menu.exec(self.group_notebook.tabBar().mapToGlobal(pos))
     def _add_group(self):
         name, ok = QInputDialog.getText(self, "新建分组", "分组名称:")
-        if ok and name.strip(): groups = self._groups(); groups.append({"name": name.strip(), "commands": []}); self.config_manager.set_quick_command_groups(groups); self._load_groups(); self.group_notebook.setCurrentIndex(len(groups)-1)
+        if ok and name.strip(): index = self.library.add_group(name.strip()); self.group_notebook.setCurrentIndex(index)
     def _rename_group(self, index):
-        groups = self._groups(); name, ok = QInputDialog.getText(self, "编辑分组", "分组名称:", text=groups[index]["name"])
-        if ok and name.strip(): groups[index]["name"] = name.strip(); self.config_manager.set_quick_command_groups(groups); self.group_notebook.setTabText(index, name.strip())
+        name, ok = QInputDialog.getText(self, "编辑分组", "分组名称:", text=self.library.group_name(index))
+        if ok and name.strip(): self.library.rename_group(index, name.strip())
     def _delete_group(self, index):
-        groups = self._groups()
-        if len(groups) <= 1: QMessageBox.warning(self, "提示", "至少需要保留一个分组"); return
-        if QMessageBox.question(self, "确认", f'确定删除分组“{groups[index]["name"]}”？') == QMessageBox.Yes: groups.pop(index); self.config_manager.set_quick_command_groups(groups); self._load_groups()
+        if len(self.library) <= 1: QMessageBox.warning(self, "提示", "至少需要保留一个分组"); return
+        if QMessageBox.question(self, "确认", f'确定删除分组“{self.library.group_name(index)}”？') == QMessageBox.Yes: self.library.remove_group(index)
     def _command_menu(self, table, pos):
-        item = table.itemAt(pos)
-        if item: table.selectRow(item.row())
-        else: table.clearSelection(); table.setCurrentItem(None)
-        menu = QMenu(self); row = table.currentRow()
+        index = table.indexAt(pos)
+        if index.isValid(): table.selectRow(index.row())
+        else: table.clearSelection(); table.setCurrentIndex(QModelIndex())
+        menu = QMenu(self); row = self._selected_command_row(table)
         add = menu.addAction("添加指令"); add.triggered.connect(self._add_command)
         if row >= 0:
             send = menu.addAction("发送"); send.triggered.connect(lambda: self._send_command(table)); edit = menu.addAction("编辑指令"); edit.triggered.connect(lambda: self._edit_command(row)); delete = menu.addAction("删除指令"); delete.triggered.connect(lambda: self._delete_command(row))
         menu.exec(table.viewport().mapToGlobal(pos))
     def _add_command(self):
         dialog = QuickCommandDialog(self)
-        if dialog.exec(): groups = self._groups(); groups[self._current_index()]["commands"].append(dialog.get_command()); self.config_manager.set_quick_command_groups(groups); self._fill_table(self._current_table(), groups[self._current_index()])
+        if dialog.exec(): self.library.add_command(self._current_index(), dialog.get_command())
     def _edit_command(self, row):
-        groups = self._groups(); group = groups[self._current_index()]; dialog = QuickCommandDialog(self, group["commands"][row])
-        if dialog.exec(): group["commands"][row] = dialog.get_command(); self.config_manager.set_quick_command_groups(groups); self._fill_table(self._current_table(), group)
+        dialog = QuickCommandDialog(self, self.library.command(self._current_index(), row))
+        if dialog.exec(): self.library.set_command(self._current_index(), row, dialog.get_command())
     def _delete_command(self, row):
-        if QMessageBox.question(self, "确认", "确定删除选中指令？") == QMessageBox.Yes: groups = self._groups(); group = groups[self._current_index()]; group["commands"].pop(row); self.config_manager.set_quick_command_groups(groups); self._fill_table(self._current_table(), group)
+        if QMessageBox.question(self, "确认", "确定删除选中指令？") == QMessageBox.Yes: self.library.remove_command(self._current_index(), row)
     def _send_command(self, table):
-        row = table.currentRow()
+        row = self._selected_command_row(table)
         if row < 0 or not self.main_window: return
-        command = self._groups()[self._current_index()]["commands"][row]; self.main_window.work_panel.send_data(str(command.get("data", command.get("command", ""))), command.get("mode", "TEXT")); self.main_window.command_panel.refresh_history()
+        command = self.library.command(self.group_notebook.indexOf(table), row)
+        # 配置了应答匹配的指令作为事务发送，等待应答并显示延迟。
+        if "reply" in command: self.main_window.work_panel.send_transaction(command)
+        else: self.main_window.work_panel.send_data(command["data"], command["mode"])
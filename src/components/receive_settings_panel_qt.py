@@ -1,41 +1,75 @@
 """Qt 接收设置面板。"""
 
-from PySide6.QtWidgets import QButtonGroup, QCheckBox, QGroupBox, QHBoxLayout, QRadioButton, QVBoxLayout
+from PySide6.QtWidgets import QButtonGroup, QCheckBox, QComboBox, QGroupBox, QHBoxLayout, QLabel, QLineEdit, QRadioButton, QVBoxLayout
+
+from utils.frame_decoder import unescape_frame_delimiter
 
 
 class ReceiveSettingsPanel(QGroupBox):
-    def __init__(self, config_manager, on_change_callback=None, on_save_log_callback=None, parent=None):
-        super().__init__("接收设置", parent); self.config_manager, self.on_change_callback, self.on_save_log_callback, self.current_port = config_manager, on_change_callback, on_save_log_callback, None
+    FRAME_DECODERS = (("none", "不分帧"), ("delimiter", "分隔符"), ("length", "长度前缀"), ("slip", "SLIP"), ("cobs", "COBS"), ("modbus_rtu", "Modbus RTU"))
+
+    def __init__(self, config_manager, on_change_callback=None, on_save_log_callback=None, parent=None, on_save_capture_callback=None):
+        super().__init__("接收设置", parent); self.config_manager, self.on_change_callback, self.on_save_log_callback, self.on_save_capture_callback, self.current_port = config_manager, on_change_callback, on_save_log_callback, on_save_capture_callback, None
         self.text_radio, self.hex_radio = QRadioButton("TEXT"), QRadioButton("HEX"); self.text_radio.setChecked(True)
         self.encoding_utf8, self.encoding_ascii = QRadioButton("UTF-8"), QRadioButton("ASCII"); self.encoding_utf8.setChecked(True)
         self.mode_group, self.encoding_group = QButtonGroup(self), QButtonGroup(self)
         self.mode_group.addButton(self.text_radio); self.mode_group.addButton(self.hex_radio)
         self.encoding_group.addButton(self.encoding_utf8); self.encoding_group.addButton(self.encoding_ascii)
-        self.log_mode_check, self.save_log_check = QCheckBox("日志模式（添加时间戳）"), QCheckBox("保存日志文件")
+        self.log_mode_check, self.save_log_check, self.save_capture_check = QCheckBox("日志模式（添加时间戳）"), QCheckBox("保存日志文件"), QCheckBox("保存原始捕获")
         self.auto_reconnect_check, self.auto_scroll_check = QCheckBox("串口自动重连"), QCheckBox("接收自动滚屏"); self.auto_scroll_check.setChecked(True)
+        self.hex_line_combo = QComboBox(); self.hex_line_combo.addItem("连续", 0); self.hex_line_combo.addItem("8 字节", 8); self.hex_line_combo.addItem("16 字节", 16); self.hex_line_combo.addItem("32 字节", 32)
+        self.hex_offset_check, self.hex_ascii_check = QCheckBox("偏移"), QCheckBox("ASCII")
+        self.frame_combo, self.frame_delimiter_edit, self.frame_length_combo = QComboBox(), QLineEdit("\\n"), QComboBox(); self._frame_delimiter = "\\n"
+        for kind, label in self.FRAME_DECODERS: self.frame_combo.addItem(label, kind)
+        for size in (1, 2, 4): self.frame_length_combo.addItem(f"{size} 字节", size)
+        self.frame_length_combo.setCurrentIndex(1); self.frame_delimiter_edit.setToolTip("帧分隔符，支持 \\r \\n \\t \\xHH 转义"); self.frame_length_combo.setToolTip("大端长度字段，不含长度字段本身")
         layout = QVBoxLayout(self); modes = QHBoxLayout(); modes.addWidget(self.text_radio); modes.addWidget(self.hex_radio); layout.addLayout(modes); encodings = QHBoxLayout(); encodings.addWidget(self.encoding_utf8); encodings.addWidget(self.encoding_ascii); layout.addLayout(encodings)
-        for widget in (self.log_mode_check, self.save_log_check, self.auto_reconnect_check, self.auto_scroll_check): layout.addWidget(widget)
-        self.text_radio.toggled.connect(self._mode_changed); self.hex_radio.toggled.connect(self._mode_changed); self.save_log_check.toggled.connect(self._save_log_changed)
-        for widget in (self.encoding_utf8, self.encoding_ascii, self.log_mode_check, self.auto_reconnect_check, self.auto_scroll_check): widget.toggled.connect(self._save)
+        hex_layout = QHBoxLayout(); hex_layout.addWidget(QLabel("HEX 每行:")); hex_layout.addWidget(self.hex_line_combo); hex_layout.addWidget(self.hex_offset_check); hex_layout.addWidget(self.hex_ascii_check); layout.addLayout(hex_layout)
+        frame_layout = QHBoxLayout(); frame_layout.addWidget(QLabel("帧解码:")); frame_layout.addWidget(self.frame_combo); frame_layout.addWidget(self.frame_delimiter_edit); frame_layout.addWidget(self.frame_length_combo); layout.addLayout(frame_layout)
+        for widget in (self.log_mode_check, self.save_log_check, self.save_capture_check, self.auto_reconnect_check, self.auto_scroll_check): layout.addWidget(widget)
+        self.text_radio.toggled.connect(self._mode_changed); self.hex_radio.toggled.connect(self._mode_changed); self.save_log_check.toggled.connect(self._save_log_changed); self.save_capture_check.toggled.connect(self._save_capture_changed)
+        for widget in (self.encoding_utf8, self.encoding_ascii, self.log_mode_check, self.auto_reconnect_check, self.auto_scroll_check, self.hex_offset_check, self.hex_ascii_check): widget.toggled.connect(self._save)
+        self.hex_line_combo.currentIndexChanged.connect(self._hex_layout_changed); self._update_encoding_enabled()
+        self.frame_combo.currentIndexChanged.connect(self._mode_changed); self.frame_length_combo.currentIndexChanged.connect(self._save); self.frame_delimiter_edit.editingFinished.connect(self._frame_delimiter_changed)
 
     def _mode_changed(self):
         self._update_encoding_enabled(); self._save()
     def _update_encoding_enabled(self):
-        is_text = self.text_radio.isChecked(); self.encoding_utf8.setEnabled(is_text); self.encoding_ascii.setEnabled(is_text)
+        is_text = self.text_radio.isChecked(); self.encoding_utf8.setEnabled(is_text); self.encoding_ascii.setEnabled(is_text); self.hex_line_combo.setEnabled(not is_text)
+        # 偏移与 ASCII 列只在按行排版时有意义。
+        lined = not is_text and bool(self.hex_line_combo.currentData()); self.hex_offset_check.setEnabled(lined); self.hex_ascii_check.setEnabled(lined)
+        self.frame_delimiter_edit.setVisible(self.frame_combo.currentData() == "delimiter"); self.frame_length_combo.setVisible(self.frame_combo.currentData() == "length")
+    def _frame_delimiter_changed(self):
+        text = self.frame_delimiter_edit.text()
+        try: valid = bool(unescape_frame_delimiter(text))
+        except UnicodeEncodeError: valid = False
+        # 无效或为空的分隔符恢复为上次保存的值。
+        if not valid: self.frame_delimiter_edit.setText(self._frame_delimiter); return
+        if text != self._frame_delimiter: self._save()
+    def _hex_layout_changed(self):
+        self._update_encoding_enabled(); self._save()
     def _save_log_changed(self, checked):
         if checked and self.on_save_log_callback and not self.on_save_log_callback(): self.save_log_check.setChecked(False); return
         self._save()
+    def _save_capture_changed(self, checked):
+        if checked and self.on_save_capture_callback and not self.on_save_capture_callback(): self.save_capture_check.setChecked(False); return
+        self._save()
     def _save(self):
+        self._frame_delimiter = self.frame_delimiter_edit.text()
         if self.current_port:
             settings = self.get_settings(); self.config_manager.update_receive_settings(self.current_port, settings)
             if self.on_change_callback: self.on_change_callback(settings)
-    def get_settings(self): return {"mode": "HEX" if self.hex_radio.isChecked() else "TEXT", "encoding": "UTF-8" if self.encoding_utf8.isChecked() else "ASCII", "log_mode": self.log_mode_check.isChecked(), "save_log": self.save_log_check.isChecked(), "auto_reconnect": self.auto_reconnect_check.isChecked(), "auto_scroll": self.auto_scroll_check.isChecked()}
+    def get_settings(self): return {"mode": "HEX" if self.hex_radio.isChecked() else "TEXT", "encoding": "UTF-8" if self.encoding_utf8.isChecked() else "ASCII", "log_mode": self.log_mode_check.isChecked(), "save_log": self.save_log_check.isChecked(), "save_capture": self.save_capture_check.isChecked(), "auto_reconnect": self.auto_reconnect_check.isChecked(), "auto_scroll": self.auto_scroll_check.isChecked(), "hex_bytes_per_line": self.hex_line_combo.currentData(), "hex_show_offset": self.hex_offset_check.isChecked(), "hex_show_ascii": self.hex_ascii_check.isChecked(), "frame_decoder": self.frame_combo.currentData(), "frame_delimiter": self.frame_delimiter_edit.text(), "frame_length_bytes": self.frame_length_combo.currentData()}
     def load_config(self, port, config):
         self.current_port = port
-        widgets = (self.text_radio, self.hex_radio, self.encoding_utf8, self.encoding_ascii, self.log_mode_check, self.save_log_check, self.auto_reconnect_check, self.auto_scroll_check)
+        widgets = (self.text_radio, self.hex_radio, self.encoding_utf8, self.encoding_ascii, self.log_mode_check, self.save_log_check, self.save_capture_check, self.auto_reconnect_check, self.auto_scroll_check, self.hex_line_combo, self.hex_offset_check, self.hex_ascii_check, self.frame_combo, self.frame_delimiter_edit, self.frame_length_combo)
         for widget in widgets: widget.blockSignals(True)
         try:
-            for widget, value in ((self.hex_radio, config.get("mode") == "HEX"), (self.text_radio, config.get("mode", "TEXT") != "HEX"), (self.encoding_utf8, config.get("encoding", "UTF-8") == "UTF-8"), (self.encoding_ascii, config.get("encoding") == "ASCII"), (self.log_mode_check, config.get("log_mode", False)), (self.save_log_check, config.get("save_log", False)), (self.auto_reconnect_check, config.get("auto_reconnect", False)), (self.auto_scroll_check, config.get("auto_scroll", True))): widget.setChecked(value)
+            for widget, value in ((self.hex_radio, config.get("mode") == "HEX"), (self.text_radio, config.get("mode", "TEXT") != "HEX"), (self.encoding_utf8, config.get("encoding", "UTF-8") == "UTF-8"), (self.encoding_ascii, config.get("encoding") == "ASCII"), (self.log_mode_check, config.get("log_mode", False)), (self.save_log_check, config.get("save_log", False)), (self.save_capture_check, config.get("save_capture", False)), (self.auto_reconnect_check, config.get("auto_reconnect", False)), (self.auto_scroll_check, config.get("auto_scroll", True)), (self.hex_offset_check, config.get("hex_show_offset", False)), (self.hex_ascii_check, config.get("hex_show_ascii", False))): widget.setChecked(value)
+            line_index = self.hex_line_combo.findData(config.get("hex_bytes_per_line", 0)); self.hex_line_combo.setCurrentIndex(line_index if line_index >= 0 else 0)
+            frame_index = self.frame_combo.findData(config.get("frame_decoder", "none")); self.frame_combo.setCurrentIndex(max(frame_index, 0))
+            length_index = self.frame_length_combo.findData(config.get("frame_length_bytes", 2)); self.frame_length_combo.setCurrentIndex(length_index if length_index >= 0 else 1)
+            self._frame_delimiter = config.get("frame_delimiter", "\\n"); self.frame_delimiter_edit.setText(self._frame_delimiter)
         finally:
             for widget in widgets: widget.blockSignals(False)
         self._update_encoding_enabled()
@@ -0,0 +1,130 @@
+"""Qt 接收显示区：只绘制视口内的行，内容来自 ReceiveLineStore。"""
+
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QColor, QFont, QKeySequence, QPainter, QPalette
+from PySide6.QtWidgets import QAbstractScrollArea, QApplication, QMenu
+
+
+class ReceiveView(QAbstractScrollArea):
+    """按行虚拟化的只读文本视图；追加后调用 refresh，绘制开销只与可见行数相关。
+
+    垂直滚动条以行为单位，水平滚动条以像素为单位；选择位置使用存储的绝对行号，
+    旧数据被淘汰后未滚动到底部的视图保持显示同一段内容。
+    """
+
+    MARGIN = 4
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store; self._colors = {}; self._anchor = self._cursor = None; self._first_line = store.first_line
+        self.setFocusPolicy(Qt.StrongFocus); self.viewport().setCursor(Qt.IBeamCursor)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded); self.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+
+    def setFont(self, font):
+        font = QFont(font); font.setStyleHint(QFont.TypeWriter); super().setFont(font); self.refresh()
+
+    def set_colors(self, colors):
+        """设置各显示级别的文字颜色，键为 ReceiveLineStore.LEVELS。"""
+        self._colors = {level: QColor(color) for level, color in colors.items()}; self.viewport().update()
+
+    def refresh(self):
+        """存储内容变化后更新滚动范围并重绘；淘汰的行数从当前滚动位置中扣除。"""
+        evicted = self.store.first_line - self._first_line; self._first_line = self.store.first_line
+        scrollbar = self.verticalScrollBar(); value = scrollbar.value() - evicted if evicted > 0 else scrollbar.value()
+        self._update_scrollbars(); scrollbar.setValue(max(0, value)); self.viewport().update()
+
+    def clear(self):
+        self.store.clear(); self._anchor = self._cursor = None; self._first_line = self.store.first_line; self.refresh()
+
+    def is_at_bottom(self):
+        scrollbar = self.verticalScrollBar(); return scrollbar.value() >= scrollbar.maximum()
+
+    def scroll_to_bottom(self):
+        scrollbar = self.verticalScrollBar(); scrollbar.setValue(scrollbar.maximum())
+
+    def selected_text(self):
+        if self._anchor is None or self._anchor == self._cursor: return ""
+        return self.store.text_range(*sorted((self._anchor, self._cursor)))
+
+    def copy(self):
+        text = self.selected_text()
+        if text: QApplication.clipboard().setText(text)
+
+    def select_all(self):
+        self._anchor = (self.store.first_line, 0)
+        end = self.store.end_line - 1
+        self._cursor = (end, len(self.store.line(end)[0])) if end >= self.store.first_line else self._anchor
+        self.viewport().update()
+
+    def _line_height(self):
+        return max(1, self.fontMetrics().lineSpacing())
+
+    def _visible_rows(self):
+        return max(1, self.viewport().height() // self._line_height())
+
+    def _update_scrollbars(self):
+        rows = self._visible_rows(); vertical = self.verticalScrollBar()
+        vertical.setRange(0, max(0, self.store.line_count() - rows)); vertical.setPageStep(rows)
+        # 等宽字体下按最长行字符数估算宽度，无需逐行测量。
+        width = self.store.max_line_chars * self.fontMetrics().horizontalAdvance("0") + 2 * self.MARGIN
+        horizontal = self.horizontalScrollBar(); horizontal.setRange(0, max(0, width - self.viewport().width())); horizontal.setPageStep(self.viewport().width())
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event); self._update_scrollbars()
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport()); metrics = self.fontMetrics(); line_height = self._line_height(); palette = self.palette()
+        first = self.store.first_line + self.verticalScrollBar().value(); x = self.MARGIN - self.horizontalScrollBar().value()
+        selection = sorted((self._anchor, self._cursor)) if self._anchor is not None and self._anchor != self._cursor else None
+        default_color = self._colors.get("normal", palette.color(QPalette.Text))
+        for row in range(self._visible_rows() + 1):
+            index = first + row
+            if index >= self.store.end_line: break
+            text, level = self.store.line(index); baseline = row * line_height + metrics.ascent()
+            painter.setPen(self._colors.get(level, default_color)); painter.drawText(x, baseline, text)
+            if selection and selection[0][0] <= index <= selection[1][0]:
+                start = selection[0][1] if index == selection[0][0] else 0
+                end = selection[1][1] if index == selection[1][0] else len(text)
+                left = x + metrics.horizontalAdvance(text[:start]); selected = text[start:end]
+                # 整行选中时多画一个字符宽度，表示包含行结束符。
+                width = metrics.horizontalAdvance(selected) + (metrics.horizontalAdvance(" ") if index != selection[1][0] else 0)
+                painter.fillRect(left, row * line_height, width, line_height, palette.color(QPalette.Highlight))
+                painter.setPen(palette.color(QPalette.HighlightedText)); painter.drawText(left, baseline, selected)
+
+    def _hit(self, position):
+        """将视口坐标换算为 (行号, 列)。"""
+        if self.store.line_count() == 0: return None
+        index = self.store.first_line + self.verticalScrollBar().value() + max(0, position.y()) // self._line_height()
+        index = min(index, self.store.end_line - 1); text = self.store.line(index)[0]
+        x = position.x() + self.horizontalScrollBar().value() - self.MARGIN; metrics = self.fontMetrics()
+        low, high = 0, len(text)
+        while low < high:
+            middle = (low + high) // 2
+            if metrics.horizontalAdvance(text[:middle + 1]) - metrics.horizontalAdvance(text[middle]) / 2 <= x: low = middle + 1
+            else: high = middle
+        return index, low
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self._anchor = self._cursor = self._hit(event.position().toPoint()); self.viewport().update()
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() & Qt.LeftButton and self._anchor is not None:
+            self._cursor = self._hit(event.position().toPoint()); self.viewport().update()
+
+    def mouseDoubleClickEvent(self, event):
+        hit = self._hit(event.position().toPoint())
+        if hit: self._anchor = (hit[0], 0); self._cursor = (hit[0], len(self.store.line(hit[0])[0])); self.viewport().update()
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.Copy): self.copy()
+        elif event.matches(QKeySequence.SelectAll): self.select_all()
+        else: super().keyPressEvent(event)
+
+    def contextMenuEvent(self, event):
+        menu = QMenu(self); copy_action = menu.addAction("复制"); copy_action.setEnabled(bool(self.selected_text())); copy_action.triggered.connect(self.copy)
+        menu.addAction("全选").triggered.connect(self.select_all); menu.exec(event.globalPos())
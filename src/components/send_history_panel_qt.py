@@ -2,33 +2,72 @@
 
 from datetime import datetime
 
-from PySide6.QtCore import Qt
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
 from PySide6.QtGui import QFont
-from PySide6.QtWidgets import QMenu, QMessageBox, QTableWidget, QTableWidgetItem, QVBoxLayout, QWidget
+from PySide6.QtWidgets import QAbstractItemView, QMenu, QMessageBox, QTableView, QVBoxLayout, QWidget
+
+
+class SendHistoryModel(QAbstractTableModel):
+    """直接读取 SendHistoryStore 的表格模型，只在视图请求可见单元格时格式化。
+
+    存储的变化通知映射为行插入、删除与单元格更新，发送一次的代价与历史条数无关。
+    """
+
+    HEADERS = ("时间", "数据")
+    TIME_CACHE_LIMIT = 4096
+
+    def __init__(self, history, parent=None):
+        super().__init__(parent); self.history, self._rows, self._times = history, len(history), {}
+        history.add_listener(self._on_history_changed)
+    def detach(self): self.history.remove_listener(self._on_history_changed)
+    def rowCount(self, parent=QModelIndex()): return 0 if parent.isValid() else self._rows
+    def columnCount(self, parent=QModelIndex()): return 0 if parent.isValid() else 2
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole: return None
+        return self.HEADERS[section] if orientation == Qt.Horizontal else section + 1
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid() or index.row() >= self._rows: return None
+        item = self.history[index.row()]
+        if index.column() == 0: return self._format_time(item.get("time", ""))
+        data = str(item.get("data", "")).replace("\n", "\\n"); return ("[H] " if item.get("mode") == "HEX" else "[T] ") + (data[:50] + ("..." if len(data) > 50 else ""))
+    def _format_time(self, text):
+        # 同一秒内的多次发送共享时间文本，缓存解析结果避免滚动时重复调用 strptime。
+        formatted = self._times.get(text)
+        if formatted is None:
+            try: formatted = datetime.strptime(text, "%Y-%m-%d %H:%M:%S").strftime("%m-%d %H:%M:%S")
+            except ValueError: formatted = text
+            if len(self._times) >= self.TIME_CACHE_LIMIT: self._times.clear()
+            self._times[text] = formatted
+        return formatted
+    def _on_history_changed(self, change, removed):
+        if change == "reset":
+            self.beginResetModel(); self._rows = len(self.history); self.endResetModel(); return
+        if change == "updated":
+            self.dataChanged.emit(self.index(0, 0), self.index(0, 0), [Qt.DisplayRole]); return
+        if removed:
+            self.beginRemoveRows(QModelIndex(), self._rows - removed, self._rows - 1); self._rows -= removed; self.endRemoveRows()
+        self.beginInsertRows(QModelIndex(), 0, 0); self._rows += 1; self.endInsertRows()
 
 
 class SendHistoryPanel(QWidget):
     def __init__(self, config_manager, main_window=None, parent=None):
-        super().__init__(parent); self.config_manager, self.main_window, self.items = config_manager, main_window, []
-        self.table = QTableWidget(0, 2); compact_font = QFont(self.table.font().family(), 7); self.table.setFont(compact_font); self.table.horizontalHeader().setFont(compact_font); self.table.verticalHeader().setDefaultSectionSize(22); self.table.setHorizontalHeaderLabels(["时间", "数据"]); self.table.horizontalHeader().setStretchLastSection(True); self.table.setSelectionBehavior(QTableWidget.SelectRows); self.table.setEditTriggers(QTableWidget.NoEditTriggers); self.table.itemDoubleClicked.connect(lambda _item: self._send_selected()); self.table.setContextMenuPolicy(Qt.CustomContextMenu); self.table.customContextMenuRequested.connect(self._menu)
-        layout = QVBoxLayout(self); layout.setContentsMargins(0, 0, 0, 0); layout.addWidget(self.table); self.refresh()
-    def refresh(self):
-        self.table.setRowCount(0); self.items = self.config_manager.get_send_history()
-        for item in self.items:
-            item = {"data": item, "mode": "TEXT", "time": ""} if isinstance(item, str) else item; row = self.table.rowCount(); self.table.insertRow(row); time = item.get("time", "")
-            try: time = datetime.strptime(time, "%Y-%m-%d %H:%M:%S").strftime("%m-%d %H:%M:%S")
-            except ValueError: pass
-            data = str(item.get("data", "")).replace("\n", "\\n"); data = ("[H] " if item.get("mode") == "HEX" else "[T] ") + (data[:50] + ("..." if len(data) > 50 else "")); self.table.setItem(row, 0, QTableWidgetItem(time)); self.table.setItem(row, 1, QTableWidgetItem(data))
+        super().__init__(parent); self.config_manager, self.main_window = config_manager, main_window; self.history = config_manager.get_send_history_store(); self.model = SendHistoryModel(self.history, self)
+        self.table = QTableView(); self.table.setModel(self.model); compact_font = QFont(self.table.font().family(), 7); self.table.setFont(compact_font); self.table.horizontalHeader().setFont(compact_font); self.table.verticalHeader().setDefaultSectionSize(22); self.table.horizontalHeader().setStretchLastSection(True); self.table.setSelectionBehavior(QAbstractItemView.SelectRows); self.table.setSelectionMode(QAbstractItemView.SingleSelection); self.table.setEditTriggers(QAbstractItemView.NoEditTriggers); self.table.doubleClicked.connect(lambda _index: self._send_selected()); self.table.setContextMenuPolicy(Qt.CustomContextMenu); self.table.customContextMenuRequested.connect(self._menu)
+        layout = QVBoxLayout(self); layout.setContentsMargins(0, 0, 0, 0); layout.addWidget(self.table)
+        self.destroyed.connect(lambda _obj=None, model=self.model: model.detach())
+    def refresh(self): self.model._on_history_changed("reset", 0)
     def _menu(self, pos):
-        item = self.table.itemAt(pos)
-        if item: self.table.selectRow(item.row())
-        else: self.table.clearSelection(); self.table.setCurrentItem(None)
-        menu = QMenu(self); row = self.table.currentRow()
+        index = self.table.indexAt(pos)
+        if index.isValid(): self.table.selectRow(index.row())
+        else: self.table.clearSelection(); self.table.setCurrentIndex(QModelIndex())
+        menu = QMenu(self); row = self._selected_row()
         if row >= 0: send = menu.addAction("发送"); send.triggered.connect(self._send_selected)
         clear = menu.addAction("清空历史"); clear.triggered.connect(self._clear); menu.exec(self.table.viewport().mapToGlobal(pos))
+    def _selected_row(self):
+        rows = self.table.selectionModel().selectedRows(); return rows[0].row() if rows else -1
     def _send_selected(self):
-        row = self.table.currentRow()
-        if row < 0 or not self.main_window or row >= len(self.items): return
-        item = self.items[row]; item = {"data": item, "mode": "TEXT"} if isinstance(item, str) else item; self.main_window.work_panel.send_data(str(item.get("data", "")), item.get("mode", "TEXT"))
+        row = self._selected_row()
+        if row < 0 or not self.main_window or row >= len(self.history): return
+        item = self.history[row]; self.main_window.work_panel.send_data(str(item.get("data", "")), item.get("mode", "TEXT"))
     def _clear(self):
-        if QMessageBox.question(self, "确认", "确定清空所有发送历史？") == QMessageBox.Yes: self.config_manager.clear_send_history(); self.refresh()
+        if QMessageBox.question(self, "确认", "确定清空所有发送历史？") == QMessageBox.Yes: self.config_manager.clear_send_history()
@@ -33,6 +33,10 @@ class WorkPanel(QWidget):
         tab = self.get_current_work_tab()
         if not tab: return False
         tab.send_data(data, mode); return True
+    def send_transaction(self, command):
+        tab = self.get_current_work_tab()
+        if not tab: return False
+        tab.send_transaction(command); return True
     def apply_theme(self): self.main_column.apply_theme(self.theme_manager); self.secondary_column.apply_theme(self.theme_manager); self._update_column_highlight()
     def cleanup(self):
         main_completed = self.main_column.cleanup()
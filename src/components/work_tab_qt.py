@@ -1,20 +1,27 @@
 """Qt 串口工作标签页，针对高频接收采用有界缓冲和批量 UI 刷新。"""
 
+import time
 from datetime import datetime
 from pathlib import Path
 
 from PySide6.QtCore import QTimer, Qt
-from PySide6.QtGui import QColor, QFont, QTextCharFormat, QTextCursor, QTextFormat
-from PySide6.QtWidgets import (QFileDialog, QHBoxLayout, QLabel, QPlainTextEdit,
+from PySide6.QtGui import QFont
+from PySide6.QtWidgets import (QFileDialog, QHBoxLayout, QInputDialog, QLabel, QPlainTextEdit,
                                QPushButton, QSplitter, QTabWidget, QVBoxLayout, QWidget)
 
 from components.receive_settings_panel_qt import ReceiveSettingsPanel
+from components.receive_view_qt import ReceiveView
 from components.send_settings_panel_qt import SendSettingsPanel
 from components.serial_settings_panel_qt import SerialSettingsPanel
+from utils.capture_file import DIRECTION_RX, DIRECTION_TX, CaptureReader, CaptureWriter
+from utils.frame_decoder import FrameFormatter, create_frame_decoder
 from utils.log_writer import LogWriter
-from utils.receive_data_utils import ReceiveDataUtils, ReceiveLogFormatter, ReceiveTextDecoder, ReceiveTextSegmenter
+from utils.receive_data_utils import ReceiveArrivals, ReceiveDataUtils, ReceiveHexFormatter, ReceiveLogFormatter, ReceiveTextDecoder, ReceiveTextSegmenter
+from utils.receive_line_store import ReceiveLineStore
 from utils.serial_manager_qt import SerialManagerQt
-from utils.send_data_utils import SendDataUtils
+from utils.send_data_utils import SendDataUtils, SendPayloadCache
+from utils.serial_reactor import SerialReactor
+from utils.transaction_engine import ReplyMatcher, TransactionEngine, TransactionTimeoutError
 
 
 class WorkTab(QWidget):
@@ -22,44 +29,54 @@ class WorkTab(QWidget):
 
     FLUSH_INTERVAL_MS = 25
     MAX_FLUSH_BYTES = 256 * 1024
-    MAX_DISPLAY_CHARS = 4 * 1024 * 1024
-    LOG_LEVEL_PROPERTY = int(QTextFormat.UserProperty) + 1
+    MAX_FLUSH_FRAMES = 4096
+    MAX_DISPLAY_CHARS = 32 * 1024 * 1024
+    MIB = 1024 * 1024
+    # 所有工作页共用，同一快捷指令在不同串口按各自编码与行尾分别缓存。
+    payload_cache = SendPayloadCache()
 
     def __init__(self, config_manager, tab_name="New Tab", is_first_tab=False,
                  on_data_sent=None, panel_type="main", parent=None):
         super().__init__(parent)
         self.config_manager, self.tab_name, self.on_data_sent, self.panel_type = config_manager, tab_name, on_data_sent, panel_type
         self.is_first_tab = is_first_tab
-        self.serial_manager = SerialManagerQt(); self.serial_manager.disconnected.connect(self._on_disconnected)
+        buffer_settings = config_manager.get_global_settings()
+        self.serial_manager = SerialManagerQt(buffer_settings.get("receive_pending_mb", 4) * self.MIB, buffer_settings.get("receive_spill_mb", 0) * self.MIB, reactor=SerialReactor.shared() if buffer_settings.get("serial_reactor") else None); self.serial_manager.disconnected.connect(self._on_disconnected)
         self.serial_manager.operation_completed.connect(self._on_operation_completed)
-        self.log_writer = LogWriter(); self.log_file_path = None; self._log_enabled = False; self._log_generation = 0; self.rx_count = self.tx_count = 0
+        # 事务由接收刷新定时器喂入已到达数据并检查超时，结果在 UI 线程中显示。
+        self.transactions = TransactionEngine(self.serial_manager); self._transactions = []
+        self.log_writer = LogWriter(); self.log_writer.apply_settings(buffer_settings); self.log_file_path = None; self._log_enabled = False; self._log_generation = 0; self.rx_count = self.tx_count = 0
+        self.capture_writer = CaptureWriter(); self._capture_enabled = False; self._capture_generation = 0; self._capture_port = None; self._replay_records = None
         self._theme_manager = None
-        self.receive_decoder = ReceiveTextDecoder(); self.receive_text_segmenter = ReceiveTextSegmenter(); self.receive_log_formatter = ReceiveLogFormatter(); self._send_in_flight = False; self._connection_in_flight = False; self._pending_send = None; self._loop_send_cancelled = False; self._scroll_pending = False; self._manual_close = False
+        self.receive_decoder = ReceiveTextDecoder(); self.receive_text_segmenter = ReceiveTextSegmenter(); self.receive_log_formatter = ReceiveLogFormatter(); self.receive_hex_formatter = ReceiveHexFormatter(); self.frame_formatter = FrameFormatter(); self._frame_decoding = False; self._frame_key = None; self._send_in_flight = False; self._connection_in_flight = False; self._pending_send = None; self._loop_send_cancelled = False; self._scroll_pending = False; self._manual_close = False
         self.flush_timer = QTimer(self); self.flush_timer.timeout.connect(self._flush_receive)
         self.loop_timer = QTimer(self); self.loop_timer.timeout.connect(lambda: self._send_data(from_timer=True))
         self.reconnect_timer = QTimer(self); self.reconnect_timer.setSingleShot(True); self.reconnect_timer.timeout.connect(self._try_reconnect)
+        self.replay_timer = QTimer(self); self.replay_timer.timeout.connect(self._replay_step)
         self._build_ui()
         self.flush_timer.start(self.FLUSH_INTERVAL_MS)
 
     def _build_ui(self):
         self.serial_settings = SerialSettingsPanel(self.config_manager, self._serial_changed, self.panel_type, self)
-        self.receive_settings = ReceiveSettingsPanel(self.config_manager, self._receive_changed, self._choose_log_file, self)
+        self.receive_settings = ReceiveSettingsPanel(self.config_manager, self._receive_changed, self._choose_log_file, self, self._choose_capture_file)
         self.send_settings = SendSettingsPanel(self.config_manager, self._send_settings_changed, self._on_send_mode_changed, self)
         self.connect_btn = QPushButton("打开串口"); self.connect_btn.clicked.connect(self._toggle_connection)
         left = QWidget(); left.setFixedWidth(180); left_layout = QVBoxLayout(left); left_layout.setContentsMargins(4, 4, 4, 4)
         for widget in (self.serial_settings, self.connect_btn, self.receive_settings, self.send_settings): left_layout.addWidget(widget)
         left_layout.addStretch()
-        self.receive_text = QPlainTextEdit(); self.receive_text.setReadOnly(True); self.receive_text.setLineWrapMode(QPlainTextEdit.NoWrap); self.receive_text.document().setMaximumBlockCount(self.config_manager.get_global_settings().get("receive_buffer_size", 10000)); self.receive_text.setFont(QFont("Consolas", self.config_manager.get_font_size()))
+        self.receive_store = ReceiveLineStore(self.config_manager.get_global_settings().get("receive_buffer_size", 10000), self.MAX_DISPLAY_CHARS)
+        self.receive_view = ReceiveView(self.receive_store); self.receive_view.setFont(QFont("Consolas", self.config_manager.get_font_size())); self._refresh_receive_colors()
         self.send_text = QPlainTextEdit(); self.send_text.setFont(QFont("Consolas", self.config_manager.get_font_size())); self.send_text.textChanged.connect(self._save_send_draft)
         self.send_btn = QPushButton("发送"); self.send_btn.setEnabled(False); self.send_btn.clicked.connect(lambda: self._send_data())
-        self.clear_receive_btn, self.clear_send_btn, self.reset_count_btn = self._link_button("清除接收"), self._link_button("清除发送"), self._link_button("复位计数")
+        self.clear_receive_btn, self.clear_send_btn, self.reset_count_btn, self.replay_btn = self._link_button("清除接收"), self._link_button("清除发送"), self._link_button("复位计数"), self._link_button("回放捕获")
+        self.replay_btn.clicked.connect(self._replay_capture)
         self.clear_receive_btn.clicked.connect(self._clear_receive); self.clear_send_btn.clicked.connect(self.send_text.clear); self.reset_count_btn.clicked.connect(self._reset_counts)
-        self.count_label = QLabel("RX: 0  TX: 0")
+        self.count_label = QLabel("RX: 0  TX: 0"); self.backlog_label = QLabel("")
         right = QWidget(); right_layout = QVBoxLayout(right); right_layout.setContentsMargins(4, 4, 4, 4)
-        receive_actions = QHBoxLayout(); receive_actions.addWidget(self.clear_receive_btn); receive_actions.addStretch()
+        receive_actions = QHBoxLayout(); receive_actions.addWidget(self.clear_receive_btn); receive_actions.addWidget(self.replay_btn); receive_actions.addStretch()
         send_actions = QHBoxLayout(); send_actions.addWidget(self.clear_send_btn); send_actions.addStretch(); send_actions.addWidget(self.send_btn)
-        status_actions = QHBoxLayout(); status_actions.addWidget(self.count_label); status_actions.addStretch(); status_actions.addWidget(self.reset_count_btn)
-        right_layout.addWidget(QLabel("接收数据")); right_layout.addWidget(self.receive_text, 3); right_layout.addLayout(receive_actions); right_layout.addWidget(QLabel("发送数据")); right_layout.addWidget(self.send_text, 1); right_layout.addLayout(send_actions); right_layout.addLayout(status_actions)
+        status_actions = QHBoxLayout(); status_actions.addWidget(self.count_label); status_actions.addWidget(self.backlog_label); status_actions.addStretch(); status_actions.addWidget(self.reset_count_btn)
+        right_layout.addWidget(QLabel("接收数据")); right_layout.addWidget(self.receive_view, 3); right_layout.addLayout(receive_actions); right_layout.addWidget(QLabel("发送数据")); right_layout.addWidget(self.send_text, 1); right_layout.addLayout(send_actions); right_layout.addLayout(status_actions)
         splitter = QSplitter(Qt.Horizontal); splitter.setChildrenCollapsible(False); splitter.addWidget(left); splitter.addWidget(right); splitter.setCollapsible(0, False); splitter.setCollapsible(1, False); splitter.setStretchFactor(1, 1)
         layout = QVBoxLayout(self); layout.setContentsMargins(0, 0, 0, 0); layout.addWidget(splitter)
         # 与 wx 版一致：首个 Tab 恢复上次串口，其余通过“+”创建的 Tab 保持未选择。
@@ -77,7 +94,7 @@ class WorkTab(QWidget):
     def _serial_changed(self, kind, value):
         if kind == "port":
             self._reset_receive_session()
-            self._close_log_writer()
+            self._close_log_writer(); self._close_capture_writer()
             config = self.config_manager.get_port_config(value)
             self.receive_settings.load_config(value, config["receive_settings"])
             self.send_settings.load_config(value, config["send_settings"])
@@ -87,8 +104,21 @@ class WorkTab(QWidget):
     def _receive_changed(self, settings):
         if not settings["save_log"] and self._log_enabled:
             self._close_log_writer()
+        if not settings.get("save_capture") and self._capture_enabled:
+            self._close_capture_writer()
         if not settings["auto_reconnect"]:
             self.reconnect_timer.stop()
+        self._apply_frame_decoder()
+
+    def _apply_frame_decoder(self):
+        """按接收设置与波特率在接收线程中启用或更换帧解码器；分帧设置未变时保留解码状态。"""
+        settings, baudrate = self.receive_settings.get_settings(), self.serial_settings.get_settings()["baudrate"]
+        key = (settings["frame_decoder"], settings["frame_delimiter"], settings["frame_length_bytes"], baudrate)
+        if key == self._frame_key: return
+        self._frame_key = key
+        try: decoder = create_frame_decoder(settings, baudrate)
+        except ValueError as error: decoder = None; self._append_system(f"[错误] 帧解码设置无效: {error}\n", "error")
+        self.serial_manager.set_frame_decoder(decoder); self._frame_decoding = decoder is not None
 
     def _close_log_writer(self):
         """关闭当前日志文件，避免串口会话之间复用旧路径。"""
@@ -97,16 +127,23 @@ class WorkTab(QWidget):
         self.log_writer.close(self._log_generation)
         self._log_generation += 1
 
+    def _close_capture_writer(self):
+        """关闭当前原始捕获文件；之后排队的旧会话数据不会写入新文件。"""
+        self._capture_enabled = False
+        self._capture_port = None
+        self.capture_writer.close(self._capture_generation)
+        self._capture_generation += 1
+
     def suspend(self):
         """在隐藏副栏时关闭会话资源，但保留 Tab、定时刷新器和日志写入器供重新显示。"""
         self._manual_close = True
         self._stop_loop_send()
         self.reconnect_timer.stop()
         self._reset_receive_session()
-        self._close_log_writer()
-        checkbox = self.receive_settings.save_log_check
-        if checkbox.isChecked():
-            checkbox.setChecked(False)
+        self._close_log_writer(); self._close_capture_writer()
+        for checkbox in (self.receive_settings.save_log_check, self.receive_settings.save_capture_check):
+            if checkbox.isChecked():
+                checkbox.setChecked(False)
         if self.serial_manager.is_open() or self._connection_in_flight:
             self.connect_btn.setEnabled(False)
             self.serial_manager.close_async()
@@ -142,7 +179,7 @@ class WorkTab(QWidget):
         self._open_connection(port)
 
     def _open_connection(self, port):
-        self._reset_receive_session()
+        self._stop_replay(); self._reset_receive_session(); self._apply_frame_decoder()
         self._connection_in_flight = True
         self.connect_btn.setEnabled(False); self.serial_settings.set_enabled(False); self.serial_manager.open_async(port=port, **self.serial_settings.get_settings())
 
@@ -152,9 +189,11 @@ class WorkTab(QWidget):
     def _reset_receive_session(self):
         """清除会话残留接收状态，不清空用户可见的历史内容。"""
         self.serial_manager.clear_pending()
+        self.transactions.cancel_all()
         self.receive_decoder.reset()
         self.receive_text_segmenter.reset()
         self.receive_log_formatter.reset()
+        self.receive_hex_formatter.reset()
 
     def _stop_loop_send(self):
         self._loop_send_cancelled = True
@@ -192,32 +231,97 @@ class WorkTab(QWidget):
             self._append_system("[警告] 自动重连失败，稍后重试\n", "warning"); self._schedule_reconnect()
 
     def _flush_receive(self):
-        data, dropped = self.serial_manager.drain(self.MAX_FLUSH_BYTES)
+        data, dropped, arrivals = self.serial_manager.drain(self.MAX_FLUSH_BYTES)
         if dropped: self.rx_count += dropped; self._update_counts()
         if dropped: self._append_text(f"[警告] 接收缓冲已满，丢弃 {dropped} 字节\n", force=True, level="warning")
         log_dropped = self.log_writer.take_dropped_bytes()
-        if log_dropped: self._append_text(f"[警告] 日志写入缓冲已满，丢弃 {log_dropped} 字节\n", force=True, level="warning", write_log=False)
+        if log_dropped: self._append_text(f"[警告] 日志写入缓冲已满，丢弃约 {log_dropped} 字节\n", force=True, level="warning", write_log=False)
         log_errors = self.log_writer.take_errors(self._log_generation)
         if log_errors:
             self._disable_logging("；".join(dict.fromkeys(log_errors)))
-        if not data: return
-        max_blocks = self.config_manager.get_global_settings().get("receive_buffer_size", 10000)
-        if self.receive_text.document().maximumBlockCount() != max_blocks:
-            self.receive_text.document().setMaximumBlockCount(max_blocks)
+        for level, message in self.log_writer.take_notices(self._log_generation): self._append_text(f"[{'信息' if level == 'info' else '警告'}] {message}\n", force=True, level=level, write_log=False)
+        capture_dropped = self.capture_writer.take_dropped_bytes()
+        if capture_dropped: self._append_text(f"[警告] 捕获写入缓冲已满，丢弃 {capture_dropped} 字节\n", force=True, level="warning", write_log=False)
+        capture_errors = self.capture_writer.take_errors(self._capture_generation)
+        if capture_errors: self._disable_capture("；".join(dict.fromkeys(capture_errors)))
+        spill_error = self.serial_manager.take_spill_error()
+        if spill_error: self._append_text(f"[警告] 创建接收溢出文件失败: {spill_error}\n", force=True, level="warning", write_log=False)
+        self._update_backlog(arrivals)
+        if self._frame_decoding: self._display_frames()
+        if not data:
+            if self._transactions: self._process_transactions(data, arrivals)
+            return
+        global_settings = self.config_manager.get_global_settings()
+        self.receive_store.max_lines = global_settings.get("receive_buffer_size", 10000)
+        self.serial_manager.set_spill_limit(global_settings.get("receive_spill_mb", 0) * self.MIB); self.log_writer.apply_settings(global_settings)
         self.rx_count += len(data); self._update_counts()
+        if self._capture_enabled: self.capture_writer.write_chunks(DIRECTION_RX, self._capture_port, data, arrivals.unix_ns_chunks(time.time_ns()), self._capture_generation)
+        # 分帧时由接收线程完成解码，界面只显示已完成的帧。
+        if not self._frame_decoding: self._display_received(data, arrivals)
+        if self._transactions: self._process_transactions(data, arrivals)
+
+    def _display_frames(self):
+        """显示接收线程已解码完成的帧；错误帧以警告颜色显示，连续同级别的帧合并为一次写入。"""
+        frames, dropped = self.serial_manager.drain_frames(self.MAX_FLUSH_FRAMES)
+        if dropped: self._append_text(f"[警告] 帧队列已满，丢弃 {dropped} 帧\n", force=True, level="warning")
+        if not frames: return
+        settings = self.receive_settings.get_settings(); lines, level = [], None
+        for frame in frames:
+            frame_level = "warning" if frame.error else "normal"
+            if lines and frame_level != level: self._append_text("".join(lines), force=True, level=level, format_log=False); lines = []
+            level = frame_level; lines.append(self.frame_formatter.format(frame, settings["mode"], settings["encoding"]))
+        self._append_text("".join(lines), force=True, level=level, format_log=False)
+
+    def _process_transactions(self, data, arrivals):
+        """按接收线程记录的到达时间匹配应答并检查超时，显示已结束事务的应答长度与延迟。"""
+        self.transactions.feed_batch(data, arrivals); self.transactions.poll()
+        pending = []
+        for future, name, size in self._transactions:
+            if not future.done(): pending.append((future, name, size)); continue
+            if future.cancelled(): self._append_system(f"[事务] {name} 已取消\n", "warning"); continue
+            error = future.exception()
+            if error is None:
+                result = future.result(); self.tx_count += size * result.attempts
+                self._append_system(f"[事务] {name}: 应答 {len(result.reply)} 字节，延迟 {result.latency_ms:.2f} ms" + (f"（第 {result.attempts} 次发送）" if result.attempts > 1 else "") + "\n", "success")
+            elif isinstance(error, TransactionTimeoutError): self.tx_count += size * error.attempts; self._append_system(f"[事务] {error}\n", "warning")
+            else: self._append_system(f"[事务] {name} 发送失败: {error}\n", "error")
+        self._transactions = pending; self._update_counts()
+
+    def _display_received(self, data, arrivals):
+        """按当前接收设置显示一批数据；实时接收与捕获回放共用。"""
         settings = self.receive_settings.get_settings()
         if settings["mode"] == "TEXT":
-            # 日志模式按文本段格式化以保持逐行时间戳语义，再合并为一次 UI 写入。
-            text = self.receive_decoder.decode(data, settings["encoding"])
-            formatted = "".join(
-                self.receive_log_formatter.format(segment, settings["log_mode"])
-                for segment in self.receive_text_segmenter.iter_segments(text)
-            )
+            if settings["log_mode"]:
+                # 日志模式按接收线程记录的到达时间逐段添加时间戳，再合并为一次 UI 写入。
+                formatted = self.receive_log_formatter.format_batch(ReceiveDataUtils.iter_timed_segments(
+                    data, arrivals, self.receive_decoder, self.receive_text_segmenter, settings["encoding"]))
+            else:
+                text = self.receive_decoder.decode(data, settings["encoding"])
+                formatted = self.receive_log_formatter.format(self.receive_text_segmenter.segment(text), False)
             self._append_text(formatted, format_log=False)
         else:
             self.receive_decoder.reset()
             self.receive_text_segmenter.reset()
-            self._append_text(ReceiveDataUtils.format_hex(data))
+            self.receive_hex_formatter.configure(settings["hex_bytes_per_line"], settings["hex_show_offset"], settings["hex_show_ascii"])
+            # 日志模式与 TEXT 相同，按各数据块的到达时间添加时间戳，而非刷新时刻。
+            if settings["log_mode"]: formatted = self.receive_log_formatter.format_batch(ReceiveDataUtils.iter_timed_hex(data, arrivals, self.receive_hex_formatter))
+            else: formatted = self.receive_log_formatter.format_batch(((self.receive_hex_formatter.format(data), None),), False)
+            self._append_text(formatted, format_log=False)
+
+    def _update_backlog(self, arrivals):
+        """显示尚未消费的接收数据量，以及已显示的最新数据距今的延迟。"""
+        pending, spilled = self.serial_manager.backlog()
+        text = ""
+        if pending > self.MAX_FLUSH_BYTES:
+            lag = (time.perf_counter_ns() - arrivals.times_ns[-1]) / 1e9 if len(arrivals) else 0.0
+            text = f"积压: {pending / self.MIB:.1f} MiB" + (f"（磁盘 {spilled / self.MIB:.1f} MiB）" if spilled else "") + f"  延迟: {lag:.1f} s"
+        if self.backlog_label.text() != text: self.backlog_label.setText(text)
+
+    def _disable_capture(self, error):
+        self._close_capture_writer()
+        checkbox = self.receive_settings.save_capture_check
+        if checkbox.isChecked(): checkbox.setChecked(False)
+        self._append_text(f"[错误] {error}\n", force=True, level="error", write_log=False)
 
     def _append_system(self, text, level="info"): self._append_text(text, force=True, level=level)
 
@@ -233,27 +337,19 @@ class WorkTab(QWidget):
         settings = self.receive_settings.get_settings()
         if format_log:
             text = self.receive_log_formatter.format(text, settings["log_mode"])
-        if force and self.receive_text.document().characterCount() > 1 and not self.receive_text.toPlainText().endswith("\n") and not text.startswith("\n"):
+        if force and self.receive_store.has_open_line() and not text.startswith("\n"):
             # wx 版会在系统消息前补换行，避免与未结束的接收数据粘连。
             text = "\n" + text
         if write_log and self._log_enabled: self.log_writer.write(text, self._log_generation)
-        cursor = self.receive_text.textCursor(); cursor.movePosition(QTextCursor.End); cursor.insertText(text, self._receive_text_format(level))
-        excess = self.receive_text.document().characterCount() - self.MAX_DISPLAY_CHARS
-        if excess > 0:
-            trim = self.receive_text.textCursor(); trim.movePosition(QTextCursor.Start); trim.movePosition(QTextCursor.Right, QTextCursor.KeepAnchor, excess); trim.removeSelectedText()
+        # 行存储只追加并整块淘汰旧行，视图只重绘可见区域。
+        self.receive_store.append(text, level); self.receive_view.refresh()
         if settings["auto_scroll"] and not self._scroll_pending:
             self._scroll_pending = True; QTimer.singleShot(0, self._scroll_receive_to_bottom)
 
     def _scroll_receive_to_bottom(self):
         self._scroll_pending = False
         if self.receive_settings.get_settings()["auto_scroll"]:
-            scrollbar = self.receive_text.verticalScrollBar(); scrollbar.setValue(scrollbar.maximum())
-
-    def _receive_text_format(self, level):
-        text_format = QTextCharFormat()
-        text_format.setForeground(QColor(self._receive_color(level)))
-        text_format.setProperty(self.LOG_LEVEL_PROPERTY, level)
-        return text_format
+            self.receive_view.scroll_to_bottom()
 
     def _receive_color(self, level):
         defaults = {"normal": "#000000", "info": "#0066CC", "error": "#D32F2F", "success": "#388E3C", "warning": "#D32F2F"}
@@ -261,44 +357,33 @@ class WorkTab(QWidget):
         return colors.get("text_fg" if level == "normal" else f"log_{level}_color", defaults[level])
 
     def _refresh_receive_colors(self):
-        document = self.receive_text.document()
-        block = document.begin()
-        while block.isValid():
-            iterator = block.begin()
-            while not iterator.atEnd():
-                fragment = iterator.fragment()
-                level = fragment.charFormat().property(self.LOG_LEVEL_PROPERTY)
-                if level:
-                    cursor = QTextCursor(document)
-                    cursor.setPosition(fragment.position())
-                    cursor.setPosition(fragment.position() + fragment.length(), QTextCursor.KeepAnchor)
-                    text_format = fragment.charFormat()
-                    text_format.setForeground(QColor(self._receive_color(level)))
-                    cursor.setCharFormat(text_format)
-                iterator += 1
-            block = block.next()
-
-    def _send_data(self, override_mode=None, add_to_history=True, from_timer=False):
+        self.receive_view.set_colors({level: self._receive_color(level) for level in ReceiveLineStore.LEVELS})
+
+    def _send_data(self, override_mode=None, add_to_history=True, from_timer=False, data=None):
         if from_timer and self._loop_send_cancelled: return
         if self.loop_timer.isActive() and not from_timer and override_mode is None:
             self._loop_send_cancelled = True; self.loop_timer.stop(); self.send_btn.setText("发送"); return
         if not from_timer and override_mode is None: self._loop_send_cancelled = False
         if self._send_in_flight: return
-        data = self.send_text.toPlainText(); settings = self.send_settings.get_settings(); mode = override_mode or settings["mode"]
+        data = self.send_text.toPlainText() if data is None else data; settings = self.send_settings.get_settings(); mode = override_mode or settings["mode"]
         if not data: return
         if not self.serial_manager.is_open(): self._stop_loop_send(); self._append_system("[错误] 串口未打开，无法发送\n", "error"); return
-        encoding = self.receive_settings.get_settings()["encoding"]
-        try:
-            if mode == "HEX":
-                byte_count = len(SendDataUtils.parse_hex(data))
-            else:
-                send_data, encoding, encoded = SendDataUtils.encode_text(data, encoding, settings["line_ending"])
-                byte_count = len(encoded)
+        # 编码结果按内容缓存，循环发送与重复发送快捷指令、历史时不再重复解析或编码。
+        try: payload = self.payload_cache.get(data, mode, self.receive_settings.get_settings()["encoding"], settings["line_ending"])
         except (ValueError, UnicodeEncodeError): self._append_system("[错误] 发送内容无效\n", "error"); return
-        self._send_in_flight = True; self._pending_send = (data, mode, byte_count, add_to_history, settings, override_mode)
-        self.serial_manager.send_async(send_data if mode == "TEXT" else data, mode, encoding)
-
-    def send_data(self, data, mode, add_to_history=True): self.send_text.setPlainText(data); self._send_data(mode, add_to_history=add_to_history)
+        self._send_in_flight = True; self._pending_send = (data, mode, len(payload), add_to_history, settings, override_mode); self._pending_payload = payload
+        self.serial_manager.send_bytes_async(payload)
+
+    def send_data(self, data, mode, add_to_history=True): self._send_data(mode, add_to_history=add_to_history, data=data)
+    def send_transaction(self, command):
+        """按快捷指令的应答配置发送并等待应答；多个事务依次发送，应答按顺序匹配。"""
+        if not self.serial_manager.is_open(): self._append_system("[错误] 串口未打开，无法发送\n", "error"); return
+        reply, encoding = command["reply"], self.receive_settings.get_settings()["encoding"]
+        try: payload = self.payload_cache.get(command["data"], command["mode"], encoding, self.send_settings.get_settings()["line_ending"]); matcher = ReplyMatcher.from_config(reply, encoding)
+        except (ValueError, UnicodeEncodeError): self._append_system("[错误] 发送内容或应答匹配配置无效\n", "error"); return
+        future = self.transactions.request(payload, matcher, reply["timeout_ms"] / 1000, reply["retries"], command["name"])
+        self._transactions.append((future, command["name"], len(payload))); self.config_manager.add_send_history(command["data"], command["mode"])
+        if self.on_data_sent: self.on_data_sent()
     def _save_send_draft(self):
         port = self.serial_settings.get_current_port()
         if port: self.config_manager.set_send_text(port, self.send_text.toPlainText())
@@ -325,6 +410,7 @@ class WorkTab(QWidget):
             data, mode, byte_count, add_to_history, settings, override_mode = self._pending_send; self._pending_send = None
             if success:
                 self.tx_count += byte_count; self._update_counts()
+                if self._capture_enabled: self.capture_writer.write(DIRECTION_TX, self._capture_port, self._pending_payload, time.time_ns(), self._capture_generation)
                 if add_to_history: self.config_manager.add_send_history(data, mode)
                 if self.on_data_sent: self.on_data_sent()
                 if not override_mode and settings["loop_send"] and not self._loop_send_cancelled and not self.loop_timer.isActive(): self.loop_timer.start(settings["loop_period_ms"]); self.send_btn.setText("取消发送")
@@ -345,14 +431,51 @@ class WorkTab(QWidget):
         self.config_manager.set_last_log_directory(str(Path(filename).parent))
         self.log_writer.take_errors()
         self.log_file_path = filename; self._log_enabled = self.log_writer.open(filename, self._log_generation); self._append_system(f"[信息] 日志文件: {filename}\n", "info"); return self._log_enabled
-    def _clear_receive(self): self.receive_text.clear(); self.receive_decoder.reset(); self.receive_text_segmenter.reset(); self.receive_log_formatter.reset()
+    def _choose_capture_file(self):
+        port = self.serial_settings.get_current_port()
+        suggested_name = f"{port}-{datetime.now():%Y%m%d%H%M%S}.qcap"
+        last_directory = self.config_manager.get_last_log_directory()
+        initial_path = str(Path(last_directory) / suggested_name) if last_directory else suggested_name
+        filename, _ = QFileDialog.getSaveFileName(self, "保存原始捕获", initial_path, "捕获文件 (*.qcap);;所有文件 (*.*)")
+        if not filename: return False
+        self.config_manager.set_last_log_directory(str(Path(filename).parent))
+        self._close_capture_writer(); self.capture_writer.take_errors()
+        self._capture_port = port; self._capture_enabled = self.capture_writer.open(filename, self._capture_generation); self._append_system(f"[信息] 原始捕获文件: {filename}\n", "info"); return self._capture_enabled
+    def _replay_capture(self):
+        """将捕获文件中的接收数据按当前 TEXT/HEX 设置回放到接收区。"""
+        if self.serial_manager.is_open() or self._connection_in_flight: self._append_system("[错误] 请先关闭串口再回放捕获文件\n", "error"); return
+        filename, _ = QFileDialog.getOpenFileName(self, "回放捕获文件", self.config_manager.get_last_log_directory(), "捕获文件 (*.qcap);;所有文件 (*.*)")
+        if not filename: return
+        try: reader = CaptureReader(filename)
+        except (OSError, ValueError) as error: self._append_system(f"[错误] 无法读取捕获文件: {error}\n", "error"); return
+        start_seconds, accepted = QInputDialog.getDouble(self, "回放捕获文件", "从第几秒开始:", 0, 0, 1e9, 3)
+        if not accepted: reader.close(); return
+        self._stop_replay(); self._reset_receive_session()
+        start = reader.start_time_ns + int(start_seconds * 1e9) if reader.start_time_ns is not None and start_seconds else None
+        # 按索引定位起点后逐批读取，不需要从头解析整个文件。
+        self._replay_reader = reader; self._replay_records = reader.records(start_time_ns=start, direction=DIRECTION_RX)
+        self._append_system(f"[信息] 回放捕获文件: {filename}\n", "info"); self.replay_timer.start(self.FLUSH_INTERVAL_MS)
+    def _replay_step(self):
+        data, offsets, times = bytearray(), [], []
+        finished = True
+        for record in self._replay_records:
+            offsets.append(len(data)); times.append(record.timestamp_ns); data += record.payload
+            if len(data) >= self.MAX_FLUSH_BYTES: finished = False; break
+        if data: self._display_received(bytes(data), ReceiveArrivals.from_unix_ns(offsets, times))
+        if finished: self._stop_replay(); self._append_system("[信息] 回放完成\n", "info")
+    def _stop_replay(self):
+        self.replay_timer.stop()
+        if self._replay_records is not None: self._replay_records = None; self._replay_reader.close()
+    def _clear_receive(self): self.receive_view.clear(); self.receive_decoder.reset(); self.receive_text_segmenter.reset(); self.receive_log_formatter.reset(); self.receive_hex_formatter.reset()
     def _reset_counts(self): self.rx_count = self.tx_count = 0; self._update_counts()
     def _update_counts(self): self.count_label.setText(f"RX: {self.rx_count}  TX: {self.tx_count}")
     def apply_theme(self, theme_manager, font_size=9):
         self._theme_manager = theme_manager
-        self.receive_text.setFont(QFont("Consolas", font_size)); self.send_text.setFont(QFont("Consolas", font_size)); self._refresh_receive_colors()
+        self.receive_view.setFont(QFont("Consolas", font_size)); self.send_text.setFont(QFont("Consolas", font_size)); self._refresh_receive_colors()
     def cleanup(self):
-        self.flush_timer.stop(); self.loop_timer.stop(); self.reconnect_timer.stop(); self._reset_receive_session(); self.serial_manager.close_async(); self._log_enabled = False
+        self.flush_timer.stop(); self.loop_timer.stop(); self.reconnect_timer.stop(); self._stop_replay(); self.capture_writer.stop(); self._reset_receive_session(); self.serial_manager.close_async()
+        # 等待排队中的关闭完成后再释放接收缓冲，避免接收线程写入已释放的溢出分段。
+        self.serial_manager.shutdown(); self._log_enabled = False
         completed = self.log_writer.stop()
         if not completed:
             print("日志写入器未在 1 秒内完成，退出后剩余日志可能未写入")
@@ -0,0 +1,129 @@
+"""QSerial 捕获文件命令行工具：查看捕获信息并按 TEXT/HEX 回放，不依赖界面框架。
+
+用法：
+    python src/main/capture_cli.py info capture.qcap
+    python src/main/capture_cli.py replay capture.qcap --mode HEX --from-time 12.5
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.capture_file import DIRECTION_NAMES, CaptureFormatError, CaptureReader
+from utils.receive_data_utils import (
+    ReceiveArrivals,
+    ReceiveDataUtils,
+    ReceiveHexFormatter,
+    ReceiveLogFormatter,
+    ReceiveTextDecoder,
+    ReceiveTextSegmenter,
+)
+
+
+# 回放时每攒够该字节数格式化并输出一次，与界面单次刷新的上限一致。
+REPLAY_BATCH_BYTES = 256 * 1024
+
+
+def _format_time(timestamp_ns):
+    return datetime.fromtimestamp(timestamp_ns / 1e9).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+
+def show_info(reader, output):
+    """输出端口、记录数、字节数与时间范围；需要顺序读取全部记录头。"""
+    counts = {}
+    first = last = None
+    for record in reader.records():
+        key = (record.port, DIRECTION_NAMES[record.direction])
+        records, size = counts.get(key, (0, 0))
+        counts[key] = (records + 1, size + len(record.payload))
+        first = record.timestamp_ns if first is None else min(first, record.timestamp_ns)
+        last = record.timestamp_ns if last is None else max(last, record.timestamp_ns)
+    output.write(f"文件: {reader.path}\n")
+    output.write(f"状态: {'完整' if reader.complete else '未正常关闭（已按记录扫描恢复）'}\n")
+    if first is None:
+        output.write("记录: 0\n")
+        return
+    output.write(f"时间: {_format_time(first)} ~ {_format_time(last)}（{(last - first) / 1e9:.3f} s）\n")
+    for (port, direction), (records, size) in sorted(counts.items()):
+        output.write(f"{port or '-'} {direction}: {records} 条记录, {size} 字节\n")
+
+
+class ReplayFormatter:
+    """按接收显示区的规则把捕获数据格式化为文本，TEXT 模式可附加日志时间戳。"""
+
+    def __init__(self, mode="TEXT", encoding="UTF-8", log_mode=False, bytes_per_line=16, show_offset=True, show_ascii=True):
+        self.mode = mode
+        self.encoding = encoding
+        self.log_mode = log_mode
+        self.decoder = ReceiveTextDecoder()
+        self.segmenter = ReceiveTextSegmenter()
+        self.log_formatter = ReceiveLogFormatter()
+        self.hex_formatter = ReceiveHexFormatter(bytes_per_line, show_offset, show_ascii)
+
+    def format(self, data, offsets, times_ns):
+        if self.mode == "HEX":
+            return self.hex_formatter.format(data)
+        if self.log_mode:
+            arrivals = ReceiveArrivals.from_unix_ns(offsets, times_ns)
+            return self.log_formatter.format_batch(ReceiveDataUtils.iter_timed_segments(
+                data, arrivals, self.decoder, self.segmenter, self.encoding))
+        return self.segmenter.segment(self.decoder.decode(data, self.encoding))
+
+
+def replay(reader, output, formatter, start_time_ns=None, start_offset=None, direction=None):
+    data, offsets, times = bytearray(), [], []
+    for record in reader.records(start_time_ns, start_offset, direction):
+        offsets.append(len(data))
+        times.append(record.timestamp_ns)
+        data += record.payload
+        if len(data) >= REPLAY_BATCH_BYTES:
+            output.write(formatter.format(bytes(data), offsets, times))
+            data, offsets, times = bytearray(), [], []
+    if data:
+        output.write(formatter.format(bytes(data), offsets, times))
+    output.write("\n")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="capture_cli", description="查看或回放 QSerial 原始捕获文件（.qcap）")
+    commands = parser.add_subparsers(dest="command", required=True)
+    info_parser = commands.add_parser("info", help="显示捕获文件概要")
+    info_parser.add_argument("path")
+    replay_parser = commands.add_parser("replay", help="按 TEXT 或 HEX 输出捕获数据")
+    replay_parser.add_argument("path")
+    replay_parser.add_argument("--mode", choices=("TEXT", "HEX"), default="TEXT")
+    replay_parser.add_argument("--encoding", choices=("UTF-8", "ASCII"), default="UTF-8")
+    replay_parser.add_argument("--log-mode", action="store_true", help="TEXT 模式下按记录时间添加时间戳")
+    replay_parser.add_argument("--bytes-per-line", type=int, choices=ReceiveHexFormatter.BYTES_PER_LINE_CHOICES, default=16)
+    replay_parser.add_argument("--direction", choices=("RX", "TX", "ALL"), default="RX")
+    start = replay_parser.add_mutually_exclusive_group()
+    start.add_argument("--from-time", type=float, metavar="SECONDS", help="从捕获开始后的第几秒开始")
+    start.add_argument("--from-offset", type=int, metavar="BYTES", help="从数据流的第几个字节开始")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        reader = CaptureReader(args.path)
+    except (OSError, CaptureFormatError) as error:
+        print(f"无法打开捕获文件: {error}", file=sys.stderr)
+        return 1
+    with reader:
+        if args.command == "info":
+            show_info(reader, sys.stdout)
+            return 0
+        start_time_ns = None
+        if args.from_time is not None and reader.start_time_ns is not None:
+            start_time_ns = reader.start_time_ns + int(args.from_time * 1e9)
+        direction = None if args.direction == "ALL" else DIRECTION_NAMES.index(args.direction)
+        formatter = ReplayFormatter(args.mode, args.encoding, args.log_mode, args.bytes_per_line)
+        replay(reader, sys.stdout, formatter, start_time_ns, args.from_offset, direction)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
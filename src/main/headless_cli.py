@@ -0,0 +1,88 @@
+"""QSerial 无界面命令行工具：按配置文件同时打开多个串口，保存日志、定时发送并报告吞吐量，不依赖界面框架。
+
+配置文件沿用应用导出的 JSON（port_configs、global_settings），另可包含：
+    "log_directory": "logs",
+    "schedules": {"COM3": [{"data": "AT\\r", "mode": "TEXT", "period_ms": 500, "count": 10, "delay_ms": 0}]}
+
+用法：
+    python src/main/headless_cli.py ports
+    python src/main/headless_cli.py run config.json --duration 60 --report-interval 5
+    python src/main/headless_cli.py run config.json --port COM3 --port COM4 --until-done
+"""
+
+import argparse
+import json
+import os
+import signal
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.headless_session import HeadlessEngine
+from utils.serial_manager import SerialManager
+
+
+def list_ports(output):
+    ports = SerialManager.get_available_ports()
+    for port in ports:
+        output.write(f"{port}\n")
+    if not ports:
+        output.write("未发现串口\n")
+
+
+def load_config(path):
+    with open(path, "r", encoding="utf-8") as stream:
+        raw = json.load(stream)
+    if not isinstance(raw, dict):
+        raise ValueError("配置文件顶层必须是对象")
+    return raw
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="headless_cli", description="无界面运行 QSerial 多串口会话")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("ports", help="列出可用串口")
+    run_parser = commands.add_parser("run", help="按配置文件打开串口并运行")
+    run_parser.add_argument("config")
+    run_parser.add_argument("--port", action="append", dest="ports", metavar="PORT", help="只打开指定串口，可重复；默认打开配置中的全部串口")
+    run_parser.add_argument("--duration", type=float, metavar="SECONDS", help="运行时长，默认一直运行到 Ctrl+C")
+    run_parser.add_argument("--report-interval", type=float, default=0, metavar="SECONDS", help="周期性输出吞吐量，0 表示只在结束时输出")
+    run_parser.add_argument("--log-directory", help="日志目录，覆盖配置文件中的 log_directory")
+    run_parser.add_argument("--until-done", action="store_true", help="全部发送计划完成后退出")
+    run_parser.add_argument("--keep-going", action="store_true", help="部分串口打开失败时继续运行")
+    run_parser.add_argument("--reactor", action="store_true", default=None, help="所有串口共用一个收发线程（仅 POSIX），覆盖配置中的 serial_reactor")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "ports":
+        list_ports(sys.stdout)
+        return 0
+    try:
+        engine = HeadlessEngine.from_config(load_config(args.config), args.log_directory, args.ports, args.reactor)
+    except (OSError, ValueError) as error:
+        print(f"无法加载配置: {error}", file=sys.stderr)
+        return 1
+    failed = engine.start()
+    engine.write_messages(sys.stdout)
+    if failed and (not args.keep_going or len(failed) == len(engine.sessions)):
+        print(f"无法打开串口: {', '.join(failed)}", file=sys.stderr)
+        engine.close()
+        return 1
+    previous_handler = signal.signal(signal.SIGINT, lambda _signum, _frame: engine.stop())
+    try:
+        engine.run(args.duration, args.report_interval, sys.stdout, args.until_done)
+    finally:
+        signal.signal(signal.SIGINT, previous_handler)
+        completed = engine.close()
+    engine.write_messages(sys.stdout)
+    sys.stdout.write(engine.report())
+    if not completed:
+        print("日志写入未在限定时间内完成", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
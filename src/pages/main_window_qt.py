@@ -23,7 +23,7 @@ class MainWindow(QMainWindow):
         if icon.exists(): self.setWindowIcon(QIcon(str(icon)))
         self.config_manager, self.theme_manager = ConfigManager(), ThemeManagerQt(); self._create_widgets(); self._create_menu(); self.apply_theme()
     def _create_widgets(self):
-        self.work_panel = WorkPanel(self.config_manager, self.theme_manager, self._on_data_sent, self); self.command_panel = CommandPanel(self.config_manager, self, self)
+        self.work_panel = WorkPanel(self.config_manager, self.theme_manager, None, self); self.command_panel = CommandPanel(self.config_manager, self, self)
         self.splitter = QSplitter(); self.splitter.setChildrenCollapsible(False); self.splitter.addWidget(self.work_panel); self.splitter.addWidget(self.command_panel); self.splitter.setCollapsible(0, False); self.splitter.setCollapsible(1, False); self.splitter.setStretchFactor(0, 1); self.command_panel.setVisible(self.config_manager.get_command_panel_visible()); self.setCentralWidget(self.splitter); QTimer.singleShot(0, self._sync_command_panel_width)
     def _create_menu(self):
         file_menu = self.menuBar().addMenu("文件")
@@ -36,7 +36,6 @@ class MainWindow(QMainWindow):
     @staticmethod
     def _action(menu, title, callback, checkable=False):
         action = QAction(title, menu); action.setCheckable(checkable); action.triggered.connect(callback); menu.addAction(action); return action
-    def _on_data_sent(self): self.command_panel.refresh_history()
     def _toggle_dual(self, checked): self.work_panel.toggle_dual_panel_mode(checked)
     def _toggle_command(self, checked): self.command_panel.setVisible(checked); self.config_manager.set_command_panel_visible(checked); QTimer.singleShot(0, self._sync_command_panel_width)
     def _sync_command_panel_width(self):
@@ -65,4 +64,4 @@ class MainWindow(QMainWindow):
     def closeEvent(self, event):
         if not self.work_panel.cleanup():
             QMessageBox.warning(self, "日志写入未完成", "日志文件写入超过 1 秒仍未完成，退出后剩余日志可能未写入。")
-        event.accept()
+        self.config_manager.close(); event.accept()
@@ -392,5 +392,7 @@ class MainWindow(wx.Frame):
         if hasattr(self, 'work_panel'):
             self.work_panel.cleanup()
         
+        # 写入尚未保存的配置修改
+        self.config_manager.close()
         self.Destroy()
 
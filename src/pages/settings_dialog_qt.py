@@ -1,18 +1,30 @@
 """Qt 全局设置对话框。"""
 
-from PySide6.QtWidgets import QDialog, QDialogButtonBox, QFormLayout, QSpinBox
+from PySide6.QtWidgets import QCheckBox, QDialog, QDialogButtonBox, QFormLayout, QSpinBox
 
 
 class SettingsDialog(QDialog):
     def __init__(self, parent, config_manager):
         super().__init__(parent); self.setWindowTitle("设置"); self.config_manager = config_manager; settings = config_manager.get_global_settings()
-        self.buffer_size_spin = self._spin(1000, 100000, settings.get("receive_buffer_size", 10000)); self.history_max_spin = self._spin(50, 1000, settings.get("send_history_max", 200)); self.font_size_spin = self._spin(6, 20, settings.get("fontSize", 9)); self.reconnect_interval_spin = self._spin(1, 30, settings.get("reconnect_interval", 5))
+        self.buffer_size_spin = self._spin(1000, 1000000, settings.get("receive_buffer_size", 10000)); self.history_max_spin = self._spin(50, 1000, settings.get("send_history_max", 200)); self.font_size_spin = self._spin(6, 20, settings.get("fontSize", 9)); self.reconnect_interval_spin = self._spin(1, 30, settings.get("reconnect_interval", 5))
+        self.pending_spin = self._spin(1, 256, settings.get("receive_pending_mb", 4)); self.spill_spin = self._spin(0, 65536, settings.get("receive_spill_mb", 0)); self.log_pending_spin = self._spin(1, 256, settings.get("log_pending_mb", 4)); self.spill_spin.setSpecialValueText("关闭（满后丢弃）")
+        self.log_flush_spin = self._spin(0, 65536, settings.get("log_flush_kb", 64)); self.log_flush_interval_spin = self._spin(0, 60000, settings.get("log_flush_interval_ms", 1000)); self.log_fsync_check = QCheckBox("刷新后同步到磁盘（断电更安全，写入更慢）"); self.log_fsync_check.setChecked(settings.get("log_fsync", False))
+        for spin in (self.log_flush_spin, self.log_flush_interval_spin): spin.setSpecialValueText("仅关闭时")
+        self.log_rotate_spin = self._spin(0, 65536, settings.get("log_rotate_mb", 0)); self.log_rotate_minutes_spin = self._spin(0, 10080, settings.get("log_rotate_minutes", 0)); self.log_compress_check = QCheckBox("后台压缩已分段的日志"); self.log_compress_check.setChecked(settings.get("log_compress", True))
+        for spin in (self.log_rotate_spin, self.log_rotate_minutes_spin): spin.setSpecialValueText("不分段")
+        self.config_delay_spin = self._spin(0, 10000, settings.get("config_save_delay_ms", 500)); self.config_delay_spin.setSpecialValueText("立即保存")
+        self.reactor_check = QCheckBox("所有串口共用一个收发线程（仅 Linux/macOS，新 Tab 生效）"); self.reactor_check.setChecked(settings.get("serial_reactor", False))
         layout = QFormLayout(self); layout.addRow("数据接收缓冲区大小:", self.buffer_size_spin); layout.addRow("发送历史最大条数:", self.history_max_spin); layout.addRow("接收区域字体大小:", self.font_size_spin); layout.addRow("自动重连间隔（秒）:", self.reconnect_interval_spin)
+        # 接收内存缓冲在新建 Tab 时分配，溢出与日志上限立即生效。
+        layout.addRow("接收内存缓冲（MiB，新 Tab 生效）:", self.pending_spin); layout.addRow("接收磁盘溢出上限（MiB）:", self.spill_spin); layout.addRow("日志写入缓冲（MiB）:", self.log_pending_spin)
+        layout.addRow("日志刷新阈值（KiB）:", self.log_flush_spin); layout.addRow("日志刷新间隔（毫秒）:", self.log_flush_interval_spin); layout.addRow("", self.log_fsync_check)
+        layout.addRow("日志分段大小（MiB）:", self.log_rotate_spin); layout.addRow("日志分段间隔（分钟）:", self.log_rotate_minutes_spin); layout.addRow("", self.log_compress_check)
+        layout.addRow("", self.reactor_check); layout.addRow("配置保存合并窗口（毫秒）:", self.config_delay_spin)
         buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel); buttons.button(QDialogButtonBox.Ok).setText("确定"); buttons.button(QDialogButtonBox.Cancel).setText("取消"); buttons.accepted.connect(self._save); buttons.rejected.connect(self.reject); layout.addRow(buttons)
     @staticmethod
     def _spin(minimum, maximum, value):
         spin = QSpinBox(); spin.setRange(minimum, maximum); spin.setValue(value); return spin
     def _save(self):
-        self.config_manager.set_global_settings({"receive_buffer_size": self.buffer_size_spin.value(), "send_history_max": self.history_max_spin.value(), "fontSize": self.font_size_spin.value(), "reconnect_interval": self.reconnect_interval_spin.value()})
+        self.config_manager.set_global_settings({"receive_buffer_size": self.buffer_size_spin.value(), "send_history_max": self.history_max_spin.value(), "fontSize": self.font_size_spin.value(), "reconnect_interval": self.reconnect_interval_spin.value(), "receive_pending_mb": self.pending_spin.value(), "receive_spill_mb": self.spill_spin.value(), "log_pending_mb": self.log_pending_spin.value(), "log_flush_kb": self.log_flush_spin.value(), "log_flush_interval_ms": self.log_flush_interval_spin.value(), "log_fsync": self.log_fsync_check.isChecked(), "log_rotate_mb": self.log_rotate_spin.value(), "log_rotate_minutes": self.log_rotate_minutes_spin.value(), "log_compress": self.log_compress_check.isChecked(), "serial_reactor": self.reactor_check.isChecked(), "config_save_delay_ms": self.config_delay_spin.value()})
         if hasattr(self.parent(), "apply_theme"): self.parent().apply_theme()
         self.accept()
@@ -0,0 +1,335 @@
+"""基于 asyncio 的串口会话：在事件循环中打开、收发串口，不依赖界面框架。"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+
+import serial
+
+from .port_monitor import PortPresenceMonitor
+from .serial_manager import SerialManager
+from .serial_writer import SerialWriter
+
+
+class AsyncSerialSession:
+    """在 asyncio 事件循环中使用的串口会话。
+
+    ``await open()`` 在线程池中打开串口并受 ``operation_timeout`` 保护；POSIX 上
+    随后把串口文件描述符注册到事件循环的读写回调，收发都在事件循环线程中以
+    非阻塞系统调用完成，多个串口可共用一个线程。事件循环不支持文件描述符回调
+    （如 Windows 的 Proactor 循环）时改用一个接收线程与 ``SerialWriter``。
+
+    接收数据按到达顺序排队，``read()`` 或 ``async for`` 逐块取出；队列超过
+    ``max_pending_bytes`` 时暂停读取，由系统缓冲承接，取走一半后恢复。
+
+    与 ``SerialManager`` 相同，每次打开和关闭都递增会话代次：被取消或超时的
+    ``open()`` 晚到的串口会被关闭，旧会话的读写回调、断开通知和发送都不会作用于
+    新会话。正常关闭后读取返回 ``b""``，异常断开时读取在取完已排队数据后抛出
+    ``serial.SerialException``。
+    """
+
+    READ_SIZE = 64 * 1024
+    MAX_PENDING_BYTES = 4 * 1024 * 1024
+
+    def __init__(self, port_monitor=None, operation_timeout=1.0, max_pending_bytes=MAX_PENDING_BYTES):
+        self.port_monitor = port_monitor or PortPresenceMonitor.shared()
+        self.operation_timeout = operation_timeout
+        self.max_pending_bytes = max_pending_bytes
+        self.port_name = None
+        self._loop = None
+        self._port = None
+        self._generation = 0
+        self._open_task = None
+        self._uses_fd = False
+        self._reading = False
+        self._receive_thread = None
+        self._receive_stop_event = None
+        self._resume_event = threading.Event()
+        self._writer = None
+        self._send_lock = asyncio.Lock()
+        self._presence_token = None
+        self._chunks = deque()
+        self._pending_bytes = 0
+        self._waiter = None
+        self._writable = None
+        self._error = None
+
+    @property
+    def is_open(self):
+        return self._port is not None
+
+    @property
+    def uses_event_loop_reader(self):
+        """是否由事件循环的文件描述符回调收发，而非接收线程。"""
+        return self._port is not None and self._uses_fd
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, _exc_type, _exc, _traceback):
+        await self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        data = await self.read()
+        if not data:
+            raise StopAsyncIteration
+        return data
+
+    async def open(self, port, baudrate=115200, parity="None", bytesize=8, stopbits=1, flow_control="None"):
+        """在限定时间内打开串口；失败时抛出 serial.SerialException，超时抛出 asyncio.TimeoutError。"""
+        if self._port is not None:
+            raise serial.SerialException("串口已打开")
+        if self._open_task is not None and not self._open_task.done():
+            # 超时或取消不能终止线程池中的打开调用，在其结束前拒绝重试。
+            raise serial.SerialException("串口操作仍在进行")
+        loop = asyncio.get_running_loop()
+        self._loop = loop
+        self._generation += 1
+        generation = self._generation
+        task = loop.run_in_executor(
+            None, SerialManager.create_port, port, baudrate, parity, bytesize, stopbits, flow_control, self.operation_timeout)
+        self._open_task = task
+        try:
+            opened_port = await asyncio.wait_for(asyncio.shield(task), self.operation_timeout)
+        except BaseException:
+            task.add_done_callback(self._discard_late_port)
+            if generation == self._generation:
+                self._generation += 1
+            raise
+        if generation != self._generation:
+            # 等待期间调用了 close()，本次打开作废。
+            SerialManager._close_port(opened_port)
+            raise serial.SerialException("打开期间串口已关闭")
+        self._start_session(opened_port, port, generation)
+
+    @staticmethod
+    def _discard_late_port(task):
+        if not task.cancelled() and task.exception() is None:
+            SerialManager._close_port(task.result())
+
+    def _start_session(self, port, port_name, generation):
+        self._port = port
+        self.port_name = port_name
+        self._chunks.clear()
+        self._pending_bytes = 0
+        self._error = None
+        fd = getattr(port, "fd", None)
+        self._uses_fd = False
+        if isinstance(fd, int):
+            try:
+                self._loop.add_reader(fd, self._on_readable, port, generation)
+                self._uses_fd = True
+                self._reading = True
+            except (NotImplementedError, RuntimeError, ValueError, OSError):
+                pass
+        if not self._uses_fd:
+            self._writer = SerialWriter(port, self.operation_timeout)
+            self._receive_stop_event = threading.Event()
+            self._resume_event.set()
+            self._receive_thread = threading.Thread(
+                target=self._receive_loop, args=(port, self._receive_stop_event, generation), daemon=True)
+            self._receive_thread.start()
+        loop = self._loop
+        self._presence_token = self.port_monitor.subscribe(
+            port_name,
+            lambda _port_name: loop.call_soon_threadsafe(
+                self._handle_disconnect, port, generation, f"串口 {port_name} 已被移除"),
+        )
+
+    def _is_current(self, port, generation):
+        return generation == self._generation and self._port is port
+
+    def _on_readable(self, port, generation):
+        if not self._is_current(port, generation):
+            return
+        try:
+            data = os.read(port.fd, self.READ_SIZE)
+        except BlockingIOError:
+            return
+        except OSError as error:
+            self._handle_disconnect(port, generation, f"read failed: {error}")
+            return
+        if not data:
+            self._handle_disconnect(port, generation, "设备报告可读但未返回数据（设备可能已断开）")
+            return
+        self._deliver(port, generation, data)
+
+    def _receive_loop(self, port, stop_event, generation):
+        """无法使用文件描述符回调时的接收线程，数据经 call_soon_threadsafe 交给事件循环。"""
+        loop = self._loop
+        while not stop_event.is_set():
+            self._resume_event.wait(SerialManager.RECEIVE_WAIT_TIMEOUT)
+            if stop_event.is_set():
+                break
+            if not self._resume_event.is_set():
+                continue
+            try:
+                data = SerialManager._read_available(port)
+            except Exception as error:
+                if not stop_event.is_set():
+                    loop.call_soon_threadsafe(self._handle_disconnect, port, generation, str(error))
+                break
+            if data and not stop_event.is_set():
+                loop.call_soon_threadsafe(self._deliver, port, generation, data)
+
+    def _deliver(self, port, generation, data):
+        if not self._is_current(port, generation):
+            return
+        self._chunks.append(data)
+        self._pending_bytes += len(data)
+        if self._pending_bytes >= self.max_pending_bytes:
+            self._pause_reading()
+        self._wake()
+
+    def _pause_reading(self):
+        if self._uses_fd:
+            if self._reading:
+                self._loop.remove_reader(self._port.fd)
+                self._reading = False
+        else:
+            self._resume_event.clear()
+
+    def _resume_reading(self):
+        if self._port is None:
+            return
+        if self._uses_fd:
+            if not self._reading:
+                self._loop.add_reader(self._port.fd, self._on_readable, self._port, self._generation)
+                self._reading = True
+        else:
+            self._resume_event.set()
+
+    def _wake(self):
+        waiter, self._waiter = self._waiter, None
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def read(self):
+        """返回下一块接收数据；会话已关闭且无剩余数据时返回 b""。"""
+        while not self._chunks:
+            if self._error is not None:
+                error, self._error = self._error, None
+                raise error
+            if self._port is None:
+                return b""
+            if self._waiter is None:
+                self._waiter = asyncio.get_running_loop().create_future()
+            await asyncio.shield(self._waiter)
+        data = self._chunks.popleft()
+        self._pending_bytes -= len(data)
+        if self._pending_bytes <= self.max_pending_bytes // 2:
+            self._resume_reading()
+        return data
+
+    async def send(self, payload, timeout=None):
+        """按调用顺序写入字节并等待完成，返回写入的字节数。
+
+        超过 timeout（默认 ``operation_timeout``）抛出 serial.SerialTimeoutException；
+        发送期间会话关闭或更替时抛出 serial.PortNotOpenError。取消只放弃尚未写入的
+        部分，已写入的字节不能撤回。
+        """
+        timeout = self.operation_timeout if timeout is None else timeout
+        port, generation = self._port, self._generation
+        if port is None:
+            raise serial.PortNotOpenError()
+        if not self._uses_fd:
+            future = self._writer.submit(payload, timeout=timeout)
+            return await asyncio.wrap_future(future)
+        deadline = time.monotonic() + timeout
+        async with self._send_lock:
+            view = memoryview(payload).cast("B")
+            written = 0
+            while written < len(view):
+                if not self._is_current(port, generation):
+                    raise serial.PortNotOpenError()
+                try:
+                    written += os.write(port.fd, view[written:])
+                    continue
+                except BlockingIOError:
+                    pass
+                except OSError as error:
+                    self._handle_disconnect(port, generation, f"write failed: {error}")
+                    raise serial.SerialException(f"write failed: {error}") from error
+                remaining = deadline - time.monotonic()
+                ready = remaining > 0 and await self._wait_writable(port, generation, remaining)
+                if not self._is_current(port, generation):
+                    # 等待期间会话已关闭或更替，_end_session 会立即唤醒等待。
+                    raise serial.PortNotOpenError()
+                if not ready:
+                    raise serial.SerialTimeoutException("发送超时")
+            return written
+
+    async def _wait_writable(self, port, generation, timeout):
+        """等待串口可写；超时或会话结束时返回 False。"""
+        writable = self._loop.create_future()
+        self._writable = writable
+        self._loop.add_writer(port.fd, lambda: writable.done() or writable.set_result(True))
+        try:
+            return await asyncio.wait_for(writable, timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            if self._writable is writable:
+                self._writable = None
+            # 会话结束后文件描述符可能已关闭并被新串口复用，写回调已由 _end_session 移除。
+            if self._is_current(port, generation):
+                self._loop.remove_writer(port.fd)
+
+    def _end_session(self):
+        """结束当前会话并返回需要在事件循环外关闭的串口；递增代次使旧回调失效。"""
+        port, self._port = self._port, None
+        self._generation += 1
+        token, self._presence_token = self._presence_token, None
+        if token is not None:
+            self.port_monitor.unsubscribe(token)
+        if port is not None and self._uses_fd:
+            if self._reading:
+                self._loop.remove_reader(port.fd)
+                self._reading = False
+            self._loop.remove_writer(port.fd)
+        writable, self._writable = self._writable, None
+        if writable is not None and not writable.done():
+            writable.set_result(False)
+        writer, self._writer = self._writer, None
+        if writer:
+            writer.stop()
+        if self._receive_stop_event:
+            self._receive_stop_event.set()
+            self._resume_event.set()
+        self._wake()
+        return port
+
+    def _handle_disconnect(self, port, generation, message):
+        if not self._is_current(port, generation):
+            return
+        print(f"串口异常断开: {message}")
+        self._error = serial.SerialException(message)
+        self._end_session()
+        SerialManager._cancel_read(port)
+        SerialManager._close_port(port)
+
+    async def close(self):
+        """关闭串口并使进行中的打开作废；已排队的接收数据仍可读取。返回是否在限定时间内关闭。"""
+        port = self._end_session()
+        receive_thread, self._receive_thread = self._receive_thread, None
+        self._receive_stop_event = None
+        if port is None:
+            return True
+
+        def close_port():
+            SerialManager._cancel_read(port)
+            SerialManager._close_port(port)
+            if receive_thread:
+                receive_thread.join()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(self._loop.run_in_executor(None, close_port)), self.operation_timeout)
+        except asyncio.TimeoutError:
+            print(f"关闭串口超时（{self.operation_timeout}秒）")
+            return False
+        return True
@@ -0,0 +1,179 @@
+"""预分配的环形字节缓冲区，供接收线程直接读入、界面线程批量取出。"""
+
+import threading
+from array import array
+from bisect import bisect_left
+
+
+class ArrivalMarks:
+    """以累计字节偏移记录各数据块的到达时间；调用方负责加锁。
+
+    取出时将偏移换算为本批内偏移，本批截断在数据块中间时剩余部分仍保留
+    同一到达时间。开销只与数据块数量相关。
+    """
+
+    # 已取出的到达记录超过该数量且占一半以上时压缩数组头部。
+    COMPACT_THRESHOLD = 4096
+
+    def __init__(self):
+        self._offsets = array("Q")
+        self._times = array("q")
+        self._head = 0
+        self._committed_total = 0
+        self._read_total = 0
+
+    def add(self, timestamp, count):
+        if timestamp is not None:
+            self._offsets.append(self._committed_total)
+            self._times.append(timestamp)
+        self._committed_total += count
+
+    def take(self, count):
+        """取出接下来 count 字节对应的 (批内偏移 array, 到达时间 array)。"""
+        read_start = self._read_total
+        read_end = read_start + count
+        self._read_total = read_end
+        head = self._head
+        end = bisect_left(self._offsets, read_end, head)
+        offsets = array("Q", (max(0, offset - read_start) for offset in self._offsets[head:end]))
+        times = self._times[head:end]
+        if end > head and read_end < self._committed_total and (
+            end == len(self._offsets) or self._offsets[end] > read_end
+        ):
+            # 本批截断在数据块中间，剩余部分仍属于同一次到达。
+            end -= 1
+            self._offsets[end] = read_end
+        self._head = end
+        if end > self.COMPACT_THRESHOLD and end * 2 > len(self._offsets):
+            del self._offsets[:end]
+            del self._times[:end]
+            self._head = 0
+        return offsets, times
+
+    def discard(self):
+        """丢弃全部未取出的记录，之后提交的数据重新开始计数。"""
+        self._offsets = array("Q")
+        self._times = array("q")
+        self._head = 0
+        self._read_total = self._committed_total
+
+
+class ByteRingBuffer:
+    """固定容量的单生产者环形缓冲区；写满时丢弃新数据并累计丢弃字节数。
+
+    生产者可通过 ``reserve`` 取得尾部连续空闲区的 memoryview，直接
+    ``readinto`` 后再 ``commit``，数据只在读入时复制一次；``clear`` 会使
+    尚未提交的预留失效，避免旧会话数据在清空后被发布。提交时可附带整数
+    到达时间（如 ``time.perf_counter_ns()``），``read_marked`` 以两个平行的
+    ``array`` 返回本批各数据块的起始偏移与到达时间，开销只与数据块数量相关。
+    """
+
+    def __init__(self, capacity):
+        if capacity <= 0:
+            raise ValueError("缓冲区容量必须大于 0")
+        self._buffer = bytearray(capacity)
+        self._view = memoryview(self._buffer)
+        self._capacity = capacity
+        self._start = 0
+        self._size = 0
+        self._epoch = 0
+        self._reserved = False
+        self._dropped = 0
+        self._marks = ArrivalMarks()
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    def __len__(self):
+        with self._lock:
+            return self._size
+
+    def _tail(self):
+        return (self._start + self._size) % self._capacity
+
+    def write(self, data, timestamp=None):
+        """复制整块数据到缓冲区；剩余空间不足时整块丢弃并返回 False。"""
+        size = len(data)
+        with self._lock:
+            if self._size + size > self._capacity:
+                self._dropped += size
+                return False
+            tail = self._tail()
+            first = min(size, self._capacity - tail)
+            self._view[tail:tail + first] = data[:first]
+            if first < size:
+                self._view[:size - first] = data[first:]
+            self._size += size
+            self._marks.add(timestamp, size)
+            return True
+
+    def reserve(self, size):
+        """预留尾部最多 size 字节的连续空间，返回 (memoryview, token)；已满时返回 (None, None)。"""
+        with self._lock:
+            free = self._capacity - self._size
+            if free <= 0 or size <= 0:
+                return None, None
+            tail = self._tail()
+            length = min(size, free, self._capacity - tail)
+            self._reserved = True
+            return self._view[tail:tail + length], (self._epoch, tail)
+
+    def commit(self, token, count, timestamp=None):
+        """发布预留区中实际读入的 count 字节；预留在 clear 之后失效时丢弃。"""
+        if token is None:
+            return False
+        with self._lock:
+            epoch, tail = token
+            if epoch != self._epoch:
+                return False
+            self._reserved = False
+            if count <= 0 or tail != self._tail():
+                return False
+            self._size += count
+            self._marks.add(timestamp, count)
+            return True
+
+    def drop(self, count):
+        """记录因缓冲区已满而未能保存的字节数。"""
+        with self._lock:
+            self._dropped += count
+
+    def read(self, max_bytes):
+        """取出最多 max_bytes 字节，返回一份连续的 bytes 副本。"""
+        return self.read_marked(max_bytes)[0]
+
+    def read_marked(self, max_bytes):
+        """取出最多 max_bytes 字节，返回 (bytes, 批内偏移 array, 到达时间 array)。"""
+        with self._lock:
+            count = min(max_bytes, self._size)
+            if count <= 0:
+                return b"", array("Q"), array("q")
+            start = self._start
+            first = min(count, self._capacity - start)
+            if first == count:
+                data = self._view[start:start + count].tobytes()
+            else:
+                data = b"".join((self._view[start:], self._view[:count - first]))
+            self._start = (start + count) % self._capacity
+            self._size -= count
+            if not self._size and not self._reserved:
+                # 缓冲区为空且无未提交预留时回到起点，使后续预留获得最长的连续空间。
+                self._start = 0
+            return (data, *self._marks.take(count))
+
+    def take_dropped(self):
+        with self._lock:
+            dropped, self._dropped = self._dropped, 0
+            return dropped
+
+    def clear(self):
+        """清空缓冲内容与丢弃计数，并使未提交的预留失效。"""
+        with self._lock:
+            self._start = 0
+            self._size = 0
+            self._dropped = 0
+            self._epoch += 1
+            self._reserved = False
+            self._marks.discard()
@@ -0,0 +1,379 @@
+"""串口原始收发捕获文件：紧凑的二进制记录、周期索引块与后台写入器。
+
+文件以 8 字节魔数开头，之后依次为记录；每条记录由 16 字节头（类型、方向、
+端口编号、Unix 纳秒时间戳、负载长度）和负载组成。数据记录每 64 条或 64 KiB
+生成一个检查点，每 64 个检查点写入一个索引块，索引块向前链接上一个索引块；
+正常关闭时写入指向最后一个索引块的文件尾。读取时只需沿索引链加载检查点，
+按时间或数据偏移二分定位后最多顺序扫描一个检查点间隔内的记录。
+"""
+
+import os
+import struct
+import threading
+from array import array
+from bisect import bisect_right
+from collections import deque, namedtuple
+from pathlib import Path
+
+
+MAGIC = b"QSCAP\x01\r\n"
+FOOTER_MAGIC = b"QSCAPEND"
+
+RECORD_HEADER = struct.Struct("<BBHqI")
+INDEX_HEADER = struct.Struct("<QII")
+INDEX_ENTRY = struct.Struct("<QqQ")
+PORT_ENTRY = struct.Struct("<HH")
+FOOTER = struct.Struct("<Q8s")
+
+KIND_DATA = 1
+KIND_PORT = 2
+KIND_INDEX = 3
+
+DIRECTION_RX = 0
+DIRECTION_TX = 1
+DIRECTION_NAMES = ("RX", "TX")
+
+CaptureRecord = namedtuple("CaptureRecord", "timestamp_ns direction port payload stream_offset")
+
+
+class CaptureFormatError(ValueError):
+    """文件不是有效的捕获文件。"""
+
+
+class CaptureFileWriter:
+    """同步写入一个捕获文件；由 CaptureWriter 的后台线程或命令行工具使用。"""
+
+    CHECKPOINT_RECORDS = 64
+    CHECKPOINT_BYTES = 64 * 1024
+    INDEX_CHECKPOINTS = 64
+
+    def __init__(self, path):
+        self._stream = Path(path).open("wb")
+        self._stream.write(MAGIC)
+        self._position = len(MAGIC)
+        self._stream_offset = 0
+        self._max_timestamp = None
+        self._since_checkpoint_records = 0
+        self._since_checkpoint_bytes = 0
+        self._checkpoints = []
+        self._new_ports = []
+        self._ports = {}
+        self._last_index = 0
+
+    def port_id(self, name):
+        """返回端口编号；首次出现的端口写入一条端口记录。"""
+        if name not in self._ports:
+            port_id = len(self._ports)
+            self._ports[name] = port_id
+            encoded = name.encode("utf-8")
+            self._write_record(KIND_PORT, 0, port_id, 0, encoded)
+            self._new_ports.append((port_id, encoded))
+        return self._ports[name]
+
+    def write(self, direction, port_id, timestamp_ns, payload):
+        if not payload:
+            return
+        if self._since_checkpoint_records == 0:
+            # 检查点时间取截至当前的最大值，保证索引数组单调可二分。
+            checkpoint_time = timestamp_ns if self._max_timestamp is None else max(self._max_timestamp, timestamp_ns)
+            self._checkpoints.append((self._position, checkpoint_time, self._stream_offset))
+        self._write_record(KIND_DATA, direction, port_id, timestamp_ns, payload)
+        self._max_timestamp = timestamp_ns if self._max_timestamp is None else max(self._max_timestamp, timestamp_ns)
+        self._stream_offset += len(payload)
+        self._since_checkpoint_records += 1
+        self._since_checkpoint_bytes += len(payload)
+        if self._since_checkpoint_records >= self.CHECKPOINT_RECORDS or self._since_checkpoint_bytes >= self.CHECKPOINT_BYTES:
+            self._since_checkpoint_records = self._since_checkpoint_bytes = 0
+            if len(self._checkpoints) >= self.INDEX_CHECKPOINTS:
+                self._write_index()
+
+    def flush(self):
+        self._stream.flush()
+
+    def close(self):
+        """写入剩余索引与文件尾后关闭。"""
+        try:
+            self._write_index()
+            self._stream.write(FOOTER.pack(self._last_index, FOOTER_MAGIC))
+            self._stream.flush()
+        finally:
+            self._stream.close()
+
+    def _write_record(self, kind, direction, port_id, timestamp_ns, payload):
+        self._stream.write(RECORD_HEADER.pack(kind, direction, port_id, timestamp_ns, len(payload)))
+        self._stream.write(payload)
+        self._position += RECORD_HEADER.size + len(payload)
+
+    def _write_index(self):
+        if not self._checkpoints and not self._new_ports:
+            return
+        parts = [INDEX_HEADER.pack(self._last_index, len(self._checkpoints), len(self._new_ports))]
+        parts.extend(INDEX_ENTRY.pack(*checkpoint) for checkpoint in self._checkpoints)
+        for port_id, encoded in self._new_ports:
+            parts.append(PORT_ENTRY.pack(port_id, len(encoded)))
+            parts.append(encoded)
+        offset = self._position
+        self._write_record(KIND_INDEX, 0, 0, 0, b"".join(parts))
+        self._last_index = offset
+        self._checkpoints = []
+        self._new_ports = []
+
+
+class CaptureReader:
+    """读取捕获文件；按时间或数据偏移定位的开销为 O(log n) 加一个检查点间隔。"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = self.path.open("rb")
+        try:
+            if self._file.read(len(MAGIC)) != MAGIC:
+                raise CaptureFormatError(f"不是捕获文件: {path}")
+            self.ports = {}
+            self._record_offsets = array("Q")
+            self._times = array("q")
+            self._stream_offsets = array("Q")
+            self.complete = self._load_index()
+            if not self.complete:
+                self._scan_records()
+        except Exception:
+            self._file.close()
+            raise
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _load_index(self):
+        """沿文件尾指向的索引链加载检查点；文件未正常关闭时返回 False。"""
+        size = os.fstat(self._file.fileno()).st_size
+        if size < len(MAGIC) + FOOTER.size:
+            return False
+        self._file.seek(size - FOOTER.size)
+        last_index, magic = FOOTER.unpack(self._file.read(FOOTER.size))
+        if magic != FOOTER_MAGIC:
+            return False
+        blocks = []
+        offset = last_index
+        while offset:
+            self._file.seek(offset)
+            kind, _direction, _port, _timestamp, length = RECORD_HEADER.unpack(self._file.read(RECORD_HEADER.size))
+            if kind != KIND_INDEX:
+                raise CaptureFormatError("捕获文件索引损坏")
+            payload = self._file.read(length)
+            previous, entry_count, port_count = INDEX_HEADER.unpack_from(payload)
+            blocks.append((payload, entry_count, port_count))
+            offset = previous
+        for payload, entry_count, port_count in reversed(blocks):
+            position = INDEX_HEADER.size
+            for record_offset, timestamp, stream_offset in INDEX_ENTRY.iter_unpack(
+                    payload[position:position + entry_count * INDEX_ENTRY.size]):
+                self._add_checkpoint(record_offset, timestamp, stream_offset)
+            position += entry_count * INDEX_ENTRY.size
+            for _ in range(port_count):
+                port_id, length = PORT_ENTRY.unpack_from(payload, position)
+                position += PORT_ENTRY.size
+                self.ports[port_id] = payload[position:position + length].decode("utf-8", "replace")
+                position += length
+        self._end = last_index or len(MAGIC)
+        return True
+
+    def _scan_records(self):
+        """未正常关闭的文件只读取记录头重建检查点，截断的尾部记录被忽略。"""
+        size = os.fstat(self._file.fileno()).st_size
+        position = len(MAGIC)
+        stream_offset = 0
+        max_timestamp = None
+        since_records = since_bytes = 0
+        while position + RECORD_HEADER.size <= size:
+            self._file.seek(position)
+            kind, _direction, port_id, timestamp, length = RECORD_HEADER.unpack(self._file.read(RECORD_HEADER.size))
+            if kind not in (KIND_DATA, KIND_PORT, KIND_INDEX) or position + RECORD_HEADER.size + length > size:
+                break
+            if kind == KIND_PORT:
+                self.ports[port_id] = self._file.read(length).decode("utf-8", "replace")
+            if kind == KIND_DATA:
+                if since_records == 0:
+                    checkpoint_time = timestamp if max_timestamp is None else max(max_timestamp, timestamp)
+                    self._add_checkpoint(position, checkpoint_time, stream_offset)
+                max_timestamp = timestamp if max_timestamp is None else max(max_timestamp, timestamp)
+                stream_offset += length
+                since_records += 1
+                since_bytes += length
+                if since_records >= CaptureFileWriter.CHECKPOINT_RECORDS or since_bytes >= CaptureFileWriter.CHECKPOINT_BYTES:
+                    since_records = since_bytes = 0
+            position += RECORD_HEADER.size + length
+        self._end = position
+
+    def _add_checkpoint(self, record_offset, timestamp, stream_offset):
+        self._record_offsets.append(record_offset)
+        self._times.append(timestamp)
+        self._stream_offsets.append(stream_offset)
+
+    @property
+    def start_time_ns(self):
+        return self._times[0] if self._times else None
+
+    def records(self, start_time_ns=None, start_offset=None, direction=None):
+        """按文件顺序产出 CaptureRecord；可从指定时间或数据偏移开始。
+
+        起点落在某条记录中间时，该记录的负载从起点处截断。
+        """
+        index = 0
+        if start_time_ns is not None:
+            index = max(0, bisect_right(self._times, start_time_ns) - 1)
+        elif start_offset is not None:
+            index = max(0, bisect_right(self._stream_offsets, start_offset) - 1)
+        if not self._record_offsets:
+            return
+        position = self._record_offsets[index]
+        stream_offset = self._stream_offsets[index]
+        while position < self._end:
+            self._file.seek(position)
+            header = self._file.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            kind, record_direction, port_id, timestamp, length = RECORD_HEADER.unpack(header)
+            position += RECORD_HEADER.size + length
+            if kind != KIND_DATA:
+                continue
+            record_offset = stream_offset
+            stream_offset += length
+            if start_time_ns is not None and timestamp < start_time_ns:
+                continue
+            if start_offset is not None and stream_offset <= start_offset:
+                continue
+            if direction is not None and record_direction != direction:
+                continue
+            payload = self._file.read(length)
+            if len(payload) < length:
+                return
+            if start_offset is not None and record_offset < start_offset:
+                payload = payload[start_offset - record_offset:]
+                record_offset = start_offset
+            yield CaptureRecord(timestamp, record_direction, self.ports.get(port_id, str(port_id)), payload, record_offset)
+
+
+class CaptureWriter:
+    """在后台线程写入捕获文件，并限制待写入数据量；接口与 LogWriter 一致。"""
+
+    def __init__(self, max_pending_bytes=16 * 1024 * 1024):
+        self.max_pending_bytes = max_pending_bytes
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._pending_bytes = 0
+        self._dropped_bytes = 0
+        self._errors = deque()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _put(self, item, size=0):
+        with self._condition:
+            if self._stopped:
+                return False
+            if size and self._pending_bytes + size > self.max_pending_bytes:
+                self._dropped_bytes += size
+                return False
+            self._queue.append(item)
+            self._pending_bytes += size
+            self._condition.notify()
+            return True
+
+    def open(self, path, generation=None):
+        return self._put(("open", path, generation))
+
+    def write(self, direction, port, payload, timestamp_ns, generation=None):
+        """排入一条记录；port 为端口名，首次出现时由后台线程写入端口记录。"""
+        return self._put(("write", (direction, port, bytes(payload), ((0, timestamp_ns),)), generation), len(payload))
+
+    def write_chunks(self, direction, port, data, chunks, generation=None):
+        """排入一批数据，chunks 为 (批内起始偏移, Unix 纳秒时间戳) 序列，每段写为一条记录。"""
+        return self._put(("write", (direction, port, data, tuple(chunks)), generation), len(data))
+
+    def close(self, generation=None):
+        return self._put(("close", None, generation))
+
+    def stop(self, timeout=1.0):
+        """处理已排队内容并有界等待关闭。"""
+        with self._condition:
+            if not self._stopped:
+                self._stopped = True
+                self._queue.append(("stop", None, None))
+                self._condition.notify()
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def take_dropped_bytes(self):
+        with self._condition:
+            dropped, self._dropped_bytes = self._dropped_bytes, 0
+            return dropped
+
+    def take_errors(self, generation=None):
+        """返回并清空指定代次（None 为全部）的后台失败信息。"""
+        with self._condition:
+            errors = [message for error_generation, message in self._errors if generation is None or error_generation == generation]
+            self._errors = deque(item for item in self._errors if generation is not None and item[0] != generation)
+            return errors
+
+    def _record_error(self, message, generation):
+        with self._condition:
+            self._errors.append((generation, message))
+
+    def _close_file(self, capture, generation):
+        if capture:
+            try:
+                capture.close()
+            except OSError as error:
+                self._record_error(f"关闭捕获文件失败: {error}", generation)
+
+    def _run(self):
+        capture = None
+        capture_generation = None
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._condition.wait()
+                # 一次取出全部排队项，批量写入后只刷新一次。
+                items = list(self._queue)
+                self._queue.clear()
+            written = 0
+            for command, value, generation in items:
+                if command == "open":
+                    self._close_file(capture, capture_generation)
+                    capture, capture_generation = None, None
+                    try:
+                        capture, capture_generation = CaptureFileWriter(value), generation
+                    except OSError as error:
+                        self._record_error(f"无法创建捕获文件: {error}", generation)
+                elif command == "write":
+                    direction, port, data, chunks = value
+                    written += len(data)
+                    if not capture or generation != capture_generation:
+                        continue
+                    try:
+                        port_id = capture.port_id(port)
+                        for index, (offset, timestamp_ns) in enumerate(chunks):
+                            end = chunks[index + 1][0] if index + 1 < len(chunks) else len(data)
+                            capture.write(direction, port_id, timestamp_ns, data[offset:end])
+                    except OSError as error:
+                        self._record_error(f"写入捕获文件失败: {error}", capture_generation)
+                        self._close_file(capture, capture_generation)
+                        capture, capture_generation = None, None
+                elif command == "close" and capture and (generation is None or generation == capture_generation):
+                    self._close_file(capture, capture_generation)
+                    capture, capture_generation = None, None
+                elif command == "stop":
+                    self._close_file(capture, capture_generation)
+                    return
+            if capture:
+                try:
+                    capture.flush()
+                except OSError as error:
+                    self._record_error(f"写入捕获文件失败: {error}", capture_generation)
+            with self._condition:
+                self._pending_bytes -= written
@@ -1,28 +1,92 @@
 """配置管理工具类。"""
 
+import functools
 import json
 import os
 import tempfile
+import threading
+import time
 from datetime import datetime
 
 from .file_utils import get_base_path
+from .frame_decoder import FRAME_DECODERS, unescape_frame_delimiter
+from .quick_command_library import QuickCommandLibrary, normalize_command
+from .send_history_store import SendHistoryStore
+
+
+def _locked(method):
+    """在配置锁内执行修改，避免后台保存线程序列化到修改了一半的配置。"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class _LazyConfig(dict):
+    """按分段延迟加载的配置字典：首次读取未加载分段中的键时才读取对应文件。"""
+
+    def __init__(self, loader):
+        super().__init__()
+        self._loader = loader
+
+    def __missing__(self, key):
+        self._loader(key)
+        return dict.__getitem__(self, key)
 
 
 class ConfigManager:
-    """读取、校验并持久化运行目录中的配置。"""
+    """读取、校验并持久化运行目录中的配置。
+
+    配置按分段保存在 ``config.d`` 目录的多个 JSON 文件中，启动时只读取全局分段，
+    其余分段在首次访问时加载；发送历史由 SendHistoryStore 保存为只追加的日志。修改配置只标记所属分段为待保存，后台保存线程将
+    首次修改后 save_delay 秒内的多次修改合并为一次写入，且只原子替换内容有变化
+    的分段；save_delay 为 0 时每次修改立即写入。退出前调用 close，导出和导入前
+    会先写入待保存的修改。导出与导入仍使用包含全部分段的单个 JSON。
+    """
+
+    # global 分段最后写入，其文件存在即表示分段目录完整，迁移中断时下次启动重新迁移。
+    SECTIONS = {
+        "ports": ("port_configs",),
+        "quick_commands": ("quick_command_groups",),
+        "global": (
+            "last_port_main", "last_port_secondary", "last_log_directory",
+            "command_panel_visible", "dual_panel_mode", "theme", "global_settings",
+        ),
+    }
+    _SECTION_OF_KEY = {key: name for name, keys in SECTIONS.items() for key in keys}
+    HISTORY_SECTION = "history"
 
     SERIAL_PARITIES = {"None", "Even", "Odd", "Mark", "Space"}
     FLOW_CONTROLS = {"None", "Hardware", "Software"}
     MODES = {"TEXT", "HEX"}
     ENCODINGS = {"UTF-8", "ASCII"}
     LINE_ENDINGS = {"CR", "LF", "CRLF"}
+    HEX_BYTES_PER_LINE = {0, 8, 16, 32}
+    FRAME_LENGTH_BYTES = {1, 2, 4}
     THEMES = {"light", "dark"}
 
-    def __init__(self, config_file="config.json"):
+    def __init__(self, config_file="config.json", save_delay=None):
         self.config_file = os.path.join(get_base_path(), config_file)
-        self.config = self._load_config()
-
-    def _get_default_config(self):
+        self.section_directory = os.path.splitext(self.config_file)[0] + ".d"
+        # 可重入锁：设置方法相互调用时仍持有同一把锁，后台序列化时配置不会被修改。
+        self._lock = threading.RLock()
+        self._condition = threading.Condition(self._lock)
+        # 先在配置锁内取得快照并获取写锁，再在配置锁外写文件，保证按快照顺序写入。
+        self._write_lock = threading.Lock()
+        self._dirty = set()
+        self._written = {}
+        self._history = None
+        self._quick_commands = None
+        self._deadline = None
+        self._closed = False
+        self._thread = None
+        self.config = _LazyConfig(self._load_section_of_key)
+        self._load_config()
+        self.save_delay = self.config["global_settings"]["config_save_delay_ms"] / 1000 if save_delay is None else save_delay
+
+    @classmethod
+    def _get_default_config(cls):
         return {
             "last_port_main": "",
             "last_port_secondary": "",
@@ -38,10 +102,23 @@ class ConfigManager:
                 "send_history_max": 200,
                 "fontSize": 9,
                 "reconnect_interval": 5,
+                "receive_pending_mb": 4,
+                "receive_spill_mb": 0,
+                "log_pending_mb": 4,
+                "log_flush_kb": 64,
+                "log_flush_interval_ms": 1000,
+                "log_fsync": False,
+                "log_rotate_mb": 0,
+                "log_rotate_minutes": 0,
+                "log_compress": True,
+                "serial_reactor": False,
+                "config_save_delay_ms": 500,
             },
         }
 
-    def _get_default_port_config(self):
+    @classmethod
+    def default_port_config(cls):
+        """返回新端口的默认配置；每次调用返回新的字典，可直接修改。"""
         return {
             "serial_settings": {
                 "baudrate": 115200,
@@ -55,8 +132,15 @@ class ConfigManager:
                 "encoding": "UTF-8",
                 "log_mode": False,
                 "save_log": False,
+                "save_capture": False,
                 "auto_reconnect": False,
                 "auto_scroll": True,
+                "hex_bytes_per_line": 0,
+                "hex_show_offset": False,
+                "hex_show_ascii": False,
+                "frame_decoder": "none",
+                "frame_delimiter": "\\n",
+                "frame_length_bytes": 2,
             },
             "send_settings": {
                 "mode": "TEXT",
@@ -68,7 +152,8 @@ class ConfigManager:
         }
 
     @staticmethod
-    def _valid_int(value, minimum, maximum):
+    def valid_int(value, minimum, maximum):
+        """值是否为 [minimum, maximum] 内的整数（不接受 bool）；供配置归一化与无界面参数校验共用。"""
         return type(value) is int and minimum <= value <= maximum
 
     @staticmethod
@@ -79,8 +164,18 @@ class ConfigManager:
     def _valid_bool(value):
         return type(value) is bool
 
-    def _normalize_port_config(self, raw):
-        defaults = self._get_default_port_config()
+    @staticmethod
+    def _valid_frame_delimiter(value):
+        if not isinstance(value, str) or not value:
+            return False
+        try:
+            return bool(unescape_frame_delimiter(value))
+        except UnicodeEncodeError:
+            return False
+
+    @classmethod
+    def _normalize_port_config(cls, raw):
+        defaults = cls.default_port_config()
         if not isinstance(raw, dict):
             return defaults
 
@@ -88,49 +183,59 @@ class ConfigManager:
         if not isinstance(serial_raw, dict):
             serial_raw = {}
         serial = defaults["serial_settings"]
-        if self._valid_int(serial_raw.get("baudrate"), 1, 4_000_000):
+        if cls.valid_int(serial_raw.get("baudrate"), 1, 4_000_000):
             serial["baudrate"] = serial_raw["baudrate"]
-        if serial_raw.get("parity") in self.SERIAL_PARITIES:
+        if serial_raw.get("parity") in cls.SERIAL_PARITIES:
             serial["parity"] = serial_raw["parity"]
         if serial_raw.get("bytesize") in {5, 6, 7, 8} and type(serial_raw["bytesize"]) is int:
             serial["bytesize"] = serial_raw["bytesize"]
-        if self._valid_number(serial_raw.get("stopbits"), {1, 1.5, 2}):
+        if cls._valid_number(serial_raw.get("stopbits"), {1, 1.5, 2}):
             serial["stopbits"] = serial_raw["stopbits"]
-        if serial_raw.get("flow_control") in self.FLOW_CONTROLS:
+        if serial_raw.get("flow_control") in cls.FLOW_CONTROLS:
             serial["flow_control"] = serial_raw["flow_control"]
 
         receive_raw = raw.get("receive_settings", {})
         if not isinstance(receive_raw, dict):
             receive_raw = {}
         receive = defaults["receive_settings"]
-        if receive_raw.get("mode") in self.MODES:
+        if receive_raw.get("mode") in cls.MODES:
             receive["mode"] = receive_raw["mode"]
-        if receive_raw.get("encoding") in self.ENCODINGS:
+        if receive_raw.get("encoding") in cls.ENCODINGS:
             receive["encoding"] = receive_raw["encoding"]
-        for key in ("log_mode", "auto_reconnect", "auto_scroll"):
-            if self._valid_bool(receive_raw.get(key)):
+        if cls._valid_number(receive_raw.get("hex_bytes_per_line"), cls.HEX_BYTES_PER_LINE) and type(receive_raw["hex_bytes_per_line"]) is int:
+            receive["hex_bytes_per_line"] = receive_raw["hex_bytes_per_line"]
+        for key in ("log_mode", "auto_reconnect", "auto_scroll", "hex_show_offset", "hex_show_ascii"):
+            if cls._valid_bool(receive_raw.get(key)):
                 receive[key] = receive_raw[key]
-        # 日志文件路径不持久化，重启和导入后必须重新选择文件。
+        if receive_raw.get("frame_decoder") in FRAME_DECODERS:
+            receive["frame_decoder"] = receive_raw["frame_decoder"]
+        if cls._valid_frame_delimiter(receive_raw.get("frame_delimiter")):
+            receive["frame_delimiter"] = receive_raw["frame_delimiter"]
+        if receive_raw.get("frame_length_bytes") in cls.FRAME_LENGTH_BYTES and type(receive_raw["frame_length_bytes"]) is int:
+            receive["frame_length_bytes"] = receive_raw["frame_length_bytes"]
+        # 日志与捕获文件路径不持久化，重启和导入后必须重新选择文件。
         receive["save_log"] = False
+        receive["save_capture"] = False
 
         send_raw = raw.get("send_settings", {})
         if not isinstance(send_raw, dict):
             send_raw = {}
         send = defaults["send_settings"]
-        if send_raw.get("mode") in self.MODES:
+        if send_raw.get("mode") in cls.MODES:
             send["mode"] = send_raw["mode"]
-        if send_raw.get("line_ending") in self.LINE_ENDINGS:
+        if send_raw.get("line_ending") in cls.LINE_ENDINGS:
             send["line_ending"] = send_raw["line_ending"]
-        if self._valid_bool(send_raw.get("loop_send")):
+        if cls._valid_bool(send_raw.get("loop_send")):
             send["loop_send"] = send_raw["loop_send"]
-        if self._valid_int(send_raw.get("loop_period_ms"), 1, 3_600_000):
+        if cls.valid_int(send_raw.get("loop_period_ms"), 1, 3_600_000):
             send["loop_period_ms"] = send_raw["loop_period_ms"]
 
         if isinstance(raw.get("send_text"), str):
             defaults["send_text"] = raw["send_text"]
         return defaults
 
-    def _normalize_quick_command_groups(self, raw):
+    @classmethod
+    def _normalize_quick_command_groups(cls, raw):
         if not isinstance(raw, list):
             return []
         groups = []
@@ -140,24 +245,12 @@ class ConfigManager:
             commands_raw = group.get("commands", [])
             if not isinstance(commands_raw, list):
                 commands_raw = []
-            commands = []
-            for command in commands_raw:
-                if not isinstance(command, dict):
-                    continue
-                data = command.get("data", command.get("command"))
-                if not isinstance(data, str):
-                    continue
-                mode = command.get("mode", "TEXT")
-                commands.append({
-                    "name": command.get("name", "") if isinstance(command.get("name", ""), str) else "",
-                    "data": data,
-                    "command": data,
-                    "mode": mode if mode in self.MODES else "TEXT",
-                })
+            commands = [command for command in map(normalize_command, commands_raw) if command is not None]
             groups.append({"name": group["name"], "commands": commands})
         return groups
 
-    def _normalize_send_history(self, raw):
+    @classmethod
+    def _normalize_send_history(cls, raw):
         if not isinstance(raw, list):
             return []
         history = []
@@ -171,60 +264,128 @@ class ConfigManager:
             time_text = item.get("time", "")
             history.append({
                 "data": item["data"],
-                "mode": mode if mode in self.MODES else "TEXT",
+                "mode": mode if mode in cls.MODES else "TEXT",
                 "time": time_text if isinstance(time_text, str) else "",
             })
         return history
 
-    def _normalize_config(self, raw):
+    @classmethod
+    def _normalize_config(cls, raw):
         """将外部 JSON 归一化为当前配置结构，未知字段不保留。"""
         if not isinstance(raw, dict):
             raise ValueError("配置根节点必须是 JSON 对象")
-        config = self._get_default_config()
+        config = cls._get_default_config()
         for key in ("last_port_main", "last_port_secondary", "last_log_directory"):
             if isinstance(raw.get(key), str):
                 config[key] = raw[key]
         for key in ("command_panel_visible", "dual_panel_mode"):
-            if self._valid_bool(raw.get(key)):
+            if cls._valid_bool(raw.get(key)):
                 config[key] = raw[key]
-        if raw.get("theme") in self.THEMES:
+        if raw.get("theme") in cls.THEMES:
             config["theme"] = raw["theme"]
 
         settings_raw = raw.get("global_settings", {})
         if isinstance(settings_raw, dict):
             settings = config["global_settings"]
-            if self._valid_int(settings_raw.get("receive_buffer_size"), 1000, 100000):
+            if cls.valid_int(settings_raw.get("receive_buffer_size"), 1000, 1_000_000):
                 settings["receive_buffer_size"] = settings_raw["receive_buffer_size"]
-            if self._valid_int(settings_raw.get("send_history_max"), 50, 1000):
+            if cls.valid_int(settings_raw.get("send_history_max"), 50, 1000):
                 settings["send_history_max"] = settings_raw["send_history_max"]
-            if self._valid_int(settings_raw.get("fontSize"), 6, 20):
+            if cls.valid_int(settings_raw.get("fontSize"), 6, 20):
                 settings["fontSize"] = settings_raw["fontSize"]
-            if self._valid_int(settings_raw.get("reconnect_interval"), 1, 30):
+            if cls.valid_int(settings_raw.get("reconnect_interval"), 1, 30):
                 settings["reconnect_interval"] = settings_raw["reconnect_interval"]
+            for key in ("receive_pending_mb", "log_pending_mb"):
+                if cls.valid_int(settings_raw.get(key), 1, 256):
+                    settings[key] = settings_raw[key]
+            # 0 表示关闭接收磁盘溢出，写满内存缓冲后按原方式丢弃并计数。
+            if cls.valid_int(settings_raw.get("receive_spill_mb"), 0, 65536):
+                settings["receive_spill_mb"] = settings_raw["receive_spill_mb"]
+            # 日志刷新阈值与间隔为 0 时不按该条件刷新，只在关闭日志时刷新。
+            if cls.valid_int(settings_raw.get("log_flush_kb"), 0, 65536):
+                settings["log_flush_kb"] = settings_raw["log_flush_kb"]
+            if cls.valid_int(settings_raw.get("log_flush_interval_ms"), 0, 60000):
+                settings["log_flush_interval_ms"] = settings_raw["log_flush_interval_ms"]
+            for key in ("log_fsync", "log_compress", "serial_reactor"):
+                if isinstance(settings_raw.get(key), bool):
+                    settings[key] = settings_raw[key]
+            # 日志分段的大小与时间上限为 0 时不按该条件分段。
+            if cls.valid_int(settings_raw.get("log_rotate_mb"), 0, 65536):
+                settings["log_rotate_mb"] = settings_raw["log_rotate_mb"]
+            if cls.valid_int(settings_raw.get("log_rotate_minutes"), 0, 10080):
+                settings["log_rotate_minutes"] = settings_raw["log_rotate_minutes"]
+            # 0 表示每次修改立即写入配置文件。
+            if cls.valid_int(settings_raw.get("config_save_delay_ms"), 0, 10000):
+                settings["config_save_delay_ms"] = settings_raw["config_save_delay_ms"]
 
         port_configs = raw.get("port_configs", {})
         if isinstance(port_configs, dict):
             config["port_configs"] = {
-                port: self._normalize_port_config(value)
+                port: cls._normalize_port_config(value)
                 for port, value in port_configs.items()
                 if isinstance(port, str) and port
             }
-        config["quick_command_groups"] = self._normalize_quick_command_groups(raw.get("quick_command_groups", []))
-        history = self._normalize_send_history(raw.get("send_history", []))
+        config["quick_command_groups"] = cls._normalize_quick_command_groups(raw.get("quick_command_groups", []))
+        history = cls._normalize_send_history(raw.get("send_history", []))
         config["send_history"] = history[:config["global_settings"]["send_history_max"]]
         return config
 
+    @classmethod
+    def normalize(cls, raw):
+        """按应用配置规则归一化外部 JSON，不读写文件；供无界面会话等复用端口配置。"""
+        return cls._normalize_config(raw)
+
+    def _section_path(self, name):
+        return os.path.join(self.section_directory, f"{name}.json")
+
+    def _section_text(self, name, config=None):
+        config = self.config if config is None else config
+        return json.dumps({key: config[key] for key in self.SECTIONS[name]}, indent=2, ensure_ascii=False)
+
+    def _history_path(self):
+        return os.path.join(self.section_directory, f"{self.HISTORY_SECTION}.jsonl")
+
+    def _loaded_sections(self):
+        # dict.__contains__ 不会触发延迟加载。
+        sections = [name for name, keys in self.SECTIONS.items() if keys[0] in self.config]
+        return sections + [self.HISTORY_SECTION] if self._history is not None else sections
+
     def _write_config(self, config):
-        directory = os.path.dirname(os.path.abspath(self.config_file))
+        """写入完整配置的全部分段与发送历史，用于迁移与导入；global 分段最后写入。"""
+        texts = {name: self._section_text(name, config) for name in self.SECTIONS}
+        history = SendHistoryStore(config["global_settings"]["send_history_max"], config["send_history"])
+        history.mark_rewrite()
+        _rewrite, history_text = history.take_journal()
+        with self._write_lock:
+            self._write_text(self._history_path(), history_text)
+            for name, text in texts.items():
+                self._write_text(self._section_path(name), text)
+                self._written[name] = text
+
+    def _adopt_config(self, config):
+        """使用已写入磁盘的完整配置替换内存配置；发送历史保留原有监听器。"""
+        history = config.pop("send_history")
+        dict.update(self.config, config)
+        if self._history is None:
+            self._history = SendHistoryStore(config["global_settings"]["send_history_max"])
+        self._history.replace(history, config["global_settings"]["send_history_max"])
+        # 磁盘上的日志已是完整内容，丢弃 replace 产生的整体重写。
+        self._history.take_journal()
+        if self._quick_commands is not None:
+            self._quick_commands.reset(self.config["quick_command_groups"])
+
+    def _write_text(self, path, text):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
         file_descriptor, temporary_path = tempfile.mkstemp(
             prefix=".config-", suffix=".tmp", dir=directory, text=True,
         )
         try:
             with os.fdopen(file_descriptor, "w", encoding="utf-8") as stream:
-                json.dump(config, stream, indent=2, ensure_ascii=False)
+                stream.write(text)
                 stream.flush()
                 os.fsync(stream.fileno())
-            os.replace(temporary_path, self.config_file)
+            os.replace(temporary_path, path)
         except OSError:
             try:
                 os.unlink(temporary_path)
@@ -233,87 +394,247 @@ class ConfigManager:
             raise
 
     def _load_config(self):
-        if not os.path.exists(self.config_file):
-            return self._get_default_config()
+        """加载全局分段；分段目录尚不完整而存在旧版 config.json 时先迁移。"""
+        if not os.path.exists(self._section_path("global")) and os.path.exists(self.config_file):
+            self._migrate_legacy_config()
+        if "global_settings" not in self.config:
+            self._load_section("global")
+
+    def _migrate_legacy_config(self):
         try:
             with open(self.config_file, "r", encoding="utf-8") as stream:
                 raw = json.load(stream)
             config = self._normalize_config(raw)
-            if config != raw:
-                self._write_config(config)
-            return config
         except (OSError, ValueError, json.JSONDecodeError, RecursionError) as error:
             print(f"加载配置文件失败: {error}")
             # 损坏的运行配置可由用户修复；不要用默认值覆盖原文件。
-            return self._get_default_config()
-
-    def save_config(self):
+            return
         try:
-            self._write_config(self.config)
+            self._write_config(config)
+            # 保留旧文件作为备份，新版本只读取分段目录。
+            os.replace(self.config_file, self.config_file + ".bak")
+        except OSError as error:
+            print(f"迁移配置文件失败: {error}")
+        self._adopt_config(config)
+
+    def _load_section_of_key(self, key):
+        name = self._SECTION_OF_KEY.get(key)
+        if name:
+            with self._lock:
+                if key not in self.config:
+                    self._load_section(name)
+
+    def _load_section(self, name):
+        path = self._section_path(name)
+        raw = None
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as stream:
+                    raw = json.load(stream)
+                if not isinstance(raw, dict):
+                    raise ValueError("配置分段根节点必须是 JSON 对象")
+            except (OSError, ValueError, json.JSONDecodeError, RecursionError) as error:
+                print(f"加载配置文件失败: {error}")
+                raw = None
+        # 其他分段依赖已归一化的全局设置，例如发送历史按 send_history_max 裁剪。
+        context = {} if name == "global" else {"global_settings": self.config["global_settings"]}
+        normalized = self._normalize_config({**(raw or {}), **context})
+        values = {key: normalized[key] for key in self.SECTIONS[name]}
+        dict.update(self.config, values)
+        if raw is None:
+            return
+        text = self._section_text(name)
+        if {key: raw.get(key) for key in values} != values or len(raw) != len(values):
+            try:
+                self._write_text(path, text)
+            except OSError as error:
+                print(f"保存配置文件失败: {error}")
+                return
+        self._written[name] = text
+
+    def get_send_history_store(self):
+        """返回发送历史存储，首次调用时重放磁盘日志；修改应通过 ConfigManager 进行。"""
+        with self._lock:
+            if self._history is None:
+                max_entries = self.config["global_settings"]["send_history_max"]
+                lines = []
+                try:
+                    with open(self._history_path(), "r", encoding="utf-8") as stream:
+                        lines = stream.readlines()
+                except FileNotFoundError:
+                    pass
+                except (OSError, ValueError) as error:
+                    print(f"加载发送历史失败: {error}")
+                self._history = SendHistoryStore.load(lines, max_entries)
+                if len(lines) > max_entries * SendHistoryStore.COMPACT_FACTOR:
+                    self._history.mark_rewrite()
+                    self.save_config(self.HISTORY_SECTION)
+            return self._history
+
+    def save_config(self, *sections):
+        """标记分段已修改，未指定时为全部已加载分段；合并窗口内的修改由后台保存线程一次写入。"""
+        with self._condition:
+            self._dirty.update(sections or self._loaded_sections())
+            if self.save_delay > 0 and self._deadline is None:
+                # 从首次修改开始计时，连续输入也会在一个窗口后写入。
+                self._deadline = time.monotonic() + self.save_delay
+            if self.save_delay > 0 and self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run_saver, daemon=True)
+                self._thread.start()
+            self._condition.notify()
+        return self.flush() if self.save_delay <= 0 else True
+
+    def flush(self):
+        """立即写入待保存的分段，内容与上次写入相同的分段跳过；没有待保存内容时直接返回 True。"""
+        with self._lock:
+            if not self._dirty:
+                return True
+            sections = [name for name in self.SECTIONS if name in self._dirty]
+            journal = self._history.take_journal() if self.HISTORY_SECTION in self._dirty and self._history else None
+            self._dirty.clear()
+            self._deadline = None
+            try:
+                texts = {name: self._section_text(name) for name in sections}
+            except RuntimeError:
+                # 调用方在锁外修改了 get_* 返回的对象，稍后重试。
+                self._dirty.update(sections)
+                self._deadline = time.monotonic() + self.save_delay
+                self._condition.notify()
+                texts = {}
+            self._write_lock.acquire()
+        saved = bool(texts) or not sections
+        try:
+            for name, text in texts.items():
+                if text == self._written.get(name):
+                    continue
+                try:
+                    self._write_text(self._section_path(name), text)
+                    self._written[name] = text
+                except OSError as error:
+                    print(f"保存配置文件失败: {error}")
+                    saved = False
+            if journal and not self._write_journal(*journal):
+                saved = False
+        finally:
+            self._write_lock.release()
+        if journal and not saved:
+            with self._lock:
+                # 追加失败后磁盘日志可能缺少记录，下一次保存时整体重写。
+                self._history.mark_rewrite()
+        return saved
+
+    def _write_journal(self, rewrite, text):
+        try:
+            if rewrite:
+                self._write_text(self._history_path(), text)
+            else:
+                os.makedirs(self.section_directory, exist_ok=True)
+                with open(self._history_path(), "a", encoding="utf-8") as stream:
+                    stream.write(text)
+                    stream.flush()
+                    os.fsync(stream.fileno())
             return True
         except OSError as error:
-            print(f"保存配置文件失败: {error}")
+            print(f"保存发送历史失败: {error}")
             return False
 
+    def close(self):
+        """写入待保存的修改并停止后台保存线程，应用退出前调用。"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(1.0)
+        return self.flush()
+
+    def _run_saver(self):
+        while True:
+            with self._condition:
+                while not self._closed and (self._deadline is None or self._deadline > time.monotonic()):
+                    self._condition.wait(None if self._deadline is None else self._deadline - time.monotonic())
+                if self._closed:
+                    return
+            self.flush()
+
     def get_last_port(self, panel="main"):
         return self.config["last_port_secondary" if panel == "secondary" else "last_port_main"]
 
+    @_locked
     def set_last_port(self, port, panel="main"):
         self.config["last_port_secondary" if panel == "secondary" else "last_port_main"] = port
-        self.save_config()
+        self.save_config("global")
 
     def get_last_log_directory(self):
         """获取上次选择日志文件时所在的目录。"""
         return self.config["last_log_directory"]
 
+    @_locked
     def set_last_log_directory(self, directory):
         """保存日志文件选择目录，不保存具体日志文件路径。"""
         self.config["last_log_directory"] = directory if isinstance(directory, str) else ""
-        self.save_config()
+        self.save_config("global")
 
+    @_locked
     def get_port_config(self, port):
         if port not in self.config["port_configs"]:
-            self.config["port_configs"][port] = self._get_default_port_config()
-            self.save_config()
+            self.config["port_configs"][port] = self.default_port_config()
+            self.save_config("ports")
         config = self.config["port_configs"][port]
         config["receive_settings"]["save_log"] = False
+        config["receive_settings"]["save_capture"] = False
         return config
 
+    @_locked
     def save_port_config(self, port, config):
         self.config["port_configs"][port] = self._normalize_port_config(config)
-        self.save_config()
+        self.save_config("ports")
 
+    @_locked
     def update_serial_settings(self, port, settings):
         port_config = self.get_port_config(port)
         port_config["serial_settings"].update(settings)
         self.save_port_config(port, port_config)
 
+    @_locked
     def update_receive_settings(self, port, settings):
         port_config = self.get_port_config(port)
         port_config["receive_settings"].update(settings)
         self.save_port_config(port, port_config)
 
+    @_locked
     def update_send_settings(self, port, settings):
         port_config = self.get_port_config(port)
         port_config["send_settings"].update(settings)
         self.save_port_config(port, port_config)
 
     def export_config(self, file_path):
+        self.flush()
         try:
+            with self._lock:
+                # 导出包含全部分段，按键读取时加载尚未加载的分段。
+                config = {
+                    key: self.get_send_history() if key == "send_history" else self.config[key]
+                    for key in self._get_default_config()
+                }
+                text = json.dumps(config, indent=2, ensure_ascii=False)
             with open(file_path, "w", encoding="utf-8") as stream:
-                json.dump(self.config, stream, indent=2, ensure_ascii=False)
+                stream.write(text)
             return True
         except OSError as error:
             print(f"导出配置失败: {error}")
             return False
 
     def import_config(self, file_path):
+        self.flush()
         try:
             with open(file_path, "r", encoding="utf-8") as stream:
                 raw = json.load(stream)
             config = self._normalize_config(raw)
-            self._write_config(config)
-            self.config = config
+            with self._lock:
+                self._write_config(config)
+                self._adopt_config(config)
+                self._dirty.clear()
+                self._deadline = None
             return True
         except (OSError, ValueError, json.JSONDecodeError, RecursionError) as error:
             print(f"导入配置失败: {error}")
@@ -322,38 +643,49 @@ class ConfigManager:
     def get_quick_command_groups(self):
         return self.config["quick_command_groups"]
 
+    @_locked
     def set_quick_command_groups(self, groups):
         self.config["quick_command_groups"] = self._normalize_quick_command_groups(groups)
-        self.save_config()
-
+        if self._quick_commands is not None:
+            self._quick_commands.reset(self.config["quick_command_groups"])
+        self.save_config("quick_commands")
+
+    def get_quick_command_library(self):
+        """返回快捷指令库；库的修改在配置锁内进行并标记快捷指令分段待保存。"""
+        with self._lock:
+            if self._quick_commands is None:
+                self._quick_commands = QuickCommandLibrary(
+                    self.config["quick_command_groups"], self._lock, lambda: self.save_config("quick_commands"))
+            return self._quick_commands
+
+    @_locked
     def add_send_history(self, data, mode="TEXT"):
         current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        history = self.config["send_history"]
-        if history and history[0]["data"] == data and history[0]["mode"] == mode:
-            history[0]["time"] = current_time
-        else:
-            history.insert(0, {"data": data, "mode": mode, "time": current_time})
-        max_history = self.get_global_settings()["send_history_max"]
-        del history[max_history:]
-        self.save_config()
+        self.get_send_history_store().add(data, mode, current_time)
+        self.save_config(self.HISTORY_SECTION)
 
     def get_send_history(self):
-        return self.config["send_history"]
+        """返回从新到旧的发送历史列表副本。"""
+        with self._lock:
+            return self.get_send_history_store().entries()
 
+    @_locked
     def clear_send_history(self):
-        self.config["send_history"] = []
-        self.save_config()
+        self.get_send_history_store().clear()
+        self.save_config(self.HISTORY_SECTION)
 
     def get_command_panel_visible(self):
         return self.config["command_panel_visible"]
 
+    @_locked
     def set_command_panel_visible(self, visible):
         self.config["command_panel_visible"] = bool(visible)
-        self.save_config()
+        self.save_config("global")
 
     def get_send_text(self, port):
         return self.get_port_config(port)["send_text"]
 
+    @_locked
     def set_send_text(self, port, text):
         port_config = self.get_port_config(port)
         port_config["send_text"] = text if isinstance(text, str) else ""
@@ -362,25 +694,35 @@ class ConfigManager:
     def get_dual_panel_mode(self):
         return self.config["dual_panel_mode"]
 
+    @_locked
     def set_dual_panel_mode(self, enabled):
         self.config["dual_panel_mode"] = bool(enabled)
-        self.save_config()
+        self.save_config("global")
 
     def get_global_settings(self):
         return self.config["global_settings"]
 
+    @_locked
     def set_global_settings(self, settings):
-        raw = dict(self.config)
-        raw["global_settings"] = settings
-        self.config = self._normalize_config(raw)
-        self.save_config()
+        # 只更新传入的键，未在设置界面出现的全局设置保持原值。
+        raw = {"global_settings": {**self.config["global_settings"], **settings}}
+        global_settings = self._normalize_config(raw)["global_settings"]
+        self.config["global_settings"] = global_settings
+        self.save_delay = global_settings["config_save_delay_ms"] / 1000
+        sections = ["global"]
+        if self._history is not None:
+            # 未加载的发送历史在加载时按新的上限裁剪。
+            self._history.set_max_entries(global_settings["send_history_max"])
+            sections.append(self.HISTORY_SECTION)
+        self.save_config(*sections)
 
     def get_theme(self):
         return self.config["theme"]
 
+    @_locked
     def set_theme(self, theme_name):
         self.config["theme"] = theme_name if theme_name in self.THEMES else "light"
-        self.save_config()
+        self.save_config("global")
 
     def get_font_size(self):
         return self.get_global_settings()["fontSize"]
@@ -0,0 +1,302 @@
+"""接收分帧：分隔符、长度前缀、SLIP、COBS 与 Modbus RTU 增量解码器，以及接收线程中的分帧队列。"""
+
+import re
+import threading
+from collections import deque, namedtuple
+from datetime import datetime
+
+from .receive_data_utils import ReceiveArrivals, ReceiveHexFormatter
+from .transaction_engine import unescape_delimiter
+
+
+# payload 为解码后的帧内容，time_ns 为完成该帧的数据块到达时间（perf_counter_ns），
+# error 为 None 表示帧有效，否则为校验或格式错误的说明。
+Frame = namedtuple("Frame", "payload time_ns error")
+
+FRAME_DECODERS = ("none", "delimiter", "length", "slip", "cobs", "modbus_rtu")
+MAX_FRAME_BYTES = 64 * 1024
+
+
+class _DelimitedDecoder:
+    """以单个或多个字节结束一帧的解码器基类，子类通过 _decode 转换帧内容。"""
+
+    def __init__(self, delimiter, max_frame_bytes=MAX_FRAME_BYTES):
+        if not delimiter:
+            raise ValueError("帧分隔符不能为空")
+        self.delimiter = bytes(delimiter)
+        self.max_frame_bytes = max_frame_bytes
+        self._buffer = bytearray()
+
+    def reset(self):
+        self._buffer.clear()
+
+    def _decode(self, frame):
+        """返回 (帧内容, 错误说明)；返回 None 表示忽略该帧。"""
+        return frame, None
+
+    def feed(self, data, time_ns):
+        """追加一块数据，返回其中完成的帧列表。"""
+        buffer = self._buffer
+        # 分隔符可能跨越两次读取，只从上次剩余数据的末尾附近开始查找。
+        start = max(0, len(buffer) - len(self.delimiter) + 1)
+        buffer += data
+        frames = []
+        consumed = 0
+        while True:
+            index = buffer.find(self.delimiter, max(consumed, start))
+            if index < 0:
+                break
+            decoded = self._decode(bytes(buffer[consumed:index]))
+            if decoded is not None:
+                frames.append(Frame(decoded[0], time_ns, decoded[1]))
+            consumed = index + len(self.delimiter)
+        if consumed:
+            del buffer[:consumed]
+        if len(buffer) > self.max_frame_bytes:
+            frames.append(Frame(bytes(buffer), time_ns, "超过最大帧长"))
+            buffer.clear()
+        return frames
+
+
+class DelimiterDecoder(_DelimitedDecoder):
+    """按分隔符分帧，帧内容不含分隔符。"""
+
+
+class SlipDecoder(_DelimitedDecoder):
+    """RFC 1055 SLIP：以 0xC0 结束一帧，0xDB 0xDC 与 0xDB 0xDD 分别还原为 0xC0 与 0xDB。"""
+
+    END, ESC = b"\xc0", b"\xdb"
+    _INVALID_ESCAPE = re.compile(rb"\xdb(?![\xdc\xdd])")
+    _ESCAPE = re.compile(rb"\xdb([\xdc\xdd])")
+
+    def __init__(self, max_frame_bytes=MAX_FRAME_BYTES):
+        super().__init__(self.END, max_frame_bytes)
+
+    def _decode(self, frame):
+        if not frame:
+            # 发送方常在帧前补一个 END 以清除线路噪声，产生的空帧直接忽略。
+            return None
+        error = "SLIP 转义无效" if self._INVALID_ESCAPE.search(frame) else None
+        return self._ESCAPE.sub(lambda match: b"\xc0" if match.group(1) == b"\xdc" else b"\xdb", frame), error
+
+
+class CobsDecoder(_DelimitedDecoder):
+    """COBS：以 0x00 结束一帧，帧内每个编码字节给出到下一个零字节的距离。"""
+
+    def __init__(self, max_frame_bytes=MAX_FRAME_BYTES):
+        super().__init__(b"\x00", max_frame_bytes)
+
+    def _decode(self, frame):
+        if not frame:
+            return None
+        output = bytearray()
+        index = 0
+        while index < len(frame):
+            code = frame[index]
+            end = index + code
+            if end > len(frame):
+                return frame, "COBS 编码长度无效"
+            output += frame[index + 1:end]
+            index = end
+            if code < 0xFF and index < len(frame):
+                output.append(0)
+        return bytes(output), None
+
+
+class LengthPrefixedDecoder:
+    """帧首 length_bytes 字节为负载长度（不含长度字段本身），帧内容为负载。"""
+
+    def __init__(self, length_bytes=2, byteorder="big", max_frame_bytes=MAX_FRAME_BYTES):
+        if length_bytes not in (1, 2, 4):
+            raise ValueError("长度字段须为 1、2 或 4 字节")
+        self.length_bytes = length_bytes
+        self.byteorder = byteorder
+        self.max_frame_bytes = max_frame_bytes
+        self._buffer = bytearray()
+
+    def reset(self):
+        self._buffer.clear()
+
+    def feed(self, data, time_ns):
+        buffer = self._buffer
+        buffer += data
+        frames = []
+        start = 0
+        header = self.length_bytes
+        while len(buffer) - start >= header:
+            length = int.from_bytes(buffer[start:start + header], self.byteorder)
+            if length > self.max_frame_bytes:
+                # 长度字段已不可信，无法再找到帧边界，丢弃全部缓存数据重新同步。
+                frames.append(Frame(bytes(buffer[start:]), time_ns, "长度字段超过最大帧长"))
+                start = len(buffer)
+                break
+            if len(buffer) - start < header + length:
+                break
+            frames.append(Frame(bytes(buffer[start + header:start + header + length]), time_ns, None))
+            start += header + length
+        if start:
+            del buffer[:start]
+        return frames
+
+
+def _crc16_table():
+    table = []
+    for value in range(256):
+        for _ in range(8):
+            value = (value >> 1) ^ 0xA001 if value & 1 else value >> 1
+        table.append(value)
+    return tuple(table)
+
+
+_CRC16_TABLE = _crc16_table()
+
+
+def modbus_crc16(data, crc=0xFFFF):
+    """Modbus CRC-16；帧末按小端附加 CRC 时，对整帧计算的结果为 0。"""
+    table = _CRC16_TABLE
+    for byte in data:
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+    return crc
+
+
+class ModbusRtuDecoder:
+    """Modbus RTU：按 CRC 校验确定帧边界，静默间隔后仍未校验通过的数据作为错误帧输出。
+
+    串口驱动与 USB 转换器会合并或拆分数据块，读取时刻无法可靠反映 3.5 字符的帧间
+    静默，因此逐字节累计 CRC，至少 4 字节且整帧 CRC 为 0 时即输出一帧，同一块中
+    连续的多帧也能拆开。帧内数据恰好构成有效 CRC 的概率约为 1/65536。新数据块距
+    上一块超过 ``gap_ns`` 时，之前未校验通过的数据以“CRC 错误”输出并重新同步；
+    默认取 3.5 字符时间与 50ms 中较大者，以容忍转换器的缓冲延迟。
+    """
+
+    MAX_ADU_BYTES = 256
+    MIN_GAP_NS = 50_000_000
+
+    def __init__(self, baudrate=9600, gap_ns=None):
+        # 每字符 11 位；波特率高于 19200 时按规范固定为 1.75ms。
+        char_gap_ns = 1_750_000 if baudrate > 19200 else int(3.5 * 11 / baudrate * 1e9)
+        self.gap_ns = gap_ns if gap_ns is not None else max(char_gap_ns, self.MIN_GAP_NS)
+        self._buffer = bytearray()
+        self._crc = 0xFFFF
+        self._last_ns = None
+
+    def reset(self):
+        self._buffer.clear()
+        self._crc = 0xFFFF
+        self._last_ns = None
+
+    def feed(self, data, time_ns):
+        frames = []
+        buffer = self._buffer
+        if buffer and self._last_ns is not None and time_ns - self._last_ns > self.gap_ns:
+            frames.append(Frame(bytes(buffer), self._last_ns, "CRC 错误"))
+            buffer.clear()
+            self._crc = 0xFFFF
+        self._last_ns = time_ns
+        table = _CRC16_TABLE
+        crc = self._crc
+        for byte in data:
+            buffer.append(byte)
+            crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+            if crc == 0 and len(buffer) >= 4:
+                frames.append(Frame(bytes(buffer[:-2]), time_ns, None))
+                buffer.clear()
+                crc = 0xFFFF
+            elif len(buffer) >= self.MAX_ADU_BYTES:
+                frames.append(Frame(bytes(buffer), time_ns, "CRC 错误"))
+                buffer.clear()
+                crc = 0xFFFF
+        self._crc = crc
+        return frames
+
+
+def unescape_frame_delimiter(text):
+    """将配置中的分隔符文本转换为字节；只支持 ASCII 字符与 \\r、\\n、\\t、\\\\、\\xHH 转义。"""
+    return unescape_delimiter(text).encode("latin-1")
+
+
+def create_frame_decoder(receive_settings, baudrate=9600):
+    """按接收设置创建解码器；frame_decoder 为 none 时返回 None。"""
+    kind = receive_settings.get("frame_decoder", "none")
+    if kind == "delimiter":
+        return DelimiterDecoder(unescape_frame_delimiter(receive_settings.get("frame_delimiter", "\\n")))
+    if kind == "length":
+        return LengthPrefixedDecoder(receive_settings.get("frame_length_bytes", 2))
+    if kind == "slip":
+        return SlipDecoder()
+    if kind == "cobs":
+        return CobsDecoder()
+    if kind == "modbus_rtu":
+        return ModbusRtuDecoder(baudrate)
+    return None
+
+
+class FramePipeline:
+    """接收线程中的分帧阶段：按读取顺序把数据交给当前解码器，完成的帧排入有界队列。
+
+    ``feed`` 由接收线程（或反应器线程）在每次读取后调用，界面线程以 ``take`` 取出已
+    完成的帧，只渲染帧而不再处理字节流。队列超过 ``max_frames`` 时丢弃新帧并计数。
+    """
+
+    MAX_FRAMES = 65536
+
+    def __init__(self, decoder=None, max_frames=MAX_FRAMES):
+        self._decoder = decoder
+        self._max_frames = max_frames
+        self._frames = deque()
+        self._dropped = 0
+        self._lock = threading.Lock()
+
+    @property
+    def decoder(self):
+        return self._decoder
+
+    def set_decoder(self, decoder):
+        """更换解码器并丢弃尚未取出的帧；None 表示停止分帧。"""
+        with self._lock:
+            self._decoder = decoder
+            self._frames.clear()
+
+    def feed(self, data, time_ns):
+        with self._lock:
+            decoder = self._decoder
+            if decoder is None:
+                return
+            frames = decoder.feed(data, time_ns)
+            room = self._max_frames - len(self._frames)
+            if len(frames) > room:
+                self._dropped += len(frames) - max(room, 0)
+                frames = frames[:max(room, 0)]
+            self._frames.extend(frames)
+
+    def take(self, max_frames=None):
+        """取出最多 max_frames 个已完成的帧。"""
+        with self._lock:
+            count = len(self._frames) if max_frames is None else min(max_frames, len(self._frames))
+            return [self._frames.popleft() for _ in range(count)]
+
+    def take_dropped(self):
+        with self._lock:
+            dropped, self._dropped = self._dropped, 0
+            return dropped
+
+    def reset(self):
+        """清除解码器的未完成数据与排队的帧，用于串口会话切换。"""
+        with self._lock:
+            if self._decoder is not None:
+                self._decoder.reset()
+            self._frames.clear()
+            self._dropped = 0
+
+
+class FrameFormatter:
+    """将帧格式化为带到达时间戳的显示行；TEXT 按编码解码，HEX 输出大写 HEX。"""
+
+    def format(self, frame, mode="HEX", encoding="UTF-8"):
+        moment = datetime.fromtimestamp(ReceiveArrivals.to_unix_ns(frame.time_ns) / 1e9)
+        if mode == "TEXT":
+            body = frame.payload.decode(encoding.replace("-", "").lower(), errors="replace").replace("\r", "\\r").replace("\n", "\\n")
+        else:
+            body = ReceiveHexFormatter.hex_text(frame.payload)
+        error = f" [{frame.error}]" if frame.error else ""
+        return moment.strftime("[%H:%M:%S.%f")[:-3] + f"] 帧 {len(frame.payload)} 字节{error}: {body}\n"
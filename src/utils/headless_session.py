@@ -0,0 +1,413 @@
+"""无界面多串口会话引擎：打开串口、保存日志、按计划发送并统计吞吐量，不依赖界面框架。"""
+
+import os
+import re
+import threading
+import time
+from concurrent.futures import wait
+from datetime import datetime
+
+from .byte_ring import ByteRingBuffer
+from .config_manager import ConfigManager
+from .log_writer import LogWriter
+from .receive_data_utils import (
+    ReceiveArrivals,
+    ReceiveDataUtils,
+    ReceiveHexFormatter,
+    ReceiveLogFormatter,
+    ReceiveTextDecoder,
+    ReceiveTextSegmenter,
+)
+from .send_data_utils import SendPayloadCache
+from .serial_manager import SerialManager
+from .serial_reactor import SerialReactor
+from .spill_buffer import SpillingReceiveBuffer
+
+
+MIB = 1024 * 1024
+# 日志文件名中替换为下划线的字符，串口路径的目录部分已先去掉。
+UNSAFE_FILENAME_CHARS = re.compile(r"[^\w.-]")
+
+
+class SendSchedule:
+    """按固定周期重复发送同一内容；count 为 0 表示不限次数。"""
+
+    __slots__ = ("data", "mode", "period", "count", "delay", "sent", "next_due")
+
+    def __init__(self, data, mode="TEXT", period_ms=1000, count=0, delay_ms=0):
+        self.data = data
+        self.mode = mode
+        self.period = period_ms / 1000
+        self.count = count
+        self.delay = delay_ms / 1000
+        self.sent = 0
+        self.next_due = None
+
+    @classmethod
+    def from_config(cls, raw, default_mode="TEXT"):
+        """解析配置中的一条发送计划，字段无效时抛出 ValueError。"""
+        if not isinstance(raw, dict) or not isinstance(raw.get("data"), str) or not raw["data"]:
+            raise ValueError("发送计划必须包含非空的 data 字符串")
+        mode = raw.get("mode", default_mode)
+        if mode not in ConfigManager.MODES:
+            raise ValueError(f"发送计划的 mode 无效: {mode!r}")
+        period_ms, count, delay_ms = raw.get("period_ms", 1000), raw.get("count", 0), raw.get("delay_ms", 0)
+        if not ConfigManager.valid_int(period_ms, 1, 3_600_000):
+            raise ValueError(f"发送计划的 period_ms 无效: {period_ms!r}")
+        if not ConfigManager.valid_int(count, 0, 2 ** 31) or not ConfigManager.valid_int(delay_ms, 0, 3_600_000):
+            raise ValueError("发送计划的 count 与 delay_ms 必须是非负整数")
+        return cls(raw["data"], mode, period_ms, count, delay_ms)
+
+    @property
+    def finished(self):
+        return bool(self.count) and self.sent >= self.count
+
+    def start(self, now):
+        self.next_due = now + self.delay
+
+    def take_due(self, now):
+        """返回到期应发送的次数并推进下次时间；落后超过一个周期时不补发积压的次数。"""
+        if self.next_due is None or self.finished or now < self.next_due:
+            return 0
+        self.next_due += self.period
+        if self.next_due <= now:
+            self.next_due = now + self.period
+        self.sent += 1
+        return 1
+
+
+class HeadlessSession:
+    """一个无界面串口会话。
+
+    接收线程直接读入有界环形缓冲，引擎线程周期性调用 ``poll`` 取出数据，按端口的
+    接收设置（TEXT/HEX、编码、日志时间戳）格式化后交给后台 LogWriter；未配置日志
+    文件时只计数不格式化。发送经 SerialManager 的常驻写线程异步完成。
+    """
+
+    MAX_POLL_BYTES = 256 * 1024
+
+    def __init__(self, port, port_config=None, global_settings=None, log_path=None, schedules=(), serial_manager=None):
+        port_config = port_config or ConfigManager.default_port_config()
+        settings = global_settings or ConfigManager._get_default_config()["global_settings"]
+        self.port = port
+        self.serial_settings = dict(port_config["serial_settings"])
+        self.receive_settings = dict(port_config["receive_settings"])
+        self.line_ending = port_config["send_settings"]["line_ending"]
+        self.reconnect_interval = settings["reconnect_interval"] if self.receive_settings["auto_reconnect"] else 0
+        self.schedules = list(schedules)
+        self.log_path = log_path
+        self._pending = SpillingReceiveBuffer(ByteRingBuffer(settings["receive_pending_mb"] * MIB), settings["receive_spill_mb"] * MIB)
+        # 打开多个串口时可共用反应器线程收发，未启用时每个串口各有接收线程与写线程。
+        reactor = SerialReactor.shared() if settings.get("serial_reactor") else None
+        self.serial_manager = serial_manager or SerialManager(reactor=reactor)
+        self.serial_manager.set_receive_sink(self._pending)
+        self.serial_manager.set_disconnect_callback(self._on_disconnected)
+        self.log_writer = LogWriter()
+        self.log_writer.apply_settings(settings)
+        self._log_generation = 1
+        self._logging = False
+        self.decoder = ReceiveTextDecoder()
+        self.segmenter = ReceiveTextSegmenter()
+        self.log_formatter = ReceiveLogFormatter()
+        self.hex_formatter = ReceiveHexFormatter(
+            self.receive_settings["hex_bytes_per_line"], self.receive_settings["hex_show_offset"], self.receive_settings["hex_show_ascii"])
+        self.payload_cache = SendPayloadCache()
+        # 发送结果在写线程中回调，计数受锁保护。
+        self._lock = threading.Lock()
+        self.rx_bytes = self.tx_bytes = self.dropped_bytes = 0
+        self.sends = self.send_failures = 0
+        self._in_flight = set()
+        self.started_at = None
+        self._disconnected = threading.Event()
+        self._next_reconnect = None
+        self._messages = []
+
+    def _message(self, level, text):
+        self._messages.append((level, text))
+
+    def take_messages(self):
+        """返回并清空会话提示，元素为 (级别, 信息)；级别为 info、warning 或 error。"""
+        messages, self._messages = self._messages, []
+        return messages
+
+    def start(self, now=None):
+        """打开日志文件与串口并开始发送计划；串口打开失败时按自动重连设置稍后重试。"""
+        now = time.monotonic() if now is None else now
+        self.started_at = now
+        if self.log_path:
+            directory = os.path.dirname(self.log_path)
+            try:
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._logging = self.log_writer.open(self.log_path, self._log_generation)
+            except OSError as error:
+                self._message("error", f"创建日志目录失败: {error}")
+        return self._open(now)
+
+    def _open(self, now):
+        self._pending.clear()
+        self.decoder.reset()
+        self.segmenter.reset()
+        self.log_formatter.reset()
+        self.hex_formatter.reset()
+        self._disconnected.clear()
+        if not self.serial_manager.open(self.port, **self.serial_settings):
+            self._message("error", "无法打开串口")
+            self._schedule_reconnect(now)
+            return False
+        self._next_reconnect = None
+        self._message("info", "已打开串口")
+        for schedule in self.schedules:
+            if schedule.next_due is None:
+                schedule.start(now)
+        return True
+
+    def _schedule_reconnect(self, now):
+        self._next_reconnect = now + self.reconnect_interval if self.reconnect_interval else None
+
+    def _on_disconnected(self):
+        # 在接收线程或串口监视线程中调用，由引擎线程在下一次 poll 中处理。
+        self._disconnected.set()
+
+    @property
+    def is_open(self):
+        return bool(self.serial_manager.is_open())
+
+    @property
+    def schedules_finished(self):
+        return all(schedule.finished for schedule in self.schedules)
+
+    def poll(self, now=None):
+        """取出并记录已接收的数据，处理断开重连和到期的发送，返回本次取出的字节数。"""
+        now = time.monotonic() if now is None else now
+        received = self._drain()
+        self._check_log()
+        if self._disconnected.is_set():
+            self._disconnected.clear()
+            self._message("error", "串口异常断开")
+            self._schedule_reconnect(now)
+        if self._next_reconnect is not None and now >= self._next_reconnect and not self.is_open:
+            self._open(now)
+        if self.is_open:
+            for schedule in self.schedules:
+                for _ in range(schedule.take_due(now)):
+                    self.send(schedule.data, schedule.mode)
+        return received
+
+    def _drain(self):
+        received = 0
+        while True:
+            data, offsets, times_ns = self._pending.read_marked(self.MAX_POLL_BYTES)
+            dropped = self._pending.take_dropped()
+            if dropped:
+                self.dropped_bytes += dropped
+                self._write_log(f"[警告] 接收缓冲已满，丢弃 {dropped} 字节\n")
+            if not data:
+                break
+            received += len(data)
+            if self._logging:
+                self._write_log(self._format(data, ReceiveArrivals(offsets, times_ns)))
+            if len(data) < self.MAX_POLL_BYTES:
+                break
+        self.rx_bytes += received
+        return received
+
+    def _format(self, data, arrivals):
+        settings = self.receive_settings
+        if settings["mode"] == "HEX":
+            return self.hex_formatter.format(data)
+        if settings["log_mode"]:
+            return self.log_formatter.format_batch(ReceiveDataUtils.iter_timed_segments(
+                data, arrivals, self.decoder, self.segmenter, settings["encoding"]))
+        return self.log_formatter.format(self.segmenter.segment(self.decoder.decode(data, settings["encoding"])), False)
+
+    def _write_log(self, text):
+        if self._logging and text:
+            self.log_writer.write(text, self._log_generation)
+
+    def _check_log(self):
+        dropped = self.log_writer.take_dropped_bytes()
+        if dropped:
+            self._message("warning", f"日志写入缓冲已满，丢弃约 {dropped} 字节")
+        errors = self.log_writer.take_errors(self._log_generation)
+        if errors:
+            self._logging = False
+            self._message("error", f"日志写入失败，已停止保存日志: {'；'.join(dict.fromkeys(errors))}")
+        for level, message in self.log_writer.take_notices(self._log_generation):
+            self._message(level, message)
+
+    def send(self, data, mode="TEXT"):
+        """编码后排入串口发送队列，不等待写入完成；返回是否已提交。"""
+        try:
+            payload = self.payload_cache.get(data, mode, self.receive_settings["encoding"], self.line_ending)
+        except (ValueError, UnicodeEncodeError) as error:
+            with self._lock:
+                self.send_failures += 1
+            self._message("error", f"发送内容无效: {error}")
+            return False
+        with self._lock:
+            self.sends += 1
+        future = self.serial_manager.submit(payload, self._on_sent)
+        with self._lock:
+            if not future.done():
+                self._in_flight.add(future)
+        return True
+
+    def _on_sent(self, future):
+        error = future.exception()
+        with self._lock:
+            self._in_flight.discard(future)
+            if error is None:
+                self.tx_bytes += future.result()
+            else:
+                self.send_failures += 1
+
+    def stats(self, now=None):
+        now = time.monotonic() if now is None else now
+        elapsed = max(now - self.started_at, 1e-9) if self.started_at is not None else 0
+        with self._lock:
+            return {
+                "port": self.port,
+                "open": self.is_open,
+                "rx_bytes": self.rx_bytes,
+                "tx_bytes": self.tx_bytes,
+                "rx_rate": self.rx_bytes / elapsed if elapsed else 0.0,
+                "tx_rate": self.tx_bytes / elapsed if elapsed else 0.0,
+                "sends": self.sends,
+                "send_failures": self.send_failures,
+                "dropped_bytes": self.dropped_bytes,
+            }
+
+    def close(self, timeout=2.0):
+        """有界等待已提交的发送完成后关闭串口，写完剩余接收数据后停止日志写入器。"""
+        with self._lock:
+            in_flight = list(self._in_flight)
+        wait(in_flight, timeout)
+        self.serial_manager.close()
+        self._drain()
+        self.log_writer.close(self._log_generation)
+        completed = self.log_writer.stop(timeout)
+        self._check_log()
+        self._pending.close()
+        return completed
+
+
+def _format_bytes(count):
+    for unit in ("B", "KB", "MB"):
+        if count < 1024 or unit == "MB":
+            return f"{count:.0f} {unit}" if unit == "B" else f"{count:.2f} {unit}"
+        count /= 1024
+
+
+class HeadlessEngine:
+    """在调用线程中周期性轮询多个 HeadlessSession，并汇总吞吐量报告。"""
+
+    POLL_INTERVAL = 0.025
+
+    def __init__(self, sessions, poll_interval=POLL_INTERVAL):
+        self.sessions = list(sessions)
+        self.poll_interval = poll_interval
+        self.started_at = None
+        self._stop_event = threading.Event()
+
+    @classmethod
+    def from_config(cls, raw, log_directory=None, ports=None, reactor=None):
+        """按配置创建会话。
+
+        配置沿用应用导出 JSON 的 ``port_configs`` 与 ``global_settings``，另加可选的
+        ``log_directory`` 与 ``schedules``（以串口名为键的发送计划列表）。ports 为
+        要打开的串口，None 表示配置中的全部串口；未打开串口的发送计划被忽略。reactor
+        为 None 时按全局设置 ``serial_reactor`` 决定是否由共享反应器线程收发。
+        """
+        config = ConfigManager.normalize(raw)
+        if reactor is not None:
+            config["global_settings"]["serial_reactor"] = reactor
+        schedules_raw = raw.get("schedules", {})
+        if not isinstance(schedules_raw, dict):
+            raise ValueError("schedules 必须是以串口名为键的对象")
+        log_directory = log_directory if log_directory is not None else raw.get("log_directory")
+        if log_directory is not None and not isinstance(log_directory, str):
+            raise ValueError("log_directory 必须是字符串")
+        selected = list(config["port_configs"]) if ports is None else list(dict.fromkeys(ports))
+        unknown = [port for port in schedules_raw if port not in selected]
+        if unknown and ports is None:
+            raise ValueError(f"发送计划中的串口未在 port_configs 中配置: {', '.join(unknown)}")
+        if not selected:
+            raise ValueError("配置中没有要打开的串口")
+        stamp = datetime.now().strftime("%Y%m%d%H%M%S")
+        sessions = []
+        for port in selected:
+            # 命令行指定但未配置的串口使用默认端口设置。
+            port_config = config["port_configs"].get(port) or ConfigManager.default_port_config()
+            entries = schedules_raw.get(port, [])
+            if not isinstance(entries, list):
+                raise ValueError(f"{port} 的发送计划必须是列表")
+            schedules = [SendSchedule.from_config(entry, port_config["send_settings"]["mode"]) for entry in entries]
+            name = UNSAFE_FILENAME_CHARS.sub("_", os.path.basename(port) or port)
+            log_path = os.path.join(log_directory, f"{name}-{stamp}.log") if log_directory else None
+            sessions.append(HeadlessSession(port, port_config, config["global_settings"], log_path, schedules))
+        return cls(sessions)
+
+    def start(self):
+        """打开全部会话，返回未能打开的串口列表。"""
+        now = time.monotonic()
+        return [session.port for session in self.sessions if not session.start(now)]
+
+    def stop(self):
+        """请求 run 在当前轮询结束后返回，可在其他线程或信号处理中调用。"""
+        self._stop_event.set()
+
+    def poll(self, now=None):
+        now = time.monotonic() if now is None else now
+        return sum(session.poll(now) for session in self.sessions)
+
+    def take_messages(self):
+        return [(session.port, level, text) for session in self.sessions for level, text in session.take_messages()]
+
+    def run(self, duration=None, report_interval=0, output=None, until_done=False):
+        """轮询直到到达 duration 秒、调用 stop，或 until_done 时全部发送计划完成。"""
+        started = self.started_at = time.monotonic()
+        next_report = started + report_interval if report_interval else None
+        while not self._stop_event.is_set():
+            now = time.monotonic()
+            self.poll(now)
+            if output:
+                self.write_messages(output)
+            if next_report is not None and now >= next_report:
+                if output:
+                    output.write(self.report(now))
+                next_report += report_interval
+            if duration is not None and now - started >= duration:
+                break
+            if until_done and all(session.schedules_finished for session in self.sessions):
+                break
+            self._stop_event.wait(self.poll_interval)
+        return time.monotonic() - started
+
+    def write_messages(self, output):
+        for port, level, text in self.take_messages():
+            label = {"info": "信息", "warning": "警告", "error": "错误"}.get(level, level)
+            output.write(f"[{label}] {port}: {text}\n")
+
+    def report(self, now=None):
+        """返回各串口与合计的收发字节数、平均速率、发送次数和丢弃字节数。"""
+        now = time.monotonic() if now is None else now
+        lines = []
+        totals = {"rx_bytes": 0, "tx_bytes": 0, "rx_rate": 0.0, "tx_rate": 0.0, "sends": 0, "send_failures": 0, "dropped_bytes": 0}
+        for session in self.sessions:
+            stats = session.stats(now)
+            for key in totals:
+                totals[key] += stats[key]
+            lines.append(self._report_line(stats["port"], stats, "已连接" if stats["open"] else "未连接"))
+        lines.append(self._report_line("合计", totals, f"{len(self.sessions)} 个串口"))
+        prefix = f"[{now - self.started_at:7.1f}s] " if self.started_at is not None else ""
+        return "".join(f"{prefix}{line}\n" for line in lines)
+
+    @staticmethod
+    def _report_line(name, stats, state):
+        return (f"{name}: RX {_format_bytes(stats['rx_bytes'])} ({_format_bytes(stats['rx_rate'])}/s)  "
+                f"TX {_format_bytes(stats['tx_bytes'])} ({_format_bytes(stats['tx_rate'])}/s)  "
+                f"发送 {stats['sends']} 次, 失败 {stats['send_failures']} 次  丢弃 {_format_bytes(stats['dropped_bytes'])}  {state}")
+
+    def close(self, timeout=2.0):
+        return all([session.close(timeout) for session in self.sessions])
@@ -1,20 +1,119 @@
-"""异步、有界日志写入器。"""
+"""异步、有界日志写入器，支持按大小或时间分段并在后台压缩旧分段。"""
 
+import gzip
+import os
+import re
+import shutil
 import threading
+import time
 from collections import deque
+from datetime import datetime
 from pathlib import Path
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class LogCompressor:
+    """在独立后台线程压缩已关闭的日志分段，压缩完成后才删除原文件。
+
+    安装了 zstandard 时使用 zstd，否则使用 gzip；压缩结果先写入临时文件再原子
+    替换，进程中途退出只会留下未压缩的原分段。失败信息通过 on_result 回报。
+    """
+
+    def __init__(self, on_result):
+        self._on_result = on_result
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def suffix():
+        return ".zst" if zstandard else ".gz"
+
+    def submit(self, path, generation=None):
+        with self._condition:
+            self._queue.append((path, generation))
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._condition.wait()
+                path, generation = self._queue.popleft()
+            target = path.with_name(path.name + self.suffix())
+            temporary = target.with_name(target.name + ".tmp")
+            try:
+                with path.open("rb") as source, self._open_target(temporary) as destination:
+                    shutil.copyfileobj(source, destination, 1024 * 1024)
+                os.replace(temporary, target)
+                path.unlink()
+            except OSError as error:
+                try:
+                    temporary.unlink()
+                except OSError:
+                    pass
+                self._on_result(generation, "warning", f"压缩日志分段失败: {error}")
+            else:
+                self._on_result(generation, "info", f"日志分段已压缩: {target}")
+
+    @staticmethod
+    def _open_target(path):
+        if zstandard:
+            return zstandard.ZstdCompressor().stream_writer(path.open("wb"), closefd=True)
+        return gzip.open(path, "wb", compresslevel=6)
+
+
+class _LogSegment:
+    """写入线程当前打开的日志分段。"""
+
+    __slots__ = ("path", "stream", "generation", "size", "opened_at", "unflushed", "last_flush")
+
+    def __init__(self, path, stream, generation, size):
+        self.path = path
+        self.stream = stream
+        self.generation = generation
+        self.size = size
+        self.opened_at = self.last_flush = time.monotonic()
+        self.unflushed = 0
+
 
 class LogWriter:
-    """在后台线程写入日志文件，并限制待写入日志数量。"""
+    """在后台线程写入日志文件，并限制待写入日志数量。
+
+    写入线程每次加锁取走全部排队内容，相邻的同一会话日志拼接后编码一次并以二进制
+    追加写入。未刷新内容达到 flush_bytes 或距上次刷新超过 flush_interval 秒时刷新文件，
+    两者为 0 时只在关闭时刷新；fsync 为真时每次刷新后同步到磁盘。flush_bytes 与
+    rotate_bytes 都按实际写入的 UTF-8 字节数计；max_pending_bytes 按字符数估算的
+    UTF-8 长度上界计，入队时不编码。
 
-    def __init__(self, max_pending_bytes=4 * 1024 * 1024):
+    rotate_bytes 或 rotate_interval（秒）大于 0 时，在批次边界按大小或时间切换到
+    同目录下以“端口-时间戳”命名的新分段，新分段沿用原会话代次，关闭后的旧会话
+    日志仍会被丢弃；compress 为真时旧分段交给 LogCompressor 在后台压缩。
+    """
+
+    SEGMENT_TIMESTAMP = re.compile(r"-\d{14}(?:-\d+)?$")
+
+    def __init__(self, max_pending_bytes=4 * 1024 * 1024, flush_bytes=64 * 1024, flush_interval=1.0, fsync=False,
+                 rotate_bytes=0, rotate_interval=0, compress=True):
         self._queue = deque()
         self._condition = threading.Condition()
         self._pending_bytes = 0
-        self._max_pending_bytes = max_pending_bytes
+        self.max_pending_bytes = max_pending_bytes
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.rotate_bytes = rotate_bytes
+        self.rotate_interval = rotate_interval
+        self.compress = compress
+        self._compressor = None
         self._dropped_bytes = 0
         self._errors = deque()
+        self._notices = deque()
         self._stopped = False
         self._thread = threading.Thread(target=self._run, daemon=True)
         self._thread.start()
@@ -30,12 +129,32 @@ class LogWriter:
     def open(self, path, generation=None):
         return self._put_control("open", path, generation)
 
+    def apply_settings(self, settings):
+        """应用全局设置中的日志缓冲上限、刷新与分段策略，修改后立即生效。"""
+        mib = 1024 * 1024
+        self.max_pending_bytes = settings.get("log_pending_mb", 4) * mib
+        self.flush_bytes = settings.get("log_flush_kb", 64) * 1024
+        self.flush_interval = settings.get("log_flush_interval_ms", 1000) / 1000
+        self.fsync = settings.get("log_fsync", False)
+        self.rotate_bytes = settings.get("log_rotate_mb", 0) * mib
+        self.rotate_interval = settings.get("log_rotate_minutes", 0) * 60
+        self.compress = settings.get("log_compress", True)
+
+    @staticmethod
+    def _size_bound(text):
+        """估算文本的 UTF-8 字节数而不编码：ASCII 为字符数，其余按每字符 3 字节计。
+
+        基本多文种平面的字符（含中文）最多 3 字节，估算不会低于实际长度；只有
+        表情等辅助平面字符实际为 4 字节，会略微少计。
+        """
+        return len(text) if text.isascii() else len(text) * 3
+
     def write(self, text, generation=None):
-        size = len(text.encode("utf-8"))
+        size = self._size_bound(text)
         with self._condition:
             if self._stopped:
                 return False
-            if self._pending_bytes + size > self._max_pending_bytes:
+            if self._pending_bytes + size > self.max_pending_bytes:
                 self._dropped_bytes += size
                 return False
             self._queue.append(("write", text, size, generation))
@@ -57,6 +176,7 @@ class LogWriter:
         return not self._thread.is_alive()
 
     def take_dropped_bytes(self):
+        """返回并清零因缓冲已满丢弃的日志量，按 _size_bound 的估算字节数计。"""
         with self._condition:
             dropped, self._dropped_bytes = self._dropped_bytes, 0
             return dropped
@@ -79,53 +199,146 @@ class LogWriter:
             self._errors = pending
             return errors
 
+    def take_notices(self, generation=None):
+        """返回并清空分段与压缩的提示，元素为 (级别, 信息)；级别为 info 或 warning。"""
+        with self._condition:
+            notices = [(level, message) for notice_generation, level, message in self._notices
+                       if generation is None or notice_generation == generation]
+            self._notices = deque(notice for notice in self._notices if generation is not None and notice[0] != generation)
+            return notices
+
     def _record_error(self, message, generation=None):
         with self._condition:
             self._errors.append((generation, message))
 
-    def _close_stream(self, stream, generation=None):
-        if not stream:
+    def _record_notice(self, generation, level, message):
+        with self._condition:
+            self._notices.append((generation, level, message))
+
+    def _flush_segment(self, segment):
+        segment.stream.flush()
+        if self.fsync:
+            os.fsync(segment.stream.fileno())
+        segment.unflushed = 0
+        segment.last_flush = time.monotonic()
+
+    def _close_segment(self, segment):
+        if not segment:
             return None
         try:
-            stream.flush()
+            self._flush_segment(segment)
         except OSError as error:
-            self._record_error(f"关闭日志文件失败: {error}", generation)
+            self._record_error(f"关闭日志文件失败: {error}", segment.generation)
         try:
-            stream.close()
+            segment.stream.close()
         except OSError as error:
-            self._record_error(f"关闭日志文件失败: {error}", generation)
+            self._record_error(f"关闭日志文件失败: {error}", segment.generation)
         return None
 
+    def _open_segment(self, path, generation):
+        path = Path(path)
+        try:
+            # 二进制追加：每批只编码一次，写入的字节数直接用于分段大小与刷新阈值。
+            stream = path.open("ab")
+        except OSError as error:
+            self._record_error(f"无法打开日志文件: {error}", generation)
+            return None
+        try:
+            size = path.stat().st_size
+        except OSError:
+            size = 0
+        return _LogSegment(path, stream, generation, size)
+
+    def _next_segment_path(self, path):
+        """按“端口-时间戳”生成下一分段路径；同一秒内多次分段时追加序号。"""
+        prefix = self.SEGMENT_TIMESTAMP.sub("", path.stem)
+        stamp = f"{datetime.now():%Y%m%d%H%M%S}"
+        candidate = path.with_name(f"{prefix}-{stamp}{path.suffix}")
+        index = 1
+        while candidate == path or candidate.exists() or candidate.with_name(candidate.name + LogCompressor.suffix()).exists():
+            candidate = path.with_name(f"{prefix}-{stamp}-{index}{path.suffix}")
+            index += 1
+        return candidate
+
+    def _should_rotate(self, segment, incoming):
+        if segment.size == 0:
+            return False
+        if self.rotate_bytes > 0 and segment.size + incoming > self.rotate_bytes:
+            return True
+        return self.rotate_interval > 0 and time.monotonic() - segment.opened_at >= self.rotate_interval
+
+    def _rotate(self, segment):
+        """关闭当前分段并以同一会话代次打开新分段，旧分段按设置交给后台压缩。"""
+        generation = segment.generation
+        path = self._next_segment_path(segment.path)
+        self._close_segment(segment)
+        if self.compress:
+            if self._compressor is None:
+                self._compressor = LogCompressor(self._record_notice)
+            self._compressor.submit(segment.path, generation)
+        new_segment = self._open_segment(path, generation)
+        if new_segment:
+            self._record_notice(generation, "info", f"日志已分段: {path}")
+        return new_segment
+
     def _run(self):
-        stream = None
-        stream_generation = None
+        segment = None
         while True:
             with self._condition:
                 while not self._queue:
-                    self._condition.wait()
-                command, value, size, generation = self._queue.popleft()
-                self._pending_bytes -= size
-            if command == "open":
-                if stream:
-                    stream = self._close_stream(stream, stream_generation)
-                    stream_generation = None
+                    # 有未刷新内容时按刷新间隔醒来，空闲的日志也会及时落盘。
+                    timeout = None
+                    if segment and segment.unflushed and self.flush_interval > 0:
+                        timeout = segment.last_flush + self.flush_interval - time.monotonic()
+                        if timeout <= 0:
+                            break
+                    self._condition.wait(timeout)
+                items = self._queue
+                self._queue = deque()
+                self._pending_bytes = 0
+            batch = []
+            for command, value, _size, generation in items:
+                if command == "write":
+                    if segment and generation == segment.generation:
+                        batch.append(value)
+                    continue
+                if batch:
+                    segment = self._write_batch(segment, batch)
+                    batch = []
+                if command == "open":
+                    segment = self._close_segment(segment)
+                    segment = self._open_segment(value, generation)
+                elif command == "close" and segment and (generation is None or generation == segment.generation):
+                    segment = self._close_segment(segment)
+                elif command == "stop":
+                    self._close_segment(segment)
+                    return
+            if batch:
+                segment = self._write_batch(segment, batch)
+            if segment and segment.unflushed and (
+                (self.flush_bytes > 0 and segment.unflushed >= self.flush_bytes)
+                or (self.flush_interval > 0 and time.monotonic() - segment.last_flush >= self.flush_interval)
+            ):
                 try:
-                    stream = Path(value).open("a", encoding="utf-8")
-                    stream_generation = generation
+                    self._flush_segment(segment)
                 except OSError as error:
-                    stream = None
-                    self._record_error(f"无法打开日志文件: {error}", generation)
-            elif command == "write" and stream and generation == stream_generation:
-                try:
-                    stream.write(value)
-                except OSError as error:
-                    stream = self._close_stream(stream, stream_generation)
-                    self._record_error(f"写入日志文件失败: {error}", stream_generation)
-                    stream_generation = None
-            elif command == "close" and stream and (generation is None or generation == stream_generation):
-                stream = self._close_stream(stream, stream_generation)
-                stream_generation = None
-            elif command == "stop":
-                if stream:
-                    self._close_stream(stream, stream_generation)
-                return
+                    self._record_error(f"写入日志文件失败: {error}", segment.generation)
+                    segment = self._close_segment(segment)
+
+    def _write_batch(self, segment, batch):
+        """将同一会话的一批日志拼接后一次写入，需要时先切换分段；写入失败时返回 None。"""
+        data = "".join(batch).encode("utf-8")
+        size = len(data)
+        if self._should_rotate(segment, size):
+            segment = self._rotate(segment)
+            if not segment:
+                return None
+        try:
+            segment.stream.write(data)
+        except OSError as error:
+            self._close_segment(segment)
+            self._record_error(f"写入日志文件失败: {error}", segment.generation)
+            return None
+        segment.size += size
+        segment.unflushed += size
+        return segment
@@ -0,0 +1,122 @@
+"""串口会话操作执行器：以一个常驻线程按提交顺序执行打开、关闭，并按序启动发送。"""
+
+import threading
+import time
+from collections import deque
+
+
+class OperationExecutor:
+    """按 FIFO 顺序执行会话操作，并统计队列深度与操作耗时。
+
+    每个会话只创建一个常驻线程，操作之间不再各自创建线程。``submit`` 的操作
+    在线程中依次同步执行；``submit_async`` 的操作（如发送）只在线程中按序启动
+    并返回 Future，相邻的异步操作不互相等待，写线程仍可排队合并。同步操作开始
+    前会等待此前全部异步操作完成，因此完成回调的顺序与提交顺序一致，打开、
+    关闭和发送状态不会倒置。异步操作的耗时在其 Future 完成时记录。
+    """
+
+    LATENCY_SAMPLES = 256
+
+    def __init__(self):
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._running = None
+        self._stopped = False
+        self._thread = None
+        self._latencies = {}
+        self._outstanding = 0
+
+    def submit(self, name, callback):
+        """加入一个同步操作；返回 False 表示执行器已停止。"""
+        return self._enqueue(name, callback, False)
+
+    def submit_async(self, name, start):
+        """加入一个异步操作；start() 返回 Future，返回 None 表示已同步完成。
+
+        调用方应在 start 内先为 Future 添加自己的完成回调，执行器随后添加的回调
+        才会在其之后运行，保证下一个同步操作开始时完成通知已经发出。
+        """
+        return self._enqueue(name, start, True)
+
+    def _enqueue(self, name, callback, is_async):
+        with self._condition:
+            if self._stopped:
+                return False
+            self._queue.append((name, callback, time.perf_counter(), is_async))
+            if not self._thread:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._condition.notify()
+            return True
+
+    def queue_depth(self):
+        """返回尚未完成的操作数量，包含正在执行的操作。"""
+        with self._condition:
+            return len(self._queue) + (1 if self._running else 0) + self._outstanding
+
+    def stats(self):
+        """返回各类操作的次数及从提交到完成的耗时（毫秒）。"""
+        with self._condition:
+            result = {}
+            for name, samples in self._latencies.items():
+                values = samples["recent"]
+                result[name] = {
+                    "count": samples["count"],
+                    "last_ms": values[-1] * 1000,
+                    "avg_ms": sum(values) / len(values) * 1000,
+                    "max_ms": max(values) * 1000,
+                }
+            return result
+
+    def stop(self, timeout=0):
+        """执行完已排队操作后结束线程，之后的提交将被拒绝。
+
+        timeout 大于 0 时最多等待该秒数直到已排队操作全部完成，返回是否已完成。
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+            if timeout > 0:
+                self._condition.wait_for(lambda: self._thread is None, timeout)
+            return self._thread is None
+
+    def _record_latency(self, name, latency):
+        samples = self._latencies.setdefault(name, {"count": 0, "recent": deque(maxlen=self.LATENCY_SAMPLES)})
+        samples["count"] += 1
+        samples["recent"].append(latency)
+
+    def _on_async_done(self, name, submitted):
+        with self._condition:
+            self._record_latency(name, time.perf_counter() - submitted)
+            self._outstanding -= 1
+            self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue and not self._stopped:
+                    self._condition.wait()
+                if not self._queue:
+                    self._thread = None
+                    self._condition.notify_all()
+                    return
+                name, callback, submitted, is_async = self._queue[0]
+                if not is_async:
+                    # 同步操作须等此前启动的发送全部完成，完成通知才不会倒置。
+                    while self._outstanding:
+                        self._condition.wait()
+                self._running = self._queue.popleft()
+            future = None
+            try:
+                future = callback()
+            except Exception as error:
+                print(f"串口操作 {name} 执行失败: {error}")
+            finally:
+                with self._condition:
+                    self._running = None
+                    if is_async and future is not None:
+                        self._outstanding += 1
+                    else:
+                        self._record_latency(name, time.perf_counter() - submitted)
+            if is_async and future is not None:
+                future.add_done_callback(lambda _future, name=name, submitted=submitted: self._on_async_done(name, submitted))
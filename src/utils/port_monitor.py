@@ -0,0 +1,104 @@
+"""共享的串口在位监视器，避免每个接收线程各自枚举系统设备。"""
+
+import itertools
+import threading
+import time
+
+import serial.tools.list_ports
+
+
+class PortPresenceMonitor:
+    """按固定间隔统一枚举系统串口，缓存结果并向订阅的会话推送移除事件。
+
+    只有曾在枚举结果中出现过的串口才会被判定为移除；伪终端、URL 等不在系统
+    枚举中的端口不会被误判断开，其异常由读取失败发现。
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, interval=0.5, enumerate_ports=None):
+        self.interval = interval
+        self._enumerate_ports = enumerate_ports or self._list_system_ports
+        self._condition = threading.Condition()
+        self._subscriptions = {}
+        self._tokens = itertools.count(1)
+        self._ports = frozenset()
+        self._has_snapshot = False
+        self._thread = None
+
+    @classmethod
+    def shared(cls):
+        """返回进程内所有串口会话共用的监视器。"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @staticmethod
+    def _list_system_ports():
+        return [port.device for port in serial.tools.list_ports.comports()]
+
+    def get_cached_ports(self):
+        """返回最近一次枚举到的串口集合，不触发新的枚举。"""
+        with self._condition:
+            return self._ports
+
+    def subscribe(self, port_name, callback):
+        """订阅串口移除事件；回调在监视线程中以串口名调用，且最多调用一次。"""
+        with self._condition:
+            token = next(self._tokens)
+            seen = self._has_snapshot and port_name in self._ports
+            self._subscriptions[token] = [port_name, callback, seen]
+            if not self._thread or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            return token
+
+    def unsubscribe(self, token):
+        with self._condition:
+            if self._subscriptions.pop(token, None) is not None:
+                self._condition.notify_all()
+
+    def poll_once(self):
+        """枚举一次系统串口，更新缓存并派发移除事件。"""
+        try:
+            ports = frozenset(self._enumerate_ports())
+        except Exception as error:
+            # 枚举失败不能作为断开依据，保留上一次结果等待下个周期。
+            print(f"枚举串口失败: {error}")
+            return
+        removed = []
+        with self._condition:
+            self._ports = ports
+            self._has_snapshot = True
+            for token, subscription in list(self._subscriptions.items()):
+                port_name, callback, seen = subscription
+                if port_name in ports:
+                    subscription[2] = True
+                elif seen:
+                    del self._subscriptions[token]
+                    removed.append((port_name, callback))
+        for port_name, callback in removed:
+            try:
+                callback(port_name)
+            except Exception as error:
+                print(f"处理串口移除事件失败: {error}")
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._subscriptions:
+                    # 没有打开的串口时退出线程，下一次订阅会重新启动。
+                    if self._thread is threading.current_thread():
+                        self._thread = None
+                    return
+            self.poll_once()
+            deadline = time.monotonic() + self.interval
+            with self._condition:
+                # 订阅全部取消时提前醒来退出，否则保持固定枚举周期。
+                while self._subscriptions:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
@@ -0,0 +1,207 @@
+"""快捷指令库：分组指令列表与按名称、数据、模式检索的内存索引。"""
+
+from contextlib import nullcontext
+
+
+MODES = ("TEXT", "HEX")
+REPLY_TYPES = ("delimiter", "regex", "length")
+DEFAULT_REPLY_TIMEOUT_MS = 1000
+MAX_REPLY_RETRIES = 10
+
+
+def normalize_reply(raw):
+    """规范化指令的应答匹配配置 type/value/timeout_ms/retries；无效时返回 None。"""
+    if not isinstance(raw, dict) or raw.get("type") not in REPLY_TYPES:
+        return None
+    value = raw.get("value")
+    if not isinstance(value, str) or not value:
+        return None
+    if raw["type"] == "length" and not (value.isdigit() and int(value) > 0):
+        return None
+    timeout_ms, retries = raw.get("timeout_ms"), raw.get("retries")
+    return {
+        "type": raw["type"],
+        "value": value,
+        "timeout_ms": timeout_ms if _is_int(timeout_ms) and timeout_ms > 0 else DEFAULT_REPLY_TIMEOUT_MS,
+        "retries": min(retries, MAX_REPLY_RETRIES) if _is_int(retries) and retries >= 0 else 0,
+    }
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def normalize_command(raw):
+    """将一条指令规范化为 name/data/command/mode 字典，有效的应答匹配配置保存在 reply；
+    数据不是字符串时返回 None。"""
+    if not isinstance(raw, dict):
+        return None
+    data = raw.get("data", raw.get("command"))
+    if not isinstance(data, str):
+        return None
+    name = raw.get("name", "")
+    mode = raw.get("mode", "TEXT")
+    command = {
+        "name": name if isinstance(name, str) else "",
+        "data": data,
+        "command": data,
+        "mode": mode if mode in MODES else "TEXT",
+    }
+    reply = normalize_reply(raw.get("reply"))
+    if reply:
+        command["reply"] = reply
+    return command
+
+
+class QuickCommandLibrary:
+    """按分组保存快捷指令，并为每条指令维护名称、数据和模式的小写检索键。
+
+    ``groups`` 为 ``[{"name": ..., "commands": [...]}, ...]``，修改直接作用于该列表，
+    便于配置管理器按原对象序列化。编辑只更新受影响指令的检索键；检索时查询按
+    空白拆分为多个词，每个词都须出现在检索键中。新查询的每个旧词都包含在某个
+    新词中时（如继续输入），结果只在上一次结果中筛选，不再扫描全部指令。
+
+    监听器以 ``listener(change, group_index, row)`` 接收变化：``"inserted"``、
+    ``"removed"``、``"updated"`` 表示分组内单行变化，``"group_reset"`` 表示分组内
+    顺序变化，``"group_moved"`` 表示分组从 row 移到 group_index，``"reset"`` 表示
+    分组列表整体变化（group_index 与 row 为 None）。
+    """
+
+    def __init__(self, groups=None, lock=None, on_change=None):
+        self._lock = lock or nullcontext()
+        self._on_change = on_change
+        self._listeners = []
+        self._reset(groups if groups is not None else [])
+
+    def _reset(self, groups):
+        self._groups = groups
+        self._keys = [[self.search_key(command) for command in group["commands"]] for group in groups]
+        self._invalidate()
+
+    def _invalidate(self):
+        self._terms = None
+        self._matches = None
+
+    @staticmethod
+    def search_key(command):
+        return "\0".join((command["name"], command["data"], command["mode"])).casefold()
+
+    @property
+    def groups(self):
+        return self._groups
+
+    def __len__(self):
+        return len(self._groups)
+
+    def group_name(self, group_index):
+        return self._groups[group_index]["name"]
+
+    def command_count(self, group_index):
+        return len(self._groups[group_index]["commands"])
+
+    def command(self, group_index, row):
+        """返回指令字典，调用方不应修改。"""
+        return self._groups[group_index]["commands"][row]
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _changed(self, change, group_index=None, row=None):
+        self._invalidate()
+        if self._on_change:
+            self._on_change()
+        for listener in list(self._listeners):
+            listener(change, group_index, row)
+
+    def reset(self, groups):
+        """以新的分组列表替换全部内容并重建索引。"""
+        with self._lock:
+            self._reset(groups)
+            self._changed("reset")
+
+    def filter(self, query):
+        """返回每个分组中匹配查询的行号列表；查询为空时返回 None。"""
+        terms = query.casefold().split()
+        if not terms:
+            return None
+        with self._lock:
+            previous = self._terms
+            narrowing = previous is not None and all(any(old in new for new in terms) for old in previous)
+            if narrowing and terms == previous:
+                return self._matches
+            matches = []
+            for group_index, keys in enumerate(self._keys):
+                rows = self._matches[group_index] if narrowing else range(len(keys))
+                matches.append([row for row in rows if all(term in keys[row] for term in terms)])
+            self._terms, self._matches = terms, matches
+            return matches
+
+    def add_group(self, name):
+        with self._lock:
+            self._groups.append({"name": name, "commands": []})
+            self._keys.append([])
+            self._changed("reset")
+            return len(self._groups) - 1
+
+    def rename_group(self, group_index, name):
+        with self._lock:
+            self._groups[group_index]["name"] = name
+            self._changed("reset")
+
+    def remove_group(self, group_index):
+        with self._lock:
+            del self._groups[group_index]
+            del self._keys[group_index]
+            self._changed("reset")
+
+    def move_group(self, source, target):
+        """按索引移动分组，允许存在同名分组。"""
+        with self._lock:
+            if not (0 <= source < len(self._groups) and 0 <= target < len(self._groups)):
+                return False
+            self._groups.insert(target, self._groups.pop(source))
+            self._keys.insert(target, self._keys.pop(source))
+            self._changed("group_moved", target, source)
+            return True
+
+    def add_command(self, group_index, command):
+        command = normalize_command(command)
+        if command is None:
+            return -1
+        with self._lock:
+            commands = self._groups[group_index]["commands"]
+            commands.append(command)
+            self._keys[group_index].append(self.search_key(command))
+            self._changed("inserted", group_index, len(commands) - 1)
+            return len(commands) - 1
+
+    def set_command(self, group_index, row, command):
+        command = normalize_command(command)
+        if command is None:
+            return False
+        with self._lock:
+            self._groups[group_index]["commands"][row] = command
+            self._keys[group_index][row] = self.search_key(command)
+            self._changed("updated", group_index, row)
+            return True
+
+    def remove_command(self, group_index, row):
+        with self._lock:
+            del self._groups[group_index]["commands"][row]
+            del self._keys[group_index][row]
+            self._changed("removed", group_index, row)
+
+    def move_command(self, group_index, source, target):
+        """把 source 行移到 target 行之前；target 可等于指令数，表示移到末尾。"""
+        with self._lock:
+            commands, keys = self._groups[group_index]["commands"], self._keys[group_index]
+            if target > source:
+                target -= 1
+            commands.insert(target, commands.pop(source))
+            keys.insert(target, keys.pop(source))
+            self._changed("group_reset", group_index)
+            return target
@@ -1,9 +1,62 @@
 """串口接收数据的通用格式化与日志模式辅助逻辑。"""
 
+import binascii
 import codecs
+import time
+from array import array
 from datetime import datetime
 
 
+class ReceiveArrivals:
+    """一批接收数据中各数据块的批内起始偏移与到达时间（perf_counter_ns）。
+
+    两个平行的 ``array`` 只按数据块计数增长，不随字节数增加开销；
+    ``to_unix_seconds`` 将单调时钟换算为用于显示的墙上时间。
+    """
+
+    __slots__ = ("offsets", "times_ns")
+
+    # 进程启动时记录一次两个时钟的对应关系，之后只做整数加减。
+    _UNIX_NS_AT_ANCHOR = time.time_ns()
+    _PERF_NS_AT_ANCHOR = time.perf_counter_ns()
+
+    def __init__(self, offsets=None, times_ns=None):
+        self.offsets = offsets if offsets is not None else array("Q")
+        self.times_ns = times_ns if times_ns is not None else array("q")
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __iter__(self):
+        return zip(self.offsets, self.times_ns)
+
+    @classmethod
+    def to_unix_seconds(cls, perf_ns):
+        return cls.to_unix_ns(perf_ns) / 1_000_000_000
+
+    @classmethod
+    def to_unix_ns(cls, perf_ns):
+        return cls._UNIX_NS_AT_ANCHOR + perf_ns - cls._PERF_NS_AT_ANCHOR
+
+    @classmethod
+    def from_unix_ns(cls, offsets, unix_times_ns):
+        """由墙上时间（如捕获文件中的记录时间）构造，供回放复用同一显示流程。"""
+        delta = cls._PERF_NS_AT_ANCHOR - cls._UNIX_NS_AT_ANCHOR
+        return cls(array("Q", offsets), array("q", (value + delta for value in unix_times_ns)))
+
+    def unix_ns_chunks(self, default_unix_ns):
+        """返回 (批内偏移, Unix 纳秒) 列表，首块缺少到达记录的数据使用 default_unix_ns。"""
+        delta = self._UNIX_NS_AT_ANCHOR - self._PERF_NS_AT_ANCHOR
+        chunks = [(offset, perf_ns + delta) for offset, perf_ns in self]
+        if not chunks or chunks[0][0] > 0:
+            chunks.insert(0, (0, default_unix_ns))
+        return chunks
+
+    def first_unix_seconds(self):
+        """返回本批最早数据块的墙上到达时间；无记录时返回 None。"""
+        return self.to_unix_seconds(self.times_ns[0]) if self.times_ns else None
+
+
 class ReceiveTextDecoder:
     """按当前接收编码增量解码串口字节，保留跨批次的多字节字符。"""
 
@@ -65,6 +118,25 @@ class ReceiveTextSegmenter:
                 self._line_has_content = True
                 yield segment
 
+    def segment(self, text):
+        """整批返回与 iter_segments 拼接结果相同的文本，适用于无需逐行时间戳的场景。
+
+        连续换行只保留一个，批次开头的换行仅在上一批存在未结束的内容时保留；
+        全部操作由字符串替换完成，不在 Python 层逐行迭代。
+        """
+        if not text:
+            return ""
+        normalized = text.replace("\r\n", "\n").replace("\r", "\n")
+        # 每轮替换使连续换行长度减半，轮数只与最长空行序列的对数相关。
+        while "\n\n" in normalized:
+            normalized = normalized.replace("\n\n", "\n")
+        if normalized.startswith("\n") and not self._line_has_content:
+            normalized = normalized[1:]
+            if not normalized:
+                return ""
+        self._line_has_content = not normalized.endswith("\n")
+        return normalized
+
 
 class ReceiveLogFormatter:
     """维护日志模式的时间戳拼接状态，不依赖界面框架。"""
@@ -72,33 +144,166 @@ class ReceiveLogFormatter:
     MAX_CONTINUOUS_SECONDS = 0.1
 
     def __init__(self):
+        self._prefix_millisecond = None
+        self._prefix = ""
         self.reset()
 
     def reset(self):
         """使下一条日志内容重新添加时间戳。"""
+        # 以 Unix 时间戳（秒）保存，便于与接收线程记录的到达时间直接比较。
         self.last_timestamp_time = None
         self.last_line_ended = True
 
+    def _timestamp_prefix(self, arrival):
+        """返回到达时间对应的时间戳前缀；同一毫秒内复用已格式化的结果。"""
+        millisecond = round(arrival * 1_000_000) // 1000
+        if millisecond != self._prefix_millisecond:
+            moment = datetime.fromtimestamp(millisecond / 1000)
+            self._prefix = moment.strftime("[%H:%M:%S.%f")[:-3] + "] "
+            self._prefix_millisecond = millisecond
+        return self._prefix
+
     def format(self, text, log_mode, now=None):
         """按日志模式为文本添加时间戳，并返回应显示和写入日志的内容。"""
         now = now or datetime.now()
-        if not log_mode:
-            self.last_line_ended = text.endswith("\n")
-            self.last_timestamp_time = None
-            return text
-        needs_timestamp = (
-            self.last_line_ended
-            or self.last_timestamp_time is None
-            or (now - self.last_timestamp_time).total_seconds() > self.MAX_CONTINUOUS_SECONDS
-        )
-        if needs_timestamp:
-            timestamp = now.strftime("[%H:%M:%S.%f")[:-3] + "] "
-            prefix = "" if self.last_line_ended or text.startswith("\n") else "\n"
-            text = prefix + timestamp + text
-            # 使用时间戳起始时间而非上一数据包时间，保证高频连续数据也会分行。
-            self.last_timestamp_time = now
-        self.last_line_ended = text.endswith("\n")
-        return text
+        return self.format_batch(((text, now.timestamp()),), log_mode)
+
+    def format_batch(self, pieces, log_mode=True):
+        """格式化 (文本段, 到达时间) 序列并一次拼接返回。
+
+        到达时间为 Unix 时间戳（秒）。每段独立判断是否需要时间戳：上一段已结束
+        一行，或距上一个时间戳超过 100ms 的连续数据会换行并插入新时间戳。
+        """
+        output = []
+        append = output.append
+        last_line_ended = self.last_line_ended
+        last_timestamp_time = None if not log_mode else self.last_timestamp_time
+        for text, arrival in pieces:
+            if not text:
+                continue
+            if log_mode and (
+                last_line_ended
+                or last_timestamp_time is None
+                or arrival - last_timestamp_time > self.MAX_CONTINUOUS_SECONDS
+            ):
+                if not last_line_ended and not text.startswith("\n"):
+                    append("\n")
+                append(self._timestamp_prefix(arrival))
+                # 使用时间戳起始时间而非上一数据包时间，保证高频连续数据也会分行。
+                last_timestamp_time = arrival
+            append(text)
+            last_line_ended = text.endswith("\n")
+        self.last_line_ended = last_line_ended
+        self.last_timestamp_time = last_timestamp_time
+        return "".join(output)
+
+
+class ReceiveHexFormatter:
+    """按固定每行字节数排版 HEX 接收数据，跨批次保持行内列位置与累计偏移。
+
+    ``binascii.hexlify`` 与 256 项字节转换表在 C 层一次生成大写 HEX，之后每行
+    只做字符串切片；bytes_per_line 为 0 时保持原有的连续显示格式。
+    """
+
+    BYTES_PER_LINE_CHOICES = (0, 8, 16, 32)
+
+    _UPPER_TABLE = bytes.maketrans(b"abcdef", b"ABCDEF")
+    _ASCII_TABLE = bytes(value if 0x20 <= value < 0x7F else 0x2E for value in range(256))
+
+    def __init__(self, bytes_per_line=0, show_offset=False, show_ascii=False):
+        self.bytes_per_line = bytes_per_line
+        self.show_offset = show_offset
+        self.show_ascii = show_ascii
+        self.reset()
+
+    def reset(self):
+        """从偏移 0 的新行开始排版。"""
+        self._offset = 0
+        self._column = 0
+        self._line_ascii = ""
+        self._break_line = False
+
+    def configure(self, bytes_per_line, show_offset, show_ascii):
+        """更新排版参数；布局变化时未写满的行直接结束，累计偏移保持不变。"""
+        layout = (bytes_per_line, show_offset, show_ascii)
+        if layout == (self.bytes_per_line, self.show_offset, self.show_ascii):
+            return
+        self.bytes_per_line, self.show_offset, self.show_ascii = layout
+        if self._column:
+            self._break_line = True
+        self._column = 0
+        self._line_ascii = ""
+
+    @classmethod
+    def hex_text(cls, data):
+        """返回以空格分隔的大写 HEX 文本，末尾不带分隔符。"""
+        return binascii.hexlify(data, b" ").translate(cls._UPPER_TABLE).decode("ascii")
+
+    def format(self, data):
+        """格式化一批字节；未写满的行在下一批中继续，ASCII 列在整行写满时输出。"""
+        if not data:
+            return ""
+        hex_text = self.hex_text(data)
+        size = len(data)
+        per_line = self.bytes_per_line
+        output = ["\n"] if self._break_line else []
+        self._break_line = False
+        if per_line <= 0:
+            self._offset += size
+            output.append(hex_text)
+            output.append(" ")
+            return "".join(output)
+        ascii_text = data.translate(self._ASCII_TABLE).decode("ascii") if self.show_ascii else ""
+        position = 0
+        if self._column:
+            # 先补齐上一批未写满的行。
+            position = min(per_line - self._column, size)
+            output.append(" ")
+            output.append(hex_text[:position * 3 - 1])
+            self._line_ascii += ascii_text[:position]
+            self._column += position
+            if self._column < per_line:
+                self._offset += position
+                return "".join(output)
+            output.append(self._line_suffix())
+            self._offset += position
+        full_end = position + (size - position) // per_line * per_line
+        if full_end > position:
+            # 整行部分按固定宽度切片，每行只有一次列表推导迭代。
+            output.append(self._format_full_lines(hex_text, ascii_text, position, full_end))
+            self._offset += full_end - position
+        if full_end < size:
+            if self.show_offset:
+                output.append(f"{self._offset:08X}  ")
+            output.append(hex_text[full_end * 3:])
+            self._line_ascii = ascii_text[full_end:]
+            self._column = size - full_end
+            self._offset += self._column
+        return "".join(output)
+
+    def _line_suffix(self):
+        """结束已写满的当前行，返回 ASCII 列与换行。"""
+        suffix = f"  {self._line_ascii}\n" if self.show_ascii else "\n"
+        self._line_ascii = ""
+        self._column = 0
+        return suffix
+
+    def _format_full_lines(self, hex_text, ascii_text, start, end):
+        per_line = self.bytes_per_line
+        # 每个字节占 3 个字符（两位 HEX 加分隔空格），行尾不保留空格。
+        width = per_line * 3 - 1
+        indexes = range(start, end, per_line)
+        base = self._offset - start
+        if self.show_offset and self.show_ascii:
+            lines = [f"{base + index:08X}  {hex_text[index * 3:index * 3 + width]}  {ascii_text[index:index + per_line]}" for index in indexes]
+        elif self.show_offset:
+            lines = [f"{base + index:08X}  {hex_text[index * 3:index * 3 + width]}" for index in indexes]
+        elif self.show_ascii:
+            lines = [f"{hex_text[index * 3:index * 3 + width]}  {ascii_text[index:index + per_line]}" for index in indexes]
+        else:
+            lines = [hex_text[index * 3:index * 3 + width] for index in indexes]
+        lines.append("")
+        return "\n".join(lines)
 
 
 class ReceiveDataUtils:
@@ -109,7 +314,47 @@ class ReceiveDataUtils:
         normalized = encoding.replace("-", "").lower()
         return (normalized, "gb2312", "gbk") if normalized == "ascii" else (normalized,)
 
+    @staticmethod
+    def iter_timed_chunks(data, arrivals, default_arrival=None):
+        """按接收线程记录的数据块到达时间切分一批数据，产出 (字节块, Unix 到达时间)。
+
+        arrivals 为 ReceiveArrivals；同一毫秒内到达的相邻数据块合并为一块，时间戳
+        精度不变而格式化次数更少。没有到达记录的数据使用 default_arrival（默认当前时间）。
+        """
+        if not data:
+            return
+        groups = []
+        last_millisecond = None
+        for offset, perf_ns in arrivals or ():
+            millisecond = perf_ns // 1_000_000
+            if millisecond != last_millisecond:
+                groups.append((offset, perf_ns))
+                last_millisecond = millisecond
+        if not groups or groups[0][0] > 0:
+            groups.insert(0, (0, None))
+        for index, (offset, perf_ns) in enumerate(groups):
+            end = groups[index + 1][0] if index + 1 < len(groups) else len(data)
+            if perf_ns is not None:
+                arrival = ReceiveArrivals.to_unix_seconds(perf_ns)
+            else:
+                arrival = default_arrival if default_arrival is not None else datetime.now().timestamp()
+            yield data[offset:end], arrival
+
+    @staticmethod
+    def iter_timed_segments(data, arrivals, decoder, segmenter, encoding, default_arrival=None):
+        """按数据块到达时间逐块解码，产出 (文本段, Unix 到达时间)。"""
+        for chunk, arrival in ReceiveDataUtils.iter_timed_chunks(data, arrivals, default_arrival):
+            text = decoder.decode(chunk, encoding)
+            for segment in segmenter.iter_segments(text):
+                yield segment, arrival
+
+    @staticmethod
+    def iter_timed_hex(data, arrivals, formatter, default_arrival=None):
+        """按数据块到达时间逐块排版 HEX，产出 (HEX 文本, Unix 到达时间)。"""
+        for chunk, arrival in ReceiveDataUtils.iter_timed_chunks(data, arrivals, default_arrival):
+            yield formatter.format(chunk), arrival
+
     @staticmethod
     def format_hex(data):
         """将字节格式化为连续 HEX 显示文本。"""
-        return data.hex(" ").upper() + (" " if data else "")
+        return ReceiveHexFormatter.hex_text(data) + " " if data else ""
@@ -0,0 +1,151 @@
+"""接收显示的只追加行存储，界面按行号读取可见部分。"""
+
+from array import array
+from collections import deque
+from itertools import accumulate
+
+
+class ReceiveLineStore:
+    """保存最近若干行接收文本及其显示级别，追加与按行号读取均为常数时间。
+
+    每写满 BLOCK_LINES 行合并为一个字符串、一组行偏移和一组级别编码，已完成
+    的行不再各自占用 Python 对象；超出行数或字符数上限时整块淘汰最早的数据。
+    行号自创建或清空起单调递增，淘汰后仍可用原行号定位剩余内容。
+    """
+
+    BLOCK_LINES = 1024
+    # 超长的未换行数据（如连续 HEX）按该宽度折成多行保存，避免单行无限增长。
+    MAX_LINE_CHARS = 4096
+    LEVELS = ("normal", "info", "error", "success", "warning")
+    _LEVEL_CODES = {level: code for code, level in enumerate(LEVELS)}
+
+    def __init__(self, max_lines=100_000, max_chars=32 * 1024 * 1024):
+        self.max_lines = max_lines
+        self.max_chars = max_chars
+        self.clear()
+
+    def clear(self):
+        """清空全部内容，行号从 0 重新开始。"""
+        self._blocks = deque()
+        self._first_line = 0
+        self._tail_lines = []
+        self._tail_levels = bytearray()
+        self._open = ""
+        self._open_level = 0
+        self._chars = 0
+        self._max_line_chars = 0
+
+    @property
+    def first_line(self):
+        """最早仍保存的行号。"""
+        return self._first_line
+
+    @property
+    def end_line(self):
+        """最后一行之后的行号；未结束的行也计入。"""
+        return self._first_line + self.line_count()
+
+    @property
+    def max_line_chars(self):
+        """曾保存过的最长行的字符数，用于计算水平滚动范围。"""
+        return max(self._max_line_chars, len(self._open))
+
+    def line_count(self):
+        return len(self._blocks) * self.BLOCK_LINES + len(self._tail_lines) + (1 if self._open else 0)
+
+    def has_open_line(self):
+        """最后一行尚未以换行结束。"""
+        return bool(self._open)
+
+    def append(self, text, level="normal"):
+        """追加文本；换行符分隔各行，未结束的部分由下一次追加继续。"""
+        if not text:
+            return
+        code = self._LEVEL_CODES.get(level, 0)
+        pieces = text.split("\n")
+        self._extend_open(pieces[0], code)
+        if len(pieces) > 1:
+            self._complete(self._open, self._open_level)
+            self._open = ""
+            middle = pieces[1:-1]
+            if middle and max(map(len, middle)) <= self.MAX_LINE_CHARS:
+                self._complete_many(middle, code)
+            else:
+                for piece in middle:
+                    self._extend_open(piece, code)
+                    self._complete(self._open, self._open_level)
+                    self._open = ""
+            self._extend_open(pieces[-1], code)
+        self._evict()
+
+    def line(self, index):
+        """返回 (文本, 级别)；行号超出保存范围时抛出 IndexError。"""
+        relative = index - self._first_line
+        if relative < 0:
+            raise IndexError(index)
+        block_index, row = divmod(relative, self.BLOCK_LINES)
+        if block_index < len(self._blocks):
+            text, offsets, levels = self._blocks[block_index]
+            return text[offsets[row]:offsets[row + 1] - 1], self.LEVELS[levels[row]]
+        row = relative - len(self._blocks) * self.BLOCK_LINES
+        if row < len(self._tail_lines):
+            return self._tail_lines[row], self.LEVELS[self._tail_levels[row]]
+        if row == len(self._tail_lines) and self._open:
+            return self._open, self.LEVELS[self._open_level]
+        raise IndexError(index)
+
+    def text_range(self, start, end):
+        """返回 (行号, 列) 起止位置之间的文本，超出保存范围的部分被截去。"""
+        (start_line, start_column), (end_line, end_column) = start, end
+        if start_line < self._first_line:
+            start_line, start_column = self._first_line, 0
+        end_line = min(end_line, self.end_line - 1)
+        if end_line < start_line:
+            return ""
+        lines = [self.line(index)[0] for index in range(start_line, end_line + 1)]
+        lines[-1] = lines[-1][:end_column]
+        lines[0] = lines[0][start_column:]
+        return "\n".join(lines)
+
+    def _extend_open(self, text, code):
+        if not text:
+            return
+        if not self._open:
+            self._open_level = code
+        self._open += text
+        while len(self._open) > self.MAX_LINE_CHARS:
+            self._complete(self._open[:self.MAX_LINE_CHARS], self._open_level)
+            self._open = self._open[self.MAX_LINE_CHARS:]
+
+    def _complete(self, line, code):
+        self._tail_lines.append(line)
+        self._tail_levels.append(code)
+        self._chars += len(line) + 1
+        if len(line) > self._max_line_chars:
+            self._max_line_chars = len(line)
+        if len(self._tail_lines) >= self.BLOCK_LINES:
+            self._seal()
+
+    def _complete_many(self, lines, code):
+        # 批量路径：一次 extend 追加，写满的数据块随后统一封存。
+        self._tail_lines.extend(lines)
+        self._tail_levels.extend(bytes((code,)) * len(lines))
+        lengths = list(map(len, lines))
+        self._chars += sum(lengths) + len(lines)
+        self._max_line_chars = max(self._max_line_chars, max(lengths))
+        while len(self._tail_lines) >= self.BLOCK_LINES:
+            self._seal()
+
+    def _seal(self):
+        lines = self._tail_lines[:self.BLOCK_LINES]
+        offsets = array("I", (0,))
+        offsets.extend(accumulate(len(line) + 1 for line in lines))
+        self._blocks.append(("\n".join(lines), offsets, bytes(self._tail_levels[:self.BLOCK_LINES])))
+        del self._tail_lines[:self.BLOCK_LINES]
+        del self._tail_levels[:self.BLOCK_LINES]
+
+    def _evict(self):
+        while self._blocks and (self.line_count() > self.max_lines or self._chars > self.max_chars):
+            text, _offsets, _levels = self._blocks.popleft()
+            self._first_line += self.BLOCK_LINES
+            self._chars -= len(text) + 1
@@ -1,5 +1,7 @@
 """发送数据处理的共享辅助方法。"""
 
+from collections import OrderedDict
+
 from utils.hex_utils import HexUtils
 
 
@@ -60,3 +62,41 @@ class SendDataUtils:
             except (LookupError, UnicodeEncodeError):
                 continue
         raise UnicodeEncodeError(encoding, text, 0, len(text), "无法使用任何编码发送数据")
+
+
+class SendPayloadCache:
+    """按数据、模式、编码与行尾缓存最终写入串口的字节。
+
+    快捷指令与发送历史反复发送同一内容时只解析或编码一次。键包含数据文本本身，
+    编辑后的指令对应新的键，旧内容按最近最少使用淘汰；HEX 与编码、行尾无关。
+    """
+
+    # 超过该长度的内容（如整段粘贴的大文本）不缓存，避免长期占用内存。
+    MAX_CACHED_CHARS = 64 * 1024
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, data, mode="TEXT", encoding="UTF-8", line_ending="CRLF"):
+        """返回发送字节；HEX 无效时抛出 ValueError，无法编码时抛出 UnicodeEncodeError。"""
+        key = (mode, data) if mode == "HEX" else (mode, data, encoding, line_ending)
+        payload = self._entries.get(key)
+        if payload is not None:
+            self._entries.move_to_end(key)
+            return payload
+        if mode == "HEX":
+            payload = SendDataUtils.parse_hex(data)
+        else:
+            payload = SendDataUtils.encode_text(data, encoding, line_ending)[2]
+        if len(data) <= self.MAX_CACHED_CHARS:
+            self._entries[key] = payload
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return payload
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,154 @@
+"""发送历史存储：内存环形缓冲加只追加的磁盘日志。"""
+
+import json
+
+
+class SendHistoryStore:
+    """按从新到旧的顺序保存最近 max_entries 条发送历史。
+
+    新记录写入预分配环形缓冲，插入和按行号读取均为常数时间；与最新一条内容
+    和模式相同的发送只更新其时间。每次修改生成一行 JSON 日志，由调用方通过
+    ``take_journal`` 取出后追加到磁盘；日志行数超过保存条数的 COMPACT_FACTOR
+    倍时改为整体重写，压缩掉已淘汰和已覆盖的记录。
+
+    监听器以 ``listener(change, removed)`` 接收变化：``"inserted"`` 表示第 0 行
+    为新记录、末尾 removed 行被淘汰，``"updated"`` 表示第 0 行时间已更新，
+    ``"reset"`` 表示内容整体变化。
+    """
+
+    MODES = ("TEXT", "HEX")
+    COMPACT_FACTOR = 2
+
+    def __init__(self, max_entries=200, entries=()):
+        self._listeners = []
+        self._journal = []
+        self._journal_lines = 0
+        self._rewrite = False
+        self._reset(max_entries, entries)
+
+    def _reset(self, max_entries, entries):
+        self._capacity = max(1, max_entries)
+        self._ring = [None] * self._capacity
+        self._start = 0
+        self._count = 0
+        # entries 为从新到旧的顺序，按从旧到新写入环形缓冲。
+        for entry in reversed(list(entries)[:self._capacity]):
+            self._append(entry)
+
+    @property
+    def max_entries(self):
+        return self._capacity
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        """按从新到旧的行号返回记录字典，调用方不应修改。"""
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        return self._ring[(self._start + self._count - 1 - index) % self._capacity]
+
+    def entries(self):
+        """返回从新到旧的记录列表副本。"""
+        return [dict(self[index]) for index in range(self._count)]
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, change, removed=0):
+        for listener in list(self._listeners):
+            listener(change, removed)
+
+    def _append(self, entry):
+        if self._count < self._capacity:
+            self._ring[(self._start + self._count) % self._capacity] = entry
+            self._count += 1
+            return 0
+        self._ring[self._start] = entry
+        self._start = (self._start + 1) % self._capacity
+        return 1
+
+    def add(self, data, mode, time_text):
+        """记录一次发送；与最新记录重复时只更新时间。返回 True 表示插入了新行。"""
+        if self._count and self[0]["data"] == data and self[0]["mode"] == mode:
+            self[0]["time"] = time_text
+            self._log({"touch": time_text})
+            self._notify("updated")
+            return False
+        entry = {"data": data, "mode": mode, "time": time_text}
+        removed = self._append(entry)
+        self._log(entry)
+        self._notify("inserted", removed)
+        return True
+
+    def clear(self):
+        self._reset(self._capacity, ())
+        self._log({"clear": True})
+        self._notify("reset")
+
+    def replace(self, entries, max_entries=None):
+        """以从新到旧的记录列表替换全部内容，下一次取出日志时整体重写。"""
+        self._reset(self._capacity if max_entries is None else max_entries, entries)
+        self._rewrite = True
+        self._notify("reset")
+
+    def set_max_entries(self, max_entries):
+        if max(1, max_entries) != self._capacity:
+            self.replace(self.entries()[:max_entries], max_entries)
+
+    def _log(self, record):
+        self._journal.append(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def has_pending_journal(self):
+        return bool(self._journal) or self._rewrite
+
+    def take_journal(self):
+        """取出待写入的日志，返回 (是否整体重写, 文本)；没有待写内容时返回 None。"""
+        if not self.has_pending_journal():
+            return None
+        if self._rewrite or self._journal_lines + len(self._journal) > self._capacity * self.COMPACT_FACTOR:
+            self._journal.clear()
+            self._rewrite = False
+            self._journal_lines = self._count
+            return True, "".join(
+                json.dumps(self[index], ensure_ascii=False) + "\n" for index in range(self._count - 1, -1, -1)
+            )
+        text = "".join(self._journal)
+        self._journal_lines += len(self._journal)
+        self._journal.clear()
+        return False, text
+
+    def mark_rewrite(self):
+        """日志写入失败后调用，下一次取出时整体重写，避免磁盘内容缺少中间记录。"""
+        self._rewrite = True
+
+    @classmethod
+    def load(cls, lines, max_entries):
+        """重放日志行恢复历史；无法解析的行（如写入中断的最后一行）被忽略。"""
+        store = cls(max_entries)
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(record, dict):
+                continue
+            if record.get("clear") is True:
+                store._reset(store._capacity, ())
+            elif "touch" in record:
+                if store._count and isinstance(record["touch"], str):
+                    store[0]["time"] = record["touch"]
+            elif isinstance(record.get("data"), str):
+                mode = record.get("mode")
+                time_text = record.get("time")
+                store._append({
+                    "data": record["data"],
+                    "mode": mode if mode in cls.MODES else "TEXT",
+                    "time": time_text if isinstance(time_text, str) else "",
+                })
+            store._journal_lines += 1
+        return store
@@ -1,12 +1,18 @@
 """串口通信管理工具类。"""
 
+import os
+import select
 import threading
 import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 
 import serial
 import serial.tools.list_ports
 
+from .port_monitor import PortPresenceMonitor
 from .send_data_utils import SendDataUtils
+from .serial_reactor import SerialReactor
+from .serial_writer import SerialWriter
 
 
 PARITY_MAP = {
@@ -33,48 +39,52 @@ FLOW_CONTROL_MAP = {
 class SerialManager:
     """封装串口操作，并使超时后的晚到结果不会污染当前会话。"""
 
-    def __init__(self):
+    # 接收线程阻塞等待数据的最长时间；仅影响停止响应，不影响数据到达后的交付延迟。
+    RECEIVE_WAIT_TIMEOUT = 0.1
+
+    def __init__(self, port_monitor=None, reactor=None):
         self.serial_port = None
         self.receive_thread = None
         self.is_running = False
         self.receive_callback = None
+        self._receive_callback_timestamped = False
+        self.receive_sink = None
+        self.frame_pipeline = None
         self.disconnect_callback = None
         self.last_config = {}
         self.operation_timeout = 1.0
-        self.check_interval = 0.5
-        self.last_check_time = 0
+        self.port_monitor = port_monitor or PortPresenceMonitor.shared()
+        # 设置共享反应器后，POSIX 串口的读取和发送由反应器线程完成，不再各建线程。
+        self.reactor = reactor
+        self._channel = None
+        self._presence_token = None
         self._operation_lock = threading.RLock()
         self._open_generation = 0
         self._receive_stop_event = None
         self._open_in_flight = False
         self._close_in_flight = False
-        self._send_in_flight = False
+        self._writer = None
 
     @staticmethod
     def get_available_ports():
         return [port.device for port in serial.tools.list_ports.comports()]
 
-    def _is_port_available(self, port_name):
-        return port_name in self.get_available_ports()
-
-    def _check_port_health(self, port):
-        if not port:
-            return False, "串口对象不存在"
-        try:
-            if not port.is_open:
-                return False, "串口未打开"
-            port_name = port.port
-            if not self._is_port_available(port_name):
-                return False, f"串口 {port_name} 已被移除"
-            try:
-                _ = port.cts
-                _ = port.dsr
-                _ = port.in_waiting
-            except (OSError, AttributeError) as error:
-                return False, f"串口状态异常: {error}"
-            return True, None
-        except Exception as error:
-            return False, f"串口健康检查失败: {error}"
+    @staticmethod
+    def create_port(port, baudrate=115200, parity="None", bytesize=8, stopbits=1,
+                    flow_control="None", write_timeout=1.0):
+        """按界面使用的参数名打开 pyserial 串口，读超时固定为 100ms。"""
+        rtscts, xonxoff = FLOW_CONTROL_MAP.get(flow_control, (False, False))
+        return serial.Serial(
+            port=port,
+            baudrate=baudrate,
+            bytesize=bytesize,
+            parity=PARITY_MAP.get(parity, serial.PARITY_NONE),
+            stopbits=STOPBITS_MAP.get(stopbits, serial.STOPBITS_ONE),
+            timeout=0.1,
+            write_timeout=write_timeout,
+            rtscts=rtscts,
+            xonxoff=xonxoff,
+        )
 
     @staticmethod
     def _close_port(port):
@@ -95,8 +105,15 @@ class SerialManager:
             self.is_running = False
             stop_event = self._receive_stop_event
             port, self.serial_port = self.serial_port, None
+            channel, self._channel = self._channel, None
+            self._unsubscribe_presence()
+            self._stop_writer()
         if stop_event:
             stop_event.set()
+        if channel:
+            # 与 close() 相同，先从反应器注销再关闭串口，避免文件描述符被复用后仍在监听。
+            channel.close().wait(self.operation_timeout)
+        self._cancel_read(port)
         self._close_port(port)
 
     def open(self, port, baudrate=115200, parity="None", bytesize=8,
@@ -129,17 +146,8 @@ class SerialManager:
         def open_worker():
             opened_port = None
             try:
-                rtscts, xonxoff = FLOW_CONTROL_MAP.get(flow_control, (False, False))
-                opened_port = serial.Serial(
-                    port=port,
-                    baudrate=baudrate,
-                    bytesize=bytesize,
-                    parity=PARITY_MAP.get(parity, serial.PARITY_NONE),
-                    stopbits=STOPBITS_MAP.get(stopbits, serial.STOPBITS_ONE),
-                    timeout=0.1,
-                    write_timeout=self.operation_timeout,
-                    rtscts=rtscts,
-                    xonxoff=xonxoff,
+                opened_port = self.create_port(
+                    port, baudrate, parity, bytesize, stopbits, flow_control, self.operation_timeout,
                 )
                 with self._operation_lock:
                     if generation != self._open_generation:
@@ -149,12 +157,27 @@ class SerialManager:
                     self.is_running = True
                     stop_event = threading.Event()
                     self._receive_stop_event = stop_event
-                    self.receive_thread = threading.Thread(
-                        target=self._receive_loop,
-                        args=(opened_port, stop_event, generation),
-                        daemon=True,
+                    if self.reactor and SerialReactor.supports(opened_port):
+                        self._channel = self.reactor.register(
+                            opened_port,
+                            lambda: self._receive_once(opened_port, True, stop_event, generation),
+                            self.operation_timeout,
+                        )
+                        self._writer = self._channel
+                    else:
+                        self.receive_thread = threading.Thread(
+                            target=self._receive_loop,
+                            args=(opened_port, stop_event, generation),
+                            daemon=True,
+                        )
+                        self.receive_thread.start()
+                        self._writer = SerialWriter(opened_port, self.operation_timeout)
+                    self._presence_token = self.port_monitor.subscribe(
+                        port,
+                        lambda _port_name: self._handle_disconnect(
+                            opened_port, stop_event, generation, f"串口 {port} 已被移除",
+                        ),
                     )
-                    self.receive_thread.start()
                     result["success"] = True
             except Exception as error:
                 result["error"] = str(error)
@@ -186,6 +209,9 @@ class SerialManager:
             if stop_event:
                 stop_event.set()
             port, self.serial_port = self.serial_port, None
+            channel, self._channel = self._channel, None
+            self._unsubscribe_presence()
+            self._stop_writer()
             if not port:
                 return True
             self._close_in_flight = True
@@ -195,6 +221,11 @@ class SerialManager:
 
         def close_worker():
             try:
+                if channel:
+                    # 先从反应器注销，避免关闭后的文件描述符被新串口复用时仍在监听。
+                    # 反应器线程停滞时不无限等待，超时后仍关闭串口并清除关闭标记。
+                    channel.close().wait(self.operation_timeout)
+                self._cancel_read(port)
                 if port.is_open:
                     port.close()
                 if receive_thread and receive_thread is not threading.current_thread():
@@ -220,96 +251,286 @@ class SerialManager:
         print(f"关闭串口超时（{self.operation_timeout}秒）")
         return False
 
+    @staticmethod
+    def _create_read_poller(port):
+        """为 POSIX 串口创建 poll 对象；无可等待的文件描述符时返回 None。"""
+        if not hasattr(select, "poll"):
+            return None
+        try:
+            fileno = port.fileno()
+        except (AttributeError, OSError, ValueError):
+            return None
+        if not isinstance(fileno, int):
+            return None
+        poller = select.poll()
+        poller.register(fileno, select.POLLIN | select.POLLERR | select.POLLHUP)
+        # pyserial 的取消读取管道用于 close() 立即唤醒阻塞中的接收线程。
+        abort_fileno = getattr(port, "pipe_abort_read_r", None)
+        if isinstance(abort_fileno, int):
+            poller.register(abort_fileno, select.POLLIN)
+        return poller
+
+    def _wait_readable(self, port, poller):
+        """阻塞在系统调用中直到串口可读、超时或被取消，返回是否应读取。"""
+        abort_fileno = getattr(port, "pipe_abort_read_r", None)
+        events = poller.poll(self.RECEIVE_WAIT_TIMEOUT * 1000)
+        for fileno, _event in events:
+            if fileno == abort_fileno:
+                try:
+                    os.read(abort_fileno, 1000)
+                except OSError:
+                    pass
+                return False
+        return bool(events)
+
+    @staticmethod
+    def _read_available(port):
+        """读取已到达的全部数据；无数据时由串口读超时阻塞等待首个字节。"""
+        waiting = port.in_waiting
+        if waiting:
+            return port.read(waiting)
+        data = port.read(1)
+        if data:
+            waiting = port.in_waiting
+            if waiting:
+                data += port.read(waiting)
+        return data
+
+    @staticmethod
+    def _readinto(port, view, use_fd):
+        """读入调用方提供的缓冲区；POSIX 上直接由系统调用写入，不产生中间 bytes。"""
+        fd = getattr(port, "fd", None)
+        if use_fd and isinstance(fd, int) and hasattr(os, "readv"):
+            try:
+                count = os.readv(fd, [view])
+            except BlockingIOError:
+                return 0
+            except OSError as error:
+                raise serial.SerialException(f"read failed: {error}") from error
+            if not count:
+                # 与 pyserial 一致：可读却读不到数据说明设备已断开。
+                raise serial.SerialException("设备报告可读但未返回数据（设备可能已断开）")
+            return count
+        return port.readinto(view)
+
+    def _receive_into(self, port, sink, use_fd, stop_event, generation):
+        """将数据直接读入接收缓冲区的预留空间，仅在会话仍有效时提交。"""
+        size = port.in_waiting or 1
+        view, token = sink.reserve(size)
+        if view is None:
+            # 缓冲区已满仍需读取，避免系统缓冲溢出；丢弃的数据计入统计。
+            data = port.read(size)
+            if data and self._is_current_session(port, stop_event, generation):
+                sink.drop(len(data))
+                # 显示缓冲丢弃的数据仍交给分帧阶段，解码器不会因缺失字节错位。
+                self._feed_frames(data, time.perf_counter_ns())
+            return
+        count, arrival = 0, None
+        try:
+            count = self._readinto(port, view, use_fd)
+            # 到达时间在读取后立即记录，不受界面刷新周期影响。
+            arrival = time.perf_counter_ns()
+        finally:
+            is_current = count and self._is_current_session(port, stop_event, generation)
+            sink.commit(token, count if is_current else 0, arrival)
+            if is_current:
+                self._feed_frames(view[:count], arrival)
+            view.release()
+
+    def _feed_frames(self, data, arrival):
+        """在接收线程中把刚读取的数据交给分帧阶段；data 可为只在本次调用内有效的视图。"""
+        pipeline = self.frame_pipeline
+        if pipeline is not None:
+            pipeline.feed(data, arrival)
+
+    def _is_current_session(self, port, stop_event, generation):
+        with self._operation_lock:
+            return (
+                not stop_event.is_set()
+                and generation == self._open_generation
+                and self.serial_port is port
+            )
+
+    @staticmethod
+    def _cancel_read(port):
+        """唤醒阻塞在读取中的接收线程，使关闭无需等待读超时。"""
+        try:
+            cancel_read = getattr(port, "cancel_read", None)
+            if cancel_read and port.is_open:
+                cancel_read()
+        except (OSError, serial.SerialException) as error:
+            print(f"取消串口读取时出错: {error}")
+
+    def _unsubscribe_presence(self):
+        """调用方须持有操作锁；取消当前会话的串口移除订阅。"""
+        token, self._presence_token = self._presence_token, None
+        if token is not None:
+            self.port_monitor.unsubscribe(token)
+
+    def _stop_writer(self):
+        """调用方须持有操作锁；使排队中的发送失败并结束写线程。"""
+        writer, self._writer = self._writer, None
+        if writer:
+            writer.stop()
+
+    def _handle_disconnect(self, port, stop_event, generation, message):
+        """读取失败或监视器发现串口移除时结束会话；旧会话的信号会被忽略。"""
+        if stop_event.is_set():
+            return
+        with self._operation_lock:
+            is_current = generation == self._open_generation and self.serial_port is port
+            channel = None
+            if is_current:
+                self.is_running = False
+                self.serial_port = None
+                channel, self._channel = self._channel, None
+                self._unsubscribe_presence()
+                self._stop_writer()
+        stop_event.set()
+        print(f"串口异常断开: {message}")
+        if channel:
+            channel.close().wait(self.operation_timeout)
+        self._cancel_read(port)
+        self._close_port(port)
+        if is_current and self.disconnect_callback:
+            self.disconnect_callback()
+
+    def _receive_once(self, port, use_fd, stop_event, generation):
+        """读取并交付一次已到达的数据；会话已结束或读取失败时返回 False。
+
+        接收线程在确认可读后调用；反应器模式下由反应器线程在串口可读时调用。
+        """
+        try:
+            if not port.is_open:
+                if not stop_event.is_set():
+                    raise serial.SerialException("串口对象无效")
+                return False
+            if stop_event.is_set():
+                return False
+            sink = self.receive_sink
+            if sink is not None:
+                self._receive_into(port, sink, use_fd, stop_event, generation)
+                return True
+            data = self._read_available(port)
+            if not data:
+                return True
+            arrival = time.perf_counter_ns()
+            callback = self.receive_callback
+            if (callback or self.frame_pipeline) and self._is_current_session(port, stop_event, generation):
+                self._feed_frames(data, arrival)
+                if callback and self._receive_callback_timestamped:
+                    callback(data, arrival)
+                elif callback:
+                    callback(data)
+            return True
+        except serial.SerialTimeoutException:
+            return True
+        except Exception as error:
+            if not stop_event.is_set() and isinstance(error, (OSError, serial.SerialException)):
+                print(f"读取数据错误: {error}")
+            self._handle_disconnect(port, stop_event, generation, error)
+            return False
+
     def _receive_loop(self, port, stop_event, generation):
-        """只操作所属会话的串口，旧会话绝不读取新打开的端口。"""
-        last_check_time = 0
+        """只操作所属会话的串口，旧会话绝不读取新打开的端口。
+
+        POSIX 串口阻塞在 poll 中等待数据，其他平台阻塞在带超时的 read 中，
+        数据到达即交付。设备移除由共享的串口监视器推送，接收线程不枚举设备，
+        读取失败同样视为断开。
+        """
+        poller = None
+        try:
+            poller = self._create_read_poller(port)
+        except (OSError, ValueError) as error:
+            print(f"无法等待串口事件，改用阻塞读取: {error}")
         while not stop_event.is_set():
             try:
-                current_time = time.time()
-                if current_time - last_check_time > self.check_interval:
-                    last_check_time = current_time
-                    is_healthy, error_message = self._check_port_health(port)
-                    if not is_healthy:
-                        print(f"串口健康检查失败: {error_message}")
-                        raise serial.SerialException(error_message)
-                if port.is_open:
-                    try:
-                        if port.in_waiting:
-                            data = port.read(port.in_waiting)
-                            with self._operation_lock:
-                                is_current = (
-                                    not stop_event.is_set()
-                                    and generation == self._open_generation
-                                    and self.serial_port is port
-                                )
-                            if is_current and self.receive_callback and data:
-                                self.receive_callback(data)
-                        else:
-                            time.sleep(0.01)
-                    except serial.SerialTimeoutException:
-                        continue
-                    except (OSError, serial.SerialException) as error:
-                        print(f"读取数据错误: {error}")
-                        raise
-                elif not stop_event.is_set():
-                    raise serial.SerialException("串口对象无效")
-                else:
-                    break
+                if port.is_open and poller and not self._wait_readable(port, poller):
+                    continue
             except Exception as error:
-                if not stop_event.is_set():
-                    print(f"串口异常断开: {error}")
-                    with self._operation_lock:
-                        is_current = generation == self._open_generation and self.serial_port is port
-                        if is_current:
-                            self.is_running = False
-                            self.serial_port = None
-                    self._close_port(port)
-                    if is_current and self.disconnect_callback:
-                        self.disconnect_callback()
+                self._handle_disconnect(port, stop_event, generation, error)
+                break
+            if not self._receive_once(port, poller is not None, stop_event, generation):
                 break
         with self._operation_lock:
             if self.receive_thread is threading.current_thread():
                 self.receive_thread = None
                 self._receive_stop_event = None
 
-    def send(self, data, mode="TEXT", encoding="UTF-8"):
-        """在限定时间内写入，超时时拒绝后续并发写入直到原操作结束。"""
+    @staticmethod
+    def encode_payload(data, mode="TEXT", encoding="UTF-8"):
+        """将发送框内容转换为写入串口的字节；HEX 无效时抛出 ValueError。"""
+        if mode == "HEX":
+            return SendDataUtils.parse_hex(data)
+        return data.encode(encoding.lower().replace("-", ""))
+
+    def _get_writer(self):
+        """调用方须持有操作锁；返回当前串口的常驻写线程，串口未打开时返回 None。"""
+        port = self.serial_port
+        if not port or not port.is_open:
+            return None
+        if not self._writer or self._writer.port is not port:
+            self._stop_writer()
+            self._writer = SerialWriter(port, self.operation_timeout)
+        return self._writer
+
+    def submit(self, payload, callback=None, timeout=None):
+        """将字节按顺序加入当前串口的发送队列，返回以写入字节数完成的 Future。"""
         with self._operation_lock:
-            if not self.serial_port or not self.serial_port.is_open or self._send_in_flight:
-                return False
-            self._send_in_flight = True
-            port = self.serial_port
+            writer = self._get_writer()
+        if writer:
+            return writer.submit(payload, callback, timeout)
+        future = Future()
+        if callback:
+            future.add_done_callback(callback)
+        future.set_exception(serial.PortNotOpenError())
+        return future
 
-        completed = threading.Event()
-        result = {"success": False, "error": None}
+    def is_write_stalled(self):
+        """当前写入是否已阻塞超过操作超时；阻塞期间应拒绝新的发送。"""
+        with self._operation_lock:
+            writer = self._writer
+        return bool(writer and writer.is_stalled())
 
-        def send_worker():
-            try:
-                if mode == "HEX":
-                    send_data = SendDataUtils.parse_hex(data)
-                else:
-                    send_data = data.encode(encoding.lower().replace("-", ""))
-                port.write(send_data)
-                result["success"] = True
-            except serial.SerialTimeoutException:
-                result["error"] = "发送超时"
-            except Exception as error:
-                result["error"] = str(error)
-            finally:
-                with self._operation_lock:
-                    self._send_in_flight = False
-                completed.set()
+    def send(self, data, mode="TEXT", encoding="UTF-8"):
+        """在限定时间内写入，超时时拒绝后续写入直到原操作结束。"""
+        try:
+            payload = self.encode_payload(data, mode, encoding)
+        except (LookupError, UnicodeEncodeError, ValueError) as error:
+            print(f"发送数据失败: {error}")
+            return False
+        return self.send_bytes(payload)
 
-        threading.Thread(target=send_worker, daemon=True).start()
-        if completed.wait(self.operation_timeout):
-            if not result["success"]:
-                print(f"发送数据失败: {result['error']}")
-            return result["success"]
-        print(f"发送数据超时（{self.operation_timeout}秒）")
+    def send_bytes(self, payload):
+        """经发送队列写入已编码的字节，并在操作超时内等待结果。"""
+        with self._operation_lock:
+            writer = self._get_writer()
+            if not writer or writer.is_stalled():
+                return False
+        future = writer.submit(payload, timeout=self.operation_timeout)
+        try:
+            future.result(self.operation_timeout)
+            return True
+        except FutureTimeoutError:
+            print(f"发送数据超时（{self.operation_timeout}秒）")
+        except serial.SerialTimeoutException:
+            print("发送数据失败: 发送超时")
+        except Exception as error:
+            print(f"发送数据失败: {error}")
         return False
 
-    def set_receive_callback(self, callback):
+    def set_receive_callback(self, callback, with_timestamp=False):
+        """设置接收回调；with_timestamp 为真时额外传入读取完成时的 perf_counter_ns。"""
         self.receive_callback = callback
+        self._receive_callback_timestamped = with_timestamp
+
+    def set_frame_pipeline(self, pipeline):
+        """设置接收线程中的分帧阶段；每次读取的数据交付后再交给 pipeline.feed(data, arrival_ns)。"""
+        self.frame_pipeline = pipeline
+
+    def set_receive_sink(self, sink):
+        """设置接收缓冲区；设置后接收线程直接读入其预留空间，不再调用接收回调。"""
+        self.receive_sink = sink
 
     def set_disconnect_callback(self, callback):
         self.disconnect_callback = callback
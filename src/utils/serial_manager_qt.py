@@ -1,11 +1,13 @@
 """面向 Qt 界面的串口适配层；串口 I/O 始终运行在后台线程。"""
 
-from collections import deque
-import threading
-
 from PySide6.QtCore import QObject, Signal
 
+from .byte_ring import ByteRingBuffer
+from .frame_decoder import FramePipeline
+from .operation_executor import OperationExecutor
+from .receive_data_utils import ReceiveArrivals
 from .serial_manager import SerialManager
+from .spill_buffer import SpillingReceiveBuffer
 
 
 class SerialManagerQt(QObject):
@@ -14,55 +16,52 @@ class SerialManagerQt(QObject):
     disconnected = Signal()
     operation_completed = Signal(str, bool)
 
-    def __init__(self, max_pending_bytes=4 * 1024 * 1024):
+    def __init__(self, max_pending_bytes=4 * 1024 * 1024, spill_limit_bytes=0, spill_directory=None, reactor=None):
         super().__init__()
-        self._manager = SerialManager()
-        self._pending = deque()
-        self._pending_bytes = 0
-        self._max_pending_bytes = max_pending_bytes
-        self._lock = threading.Lock()
-        self._operation_lock = threading.Lock()
-        self._dropped_bytes = 0
-        self._manager.set_receive_callback(self._enqueue)
+        self._manager = SerialManager(reactor=reactor)
+        # 接收线程直接读入预分配环形缓冲区，界面线程取出时只复制一次；
+        # 启用溢出时环形缓冲写满后的数据顺序写入磁盘分段文件，不再丢弃。
+        self._pending = SpillingReceiveBuffer(ByteRingBuffer(max_pending_bytes), spill_limit_bytes, spill_directory)
+        self._frames = FramePipeline()
+        self._executor = OperationExecutor()
+        self._manager.set_receive_sink(self._pending)
         self._manager.set_disconnect_callback(self._emit_disconnected)
 
     @staticmethod
     def get_available_ports():
         return SerialManager.get_available_ports()
 
-    def _enqueue(self, data):
-        with self._lock:
-            if self._pending_bytes + len(data) > self._max_pending_bytes:
-                self._dropped_bytes += len(data)
-                return
-            self._pending.append(data)
-            self._pending_bytes += len(data)
-
     def drain(self, max_bytes=256 * 1024):
-        """由 UI 线程周期调用；返回一批数据及本批之前丢弃的字节数。"""
-        chunks, total = [], 0
-        with self._lock:
-            while self._pending and total < max_bytes:
-                chunk = self._pending.popleft()
-                remaining = max_bytes - total
-                if len(chunk) > remaining:
-                    chunks.append(chunk[:remaining])
-                    self._pending.appendleft(chunk[remaining:])
-                    self._pending_bytes -= remaining
-                    total += remaining
-                    break
-                chunks.append(chunk)
-                total += len(chunk)
-                self._pending_bytes -= len(chunk)
-            dropped, self._dropped_bytes = self._dropped_bytes, 0
-        return b"".join(chunks), dropped
+        """由 UI 线程周期调用；返回一批连续数据、本批之前丢弃的字节数，
+        以及接收线程在读取后记录的各数据块到达时间 ReceiveArrivals。"""
+        data, offsets, times_ns = self._pending.read_marked(max_bytes)
+        return data, self._pending.take_dropped(), ReceiveArrivals(offsets, times_ns)
+
+    def set_frame_decoder(self, decoder):
+        """设置在接收线程中运行的帧解码器；None 表示不分帧，界面按字节流显示。"""
+        self._frames.set_decoder(decoder)
+        self._manager.set_frame_pipeline(self._frames if decoder is not None else None)
+
+    def drain_frames(self, max_frames=4096):
+        """由 UI 线程周期调用；返回接收线程已解码完成的帧列表与帧队列丢弃的帧数。"""
+        return self._frames.take(max_frames), self._frames.take_dropped()
+
+    def backlog(self):
+        """返回 (尚未取出的字节数, 其中已溢出到磁盘的字节数)。"""
+        return len(self._pending), self._pending.spilled_bytes()
+
+    def set_spill_limit(self, limit_bytes):
+        """设置磁盘溢出上限；0 表示关闭溢出。"""
+        self._pending.spill_limit = limit_bytes
+
+    def take_spill_error(self):
+        """返回并清除最近一次创建溢出文件失败的原因。"""
+        return self._pending.take_spill_error()
 
     def clear_pending(self):
-        """丢弃当前会话尚未显示的数据，避免串口切换后混入旧数据。"""
-        with self._lock:
-            self._pending.clear()
-            self._pending_bytes = 0
-            self._dropped_bytes = 0
+        """丢弃当前会话尚未显示的数据与未完成的帧，避免串口切换后混入旧数据。"""
+        self._pending.clear()
+        self._frames.reset()
 
     def _emit_disconnected(self):
         try:
@@ -80,15 +79,15 @@ class SerialManagerQt(QObject):
 
     def _run_async(self, operation, callback):
         def runner():
-            with self._operation_lock:
-                try:
-                    result = callback()
-                    success = bool(result) if result is not None else True
-                except Exception:
-                    success = False
-                # 保持完成信号顺序与底层操作顺序一致，避免打开/关闭状态倒置。
-                self._emit_operation_completed(operation, success)
-        threading.Thread(target=runner, daemon=True).start()
+            try:
+                result = callback()
+                success = bool(result) if result is not None else True
+            except Exception:
+                success = False
+            # 执行器按提交顺序逐个完成操作，完成信号顺序与底层操作顺序一致。
+            self._emit_operation_completed(operation, success)
+        if not self._executor.submit(operation, runner):
+            self._emit_operation_completed(operation, False)
 
     def open_async(self, **settings):
         self._run_async("open", lambda: self._manager.open(**settings))
@@ -97,8 +96,56 @@ class SerialManagerQt(QObject):
         self._run_async("close", self._manager.close)
 
     def send_async(self, data, mode="TEXT", encoding="UTF-8"):
-        self._run_async("send", lambda: self._manager.send(data, mode, encoding)
-        )
+        """编码后经会话执行器交给串口常驻写线程，不为发送创建线程。"""
+        try:
+            payload = SerialManager.encode_payload(data, mode, encoding)
+        except (LookupError, UnicodeEncodeError, ValueError):
+            self._emit_operation_completed("send", False)
+            return
+        self.send_bytes_async(payload)
+
+    def send_bytes_async(self, payload):
+        """将已编码的字节按顺序交给写线程发送队列，写入完成后发出 operation_completed("send", ...)。
+
+        发送作为异步操作在会话执行器中按序启动：不等待写入完成，连续发送仍在写线程
+        中排队合并；其后的打开、关闭会等这些发送完成再执行，完成信号不会倒置。
+        写入阻塞超时期间拒绝新的发送。
+        """
+        def start():
+            if self._manager.is_write_stalled():
+                self._emit_operation_completed("send", False)
+                return None
+
+            def on_written(future):
+                self._emit_operation_completed("send", not future.cancelled() and future.exception() is None)
+            return self._manager.submit(payload, on_written, self._manager.operation_timeout)
+        if not self._executor.submit_async("send", start):
+            self._emit_operation_completed("send", False)
+
+    def submit(self, payload, callback=None, timeout=None):
+        """直接加入串口发送队列并返回 Future，不经会话执行器；供事务引擎按应答节奏发送。"""
+        return self._manager.submit(payload, callback, timeout)
+
+    def operation_queue_depth(self):
+        """返回尚未完成的打开、关闭和发送操作数量。"""
+        return self._executor.queue_depth()
+
+    def operation_stats(self):
+        """返回各类操作从提交到完成的耗时统计（毫秒）。"""
+        return self._executor.stats()
+
+    def shutdown(self, timeout=2.0):
+        """完成已排队的操作后结束会话执行线程，并释放磁盘溢出文件；返回是否在 timeout 秒内完成。
+
+        排队中的关闭完成前接收线程仍可能预留缓冲区，因此先有界等待执行器处理完
+        已排队操作；超时时先断开接收槽，使接收线程不再写入，再释放溢出文件。
+        """
+        completed = self._executor.stop(timeout)
+        if not completed:
+            print(f"串口操作未在 {timeout} 秒内完成，强制释放接收缓冲")
+            self._manager.set_receive_sink(None)
+        self._pending.close()
+        return completed
 
     def is_open(self):
         return self._manager.is_open()
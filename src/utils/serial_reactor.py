@@ -0,0 +1,314 @@
+"""共享的串口 I/O 反应器：一个 selector 线程为所有 POSIX 串口读取数据并写出发送队列。"""
+
+import os
+import selectors
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import serial
+
+
+def _fail(future, error):
+    """以异常结束尚未完成的 Future；已取消或已完成的 Future 保持不变。"""
+    if future.done():
+        return
+    if future.running() or future.set_running_or_notify_cancel():
+        future.set_exception(error)
+
+
+class ReactorChannel:
+    """反应器中的一个串口：可读时调用会话的读取回调，发送接口与 SerialWriter 一致。
+
+    发送队列按提交顺序由反应器线程以非阻塞写入；超过截止时间仍未开始写入的数据
+    不再发送，开始写入后超过写超时仍未写完的数据以 SerialTimeoutException 结束。
+    """
+
+    MAX_PENDING_ITEMS = 1024
+
+    def __init__(self, reactor, port, on_readable, timeout=1.0, max_pending_items=MAX_PENDING_ITEMS):
+        self.reactor = reactor
+        self.port = port
+        self.fd = port.fd
+        self.timeout = timeout
+        self._on_readable = on_readable
+        self._max_pending_items = max_pending_items
+        # 队列与当前写入项由反应器的锁保护；events 与 registered 只在反应器线程中访问。
+        self._queue = deque()
+        self._current = None
+        self._stopped = False
+        self._closing = False
+        self.events = 0
+        self.registered = False
+        self.removed = threading.Event()
+
+    def submit(self, data, callback=None, timeout=None):
+        """将字节加入发送队列；callback 以 Future 为参数在反应器线程中调用。"""
+        future = Future()
+        if callback:
+            future.add_done_callback(callback)
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        with self.reactor._lock:
+            if self._stopped:
+                error = serial.PortNotOpenError()
+            elif len(self._queue) >= self._max_pending_items:
+                error = serial.SerialException("发送队列已满")
+            else:
+                self._queue.append((bytes(data), future, deadline))
+                self.reactor._request(self)
+                return future
+        _fail(future, error)
+        return future
+
+    def pending_count(self):
+        with self.reactor._lock:
+            return len(self._queue)
+
+    def is_stalled(self):
+        """当前写入已超过写超时但尚未写完。"""
+        with self.reactor._lock:
+            return self._current is not None and time.monotonic() >= self._current[3]
+
+    def stop(self):
+        """拒绝新的提交并使排队与写入中的数据失败；不影响读取。"""
+        with self.reactor._lock:
+            self._stopped = True
+            pending = [item[1] for item in self._queue]
+            self._queue.clear()
+            if self._current is not None:
+                pending.append(self._current[1])
+                self._current = None
+            self.reactor._request(self)
+        for future in pending:
+            _fail(future, serial.PortNotOpenError())
+
+    def close(self):
+        """停止发送并从反应器注销，返回注销完成后置位的 Event；关闭串口前须等待该事件。"""
+        self.stop()
+        with self.reactor._lock:
+            self._closing = True
+            self.reactor._request(self)
+        if self.reactor.in_reactor_thread():
+            self.reactor._apply_changes()
+        return self.removed
+
+
+class SerialReactor:
+    """以一个 selector 线程服务多个串口的读写。
+
+    每个打开的串口只占用一个 ``ReactorChannel`` 与其发送队列，不再各有接收线程和
+    写线程。注册、注销和发送请求由任意线程提交，经唤醒管道交给反应器线程应用，
+    selector 只在反应器线程中修改。读取回调在反应器线程中执行，须只读取已到达的
+    数据而不能阻塞；回调返回 False 时注销该串口。没有注册的串口时线程退出，下次
+    注册时重新启动。
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._selector = None
+        self._wake_read = self._wake_write = None
+        self._changes = set()
+        self._channels = set()
+        self._writing = set()
+        self._thread = None
+
+    @classmethod
+    def shared(cls):
+        """返回进程内所有串口会话共用的反应器。"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @staticmethod
+    def supports(port):
+        """串口是否提供可注册到 selector 的文件描述符（POSIX）。"""
+        return os.name == "posix" and isinstance(getattr(port, "fd", None), int)
+
+    def in_reactor_thread(self):
+        return self._thread is threading.current_thread()
+
+    def register(self, port, on_readable, timeout=1.0):
+        """注册串口并返回 ReactorChannel；on_readable() 在串口可读时于反应器线程中调用。"""
+        channel = ReactorChannel(self, port, on_readable, timeout)
+        with self._lock:
+            self._channels.add(channel)
+            if self._thread is None:
+                self._selector = selectors.DefaultSelector()
+                self._wake_read, self._wake_write = os.pipe()
+                os.set_blocking(self._wake_read, False)
+                os.set_blocking(self._wake_write, False)
+                self._selector.register(self._wake_read, selectors.EVENT_READ)
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._request(channel)
+        return channel
+
+    def _request(self, channel):
+        """调用方须持有锁；标记通道的注册状态或写入需求已变化并唤醒反应器线程。"""
+        self._changes.add(channel)
+        if not self.in_reactor_thread():
+            try:
+                os.write(self._wake_write, b"\0")
+            except BlockingIOError:
+                pass
+
+    def _apply_changes(self):
+        """只在反应器线程中调用：按各通道状态更新 selector 注册。"""
+        with self._lock:
+            changes, self._changes = self._changes, set()
+            states = [(channel, channel._closing, bool(channel._queue or channel._current)) for channel in changes]
+        for channel, closing, writing in states:
+            if channel.removed.is_set():
+                # 已注销的通道不再注册，避免在串口关闭后复用其文件描述符。
+                continue
+            if closing:
+                self._unregister(channel)
+                continue
+            if writing:
+                self._writing.add(channel)
+            else:
+                self._writing.discard(channel)
+            events = selectors.EVENT_READ | (selectors.EVENT_WRITE if writing else 0)
+            if channel.events == events:
+                continue
+            try:
+                if channel.registered:
+                    self._selector.modify(channel.fd, events, channel)
+                else:
+                    self._selector.register(channel.fd, events, channel)
+                    channel.registered = True
+                channel.events = events
+            except (OSError, ValueError, KeyError) as error:
+                # 注册失败的串口不会再被读取，停止发送使调用方尽快发现错误。
+                print(f"注册串口到反应器失败: {error}")
+                channel.stop()
+                self._unregister(channel)
+
+    def _unregister(self, channel):
+        if channel.registered:
+            try:
+                self._selector.unregister(channel.fd)
+            except (KeyError, ValueError, OSError):
+                pass
+            channel.registered = False
+        self._writing.discard(channel)
+        with self._lock:
+            self._channels.discard(channel)
+        channel.removed.set()
+
+    def _next_timeout(self, now):
+        deadlines = []
+        with self._lock:
+            for channel in self._writing:
+                if channel._current is not None:
+                    deadlines.append(channel._current[3])
+                elif channel._queue:
+                    deadlines.append(channel._queue[0][2])
+        return max(0.0, min(deadlines) - now) if deadlines else None
+
+    def _run(self):
+        while True:
+            self._apply_changes()
+            with self._lock:
+                if not self._channels and not self._changes:
+                    # 没有注册的串口时退出线程，下一次注册会重新启动。
+                    self._selector.close()
+                    os.close(self._wake_read)
+                    os.close(self._wake_write)
+                    self._selector = self._wake_read = self._wake_write = None
+                    self._thread = None
+                    return
+            try:
+                events = self._selector.select(self._next_timeout(time.monotonic()))
+            except InterruptedError:
+                continue
+            for key, mask in events:
+                channel = key.data
+                if channel is None:
+                    try:
+                        while os.read(self._wake_read, 4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    continue
+                if mask & selectors.EVENT_READ and channel.registered:
+                    self._service_read(channel)
+                if mask & selectors.EVENT_WRITE and channel.registered:
+                    self._service_write(channel)
+            now = time.monotonic()
+            for channel in list(self._writing):
+                if channel.registered:
+                    self._expire(channel, now)
+
+    def _service_read(self, channel):
+        try:
+            keep = channel._on_readable()
+        except Exception as error:
+            print(f"处理串口读取失败: {error}")
+            keep = False
+        if keep is False:
+            channel.stop()
+            self._unregister(channel)
+
+    def _expire(self, channel, now):
+        """使超过截止时间仍未开始的数据与超过写超时的当前写入失败。"""
+        failed = []
+        with self._lock:
+            current = channel._current
+            if current is not None and now >= current[3]:
+                channel._current = None
+                failed.append((current[1], serial.SerialTimeoutException("Write timeout")))
+            while channel._queue and channel._queue[0][2] <= now:
+                failed.append((channel._queue.popleft()[1], serial.SerialTimeoutException("发送等待超时")))
+            if failed:
+                self._changes.add(channel)
+        for future, error in failed:
+            _fail(future, error)
+
+    def _service_write(self, channel):
+        """按顺序尽量写出发送队列，写满时保留当前项等待下次可写。"""
+        while True:
+            failed = []
+            with self._lock:
+                if channel._current is None:
+                    now = time.monotonic()
+                    while channel._queue:
+                        data, future, deadline = channel._queue.popleft()
+                        if deadline <= now:
+                            failed.append((future, serial.SerialTimeoutException("发送等待超时")))
+                        elif future.set_running_or_notify_cancel():
+                            channel._current = [memoryview(data), future, 0, now + channel.timeout]
+                            break
+                current = channel._current
+                if current is None:
+                    self._changes.add(channel)
+            for future, error in failed:
+                _fail(future, error)
+            if current is None:
+                return
+            view, future, offset, _deadline = current
+            try:
+                written = os.write(channel.fd, view[offset:])
+                error = None
+            except BlockingIOError:
+                return
+            except OSError as write_error:
+                written, error = 0, serial.SerialException(f"write failed: {write_error}")
+            with self._lock:
+                if channel._current is not current:
+                    continue
+                current[2] += written
+                done = error is not None or current[2] >= len(view)
+                if done:
+                    channel._current = None
+            if not done:
+                continue
+            if error is None:
+                future.set_result(len(view))
+            else:
+                future.set_exception(error)
@@ -0,0 +1,118 @@
+"""串口发送队列：每个打开的串口由一个常驻写线程按顺序写入。"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import serial
+
+
+class SerialWriter:
+    """按提交顺序写入同一串口，并将相邻小块数据合并为一次 write。
+
+    每个提交返回 ``concurrent.futures.Future``，结果为写入的字节数；失败时
+    以异常结束。超过截止时间仍未开始写入的数据不会再发送。
+    """
+
+    MAX_PENDING_ITEMS = 1024
+    COALESCE_BYTES = 4096
+
+    def __init__(self, port, timeout=1.0, max_pending_items=MAX_PENDING_ITEMS,
+                 coalesce_bytes=COALESCE_BYTES):
+        self.port = port
+        self.timeout = timeout
+        self._max_pending_items = max_pending_items
+        self._coalesce_bytes = coalesce_bytes
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._inflight_deadline = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _fail(future, error):
+        if future.set_running_or_notify_cancel():
+            future.set_exception(error)
+
+    def submit(self, data, callback=None, timeout=None):
+        """将字节加入发送队列；callback 以 Future 为参数在写线程中调用。"""
+        future = Future()
+        if callback:
+            future.add_done_callback(callback)
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        with self._condition:
+            if self._stopped:
+                error = serial.PortNotOpenError()
+            elif len(self._queue) >= self._max_pending_items:
+                error = serial.SerialException("发送队列已满")
+            else:
+                self._queue.append((bytes(data), future, deadline))
+                self._condition.notify()
+                return future
+        # 在锁外结束 Future，避免回调中再次提交时死锁。
+        self._fail(future, error)
+        return future
+
+    def pending_count(self):
+        with self._condition:
+            return len(self._queue)
+
+    def is_stalled(self):
+        """当前写入已超过其截止时间但仍阻塞在系统调用中。"""
+        with self._condition:
+            return self._inflight_deadline is not None and time.monotonic() >= self._inflight_deadline
+
+    def stop(self):
+        """拒绝新的提交并使排队数据失败；正在进行的写入由其自身结束。"""
+        with self._condition:
+            self._stopped = True
+            pending = list(self._queue)
+            self._queue.clear()
+            self._condition.notify()
+        for _data, future, _deadline in pending:
+            self._fail(future, serial.PortNotOpenError())
+
+    def _take_batch(self):
+        """调用方须持有条件锁；取出队首并合并其后总长不超过阈值的小块数据。"""
+        batch = [self._queue.popleft()]
+        size = len(batch[0][0])
+        while self._queue and size + len(self._queue[0][0]) <= self._coalesce_bytes:
+            item = self._queue.popleft()
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue and not self._stopped:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+                batch = self._take_batch()
+                now = time.monotonic()
+                expired = [item for item in batch if item[2] <= now]
+                batch = [item for item in batch if item[2] > now]
+                if batch:
+                    self._inflight_deadline = min(item[2] for item in batch)
+            for _data, future, _deadline in expired:
+                self._fail(future, serial.SerialTimeoutException("发送等待超时"))
+            batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                with self._condition:
+                    self._inflight_deadline = None
+                continue
+            error = None
+            try:
+                self.port.write(b"".join(item[0] for item in batch))
+            except Exception as write_error:
+                error = write_error
+            with self._condition:
+                self._inflight_deadline = None
+            for data, future, _deadline in batch:
+                if error is None:
+                    future.set_result(len(data))
+                else:
+                    future.set_exception(error)
@@ -0,0 +1,308 @@
+"""接收缓冲的磁盘溢出：内存环形缓冲写满后将后续数据顺序写入内存映射的分段文件。"""
+
+import mmap
+import os
+import tempfile
+import threading
+from array import array
+from collections import deque
+
+from .byte_ring import ArrivalMarks
+
+
+class _Segment:
+    __slots__ = ("path", "map", "view", "write_pos", "read_pos")
+
+    def __init__(self, path, file_map):
+        self.path = path
+        self.map = file_map
+        self.view = memoryview(file_map)
+        self.write_pos = 0
+        self.read_pos = 0
+
+    def release(self):
+        self.view.release()
+        self.map.close()
+        if self.path:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+
+class MappedSegmentQueue:
+    """按写入顺序保存字节的磁盘队列，接口与 ByteRingBuffer 的生产者和消费者一侧一致。
+
+    数据写入固定大小、已内存映射的分段文件，接收线程可直接 ``readinto`` 映射区；
+    读完的分段立即解除映射并删除。POSIX 下文件在映射后即取消链接，进程异常退出
+    也不会遗留分段文件。总量超过 max_bytes 时拒绝预留，由调用方计入丢弃字节。
+    """
+
+    SEGMENT_BYTES = 16 * 1024 * 1024
+
+    def __init__(self, max_bytes, directory=None, segment_bytes=SEGMENT_BYTES):
+        self.max_bytes = max_bytes
+        self._directory = directory
+        self._segment_bytes = segment_bytes
+        self._segments = deque()
+        self._size = 0
+        self._epoch = 0
+        self._reserved = False
+        self._dropped = 0
+        self._closed = False
+        self._error = None
+        self._marks = ArrivalMarks()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return self._size
+
+    def is_idle(self):
+        """队列为空且没有未提交的预留。"""
+        with self._lock:
+            return not self._size and not self._reserved
+
+    def take_error(self):
+        """返回并清除最近一次创建分段文件失败的原因。"""
+        with self._lock:
+            error, self._error = self._error, None
+            return error
+
+    def _new_segment(self):
+        handle, path = tempfile.mkstemp(prefix="qserial-spill-", suffix=".bin", dir=self._directory)
+        try:
+            os.ftruncate(handle, self._segment_bytes)
+            file_map = mmap.mmap(handle, self._segment_bytes)
+        except OSError:
+            os.close(handle)
+            os.unlink(path)
+            raise
+        os.close(handle)
+        if os.name != "nt":
+            # 映射仍然有效，目录项已不再需要。
+            os.unlink(path)
+            path = None
+        return _Segment(path, file_map)
+
+    def _writable_segment(self):
+        if self._segments and self._segments[-1].write_pos < self._segment_bytes:
+            return self._segments[-1]
+        segment = self._new_segment()
+        self._segments.append(segment)
+        return segment
+
+    def reserve(self, size):
+        """预留当前分段尾部最多 size 字节，返回 (memoryview, token)；超出上限时返回 (None, None)。"""
+        with self._lock:
+            free = self.max_bytes - self._size
+            if self._closed or free <= 0 or size <= 0:
+                return None, None
+            try:
+                segment = self._writable_segment()
+            except OSError as error:
+                self._error = str(error)
+                return None, None
+            start = segment.write_pos
+            length = min(size, free, self._segment_bytes - start)
+            self._reserved = True
+            return segment.view[start:start + length], (self._epoch, segment, start)
+
+    def commit(self, token, count, timestamp=None):
+        if token is None:
+            return False
+        with self._lock:
+            epoch, segment, start = token
+            if epoch != self._epoch:
+                return False
+            self._reserved = False
+            if count <= 0 or segment.write_pos != start or not self._segments or self._segments[-1] is not segment:
+                return False
+            segment.write_pos += count
+            self._size += count
+            self._marks.add(timestamp, count)
+            return True
+
+    def write(self, data, timestamp=None):
+        """复制整块数据；剩余容量不足时整块丢弃并返回 False。"""
+        size = len(data)
+        with self._lock:
+            if self._closed or self._size + size > self.max_bytes:
+                self._dropped += size
+                return False
+            view = memoryview(data)
+            position = 0
+            try:
+                while position < size:
+                    segment = self._writable_segment()
+                    count = min(size - position, self._segment_bytes - segment.write_pos)
+                    segment.view[segment.write_pos:segment.write_pos + count] = view[position:position + count]
+                    segment.write_pos += count
+                    position += count
+            except OSError as error:
+                self._error = str(error)
+                self._dropped += size - position
+            self._size += position
+            self._marks.add(timestamp, position)
+            return position == size
+
+    def drop(self, count):
+        with self._lock:
+            self._dropped += count
+
+    def read_marked(self, max_bytes):
+        """按写入顺序取出最多 max_bytes 字节，返回 (bytes, 批内偏移 array, 到达时间 array)。"""
+        with self._lock:
+            count = min(max_bytes, self._size)
+            if count <= 0:
+                return b"", array("Q"), array("q")
+            parts = []
+            remaining = count
+            while remaining:
+                segment = self._segments[0]
+                length = min(remaining, segment.write_pos - segment.read_pos)
+                parts.append(segment.view[segment.read_pos:segment.read_pos + length])
+                segment.read_pos += length
+                remaining -= length
+                if segment.read_pos == segment.write_pos and (
+                    segment.write_pos == self._segment_bytes or len(self._segments) > 1
+                ):
+                    parts[-1] = parts[-1].tobytes()
+                    self._segments.popleft().release()
+            data = b"".join(parts)
+            self._size -= count
+            if not self._size and not self._reserved and self._segments:
+                # 队列已空且无未提交预留时从分段开头重新写入，复用已映射的文件。
+                self._segments[0].write_pos = self._segments[0].read_pos = 0
+            return (data, *self._marks.take(count))
+
+    def take_dropped(self):
+        with self._lock:
+            dropped, self._dropped = self._dropped, 0
+            return dropped
+
+    def clear(self):
+        """释放全部分段并使未提交的预留失效。"""
+        with self._lock:
+            self._release_segments()
+            self._dropped = 0
+
+    def close(self):
+        """释放分段文件，之后的写入全部计为丢弃。"""
+        with self._lock:
+            self._closed = True
+            self._release_segments()
+
+    def _release_segments(self):
+        # 未提交的预留仍引用映射区，其分段保留到提交失败后由垃圾回收释放。
+        segments = list(self._segments)
+        self._segments.clear()
+        for segment in segments:
+            try:
+                segment.release()
+            except BufferError:
+                pass
+        self._size = 0
+        self._epoch += 1
+        self._reserved = False
+        self._marks.discard()
+
+
+class SpillingReceiveBuffer:
+    """内存环形缓冲加可选磁盘溢出队列，对接收线程表现为同一个接收槽。
+
+    环形缓冲写满且启用溢出时，后续数据全部写入磁盘队列，直到界面线程按顺序
+    取完溢出数据后才回到内存缓冲，保证取出顺序与到达顺序一致。溢出上限为 0 或
+    磁盘队列也已写满时，数据计入丢弃字节数。
+    """
+
+    def __init__(self, ring, spill_limit=0, directory=None, segment_bytes=MappedSegmentQueue.SEGMENT_BYTES):
+        self._ring = ring
+        self._spill = MappedSegmentQueue(spill_limit, directory, segment_bytes)
+        self._spilling = False
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self):
+        return self._ring.capacity
+
+    @property
+    def spill_limit(self):
+        return self._spill.max_bytes
+
+    @spill_limit.setter
+    def spill_limit(self, value):
+        # 调小上限不丢弃已溢出的数据，只限制之后的写入。
+        self._spill.max_bytes = value
+
+    def __len__(self):
+        return len(self._ring) + len(self._spill)
+
+    def spilled_bytes(self):
+        """尚未取出的磁盘溢出字节数。"""
+        return len(self._spill)
+
+    def take_spill_error(self):
+        return self._spill.take_error()
+
+    def reserve(self, size):
+        with self._lock:
+            if not self._spilling:
+                view, token = self._ring.reserve(size)
+                if view is not None:
+                    return view, (self._ring, token)
+                if self._spill.max_bytes <= 0:
+                    return None, None
+                self._spilling = True
+            view, token = self._spill.reserve(size)
+            return (view, (self._spill, token)) if view is not None else (None, None)
+
+    def commit(self, token, count, timestamp=None):
+        if token is None:
+            return False
+        target, inner = token
+        return target.commit(inner, count, timestamp)
+
+    def write(self, data, timestamp=None):
+        with self._lock:
+            if not self._spilling:
+                if len(self._ring) + len(data) <= self._ring.capacity or self._spill.max_bytes <= 0:
+                    return self._ring.write(data, timestamp)
+                self._spilling = True
+            return self._spill.write(data, timestamp)
+
+    def drop(self, count):
+        self._ring.drop(count)
+
+    def read(self, max_bytes):
+        return self.read_marked(max_bytes)[0]
+
+    def read_marked(self, max_bytes):
+        """先取内存缓冲中较早的数据，不足时再从磁盘队列补足。"""
+        data, offsets, times = self._ring.read_marked(max_bytes)
+        remaining = max_bytes - len(data)
+        if remaining > 0 and len(self._spill):
+            spilled, spill_offsets, spill_times = self._spill.read_marked(remaining)
+            base = len(data)
+            offsets.extend(offset + base for offset in spill_offsets)
+            times.extend(spill_times)
+            data = data + spilled if data else spilled
+        with self._lock:
+            if self._spilling and self._spill.is_idle():
+                self._spilling = False
+        return data, offsets, times
+
+    def take_dropped(self):
+        return self._ring.take_dropped() + self._spill.take_dropped()
+
+    def clear(self):
+        with self._lock:
+            self._ring.clear()
+            self._spill.clear()
+            self._spilling = False
+
+    def close(self):
+        """释放磁盘溢出文件。"""
+        with self._lock:
+            self._spill.close()
+            self._spilling = False
@@ -79,7 +79,7 @@ class ThemeManagerQt:
         disabled_border = QColor(border).lighter(135) if is_dark else QColor(border).darker(120)
         return f"""
             QWidget {{ background: {bg}; color: {fg}; }}
-            QLineEdit, QPlainTextEdit, QTextEdit, QComboBox, QSpinBox, QTableWidget, QTreeWidget {{
+            QLineEdit, QPlainTextEdit, QTextEdit, ReceiveView, QComboBox, QSpinBox, QTableWidget, QTableView, QTreeWidget {{
                 background: {text_bg}; color: {text_fg}; border: 1px solid {input_border.name()};
             }}
             QGroupBox:disabled {{ background: {disabled_bg.name()}; color: {disabled_fg.name()}; border-color: {disabled_border.name()}; }}
@@ -101,8 +101,8 @@ class ThemeManagerQt:
             QMenu::item {{ background: transparent; color: {text_fg}; padding: 6px 24px 6px 10px; }}
             QMenu::item:selected {{ background: {selected}; color: {selected_fg}; }}
             QMenu::separator {{ height: 1px; background: {border}; margin: 4px 6px; }}
-            QTableWidget {{ gridline-color: {border}; alternate-background-color: {button_bg}; }}
-            QTableWidget::item {{ padding: 3px 5px; }}
+            QTableWidget, QTableView {{ gridline-color: {border}; alternate-background-color: {button_bg}; }}
+            QTableWidget::item, QTableView::item {{ padding: 3px 5px; }}
             QHeaderView::section {{ background: {button_bg}; color: {button_fg}; border: 1px solid {border}; padding: 4px; }}
-            QTableWidget::item:selected {{ background: {selected}; color: {selected_fg}; }}
+            QTableWidget::item:selected, QTableView::item:selected {{ background: {selected}; color: {selected_fg}; }}
         """
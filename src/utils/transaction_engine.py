@@ -0,0 +1,327 @@
+"""请求/应答事务：发送一条数据后按分隔符、正则、长度或自定义规则匹配应答，支持超时重试与流水线。"""
+
+import re
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import Future, InvalidStateError
+
+from .send_data_utils import SendDataUtils
+
+
+TransactionResult = namedtuple("TransactionResult", "name reply latency_ms attempts")
+
+
+class TransactionTimeoutError(TimeoutError):
+    """事务在全部重试后仍未收到匹配的应答。"""
+
+    def __init__(self, name, attempts):
+        super().__init__(f"{name or '事务'} 等待应答超时（已发送 {attempts} 次）")
+        self.name = name
+        self.attempts = attempts
+
+
+_ESCAPES = re.compile(r"\\(x[0-9a-fA-F]{2}|[rnt\\])")
+
+
+def unescape_delimiter(text):
+    """将分隔符文本中的 \\r、\\n、\\t、\\\\ 与 \\xHH 转换为对应字符。"""
+    def replace(match):
+        token = match.group(1)
+        if token[0] == "x":
+            return chr(int(token[1:], 16))
+        return {"r": "\r", "n": "\n", "t": "\t", "\\": "\\"}[token]
+    return _ESCAPES.sub(replace, text)
+
+
+class ReplyMatcher:
+    """判断接收缓冲开头是否已包含一条完整应答。
+
+    ``match(buffer)`` 返回应答的结束偏移，应答尚不完整时返回 -1；应答之前到达的
+    回显等数据计入该应答。
+    """
+
+    def __init__(self, match, description):
+        self.match = match
+        self.description = description
+
+    @classmethod
+    def delimiter(cls, delimiter):
+        if not delimiter:
+            raise ValueError("应答分隔符不能为空")
+        delimiter = bytes(delimiter)
+
+        def match(buffer):
+            index = buffer.find(delimiter)
+            return index + len(delimiter) if index >= 0 else -1
+        return cls(match, f"分隔符 {delimiter!r}")
+
+    @classmethod
+    def regex(cls, pattern):
+        """pattern 为 bytes 正则或已编译的 bytes 正则，应答截止到首次匹配的结尾。"""
+        compiled = re.compile(pattern) if isinstance(pattern, (bytes, bytearray)) else pattern
+        if not isinstance(compiled.pattern, bytes):
+            raise ValueError("应答正则必须是 bytes 模式")
+
+        def match(buffer):
+            found = compiled.search(buffer)
+            return found.end() if found and found.end() > 0 else -1
+        return cls(match, f"正则 {compiled.pattern!r}")
+
+    @classmethod
+    def length(cls, count):
+        if not isinstance(count, int) or count <= 0:
+            raise ValueError("应答长度必须是正整数")
+        return cls(lambda buffer: count if len(buffer) >= count else -1, f"{count} 字节")
+
+    @classmethod
+    def predicate(cls, frame_length, description="自定义帧"):
+        """frame_length(buffer) 返回一帧完整应答的长度，不完整时返回 None 或 0。"""
+        def match(buffer):
+            length = frame_length(buffer)
+            return length if length else -1
+        return cls(match, description)
+
+    @classmethod
+    def from_config(cls, reply, encoding="UTF-8"):
+        """由快捷指令的 reply 配置创建；value 按类型解释为分隔符文本、bytes 正则或字节数。"""
+        kind, value = reply["type"], reply["value"]
+        if kind == "length":
+            return cls.length(int(value))
+        if kind == "regex":
+            try:
+                return cls.regex(re.compile(_encode(value, encoding)))
+            except re.error as error:
+                raise ValueError(f"应答正则无效: {error}") from error
+        return cls.delimiter(_encode(unescape_delimiter(value), encoding))
+
+
+def _encode(text, encoding):
+    """按发送编码规则编码匹配文本，不转换其中的换行。"""
+    for candidate in SendDataUtils.get_encoding_candidates(encoding):
+        try:
+            return text.encode(candidate.replace("-", "").lower())
+        except (LookupError, UnicodeEncodeError):
+            continue
+    raise ValueError(f"无法使用 {encoding} 编码应答匹配内容")
+
+
+def _resolve(future, result=None, error=None):
+    """完成事务 Future；调用方已取消的 Future 保持不变。"""
+    try:
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+    except InvalidStateError:
+        pass
+
+
+class _Transaction:
+    __slots__ = ("name", "payload", "matcher", "timeout_ns", "retries", "attempts", "future", "sent_ns", "deadline_ns")
+
+    def __init__(self, name, payload, matcher, timeout_ns, retries):
+        self.name = name
+        self.payload = payload
+        self.matcher = matcher
+        self.timeout_ns = timeout_ns
+        self.retries = retries
+        self.attempts = 0
+        self.future = Future()
+        self.sent_ns = self.deadline_ns = 0
+
+
+class TransactionEngine:
+    """在串口会话上按顺序执行请求/应答事务。
+
+    ``serial_manager`` 只需提供 ``submit(payload, callback)``（如 SerialManager 或
+    SerialManagerQt）。接收数据由调用方经 ``feed``（可直接作为带时间戳的接收回调）
+    或 ``feed_batch`` 交给引擎，``poll`` 由调用方周期调用以处理超时；两者都可在
+    任意线程中调用。
+
+    最多 ``pipeline_depth`` 个事务同时等待应答，应答按发送顺序依次匹配最早的事务，
+    超出的请求排队到有空位时再发送。事务超时后若还有重试次数则重新发送并排到
+    等待队列末尾，否则以 TransactionTimeoutError 结束；超时时丢弃已收到的不完整
+    数据，避免残留字节错配后续应答。没有等待中的事务时收到的数据直接丢弃。延迟
+    从提交发送（写入完成后更新为写入完成时刻）计到完成匹配的数据块到达时刻。
+    """
+
+    MAX_BUFFER_BYTES = 1024 * 1024
+    LATENCY_SAMPLES = 1024
+
+    def __init__(self, serial_manager, pipeline_depth=1, clock=time.perf_counter_ns):
+        self.serial_manager = serial_manager
+        self.pipeline_depth = max(1, pipeline_depth)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._queued = deque()
+        self._outstanding = deque()
+        self._to_send = deque()
+        self._sending = False
+        self._buffer = bytearray()
+        self._latencies = deque(maxlen=self.LATENCY_SAMPLES)
+        self.completed = self.failed = self.timeouts = self.retries = 0
+        self.discarded_bytes = 0
+
+    @property
+    def active(self):
+        """是否有排队或等待应答的事务。"""
+        with self._lock:
+            return bool(self._queued or self._outstanding)
+
+    def request(self, payload, matcher, timeout=1.0, retries=0, name=""):
+        """提交一个事务，返回以 TransactionResult 完成的 Future。"""
+        transaction = _Transaction(name, bytes(payload), matcher, int(timeout * 1e9), max(0, retries))
+        with self._lock:
+            self._queued.append(transaction)
+            self._pump()
+        self._flush_sends()
+        return transaction.future
+
+    def _pump(self):
+        """调用方须持有锁；在流水线有空位时将排队的事务转入等待应答。"""
+        while self._queued and len(self._outstanding) < self.pipeline_depth:
+            self._start_attempt(self._queued.popleft())
+
+    def _start_attempt(self, transaction):
+        """调用方须持有锁；开始一次发送并加入等待队列末尾，实际提交由 _flush_sends 完成。"""
+        transaction.attempts += 1
+        transaction.sent_ns = self._clock()
+        transaction.deadline_ns = transaction.sent_ns + transaction.timeout_ns
+        self._outstanding.append(transaction)
+        self._to_send.append((transaction, transaction.attempts))
+
+    def _flush_sends(self):
+        """不持有锁时调用；按顺序提交待发送的事务。
+
+        串口关闭时会在持有其操作锁的情况下等待写线程结束，写完成回调又需要本引擎
+        的锁，因此提交期间不能持有锁；同一时刻只有一个线程负责提交以保持发送顺序。
+        """
+        while True:
+            with self._lock:
+                if self._sending or not self._to_send:
+                    return
+                self._sending = True
+                transaction, attempt = self._to_send.popleft()
+            try:
+                self.serial_manager.submit(transaction.payload, lambda future: self._on_written(transaction, attempt, future))
+            finally:
+                with self._lock:
+                    self._sending = False
+
+    def _on_written(self, transaction, attempt, future):
+        """写完成回调，可能在写线程中执行，因此只更新状态，不在此提交后续发送。"""
+        error = None if future.cancelled() else future.exception()
+        with self._lock:
+            if transaction.attempts != attempt or transaction not in self._outstanding:
+                return
+            if error is None and not future.cancelled():
+                # 应答可能先于写入完成回调到达，此时保留提交时刻。
+                transaction.sent_ns = max(transaction.sent_ns, self._clock())
+                return
+            self._outstanding.remove(transaction)
+            self.failed += 1
+        if error is None:
+            transaction.future.cancel()
+        else:
+            _resolve(transaction.future, error=error)
+
+    def feed(self, data, arrival_ns=None):
+        """交付一块接收数据；arrival_ns 为读取完成时的 perf_counter_ns，缺省为当前时刻。"""
+        arrival_ns = self._clock() if arrival_ns is None else arrival_ns
+        finished = []
+        with self._lock:
+            if not self._outstanding:
+                self.discarded_bytes += len(data)
+                return
+            self._buffer += data
+            while self._outstanding:
+                transaction = self._outstanding[0]
+                end = transaction.matcher.match(self._buffer)
+                if end < 0:
+                    break
+                reply = bytes(self._buffer[:end])
+                del self._buffer[:end]
+                self._outstanding.popleft()
+                latency_ms = max(0, arrival_ns - transaction.sent_ns) / 1e6
+                self._latencies.append(latency_ms)
+                self.completed += 1
+                finished.append((transaction, TransactionResult(transaction.name, reply, latency_ms, transaction.attempts)))
+            if not self._outstanding:
+                self.discarded_bytes += len(self._buffer)
+                self._buffer.clear()
+            elif len(self._buffer) > self.MAX_BUFFER_BYTES:
+                self.discarded_bytes += len(self._buffer)
+                self._buffer.clear()
+            self._pump()
+        self._flush_sends()
+        for transaction, result in finished:
+            _resolve(transaction.future, result)
+
+    def feed_batch(self, data, arrivals):
+        """按 ReceiveArrivals 记录的各块到达时间逐块交付一批数据。"""
+        chunks = list(arrivals)
+        if not chunks or chunks[0][0] > 0:
+            # 首块缺少到达记录时沿用下一块的到达时间，没有任何记录时按当前时刻计算。
+            chunks.insert(0, (0, chunks[0][1] if chunks else None))
+        for index, (offset, arrival_ns) in enumerate(chunks):
+            end = chunks[index + 1][0] if index + 1 < len(chunks) else len(data)
+            if end > offset:
+                self.feed(data[offset:end], arrival_ns)
+
+    def poll(self, now_ns=None):
+        """处理已超时的事务，按剩余次数重发或结束，并发送写入失败后仍在排队的事务。"""
+        now_ns = self._clock() if now_ns is None else now_ns
+        failed = []
+        with self._lock:
+            expired = [transaction for transaction in self._outstanding if now_ns >= transaction.deadline_ns]
+            if expired:
+                self.discarded_bytes += len(self._buffer)
+                self._buffer.clear()
+            for transaction in expired:
+                self._outstanding.remove(transaction)
+                if transaction.attempts <= transaction.retries:
+                    self.retries += 1
+                    self._start_attempt(transaction)
+                else:
+                    self.timeouts += 1
+                    self.failed += 1
+                    failed.append(transaction)
+            self._pump()
+        self._flush_sends()
+        for transaction in failed:
+            _resolve(transaction.future, error=TransactionTimeoutError(transaction.name, transaction.attempts))
+
+    def cancel_all(self, error=None):
+        """结束全部排队与等待中的事务，如串口关闭或断开时；默认以取消结束。"""
+        with self._lock:
+            transactions = list(self._outstanding) + list(self._queued)
+            self._outstanding.clear()
+            self._queued.clear()
+            self._to_send.clear()
+            self._buffer.clear()
+        for transaction in transactions:
+            if error is None:
+                transaction.future.cancel()
+            else:
+                _resolve(transaction.future, error=error)
+
+    def stats(self):
+        """返回完成、失败、超时与重试次数，以及最近事务延迟的中位数、P99 与最大值（毫秒）。"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                "completed": self.completed,
+                "failed": self.failed,
+                "timeouts": self.timeouts,
+                "retries": self.retries,
+                "discarded_bytes": self.discarded_bytes,
+                "pending": len(self._queued) + len(self._outstanding),
+            }
+        if latencies:
+            stats.update(
+                latency_median_ms=latencies[len(latencies) // 2],
+                latency_p99_ms=latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+                latency_max_ms=latencies[-1],
+            )
+        return stats
@@ -0,0 +1,186 @@
+"""asyncio 串口会话测试。"""
+
+import asyncio
+import os
+import sys
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import serial
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from utils.async_serial_session import AsyncSerialSession
+from utils.serial_manager import SerialManager
+
+
+def read_master(fd, expected, timeout=1.0):
+    data = b""
+    deadline = time.monotonic() + timeout
+    os.set_blocking(fd, False)
+    while len(data) < expected and time.monotonic() < deadline:
+        try:
+            data += os.read(fd, 4096)
+        except BlockingIOError:
+            time.sleep(0.01)
+    return data
+
+
+@unittest.skipUnless(hasattr(os, "openpty"), "需要 POSIX 伪终端")
+class AsyncSerialSessionPtyTests(unittest.TestCase):
+    def setUp(self):
+        self.master, self.slave = os.openpty()
+
+    def tearDown(self):
+        os.close(self.master)
+        os.close(self.slave)
+
+    async def _round_trip(self, session):
+        received = []
+        async with session:
+            await session.open(os.ttyname(self.slave))
+            os.write(self.master, b"hello ")
+            async for chunk in session:
+                received.append(chunk)
+                if b"".join(received) == b"hello ":
+                    os.write(self.master, b"world")
+                elif b"".join(received) == b"hello world":
+                    break
+            self.assertEqual(await session.send(b"ping"), 4)
+            self.assertEqual(await session.send(bytearray(b"pong")), 4)
+            uses_reader = session.uses_event_loop_reader
+        self.assertFalse(session.is_open)
+        self.assertEqual(await session.read(), b"")
+        return uses_reader
+
+    def test_event_loop_reader_round_trip(self):
+        session = AsyncSerialSession(port_monitor=Mock())
+        self.assertTrue(asyncio.run(self._round_trip(session)))
+        self.assertEqual(read_master(self.master, 8), b"pingpong")
+
+    def test_receive_thread_fallback_when_loop_has_no_fd_callbacks(self):
+        async def run():
+            loop = asyncio.get_running_loop()
+            with patch.object(loop, "add_reader", side_effect=NotImplementedError):
+                return await self._round_trip(AsyncSerialSession(port_monitor=Mock()))
+
+        self.assertFalse(asyncio.run(run()))
+        self.assertEqual(read_master(self.master, 8), b"pingpong")
+
+    def test_reading_pauses_above_pending_limit_and_resumes_after_drain(self):
+        async def run():
+            session = AsyncSerialSession(port_monitor=Mock(), max_pending_bytes=8)
+            await session.open(os.ttyname(self.slave))
+            os.write(self.master, b"0123456789")
+            while session._pending_bytes < 8:
+                await asyncio.sleep(0.01)
+            self.assertFalse(session._reading)
+            os.write(self.master, b"AB")
+            await asyncio.sleep(0.05)
+            data = b""
+            while len(data) < 12:
+                data += await session.read()
+            self.assertTrue(session._reading)
+            await session.close()
+            return data
+
+        self.assertEqual(asyncio.run(run()), b"0123456789AB")
+
+    def test_close_during_blocked_send_raises_port_not_open_promptly(self):
+        async def run():
+            session = AsyncSerialSession(port_monitor=Mock(), operation_timeout=3.0)
+            await session.open(os.ttyname(self.slave))
+            # 主端不读取时伪终端写缓冲很快写满，发送阻塞在等待可写。
+            send = asyncio.ensure_future(session.send(b"x" * (4 << 20)))
+            await asyncio.sleep(0.3)
+            self.assertFalse(send.done())
+            started = time.monotonic()
+            await session.close()
+            with self.assertRaises(serial.PortNotOpenError):
+                await send
+            return time.monotonic() - started
+
+        self.assertLess(asyncio.run(run()), 1.0)
+
+
+class AsyncSerialSessionGenerationTests(unittest.TestCase):
+    def test_cancelled_open_closes_late_port_and_rejects_retry_until_done(self):
+        late_port = Mock(is_open=True)
+
+        def slow_create(*_args):
+            time.sleep(0.2)
+            return late_port
+
+        async def run():
+            session = AsyncSerialSession(port_monitor=Mock())
+            task = asyncio.ensure_future(session.open("COM1"))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            with self.assertRaisesRegex(serial.SerialException, "仍在进行"):
+                await session.open("COM1")
+            await asyncio.sleep(0.3)
+            return session
+
+        with patch.object(SerialManager, "create_port", side_effect=slow_create):
+            session = asyncio.run(run())
+        self.assertFalse(session.is_open)
+        late_port.close.assert_called_once()
+
+    def test_close_during_open_discards_port(self):
+        port = Mock(is_open=True, fd=None)
+
+        def slow_create(*_args):
+            time.sleep(0.1)
+            return port
+
+        async def run():
+            session = AsyncSerialSession(port_monitor=Mock())
+            task = asyncio.ensure_future(session.open("COM1"))
+            await asyncio.sleep(0.02)
+            self.assertTrue(await session.close())
+            with self.assertRaisesRegex(serial.SerialException, "已关闭"):
+                await task
+            return session
+
+        with patch.object(SerialManager, "create_port", side_effect=slow_create):
+            session = asyncio.run(run())
+        self.assertFalse(session.is_open)
+        port.close.assert_called_once()
+
+    def test_stale_callbacks_are_ignored_and_disconnect_ends_reads(self):
+        monitor = Mock()
+
+        async def run():
+            session = AsyncSerialSession(port_monitor=monitor)
+            first, second = Mock(is_open=True, fd=None), Mock(is_open=True, fd=None)
+            with patch.object(SerialManager, "create_port", side_effect=[first, second]), \
+                    patch.object(SerialManager, "_read_available", side_effect=lambda _port: time.sleep(0.01) or b""):
+                await session.open("COM1")
+                old_generation = session._generation
+                await session.close()
+                await session.open("COM1")
+                session._deliver(first, old_generation, b"stale")
+                session._handle_disconnect(first, old_generation, "旧会话")
+                self.assertTrue(session.is_open)
+                session._deliver(second, session._generation, b"kept")
+                session._handle_disconnect(second, session._generation, "已被移除")
+                self.assertFalse(session.is_open)
+                self.assertEqual(await session.read(), b"kept")
+                with self.assertRaisesRegex(serial.SerialException, "已被移除"):
+                    await session.read()
+                with self.assertRaises(serial.PortNotOpenError):
+                    await session.send(b"x")
+                self.assertEqual(await session.read(), b"")
+
+        asyncio.run(run())
+        self.assertEqual(monitor.subscribe.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
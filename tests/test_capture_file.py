@@ -0,0 +1,89 @@
+"""原始捕获文件的写入、索引定位与截断恢复测试。"""
+
+import io
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from main.capture_cli import ReplayFormatter, replay
+from utils.capture_file import DIRECTION_RX, DIRECTION_TX, CaptureFileWriter, CaptureReader, CaptureWriter
+
+
+BASE_NS = 1_700_000_000_000_000_000
+
+
+class CaptureFileTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / "capture.qcap"
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_records(self, count, close=True):
+        writer = CaptureFileWriter(self.path)
+        port = writer.port_id("COM3")
+        for index in range(count):
+            direction = DIRECTION_TX if index % 10 == 0 else DIRECTION_RX
+            writer.write(direction, port, BASE_NS + index * 1_000_000, b"%06d;" % index)
+        if close:
+            writer.close()
+        else:
+            writer.flush()
+        return writer
+
+    def test_index_seeks_by_time_and_stream_offset(self):
+        self.write_records(20_000)
+        with CaptureReader(self.path) as reader:
+            self.assertTrue(reader.complete)
+            self.assertEqual(reader.ports, {0: "COM3"})
+            first = next(reader.records(start_time_ns=BASE_NS + 12_345 * 1_000_000))
+            self.assertEqual(first.payload, b"012345;")
+            self.assertEqual(first.port, "COM3")
+            # 起点落在记录中间时从该处截断负载。
+            first = next(reader.records(start_offset=7 * 500 + 3))
+            self.assertEqual((first.payload, first.stream_offset), (b"500;", 7 * 500 + 3))
+            received = list(reader.records(start_time_ns=BASE_NS + 19_990 * 1_000_000, direction=DIRECTION_RX))
+            self.assertEqual([record.payload for record in received], [b"%06d;" % index for index in range(19_991, 20_000)])
+
+    def test_truncated_file_is_recovered_by_scanning_records(self):
+        writer = self.write_records(1_000, close=False)
+        with self.path.open("r+b") as handle:
+            handle.truncate(self.path.stat().st_size - 3)
+        with CaptureReader(self.path) as reader:
+            self.assertFalse(reader.complete)
+            payloads = [record.payload for record in reader.records()]
+            self.assertEqual(len(payloads), 999)
+            self.assertEqual(next(reader.records(start_time_ns=BASE_NS + 700 * 1_000_000)).payload, b"000700;")
+        writer._stream.close()
+
+    def test_background_writer_ignores_stale_generation_and_replays_as_hex(self):
+        writer = CaptureWriter()
+        try:
+            writer.open(self.path, generation=1)
+            writer.write_chunks(DIRECTION_RX, "COM3", b"\x01\x02\x03\x04", [(0, BASE_NS), (2, BASE_NS + 5)], generation=1)
+            writer.write(DIRECTION_TX, "COM3", b"AT", BASE_NS + 10, generation=1)
+            writer.close(generation=1)
+            writer.write(DIRECTION_RX, "COM3", b"late", BASE_NS + 20, generation=1)
+            deadline = time.monotonic() + 2
+            while time.monotonic() < deadline and not self.path.exists():
+                time.sleep(0.01)
+        finally:
+            writer.stop()
+        self.assertEqual(writer.take_errors(1), [])
+        with CaptureReader(self.path) as reader:
+            self.assertTrue(reader.complete)
+            self.assertEqual([record.payload for record in reader.records()], [b"\x01\x02", b"\x03\x04", b"AT"])
+            output = io.StringIO()
+            replay(reader, output, ReplayFormatter("HEX", bytes_per_line=8, show_offset=False, show_ascii=False), direction=DIRECTION_RX)
+        self.assertEqual(output.getvalue(), "01 02 03 04\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
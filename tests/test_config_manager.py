@@ -4,6 +4,7 @@ import io
 import json
 import sys
 import tempfile
+import time
 import unittest
 from contextlib import redirect_stdout
 from pathlib import Path
@@ -32,14 +33,15 @@ class ConfigManagerTests(unittest.TestCase):
                 "loop_send": True,
                 "loop_period_ms": 250,
             })
+            manager.close()
 
     def test_load_and_import_normalize_partial_or_invalid_fields(self):
         with tempfile.TemporaryDirectory() as directory:
             config_path = Path(directory) / "config.json"
             config_path.write_text(json.dumps({
                 "last_port_main": "COM1",
-                "port_configs": {"COM1": {"serial_settings": {"baudrate": "bad"}}},
-                "global_settings": {"fontSize": "large"},
+                "port_configs": {"COM1": {"serial_settings": {"baudrate": "bad"}, "receive_settings": {"hex_bytes_per_line": 12, "hex_show_ascii": True}}},
+                "global_settings": {"fontSize": "large", "log_flush_kb": 0, "log_flush_interval_ms": -1, "log_fsync": 1},
                 "send_history": ["legacy", {"data": 1}],
             }), encoding="utf-8")
             manager = ConfigManager(str(config_path))
@@ -47,10 +49,21 @@ class ConfigManagerTests(unittest.TestCase):
             manager.set_last_log_directory(str(Path(directory)))
             self.assertEqual(manager.get_last_log_directory(), str(Path(directory)))
             self.assertEqual(manager.get_port_config("COM1")["serial_settings"]["baudrate"], 115200)
+            self.assertEqual(manager.get_port_config("COM1")["receive_settings"]["hex_bytes_per_line"], 0)
+            self.assertTrue(manager.get_port_config("COM1")["receive_settings"]["hex_show_ascii"])
             self.assertEqual(manager.get_global_settings()["fontSize"], 9)
+            self.assertEqual(manager.get_global_settings()["log_flush_kb"], 0)
+            self.assertEqual(manager.get_global_settings()["log_flush_interval_ms"], 1000)
+            self.assertFalse(manager.get_global_settings()["log_fsync"])
             self.assertEqual(manager.get_send_history(), [{"data": "legacy", "mode": "TEXT", "time": ""}])
             self.assertEqual(manager.get_port_config("COM1")["send_settings"]["line_ending"], "CRLF")
-            self.assertEqual(json.loads(config_path.read_text(encoding="utf-8")), manager.config)
+            self.assertTrue(manager.flush())
+            # 旧版单文件配置迁移为分段文件后保留为备份。
+            self.assertFalse(config_path.exists())
+            self.assertTrue((Path(directory) / "config.json.bak").exists())
+            sections = Path(directory) / "config.d"
+            self.assertEqual(json.loads((sections / "global.json").read_text(encoding="utf-8"))["last_log_directory"], str(Path(directory)))
+            self.assertEqual(json.loads((sections / "ports.json").read_text(encoding="utf-8"))["port_configs"], manager.config["port_configs"])
 
             imported_path = Path(directory) / "import.json"
             imported_path.write_text(json.dumps({"global_settings": {"send_history_max": 50}}), encoding="utf-8")
@@ -73,6 +86,14 @@ class ConfigManagerTests(unittest.TestCase):
                 ConfigManager(str(broken_path))
             self.assertEqual(broken_path.read_text(encoding="utf-8"), "[]")
 
+    def test_frame_decoder_settings_are_validated(self):
+        ports = ConfigManager.normalize({"port_configs": {
+            "A": {"receive_settings": {"frame_decoder": "modbus_rtu", "frame_delimiter": "\\x03", "frame_length_bytes": 4}},
+            "B": {"receive_settings": {"frame_decoder": "crc", "frame_delimiter": "分", "frame_length_bytes": True}},
+        }})["port_configs"]
+        self.assertEqual([ports["A"]["receive_settings"][key] for key in ("frame_decoder", "frame_delimiter", "frame_length_bytes")], ["modbus_rtu", "\\x03", 4])
+        self.assertEqual([ports["B"]["receive_settings"][key] for key in ("frame_decoder", "frame_delimiter", "frame_length_bytes")], ["none", "\\n", 2])
+
     def test_history_is_capped_after_import_and_global_setting_change(self):
         with tempfile.TemporaryDirectory() as directory:
             config_path = Path(directory) / "config.json"
@@ -87,6 +108,7 @@ class ConfigManagerTests(unittest.TestCase):
             self.assertEqual(len(manager.get_send_history()), 50)
             manager.add_send_history(manager.get_send_history()[0]["data"], "TEXT")
             self.assertEqual(len(manager.get_send_history()), 50)
+            manager.close()
 
     def test_import_failure_keeps_current_memory_config(self):
         with tempfile.TemporaryDirectory() as directory:
@@ -97,6 +119,49 @@ class ConfigManagerTests(unittest.TestCase):
             with patch.object(manager, "_write_config", side_effect=OSError("disk full")):
                 self.assertFalse(manager.import_config(str(imported_path)))
             self.assertEqual(manager.get_theme(), "dark")
+            manager.close()
+
+    def test_mutations_are_coalesced_and_flushed_before_export(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config_path = Path(directory) / "config.json"
+            manager = ConfigManager(str(config_path), save_delay=60)
+            with patch.object(manager, "_write_text", wraps=manager._write_text) as write_text:
+                for index in range(100):
+                    manager.set_send_text("COM1", "draft %d" % index)
+                    manager.add_send_history("AT+%d" % index)
+                self.assertEqual(write_text.call_count, 0)
+                exported_path = Path(directory) / "export.json"
+                self.assertTrue(manager.export_config(str(exported_path)))
+                # 只重写发生变化的端口分段一次，发送历史以追加方式写入日志。
+                self.assertEqual(write_text.call_count, 1)
+            journal_path = Path(directory) / "config.d" / "history.jsonl"
+            self.assertEqual(len(journal_path.read_text(encoding="utf-8").splitlines()), 100)
+            exported = json.loads(exported_path.read_text(encoding="utf-8"))
+            self.assertEqual(exported["port_configs"]["COM1"]["send_text"], "draft 99")
+            self.assertEqual(exported["send_history"][0]["data"], "AT+99")
+            manager.set_theme("dark")
+            self.assertTrue(manager.close())
+
+            reloaded = ConfigManager(str(config_path), save_delay=0)
+            self.assertNotIn("send_history", dict.keys(reloaded.config))
+            self.assertEqual(reloaded.get_theme(), "dark")
+            self.assertEqual(reloaded.get_send_history(), exported["send_history"])
+            with patch.object(reloaded, "_write_text", wraps=reloaded._write_text) as write_text:
+                reloaded.set_theme("dark")
+                reloaded.set_theme("light")
+            self.assertEqual([call.args[0] for call in write_text.call_args_list], [reloaded._section_path("global")])
+
+    def test_background_saver_writes_after_the_window(self):
+        with tempfile.TemporaryDirectory() as directory:
+            config_path = Path(directory) / "config.json"
+            manager = ConfigManager(str(config_path), save_delay=0.05)
+            manager.set_theme("dark")
+            deadline = time.monotonic() + 2
+            global_path = Path(directory) / "config.d" / "global.json"
+            while time.monotonic() < deadline and not global_path.exists():
+                time.sleep(0.01)
+            self.assertEqual(json.loads(global_path.read_text(encoding="utf-8"))["theme"], "dark")
+            manager.close()
 
     def test_deep_json_is_handled_as_invalid_config(self):
         with tempfile.TemporaryDirectory() as directory:
@@ -0,0 +1,130 @@
+"""接收分帧解码器与接收线程分帧阶段测试。"""
+
+import os
+import sys
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import Mock
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from utils.byte_ring import ByteRingBuffer
+from utils.frame_decoder import (CobsDecoder, DelimiterDecoder, Frame, FrameFormatter, FramePipeline,
+                                 LengthPrefixedDecoder, ModbusRtuDecoder, SlipDecoder, create_frame_decoder,
+                                 modbus_crc16)
+from utils.serial_manager import SerialManager
+
+
+def cobs_encode(data):
+    output, block = bytearray(), bytearray()
+    for byte in data:
+        if byte:
+            block.append(byte)
+            if len(block) == 254:
+                output += bytes([255]) + block
+                block.clear()
+        else:
+            output += bytes([len(block) + 1]) + block
+            block.clear()
+    return bytes(output + bytes([len(block) + 1]) + block) + b"\x00"
+
+
+def modbus_frame(pdu):
+    return pdu + modbus_crc16(pdu).to_bytes(2, "little")
+
+
+def feed_all(decoder, chunks):
+    frames = []
+    for time_ns, chunk in enumerate(chunks):
+        frames.extend(decoder.feed(chunk, time_ns))
+    return frames
+
+
+class FrameDecoderTests(unittest.TestCase):
+    def test_delimiter_frames_span_chunks_and_oversized_data_is_reported(self):
+        decoder = DelimiterDecoder(b"\r\n", max_frame_bytes=8)
+        frames = feed_all(decoder, [b"AT\r", b"\nOK\r\n\r", b"\n", b"0123456789"])
+        self.assertEqual(frames, [Frame(b"AT", 1, None), Frame(b"OK", 1, None), Frame(b"", 2, None),
+                                  Frame(b"0123456789", 3, "超过最大帧长")])
+        self.assertEqual(create_frame_decoder({"frame_decoder": "delimiter", "frame_delimiter": "\\x03"}).delimiter, b"\x03")
+        self.assertIsNone(create_frame_decoder({"frame_decoder": "none"}))
+
+    def test_length_prefixed_frames_wait_for_complete_payload(self):
+        decoder = LengthPrefixedDecoder(2)
+        self.assertEqual(feed_all(decoder, [b"\x00", b"\x03ab", b"c\x00\x00\x00\x01z"]),
+                         [Frame(b"abc", 2, None), Frame(b"", 2, None), Frame(b"z", 2, None)])
+        small = LengthPrefixedDecoder(1, max_frame_bytes=4)
+        self.assertEqual(small.feed(b"\x09xyz", 7), [Frame(b"\x09xyz", 7, "长度字段超过最大帧长")])
+        self.assertEqual(small.feed(b"\x01q", 8), [Frame(b"q", 8, None)])
+
+    def test_slip_unescapes_and_flags_invalid_escapes(self):
+        decoder = SlipDecoder()
+        frames = feed_all(decoder, [b"\xc0a\xdb\xdcb\xdb", b"\xddc\xc0\xc0x\xdby\xc0"])
+        self.assertEqual(frames, [Frame(b"a\xc0b\xdbc", 1, None), Frame(b"x\xdby", 1, "SLIP 转义无效")])
+
+    def test_cobs_round_trips_zero_bytes_and_long_blocks(self):
+        payloads = [b"\x00", b"a\x00b\x00", bytes(range(1, 256)) * 2, b"\x11\x22\x00\x33"]
+        stream = b"".join(cobs_encode(payload) for payload in payloads)
+        decoder = CobsDecoder()
+        frames = feed_all(decoder, [stream[index:index + 7] for index in range(0, len(stream), 7)])
+        self.assertEqual([frame.payload for frame in frames], payloads)
+        self.assertTrue(all(frame.error is None for frame in frames))
+        self.assertEqual(decoder.feed(b"\x05ab\x00", 0), [Frame(b"\x05ab", 0, "COBS 编码长度无效")])
+
+    def test_modbus_rtu_splits_on_crc_and_resyncs_after_silence(self):
+        request = modbus_frame(b"\x01\x03\x00\x00\x00\x02")
+        response = modbus_frame(b"\x01\x03\x04\x00\x0a\x00\x0b")
+        decoder = ModbusRtuDecoder(9600, gap_ns=1000)
+        self.assertEqual(decoder.feed(request + response[:3], 100), [Frame(request[:-2], 100, None)])
+        self.assertEqual(decoder.feed(response[3:], 200), [Frame(response[:-2], 200, None)])
+        # 损坏的帧在静默间隔后以 CRC 错误输出，随后的帧重新同步。
+        self.assertEqual(decoder.feed(b"\x01\x03\xff", 300), [])
+        self.assertEqual(decoder.feed(request, 5000), [Frame(b"\x01\x03\xff", 300, "CRC 错误"), Frame(request[:-2], 5000, None)])
+        self.assertEqual(ModbusRtuDecoder(9600).gap_ns, ModbusRtuDecoder.MIN_GAP_NS)
+
+    def test_pipeline_bounds_queue_and_formats_frames(self):
+        pipeline = FramePipeline(max_frames=2)
+        pipeline.feed(b"ignored\n", 1)
+        pipeline.set_decoder(DelimiterDecoder(b"\n"))
+        pipeline.feed(b"a\nb\nc\nd", 5)
+        self.assertEqual(pipeline.take_dropped(), 1)
+        self.assertEqual([frame.payload for frame in pipeline.take(1)], [b"a"])
+        pipeline.reset()
+        pipeline.feed(b"e\n", 6)
+        self.assertEqual(pipeline.take(), [Frame(b"e", 6, None)])
+        line = FrameFormatter().format(Frame(b"\x01\xab", time.perf_counter_ns(), "CRC 错误"))
+        self.assertRegex(line, r"^\[\d\d:\d\d:\d\d\.\d{3}\] 帧 2 字节 \[CRC 错误\]: 01 AB\n$")
+        self.assertTrue(FrameFormatter().format(Frame(b"OK\r", 0, None), "TEXT").endswith("帧 3 字节: OK\\r\n"))
+
+
+@unittest.skipUnless(hasattr(os, "openpty"), "需要 POSIX 伪终端")
+class ReceiveThreadFramingTests(unittest.TestCase):
+    def test_receive_thread_decodes_frames_including_dropped_bytes(self):
+        master, slave = os.openpty()
+        manager = SerialManager(port_monitor=Mock())
+        # 显示缓冲只有 4 字节，溢出丢弃的数据仍由分帧阶段完整解码。
+        manager.set_receive_sink(ByteRingBuffer(4))
+        pipeline = FramePipeline(SlipDecoder())
+        manager.set_frame_pipeline(pipeline)
+        try:
+            self.assertTrue(manager.open(os.ttyname(slave)))
+            started = time.perf_counter_ns()
+            os.write(master, b"\xc0first\xc0sec\xdb\xdcond\xc0")
+            frames = []
+            deadline = time.monotonic() + 1.0
+            while len(frames) < 2 and time.monotonic() < deadline:
+                frames += pipeline.take()
+                time.sleep(0.01)
+            self.assertEqual([frame.payload for frame in frames], [b"first", b"sec\xc0ond"])
+            self.assertTrue(all(started <= frame.time_ns <= time.perf_counter_ns() for frame in frames))
+        finally:
+            manager.close()
+            os.close(master)
+            os.close(slave)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+"""无界面会话引擎与命令行测试。"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import Mock
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from utils.headless_session import HeadlessEngine, SendSchedule
+from utils.serial_manager import SerialManager
+from utils.serial_reactor import SerialReactor
+
+
+def read_available(fd, expected, timeout=1.0):
+    data = b""
+    deadline = time.monotonic() + timeout
+    os.set_blocking(fd, False)
+    while len(data) < expected and time.monotonic() < deadline:
+        try:
+            data += os.read(fd, 4096)
+        except BlockingIOError:
+            time.sleep(0.01)
+    return data
+
+
+class HeadlessSessionTests(unittest.TestCase):
+    def test_schedule_validation_and_due_times_skip_backlog(self):
+        with self.assertRaises(ValueError):
+            SendSchedule.from_config({"data": "", "period_ms": 100})
+        with self.assertRaises(ValueError):
+            SendSchedule.from_config({"data": "AT", "period_ms": 0})
+        with self.assertRaises(ValueError):
+            SendSchedule.from_config({"data": "AT", "mode": "BIN"})
+        schedule = SendSchedule.from_config({"data": "01 02", "period_ms": 100, "count": 2, "delay_ms": 50}, "HEX")
+        self.assertEqual(schedule.mode, "HEX")
+        schedule.start(10.0)
+        self.assertEqual(schedule.take_due(10.01), 0)
+        self.assertEqual(schedule.take_due(10.05), 1)
+        # 轮询落后多个周期时只发送一次，并从当前时间重新计时。
+        self.assertEqual(schedule.take_due(11.0), 1)
+        self.assertTrue(schedule.finished)
+        self.assertEqual(schedule.take_due(12.0), 0)
+
+    def test_engine_from_config_uses_app_port_settings(self):
+        raw = {
+            "port_configs": {"COM3": {"receive_settings": {"mode": "HEX"}, "send_settings": {"mode": "HEX"}}, "COM4": {}},
+            "schedules": {"COM3": [{"data": "01 02", "period_ms": 10}]},
+            "log_directory": "logs",
+        }
+        engine = HeadlessEngine.from_config(raw)
+        self.assertEqual([session.port for session in engine.sessions], ["COM3", "COM4"])
+        self.assertEqual(engine.sessions[0].receive_settings["mode"], "HEX")
+        self.assertEqual(engine.sessions[0].schedules[0].mode, "HEX")
+        self.assertTrue(engine.sessions[1].log_path.startswith(os.path.join("logs", "COM4-")))
+        self.assertIsNone(engine.sessions[0].serial_manager.reactor)
+        reactor_engine = HeadlessEngine.from_config(raw, reactor=True)
+        self.assertIs(reactor_engine.sessions[0].serial_manager.reactor, SerialReactor.shared())
+        self.assertEqual(HeadlessEngine.from_config(raw, None, ["/dev/ttyUSB0"]).sessions[0].log_path[:13], os.path.join("logs", "ttyUSB0-"))
+        with self.assertRaises(ValueError):
+            HeadlessEngine.from_config({"port_configs": {"COM3": {}}, "schedules": {"COM9": []}})
+        with self.assertRaises(ValueError):
+            HeadlessEngine.from_config({"port_configs": {}})
+        for session in engine.sessions + reactor_engine.sessions:
+            session.log_writer.stop()
+
+    @unittest.skipUnless(hasattr(os, "openpty"), "需要 POSIX 伪终端")
+    def test_session_logs_received_data_and_runs_send_schedule(self):
+        master, slave = os.openpty()
+        port = os.ttyname(slave)
+        with tempfile.TemporaryDirectory() as directory:
+            raw = {
+                "port_configs": {port: {"receive_settings": {"log_mode": True}, "send_settings": {"line_ending": "LF"}}},
+                "schedules": {port: [{"data": "ping\r\n", "period_ms": 20, "count": 3}]},
+            }
+            engine = HeadlessEngine.from_config(raw, directory)
+            session = engine.sessions[0]
+            session.serial_manager = SerialManager(port_monitor=Mock())
+            session.serial_manager.set_receive_sink(session._pending)
+            try:
+                self.assertEqual(engine.start(), [])
+                os.write(master, b"hello\nworld\n")
+                engine.run(duration=2.0, until_done=True)
+                sent = read_available(master, 15)
+                # 写入完成回调可能晚于数据到达另一端。
+                deadline = time.monotonic() + 1.0
+                while (session.rx_bytes < 12 or session.tx_bytes < 15) and time.monotonic() < deadline:
+                    engine.poll()
+                    time.sleep(0.01)
+                stats = session.stats()
+                self.assertTrue(engine.close())
+            finally:
+                os.close(master)
+                os.close(slave)
+            self.assertEqual(sent, b"ping\nping\nping\n")
+            self.assertEqual((stats["rx_bytes"], stats["tx_bytes"], stats["sends"], stats["send_failures"]), (12, 15, 3, 0))
+            self.assertIn("合计: RX 12 B", engine.report())
+            log_text = Path(session.log_path).read_text(encoding="utf-8")
+        self.assertRegex(log_text, r"^\[\d\d:\d\d:\d\d\.\d{3}\] hello\n\[\d\d:\d\d:\d\d\.\d{3}\] world\n$")
+
+    def test_cli_imports_without_qt(self):
+        code = ("import sys; sys.path.insert(0, 'src'); import main.headless_cli; "
+                "assert 'PySide6' not in sys.modules and 'wx' not in sys.modules")
+        subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, check=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
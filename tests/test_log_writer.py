@@ -1,6 +1,8 @@
 """异步日志写入回归测试。"""
 
+import gzip
 import sys
+import tempfile
 import time
 import unittest
 from pathlib import Path
@@ -10,7 +12,7 @@ from unittest.mock import patch
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(PROJECT_ROOT / "src"))
 
-from utils.log_writer import LogWriter
+from utils.log_writer import LogCompressor, LogWriter
 
 
 class LogWriterTests(unittest.TestCase):
@@ -84,10 +86,10 @@ class LogWriterTests(unittest.TestCase):
     def test_stop_flushes_queued_log_content(self):
         class Stream:
             def __init__(self):
-                self.content = ""
+                self.content = b""
 
-            def write(self, text):
-                self.content += text
+            def write(self, data):
+                self.content += data
 
             def flush(self):
                 pass
@@ -101,7 +103,102 @@ class LogWriterTests(unittest.TestCase):
             writer.open("closing.log")
             writer.write("日志尾部")
             self.assertTrue(writer.stop())
-        self.assertEqual(stream.content, "日志尾部")
+        self.assertEqual(stream.content.decode("utf-8"), "日志尾部")
+
+    def test_queued_writes_are_joined_and_flushed_by_size(self):
+        class Stream:
+            def __init__(self):
+                self.writes = []
+                self.flushes = 0
+
+            def write(self, data):
+                self.writes.append(data)
+
+            def flush(self):
+                self.flushes += 1
+
+            def close(self):
+                pass
+
+        stream = Stream()
+        writer = LogWriter(flush_bytes=4, flush_interval=0)
+        with patch("utils.log_writer.Path.open", return_value=stream):
+            # 先占住条件锁，使全部日志在写入线程的同一次取出中处理。
+            with writer._condition:
+                writer.open("batched.log", 1)
+                writer.write("ab", 1)
+                writer.write("旧", 0)
+                writer.write("cd", 1)
+            deadline = time.monotonic() + 1
+            while time.monotonic() < deadline and not stream.flushes:
+                time.sleep(0.01)
+            self.assertEqual(stream.writes, [b"abcd"])
+            self.assertEqual(stream.flushes, 1)
+            self.assertTrue(writer.stop())
+
+    def test_rotation_keeps_session_generation_and_compresses_old_segment(self):
+        with tempfile.TemporaryDirectory() as directory:
+            first = Path(directory) / "COM3-20250101000000.log"
+            writer = LogWriter(rotate_bytes=8)
+            try:
+                writer.open(str(first), 1)
+                writer.write("12345\n", 1)
+                # 等写入线程取走第一批，使第二条日志进入新的批次。
+                self.assertTrue(self.wait_for(lambda: not writer._queue))
+                writer.write("67890\n", 1)
+                writer.close(1)
+                # 旧会话关闭后排队的日志不会写入新分段。
+                writer.write("late\n", 1)
+                self.assertTrue(self.wait_for(lambda: any(level == "info" and "已压缩" in message for level, message in writer.take_notices(1))))
+            finally:
+                self.assertTrue(writer.stop())
+            segments = sorted(path.name for path in Path(directory).iterdir())
+            self.assertEqual(len(segments), 2)
+            self.assertTrue(segments[0].startswith("COM3-") and segments[0] != first.name)
+            compressed = Path(directory) / (first.name + LogCompressor.suffix())
+            self.assertIn(compressed.name, segments)
+            rotated = Path(directory) / next(name for name in segments if name.endswith(".log"))
+            self.assertEqual(rotated.read_text(encoding="utf-8"), "67890\n")
+            if compressed.suffix == ".gz":
+                self.assertEqual(gzip.decompress(compressed.read_bytes()), b"12345\n")
+
+    def test_rotation_counts_multibyte_text_in_bytes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            first = Path(directory) / "COM3.log"
+            writer = LogWriter(rotate_bytes=12, compress=False)
+            try:
+                writer.open(str(first), 1)
+                # 每条 3 个汉字为 9 字节，第二条会使分段超过 12 字节而切换。
+                for text in ("接收中", "已完成"):
+                    writer.write(text, 1)
+                    self.assertTrue(self.wait_for(lambda: not writer._queue))
+                writer.close(1)
+            finally:
+                self.assertTrue(writer.stop())
+            segments = sorted(Path(directory).iterdir())
+            self.assertEqual(len(segments), 2)
+            self.assertTrue(all(path.stat().st_size <= 12 for path in segments))
+            self.assertEqual(first.read_text(encoding="utf-8"), "接收中")
+
+    @staticmethod
+    def wait_for(predicate, timeout=2):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if predicate():
+                return True
+            time.sleep(0.01)
+        return False
+
+    def test_pending_limit_estimates_cjk_text_at_three_bytes_per_character(self):
+        writer = LogWriter(max_pending_bytes=30)
+        try:
+            # 占住条件锁使日志留在队列中，待写入量只由估算值决定。
+            with writer._condition:
+                self.assertTrue(writer.write("中" * 10))
+                self.assertFalse(writer.write("溢出"))
+            self.assertEqual(writer.take_dropped_bytes(), 6)
+        finally:
+            writer.stop()
 
     def test_log_errors_are_isolated_by_generation(self):
         writer = LogWriter()
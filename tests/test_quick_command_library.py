@@ -0,0 +1,67 @@
+"""快捷指令库索引、增量检索与编辑测试。"""
+
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import Mock
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from utils.quick_command_library import QuickCommandLibrary, normalize_command
+
+
+def make_groups():
+    return [
+        {"name": "调制解调器", "commands": [normalize_command({"name": "复位", "data": "AT+RST", "mode": "TEXT"}),
+                                        normalize_command({"name": "版本", "data": "AT+GMR", "mode": "TEXT"})]},
+        {"name": "Modbus", "commands": [normalize_command({"name": "读寄存器", "data": "01 03 00 00", "mode": "HEX"})]},
+    ]
+
+
+class QuickCommandLibraryTests(unittest.TestCase):
+    def test_filter_matches_all_terms_across_name_data_and_mode(self):
+        library = QuickCommandLibrary(make_groups())
+        self.assertIsNone(library.filter("  "))
+        self.assertEqual(library.filter("at+"), [[0, 1], []])
+        self.assertEqual(library.filter("HEX 03"), [[], [0]])
+        self.assertEqual(library.filter("复位 text"), [[0], []])
+
+    def test_typing_narrows_previous_matches_and_edits_invalidate_them(self):
+        library = QuickCommandLibrary(make_groups())
+        library.filter("a")
+        library._keys[0][1] = "changed"
+        # 继续输入时只在上次结果中筛选，不读取已匹配范围之外的检索键。
+        self.assertEqual(library.filter("at"), [[0], []])
+        library._keys[0][1] = QuickCommandLibrary.search_key(library.command(0, 1))
+        library.filter("at+rst")
+        self.assertEqual(library.filter("at+g"), [[1], []])
+
+        on_change = Mock()
+        library = QuickCommandLibrary(make_groups(), on_change=on_change)
+        listener = Mock()
+        library.add_listener(listener)
+        self.assertEqual(library.filter("at+r"), [[0], []])
+        self.assertEqual(library.add_command(0, {"name": "复位2", "data": "AT+RESTORE"}), 2)
+        self.assertEqual(library.filter("at+re"), [[2], []])
+        library.set_command(0, 2, {"name": "x", "data": "y", "mode": "bad"})
+        self.assertEqual(library.command(0, 2)["mode"], "TEXT")
+        self.assertEqual(library.filter("at+re"), [[], []])
+        self.assertEqual(library.move_command(0, 0, 3), 2)
+        self.assertEqual([command["data"] for command in library.groups[0]["commands"]], ["AT+GMR", "y", "AT+RST"])
+        self.assertEqual(library.filter("rst"), [[2], []])
+        self.assertEqual(on_change.call_count, 3)
+        self.assertEqual([call.args for call in listener.call_args_list],
+                         [("inserted", 0, 2), ("updated", 0, 2), ("group_reset", 0, None)])
+
+    def test_reply_settings_are_kept_only_when_valid(self):
+        command = normalize_command({"name": "查询", "data": "AT", "reply": {"type": "delimiter", "value": "OK\\r\\n", "retries": 99}})
+        self.assertEqual(command["reply"], {"type": "delimiter", "value": "OK\\r\\n", "timeout_ms": 1000, "retries": 10})
+        self.assertEqual(normalize_command({"data": "x", "reply": {"type": "length", "value": "8", "timeout_ms": 50}})["reply"]["timeout_ms"], 50)
+        for reply in ({"type": "length", "value": "0"}, {"type": "regex", "value": ""}, {"type": "crc", "value": "x"}, "OK"):
+            self.assertNotIn("reply", normalize_command({"data": "x", "reply": reply}))
+
+
+if __name__ == "__main__":
+    unittest.main()
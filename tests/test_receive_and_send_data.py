@@ -2,15 +2,20 @@
 
 import sys
 import unittest
+from array import array
 from datetime import datetime, timedelta
 from pathlib import Path
+from unittest.mock import patch
 
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(PROJECT_ROOT / "src"))
 
-from utils.receive_data_utils import ReceiveLogFormatter, ReceiveTextDecoder, ReceiveTextSegmenter
-from utils.send_data_utils import SendDataUtils
+from utils.byte_ring import ByteRingBuffer
+from utils.receive_data_utils import ReceiveArrivals, ReceiveDataUtils, ReceiveHexFormatter, ReceiveLogFormatter, ReceiveTextDecoder, ReceiveTextSegmenter
+from utils.receive_line_store import ReceiveLineStore
+from utils.send_data_utils import SendDataUtils, SendPayloadCache
+from utils.spill_buffer import SpillingReceiveBuffer
 
 
 class ReceiveAndSendDataTests(unittest.TestCase):
@@ -21,6 +26,13 @@ class ReceiveAndSendDataTests(unittest.TestCase):
         self.assertEqual(decoder.decode(encoded[2:], "UTF-8"), "中")
         self.assertEqual(list(ReceiveTextSegmenter().iter_segments("A\n\nB")), ["A\n", "B"])
 
+    def test_batch_segmenting_matches_per_line_iteration_across_batches(self):
+        batches = ["A\r", "\nB\n\n\r\n", "\n", "\t \r\r\rC", "\n\nD"]
+        iterating, batching = ReceiveTextSegmenter(), ReceiveTextSegmenter()
+        for batch in batches:
+            self.assertEqual(batching.segment(batch), "".join(iterating.iter_segments(batch)))
+        self.assertEqual(ReceiveTextSegmenter().segment("\n\nA\n\n\nB"), "A\nB")
+
     def test_log_mode_splits_continuous_data_by_timestamp_duration(self):
         formatter = ReceiveLogFormatter()
         started = datetime(2026, 1, 1, 12, 0, 0)
@@ -28,6 +40,58 @@ class ReceiveAndSendDataTests(unittest.TestCase):
         self.assertEqual(formatter.format("B", True, started + timedelta(milliseconds=50)), "B")
         self.assertEqual(formatter.format("C", True, started + timedelta(milliseconds=101)), "\n[12:00:00.101] C")
 
+    def test_timed_segments_follow_chunk_arrivals_merged_per_millisecond(self):
+        data = "AB\nC".encode("utf-8") + "中".encode("utf-8")
+        arrivals = ReceiveArrivals(
+            array("Q", [0, 1, 3, 4]),
+            array("q", [5_000_000, 5_400_000, 55_000_000, 205_000_000]),
+        )
+        pieces = list(ReceiveDataUtils.iter_timed_segments(
+            data, arrivals, ReceiveTextDecoder(), ReceiveTextSegmenter(), "UTF-8"))
+        self.assertEqual(pieces, [
+            ("AB\n", ReceiveArrivals.to_unix_seconds(5_000_000)),
+            ("C", ReceiveArrivals.to_unix_seconds(55_000_000)),
+            ("中", ReceiveArrivals.to_unix_seconds(205_000_000)),
+        ])
+
+    def test_batch_log_formatting_keeps_continuation_window(self):
+        started = datetime(2026, 1, 1, 12, 0, 0).timestamp()
+        pieces = [("AB\n", started), ("C", started + 0.05), ("D", started + 0.1), ("中", started + 0.2)]
+        formatter = ReceiveLogFormatter()
+        self.assertEqual(formatter.format_batch(pieces), "[12:00:00.000] AB\n[12:00:00.050] CD\n[12:00:00.200] 中")
+        self.assertEqual(formatter.format("E", True, datetime(2026, 1, 1, 12, 0, 0, 250000)), "E")
+
+    def test_hex_layout_continues_lines_across_batches(self):
+        self.assertEqual(ReceiveDataUtils.format_hex(b"\x0a\xbc"), "0A BC ")
+        self.assertEqual(ReceiveDataUtils.format_hex(b""), "")
+        formatter = ReceiveHexFormatter(8, show_offset=True, show_ascii=True)
+        data = b"ABC\x00\x01defgh0123456789"
+        split = formatter.format(data[:5]) + formatter.format(data[5:14]) + formatter.format(data[14:])
+        self.assertEqual(split, "00000000  41 42 43 00 01 64 65 66  ABC..def\n"
+                                "00000008  67 68 30 31 32 33 34 35  gh012345\n"
+                                "00000010  36 37 38 39")
+        self.assertEqual(split, ReceiveHexFormatter(8, True, True).format(data))
+        formatter.configure(0, False, False)
+        self.assertEqual(formatter.format(b"\xff"), "\nFF ")
+
+    def test_line_store_keeps_absolute_line_numbers_across_block_eviction(self):
+        store = ReceiveLineStore(max_lines=ReceiveLineStore.BLOCK_LINES * 2)
+        store.append("head")
+        store.append(" more\n[系统]\n", "warning")
+        self.assertEqual(store.line(0), ("head more", "normal"))
+        self.assertEqual(store.line(1), ("[系统]", "warning"))
+        self.assertFalse(store.has_open_line())
+        store.append("".join(f"{index}\n" for index in range(ReceiveLineStore.BLOCK_LINES * 3)) + "open")
+        self.assertEqual(store.first_line, ReceiveLineStore.BLOCK_LINES * 2)
+        self.assertEqual(store.end_line, ReceiveLineStore.BLOCK_LINES * 3 + 3)
+        self.assertEqual(store.line(store.first_line)[0], str(store.first_line - 2))
+        self.assertEqual(store.line(store.end_line - 1)[0], "open")
+        self.assertEqual(store.text_range((store.end_line - 2, 1), (store.end_line - 1, 2)), "071\nop")
+        with self.assertRaises(IndexError):
+            store.line(0)
+        store.append("X" * (ReceiveLineStore.MAX_LINE_CHARS + 1))
+        self.assertEqual(len(store.line(store.end_line - 2)[0]), ReceiveLineStore.MAX_LINE_CHARS)
+
     def test_hex_separators_and_invalid_text_conversion(self):
         self.assertEqual(SendDataUtils.parse_hex("0x01, 0x02:03-04\n"), b"\x01\x02\x03\x04")
         self.assertEqual(SendDataUtils.hex_to_text("FF 41"), "\ufffdA")
@@ -37,3 +101,70 @@ class ReceiveAndSendDataTests(unittest.TestCase):
         self.assertEqual(SendDataUtils.encode_text("A\r\nB", "UTF-8", "LF")[2], b"A\nB")
         self.assertEqual(SendDataUtils.text_to_hex("A\nB", line_ending="CR"), "41 0D 42")
         self.assertEqual(SendDataUtils.hex_to_text("41 0D 42", line_ending="CR"), "A\r\nB")
+
+    def test_payload_cache_keys_by_mode_encoding_and_line_ending(self):
+        cache = SendPayloadCache(max_entries=2)
+        with patch.object(SendDataUtils, "encode_text", wraps=SendDataUtils.encode_text) as encode_text:
+            self.assertEqual(cache.get("A\r\nB", "TEXT", "UTF-8", "LF"), b"A\nB")
+            self.assertEqual(cache.get("A\r\nB", "TEXT", "UTF-8", "LF"), b"A\nB")
+            self.assertEqual(cache.get("A\r\nB", "TEXT", "UTF-8", "CR"), b"A\rB")
+        self.assertEqual(encode_text.call_count, 2)
+        self.assertEqual(cache.get("41 42", "HEX", "ASCII", "CR"), b"AB")
+        # 超出容量时淘汰最久未使用的内容。
+        self.assertEqual(len(cache), 2)
+        self.assertNotIn(("TEXT", "A\r\nB", "UTF-8", "LF"), cache._entries)
+        with self.assertRaises(ValueError):
+            cache.get("zz", "HEX")
+
+    def test_ring_buffer_wraps_drops_whole_chunks_and_invalidates_reservations(self):
+        ring = ByteRingBuffer(8)
+        self.assertTrue(ring.write(b"abcdef"))
+        self.assertEqual(ring.read(4), b"abcd")
+        self.assertTrue(ring.write(b"ghijk"))
+        self.assertFalse(ring.write(b"XYZ"))
+        self.assertEqual(ring.read(64), b"efghijk")
+        self.assertEqual(ring.take_dropped(), 3)
+
+        view, token = ring.reserve(4)
+        view[:2] = b"lm"
+        ring.clear()
+        self.assertFalse(ring.commit(token, 2))
+        view, token = ring.reserve(4)
+        view[:3] = b"nop"
+        self.assertTrue(ring.commit(token, 3))
+        self.assertEqual(ring.read(64), b"nop")
+
+    def test_spilling_buffer_keeps_order_across_memory_and_disk_segments(self):
+        buffer = SpillingReceiveBuffer(ByteRingBuffer(8), spill_limit=20, segment_bytes=8)
+        self.addCleanup(buffer.close)
+        self.assertTrue(buffer.write(b"ABCDEF", 1))
+        view, token = buffer.reserve(16)
+        self.assertEqual(len(view), 2)
+        view[:2] = b"GH"
+        buffer.commit(token, 2, 2)
+        for chunk, timestamp in ((b"IJKLMNOP", 3), (b"QRST", 4)):
+            view, token = buffer.reserve(len(chunk))
+            view[:len(chunk)] = chunk
+            buffer.commit(token, len(chunk), timestamp)
+        self.assertEqual(buffer.spilled_bytes(), 12)
+        self.assertFalse(buffer.write(b"overflowing-spill", 5))
+        self.assertEqual(buffer.take_dropped(), 17)
+        data, offsets, times = buffer.read_marked(12)
+        self.assertEqual((data, list(offsets), list(times)), (b"ABCDEFGHIJKL", [0, 6, 8], [1, 2, 3]))
+        # 溢出数据未取完之前，新数据继续排在磁盘队列之后。
+        self.assertTrue(buffer.write(b"U", 6))
+        self.assertEqual(buffer.read(100), b"MNOPQRSTU")
+        self.assertEqual(buffer.spilled_bytes(), 0)
+        self.assertTrue(buffer.write(b"V", 7))
+        self.assertEqual(len(buffer), 1)
+        self.assertEqual(buffer.spilled_bytes(), 0)
+
+    def test_ring_buffer_reports_chunk_arrivals_across_partial_reads(self):
+        ring = ByteRingBuffer(16)
+        ring.write(b"abc", 100)
+        view, token = ring.reserve(4)
+        view[:4] = b"defg"
+        ring.commit(token, 4, 200)
+        self.assertEqual(ring.read_marked(5), (b"abcde", array("Q", [0, 3]), array("q", [100, 200])))
+        ring.write(b"h", 300)
+        self.assertEqual(ring.read_marked(16), (b"fgh", array("Q", [0, 2]), array("q", [200, 300])))
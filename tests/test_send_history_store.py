@@ -0,0 +1,59 @@
+"""发送历史环形缓冲、变化通知与只追加日志测试。"""
+
+import sys
+import unittest
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from utils.send_history_store import SendHistoryStore
+
+
+class SendHistoryStoreTests(unittest.TestCase):
+    def test_ring_evicts_oldest_and_notifies_incrementally(self):
+        store = SendHistoryStore(3)
+        changes = []
+        store.add_listener(lambda change, removed: changes.append((change, removed)))
+        for index in range(5):
+            store.add("AT+%d" % index, "TEXT", "t%d" % index)
+        store.add("AT+4", "TEXT", "later")
+        self.assertEqual([entry["data"] for entry in store.entries()], ["AT+4", "AT+3", "AT+2"])
+        self.assertEqual(store[0]["time"], "later")
+        self.assertEqual(changes, [("inserted", 0)] * 3 + [("inserted", 1)] * 2 + [("updated", 0)])
+        # 模式不同不视为重复。
+        store.add("AT+4", "HEX", "hex")
+        self.assertEqual(len(store), 3)
+        self.assertEqual(store[1]["mode"], "TEXT")
+
+    def test_journal_is_appended_replayed_and_compacted(self):
+        store = SendHistoryStore(2)
+        lines = []
+        for data in ("A", "B", "B", "C"):
+            store.add(data, "TEXT", "now")
+        rewrite, text = store.take_journal()
+        self.assertFalse(rewrite)
+        lines += text.splitlines(keepends=True)
+        self.assertEqual(len(lines), 4)
+        self.assertIsNone(store.take_journal())
+        # 写入中断的最后一行被忽略。
+        replayed = SendHistoryStore.load(lines + ['{"data": "D"'], 2)
+        self.assertEqual(replayed.entries(), store.entries())
+
+        store.clear()
+        store.add("E", "HEX", "later")
+        rewrite, text = store.take_journal()
+        # 日志行数超过保存条数的两倍时整体重写为当前内容。
+        self.assertTrue(rewrite)
+        self.assertEqual(SendHistoryStore.load(text.splitlines(), 2).entries(), [{"data": "E", "mode": "HEX", "time": "later"}])
+
+    def test_shrinking_max_entries_keeps_newest_and_rewrites(self):
+        store = SendHistoryStore(5, [{"data": str(index), "mode": "TEXT", "time": ""} for index in range(5)])
+        store.set_max_entries(2)
+        self.assertEqual([entry["data"] for entry in store.entries()], ["0", "1"])
+        self.assertTrue(store.take_journal()[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
 """串口操作超时与会话隔离回归测试。"""
 
 import io
+import os
 import sys
 import threading
 import time
@@ -13,7 +14,12 @@ from unittest.mock import Mock, patch
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(PROJECT_ROOT / "src"))
 
+from utils.byte_ring import ByteRingBuffer
+from utils.operation_executor import OperationExecutor
+from utils.port_monitor import PortPresenceMonitor
 from utils.serial_manager import SerialManager
+from utils.serial_manager_qt import SerialManagerQt
+from utils.serial_writer import SerialWriter
 
 
 class SerialManagerTests(unittest.TestCase):
@@ -125,19 +131,18 @@ class SerialManagerTests(unittest.TestCase):
         manager.is_running = True
         manager._open_generation = 1
         manager._receive_stop_event = stop_event
-        with patch.object(manager, "_check_port_health", return_value=(True, None)):
-            receive_thread = threading.Thread(target=manager._receive_loop, args=(old_port, stop_event, 1), daemon=True)
-            manager.receive_thread = receive_thread
-            receive_thread.start()
-            self.assertTrue(entered.wait(0.2))
-            with redirect_stdout(io.StringIO()):
-                self.assertFalse(manager.close())
-                self.assertFalse(manager.open("COM2"))
-            release.set()
-            receive_thread.join(0.5)
-            deadline = time.monotonic() + 0.5
-            while manager._close_in_flight and time.monotonic() < deadline:
-                time.sleep(0.01)
+        receive_thread = threading.Thread(target=manager._receive_loop, args=(old_port, stop_event, 1), daemon=True)
+        manager.receive_thread = receive_thread
+        receive_thread.start()
+        self.assertTrue(entered.wait(0.2))
+        with redirect_stdout(io.StringIO()):
+            self.assertFalse(manager.close())
+            self.assertFalse(manager.open("COM2"))
+        release.set()
+        receive_thread.join(0.5)
+        deadline = time.monotonic() + 0.5
+        while manager._close_in_flight and time.monotonic() < deadline:
+            time.sleep(0.01)
         self.assertFalse(manager._close_in_flight)
         self.assertFalse(manager.is_open())
 
@@ -168,14 +173,230 @@ class SerialManagerTests(unittest.TestCase):
         manager.serial_port = port
         manager._open_generation = 1
         manager.set_receive_callback(callback)
-        with patch.object(manager, "_check_port_health", return_value=(True, None)):
-            thread = threading.Thread(target=manager._receive_loop, args=(port, stop_event, 1), daemon=True)
-            manager.receive_thread = thread
-            thread.start()
-            self.assertTrue(entered.wait(0.2))
-            stop_event.set()
-            manager._open_generation = 2
-            manager.serial_port = None
-            release.set()
-            thread.join(0.5)
+        thread = threading.Thread(target=manager._receive_loop, args=(port, stop_event, 1), daemon=True)
+        manager.receive_thread = thread
+        thread.start()
+        self.assertTrue(entered.wait(0.2))
+        stop_event.set()
+        manager._open_generation = 2
+        manager.serial_port = None
+        release.set()
+        thread.join(0.5)
         callback.assert_not_called()
+
+    @unittest.skipUnless(hasattr(os, "openpty"), "需要 POSIX 伪终端")
+    def test_receive_loop_delivers_pty_data_without_polling_delay(self):
+        master, slave = os.openpty()
+        manager = SerialManager()
+        received = []
+        arrived = threading.Event()
+
+        def on_receive(data):
+            received.append(data)
+            arrived.set()
+
+        manager.set_receive_callback(on_receive)
+        try:
+            self.assertTrue(manager.open(os.ttyname(slave)))
+            os.write(master, b"ping")
+            self.assertTrue(arrived.wait(0.5))
+            started = time.monotonic()
+            self.assertTrue(manager.close())
+            self.assertLess(time.monotonic() - started, 0.5)
+        finally:
+            os.close(master)
+            os.close(slave)
+        self.assertEqual(b"".join(received), b"ping")
+
+    def test_port_monitor_reports_removal_only_for_previously_seen_ports(self):
+        ports = ["COM1", "COM2"]
+        monitor = PortPresenceMonitor(enumerate_ports=lambda: list(ports))
+        removed = []
+        # 由测试直接驱动枚举周期，不启动后台监视线程。
+        with patch.object(PortPresenceMonitor, "_run", lambda _self: None):
+            monitor.subscribe("COM1", removed.append)
+            monitor.subscribe("/dev/pts/3", removed.append)
+        monitor.poll_once()
+        ports.remove("COM1")
+        monitor.poll_once()
+        monitor.poll_once()
+        self.assertEqual(removed, ["COM1"])
+        self.assertEqual(monitor.get_cached_ports(), frozenset({"COM2"}))
+
+    def test_port_removal_event_disconnects_only_current_session(self):
+        monitor = Mock(subscribe=Mock(return_value=1))
+        manager = SerialManager(port_monitor=monitor)
+        manager._receive_loop = lambda *_args: None
+        disconnected = Mock()
+        manager.set_disconnect_callback(disconnected)
+        port = self._SlowPort()
+        with patch("utils.serial_manager.serial.Serial", return_value=port):
+            self.assertTrue(manager.open("COM1"))
+        on_removed = monitor.subscribe.call_args.args[1]
+        with redirect_stdout(io.StringIO()):
+            on_removed("COM1")
+            on_removed("COM1")
+        disconnected.assert_called_once()
+        monitor.unsubscribe.assert_called_once_with(1)
+        self.assertFalse(port.is_open)
+        self.assertFalse(manager.is_open())
+
+    def test_writer_keeps_order_and_coalesces_queued_small_writes(self):
+        class RecordingPort(self._SlowPort):
+            def __init__(self, release):
+                super().__init__()
+                self.release, self.writes = release, []
+
+            def write(self, data):
+                self.release.wait()
+                self.writes.append(data)
+
+        release = threading.Event()
+        port = RecordingPort(release)
+        writer = SerialWriter(port)
+        completed = []
+        futures = [writer.submit(bytes([index]), lambda future: completed.append(future.result())) for index in range(5)]
+        time.sleep(0.05)
+        release.set()
+        self.assertEqual([future.result(0.5) for future in futures], [1] * 5)
+        writer.stop()
+        self.assertEqual(b"".join(port.writes), b"\x00\x01\x02\x03\x04")
+        self.assertLess(len(port.writes), 5)
+        self.assertEqual(completed, [1] * 5)
+
+    def test_writer_fails_queued_items_on_stop_and_when_full(self):
+        release = threading.Event()
+        port = self._SlowPort()
+        port.write = lambda _data: release.wait()
+        writer = SerialWriter(port, max_pending_items=1)
+        first = writer.submit(b"1")
+        time.sleep(0.05)
+        queued = writer.submit(b"2")
+        rejected = writer.submit(b"3")
+        self.assertIsInstance(rejected.exception(0), Exception)
+        writer.stop()
+        self.assertIsInstance(queued.exception(0), Exception)
+        release.set()
+        self.assertEqual(first.result(0.5), 1)
+
+    def test_qt_sends_coalesce_on_writer_and_keep_completion_order(self):
+        class RecordingPort(self._SlowPort):
+            def __init__(self, release):
+                super().__init__()
+                self.release, self.writes = release, []
+
+            def write(self, data):
+                self.release.wait()
+                self.writes.append(data)
+
+        release, opened = threading.Event(), threading.Event()
+        port = RecordingPort(release)
+        qt_manager = SerialManagerQt()
+        completed = []
+        # 没有 Qt 事件循环时跨线程信号不会投递，直接记录各线程中报告的完成结果。
+        qt_manager._emit_operation_completed = lambda operation, success: completed.append((operation, success))
+
+        def fake_open(**_settings):
+            opened.wait(1)
+            qt_manager._manager.serial_port = port
+            return True
+        qt_manager._manager.open = fake_open
+        qt_manager._manager.close = lambda: True
+        try:
+            qt_manager.open_async()
+            for index in range(4):
+                qt_manager.send_bytes_async(bytes([index]))
+            qt_manager.close_async()
+            time.sleep(0.05)
+            # 打开完成前发送不会启动，不会先于“open”报告失败。
+            self.assertEqual(completed, [])
+            opened.set()
+            time.sleep(0.1)
+            # 发送只在执行器中启动，写入阻塞时后续发送已进入写线程队列，关闭等待它们完成。
+            self.assertEqual(completed, [("open", True)])
+            self.assertEqual(qt_manager.operation_queue_depth(), 5)
+            release.set()
+            deadline = time.monotonic() + 1
+            while len(completed) < 6 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(completed, [("open", True)] + [("send", True)] * 4 + [("close", True)])
+            self.assertEqual(b"".join(port.writes), b"\x00\x01\x02\x03")
+            self.assertLess(len(port.writes), 4)
+            self.assertEqual(qt_manager.operation_stats()["send"]["count"], 4)
+        finally:
+            qt_manager._manager._stop_writer()
+            qt_manager.shutdown()
+
+    def test_qt_shutdown_waits_for_queued_close_before_releasing_buffer(self):
+        qt_manager = SerialManagerQt()
+        events = []
+
+        def slow_close():
+            time.sleep(0.2)
+            events.append("close")
+            return True
+        qt_manager._manager.close = slow_close
+        release_pending = qt_manager._pending.close
+        qt_manager._pending.close = lambda: (events.append("release"), release_pending())
+        qt_manager._emit_operation_completed = lambda *_args: None
+        qt_manager.close_async()
+        self.assertTrue(qt_manager.shutdown())
+        self.assertEqual(events, ["close", "release"])
+
+        stalled = SerialManagerQt()
+        stalled._manager.close = lambda: time.sleep(0.3)
+        stalled._emit_operation_completed = lambda *_args: None
+        stalled.close_async()
+        with redirect_stdout(io.StringIO()):
+            self.assertFalse(stalled.shutdown(timeout=0.05))
+        # 超时后先断开接收槽，接收线程不再预留已释放的缓冲区。
+        self.assertIsNone(stalled._manager.receive_sink)
+
+    def test_operation_executor_completes_in_submission_order_on_one_thread(self):
+        executor = OperationExecutor()
+        release = threading.Event()
+        completed, threads = [], set()
+
+        def operation(name, wait=False):
+            def run():
+                if wait:
+                    release.wait()
+                threads.add(threading.get_ident())
+                completed.append(name)
+            return run
+
+        executor.submit("open", operation("open", wait=True))
+        for _ in range(3):
+            executor.submit("send", operation("send"))
+        executor.submit("close", operation("close"))
+        time.sleep(0.02)
+        self.assertEqual(executor.queue_depth(), 5)
+        release.set()
+        deadline = time.monotonic() + 1
+        while executor.queue_depth() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(completed, ["open", "send", "send", "send", "close"])
+        self.assertEqual(len(threads), 1)
+        self.assertEqual(executor.stats()["send"]["count"], 3)
+        executor.stop()
+        self.assertFalse(executor.submit("send", operation("send")))
+
+    @unittest.skipUnless(hasattr(os, "openpty"), "需要 POSIX 伪终端")
+    def test_receive_sink_reads_pty_data_directly_into_ring(self):
+        master, slave = os.openpty()
+        manager = SerialManager(port_monitor=Mock())
+        ring = ByteRingBuffer(8)
+        manager.set_receive_sink(ring)
+        try:
+            self.assertTrue(manager.open(os.ttyname(slave)))
+            os.write(master, b"0123456789AB")
+            deadline = time.monotonic() + 0.5
+            while len(ring) < 8 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            time.sleep(0.05)
+            self.assertTrue(manager.close())
+        finally:
+            os.close(master)
+            os.close(slave)
+        self.assertEqual(ring.read(64), b"01234567")
+        self.assertEqual(ring.take_dropped(), 4)
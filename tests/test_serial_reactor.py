@@ -0,0 +1,153 @@
+"""共享串口反应器测试。"""
+
+import io
+import os
+import sys
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest.mock import Mock
+
+import serial
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from utils.byte_ring import ByteRingBuffer
+from utils.serial_manager import SerialManager
+from utils.serial_reactor import SerialReactor
+
+
+def wait_until(condition, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def read_master(fd, expected, timeout=1.0):
+    data = b""
+    deadline = time.monotonic() + timeout
+    os.set_blocking(fd, False)
+    while len(data) < expected and time.monotonic() < deadline:
+        try:
+            data += os.read(fd, 65536)
+        except BlockingIOError:
+            time.sleep(0.01)
+    return data
+
+
+@unittest.skipUnless(hasattr(os, "openpty"), "需要 POSIX 伪终端")
+class SerialReactorTests(unittest.TestCase):
+    def setUp(self):
+        self.pairs = []
+
+    def tearDown(self):
+        for master, slave in self.pairs:
+            for fd in (master, slave):
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+
+    def _open(self, reactor, count):
+        managers = []
+        for _ in range(count):
+            master, slave = os.openpty()
+            self.pairs.append((master, slave))
+            manager = SerialManager(port_monitor=Mock(), reactor=reactor)
+            manager.set_receive_sink(ByteRingBuffer(1024))
+            self.assertTrue(manager.open(os.ttyname(slave)))
+            managers.append(manager)
+        return managers
+
+    def test_one_thread_serves_reads_and_writes_for_many_ports(self):
+        reactor = SerialReactor()
+        threads_before = threading.active_count()
+        managers = self._open(reactor, 8)
+        self.assertTrue(all(manager.receive_thread is None for manager in managers))
+        self.assertEqual(threading.active_count(), threads_before + 1)
+        for index, (master, _slave) in enumerate(self.pairs):
+            os.write(master, f"port{index}".encode())
+        self.assertTrue(wait_until(lambda: all(len(manager.receive_sink) == 5 for manager in managers)))
+        self.assertEqual([manager.receive_sink.read(64) for manager in managers], [f"port{index}".encode() for index in range(8)])
+
+        futures = [manager.submit(f"tx{index}".encode()) for index, manager in enumerate(managers)]
+        self.assertEqual([future.result(1.0) for future in futures], [3] * 8)
+        self.assertTrue(managers[0].send_bytes(b"more"))
+        self.assertEqual(read_master(self.pairs[0][0], 7), b"tx0more")
+
+        for manager in managers:
+            self.assertTrue(manager.close())
+        self.assertTrue(wait_until(lambda: reactor._thread is None))
+        with self.assertRaises(serial.PortNotOpenError):
+            managers[0].submit(b"x").result(1.0)
+
+    def test_read_failure_disconnects_only_that_port(self):
+        reactor = SerialReactor()
+        first, second = self._open(reactor, 2)
+        disconnected = threading.Event()
+        first.set_disconnect_callback(disconnected.set)
+        channel = first._channel
+        os.close(self.pairs[0][0])
+        self.assertTrue(disconnected.wait(1.0))
+        self.assertTrue(channel.removed.is_set())
+        self.assertFalse(first.is_open())
+        os.write(self.pairs[1][0], b"still")
+        self.assertTrue(wait_until(lambda: len(second.receive_sink) == 5))
+        self.assertTrue(second.close())
+        first.close()
+
+    def test_blocked_write_times_out_and_later_items_expire(self):
+        reactor = SerialReactor()
+        manager, = self._open(reactor, 1)
+        manager.operation_timeout = 0.2
+        manager._channel.timeout = 0.2
+        # 主端不读取时伪终端写缓冲很快写满，写入无法完成。
+        blocked = manager.submit(b"x" * (1 << 20))
+        queued = manager.submit(b"y", timeout=0.05)
+        with self.assertRaises(serial.SerialTimeoutException):
+            queued.result(1.0)
+        self.assertTrue(wait_until(manager._writer.is_stalled, 0.5) or blocked.done())
+        with self.assertRaisesRegex(serial.SerialTimeoutException, "Write timeout"):
+            blocked.result(1.0)
+        self.assertTrue(manager.close())
+
+    def test_open_timeout_unregisters_channel_before_closing_port(self):
+        reactor = SerialReactor()
+        master, slave = os.openpty()
+        self.pairs.append((master, slave))
+        monitor = Mock()
+        # 订阅在注册反应器之后执行，拖慢它使打开在注册完成后才超时。
+        monitor.subscribe.side_effect = lambda *_args: time.sleep(0.3)
+        manager = SerialManager(port_monitor=monitor, reactor=reactor)
+        manager.operation_timeout = 0.1
+        manager.set_receive_sink(ByteRingBuffer(1024))
+        with redirect_stdout(io.StringIO()):
+            self.assertFalse(manager.open(os.ttyname(slave)))
+        self.assertTrue(wait_until(lambda: not manager._open_in_flight))
+        self.assertIsNone(manager._channel)
+        self.assertFalse(manager.is_open())
+        self.assertTrue(wait_until(lambda: not reactor._channels))
+        self.assertTrue(wait_until(lambda: reactor._thread is None))
+
+    def test_close_does_not_wait_forever_for_stalled_reactor(self):
+        reactor = SerialReactor()
+        manager, = self._open(reactor, 1)
+        channel = manager._channel
+        manager.operation_timeout = 0.1
+        stalled = Mock()
+        stalled.close.return_value = threading.Event()
+        manager._channel = stalled
+        with redirect_stdout(io.StringIO()):
+            manager.close()
+        self.assertTrue(wait_until(lambda: not manager._close_in_flight))
+        self.assertFalse(manager.is_open())
+        channel.close().wait(1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
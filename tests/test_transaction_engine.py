@@ -0,0 +1,187 @@
+"""请求/应答事务引擎测试。"""
+
+import os
+import re
+import sys
+import threading
+import time
+import unittest
+from concurrent.futures import Future
+from pathlib import Path
+from unittest.mock import Mock
+
+import serial
+
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from utils.receive_data_utils import ReceiveArrivals
+from utils.serial_manager import SerialManager
+from utils.transaction_engine import ReplyMatcher, TransactionEngine, TransactionTimeoutError
+
+
+class FakeManager:
+    """记录提交的数据；error 不为空时以该异常完成写入，否则立即以写入成功完成。"""
+
+    def __init__(self):
+        self.sent = []
+        self.error = None
+
+    def submit(self, payload, callback=None, timeout=None):
+        self.sent.append(payload)
+        future = Future()
+        if callback:
+            future.add_done_callback(callback)
+        if self.error:
+            future.set_exception(self.error)
+        else:
+            future.set_result(len(payload))
+        return future
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000_000
+
+    def __call__(self):
+        return self.now
+
+
+class ReplyMatcherTests(unittest.TestCase):
+    def test_matchers_return_reply_end_or_minus_one(self):
+        self.assertEqual(ReplyMatcher.delimiter(b"\r\n").match(bytearray(b"AT\r\nOK\r\n")), 4)
+        self.assertEqual(ReplyMatcher.delimiter(b"\r\n").match(bytearray(b"AT\r")), -1)
+        self.assertEqual(ReplyMatcher.regex(rb"OK\r\n").match(bytearray(b"AT\r\nOK\r\nrest")), 8)
+        self.assertEqual(ReplyMatcher.length(3).match(bytearray(b"ab")), -1)
+        self.assertEqual(ReplyMatcher.length(3).match(bytearray(b"abcd")), 3)
+        # 自定义帧：首字节为负载长度。
+        framed = ReplyMatcher.predicate(lambda buffer: buffer[0] + 1 if buffer and len(buffer) > buffer[0] else None)
+        self.assertEqual(framed.match(bytearray(b"\x02ab\x01")), 3)
+        self.assertEqual(framed.match(bytearray(b"\x05ab")), -1)
+        with self.assertRaises(ValueError):
+            ReplyMatcher.regex(re.compile("text"))
+
+    def test_from_config_decodes_escapes_and_validates(self):
+        self.assertEqual(ReplyMatcher.from_config({"type": "delimiter", "value": "OK\\r\\n\\x03"}).match(bytearray(b"OK\r\n\x03")), 5)
+        self.assertEqual(ReplyMatcher.from_config({"type": "regex", "value": "温度=\\d+"}).match(bytearray("温度=25;".encode())), 9)
+        self.assertEqual(ReplyMatcher.from_config({"type": "length", "value": "2"}).match(bytearray(b"xyz")), 2)
+        with self.assertRaisesRegex(ValueError, "正则"):
+            ReplyMatcher.from_config({"type": "regex", "value": "("})
+
+
+class TransactionEngineTests(unittest.TestCase):
+    def setUp(self):
+        self.manager = FakeManager()
+        self.clock = FakeClock()
+
+    def test_replies_complete_in_order_with_latency_from_arrival_time(self):
+        engine = TransactionEngine(self.manager, clock=self.clock)
+        first = engine.request(b"AT\r\n", ReplyMatcher.delimiter(b"OK\r\n"), name="AT")
+        second = engine.request(b"ATI\r\n", ReplyMatcher.delimiter(b"OK\r\n"))
+        # 深度为 1 时第二个请求要等第一个应答后才发送。
+        self.assertEqual(self.manager.sent, [b"AT\r\n"])
+        sent_ns = self.clock.now
+        self.clock.now += 10_000_000
+        engine.feed(b"AT\r\nO", sent_ns + 2_000_000)
+        self.assertFalse(first.done())
+        engine.feed(b"K\r\n", sent_ns + 3_500_000)
+        result = first.result(0)
+        self.assertEqual((result.name, result.reply, result.latency_ms, result.attempts), ("AT", b"AT\r\nOK\r\n", 3.5, 1))
+        self.assertEqual(self.manager.sent, [b"AT\r\n", b"ATI\r\n"])
+        engine.feed(b"noise")
+        self.assertFalse(second.done())
+        self.assertEqual(engine.stats()["pending"], 1)
+
+    def test_pipelined_requests_are_matched_fifo_and_idle_data_is_discarded(self):
+        engine = TransactionEngine(self.manager, pipeline_depth=2, clock=self.clock)
+        engine.feed(b"stale")
+        futures = [engine.request(bytes([index]), ReplyMatcher.length(2)) for index in range(3)]
+        self.assertEqual(self.manager.sent, [b"\x00", b"\x01"])
+        engine.feed_batch(b"aabbcc", ReceiveArrivals.from_unix_ns([0, 3], [0, 0]))
+        self.assertEqual([future.result(0).reply for future in futures], [b"aa", b"bb", b"cc"])
+        self.assertEqual(self.manager.sent, [b"\x00", b"\x01", b"\x02"])
+        stats = engine.stats()
+        self.assertEqual((stats["completed"], stats["discarded_bytes"], stats["pending"]), (3, 5, 0))
+        self.assertIn("latency_p99_ms", stats)
+
+    def test_timeout_retries_then_fails_and_drops_partial_reply(self):
+        engine = TransactionEngine(self.manager, clock=self.clock)
+        future = engine.request(b"ping", ReplyMatcher.delimiter(b"\n"), timeout=0.1, retries=1)
+        engine.feed(b"partial")
+        self.clock.now += 100_000_000
+        engine.poll()
+        self.assertEqual(self.manager.sent, [b"ping", b"ping"])
+        engine.feed(b"pong\n")
+        self.assertEqual((future.result(0).reply, future.result(0).attempts), (b"pong\n", 2))
+
+        failing = engine.request(b"ping", ReplyMatcher.delimiter(b"\n"), timeout=0.1, retries=1)
+        for _ in range(2):
+            self.clock.now += 100_000_000
+            engine.poll()
+        with self.assertRaises(TransactionTimeoutError) as raised:
+            failing.result(0)
+        self.assertEqual(raised.exception.attempts, 2)
+        stats = engine.stats()
+        self.assertEqual((stats["completed"], stats["timeouts"], stats["retries"], stats["discarded_bytes"]), (1, 1, 2, 7))
+
+    def test_write_failure_and_cancel_all_end_transactions(self):
+        engine = TransactionEngine(self.manager, clock=self.clock)
+        self.manager.error = serial.PortNotOpenError()
+        with self.assertRaises(serial.PortNotOpenError):
+            engine.request(b"x", ReplyMatcher.length(1)).result(0)
+        self.manager.error = None
+        first = engine.request(b"a", ReplyMatcher.length(1))
+        queued = engine.request(b"b", ReplyMatcher.length(1))
+        engine.cancel_all()
+        self.assertTrue(first.cancelled() and queued.cancelled())
+        self.assertFalse(engine.active)
+        # 调用方先取消的 Future 在应答到达时保持取消状态，应答仍按顺序消耗。
+        cancelled = engine.request(b"c", ReplyMatcher.length(1))
+        cancelled.cancel()
+        engine.feed(b"C")
+        self.assertTrue(cancelled.cancelled())
+        self.assertFalse(engine.active)
+
+
+@unittest.skipUnless(hasattr(os, "openpty"), "需要 POSIX 伪终端")
+class TransactionEngineSerialTests(unittest.TestCase):
+    def test_transactions_over_pseudo_terminal(self):
+        master, slave = os.openpty()
+        stop = threading.Event()
+
+        def respond():
+            # 对端收到一行请求后回复 "OK <请求>"。
+            buffer = b""
+            os.set_blocking(master, False)
+            while not stop.is_set():
+                try:
+                    buffer += os.read(master, 1024)
+                except BlockingIOError:
+                    time.sleep(0.001)
+                    continue
+                while b"\n" in buffer:
+                    line, buffer = buffer.split(b"\n", 1)
+                    os.write(master, b"OK " + line + b"\n")
+
+        responder = threading.Thread(target=respond, daemon=True)
+        responder.start()
+        manager = SerialManager(port_monitor=Mock())
+        engine = TransactionEngine(manager, pipeline_depth=4)
+        manager.set_receive_callback(engine.feed, with_timestamp=True)
+        try:
+            self.assertTrue(manager.open(os.ttyname(slave)))
+            futures = [engine.request(f"cmd{index}\n".encode(), ReplyMatcher.delimiter(b"\n"), timeout=2.0) for index in range(20)]
+            self.assertEqual([future.result(3).reply for future in futures], [f"OK cmd{index}\n".encode() for index in range(20)])
+            self.assertTrue(all(future.result().latency_ms > 0 for future in futures))
+            self.assertEqual(engine.stats()["completed"], 20)
+        finally:
+            stop.set()
+            manager.close()
+            responder.join(1.0)
+            os.close(master)
+            os.close(slave)
+
+
+if __name__ == "__main__":
+    unittest.main()
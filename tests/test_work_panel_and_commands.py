@@ -5,13 +5,20 @@ import unittest
 from pathlib import Path
 from unittest.mock import Mock
 
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QTableView
+
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(PROJECT_ROOT / "src"))
 
-from components.quick_commands_panel_qt import QuickCommandsPanel
+from components.quick_commands_panel_qt import CommandTable, QuickCommandModel, QuickCommandsPanel
+from components.send_history_panel_qt import SendHistoryModel
 from components.work_column_qt import WorkColumn
 from components.work_panel_qt import WorkPanel
+from utils.quick_command_library import QuickCommandLibrary
+from utils.send_history_store import SendHistoryStore
+from utils.theme_manager_qt import ThemeManagerQt
 
 
 class WorkPanelAndCommandTests(unittest.TestCase):
@@ -39,14 +46,61 @@ class WorkPanelAndCommandTests(unittest.TestCase):
         column.on_column_activated.assert_called_once_with(column)
 
     def test_reordering_duplicate_named_groups_keeps_both_groups(self):
-        groups = [
-            {"name": "重复", "commands": [{"data": "A"}]},
-            {"name": "重复", "commands": [{"data": "B"}]},
-        ]
+        library = QuickCommandLibrary([
+            {"name": "重复", "commands": [{"name": "", "data": "A", "command": "A", "mode": "TEXT"}]},
+            {"name": "重复", "commands": [{"name": "", "data": "B", "command": "B", "mode": "TEXT"}]},
+        ])
         panel = QuickCommandsPanel.__new__(QuickCommandsPanel)
-        panel.config_manager = Mock(get_quick_command_groups=Mock(return_value=groups))
+        panel.library = library
 
         QuickCommandsPanel._save_group_order(panel, 0, 1)
 
-        saved_groups = panel.config_manager.set_quick_command_groups.call_args.args[0]
-        self.assertEqual([group["commands"][0]["data"] for group in saved_groups], ["B", "A"])
+        self.assertEqual([group["commands"][0]["data"] for group in library.groups], ["B", "A"])
+        self.assertEqual(library.filter("a"), [[], [0]])
+
+    def test_command_model_follows_library_edits_and_filter(self):
+        library = QuickCommandLibrary([{"name": "默认", "commands": []}])
+        model = QuickCommandModel(library, 0)
+        inserted = []
+        model.rowsInserted.connect(lambda _parent, first, last: inserted.append((first, last)))
+        library.add_command(0, {"name": "复位", "data": "AT+RST\r\n", "mode": "TEXT"})
+        library.add_command(0, {"name": "读取", "data": "01 03", "mode": "HEX"})
+
+        self.assertEqual(inserted, [(0, 0), (1, 1)])
+        self.assertEqual(model.data(model.index(0, 1)), "[T] AT+RST\\r\\n")
+        model.set_filter(library.filter("hex")[0])
+        self.assertEqual((model.rowCount(), model.source_row(0)), (1, 1))
+        self.assertFalse(model.flags(model.index(0, 0)) & Qt.ItemIsDragEnabled)
+        model.detach()
+
+    def test_history_model_inserts_one_row_per_send_and_formats_on_demand(self):
+        history = SendHistoryStore(1000, [{"data": "AT+%d" % index, "mode": "TEXT", "time": "2024-01-02 03:04:05"} for index in range(1000)])
+        model = SendHistoryModel(history)
+        inserted, removed, resets = [], [], []
+        model.rowsInserted.connect(lambda _parent, first, last: inserted.append((first, last)))
+        model.rowsRemoved.connect(lambda _parent, first, last: removed.append((first, last)))
+        model.modelReset.connect(lambda: resets.append(True))
+
+        history.add("AT\nOK", "HEX", "2024-01-02 03:04:06")
+
+        self.assertEqual((inserted, removed, resets), ([(0, 0)], [(999, 999)], []))
+        self.assertEqual(model.rowCount(), 1000)
+        self.assertEqual(model.data(model.index(0, 1)), "[H] AT\\nOK")
+        self.assertEqual(model.data(model.index(1, 0)), "01-02 03:04:05")
+        self.assertEqual(model.data(model.index(2, 0)), "01-02 03:04:05")
+        self.assertEqual(len(model._times), 1)
+        history.clear()
+        self.assertEqual((model.rowCount(), resets), (0, [True]))
+        model.detach()
+
+    def test_theme_styles_model_based_command_and_history_tables(self):
+        # 快捷指令与发送历史均为 QTableView，主题规则不能只覆盖 QTableWidget。
+        self.assertTrue(issubclass(CommandTable, QTableView))
+        theme = ThemeManagerQt()
+        theme.load_theme("dark")
+        selectors = set()
+        for line in theme.stylesheet().splitlines():
+            if "{" in line:
+                selectors.update(part.strip() for part in line.split("{")[0].split(","))
+        for selector in ("QTableView", "QTableView::item", "QTableView::item:selected"):
+            self.assertIn(selector, selectors)
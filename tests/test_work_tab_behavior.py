@@ -2,7 +2,9 @@
 
 import sys
 import tempfile
+from array import array
 import unittest
+from concurrent.futures import Future
 from pathlib import Path
 from unittest.mock import Mock, patch
 
@@ -11,6 +13,8 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(PROJECT_ROOT / "src"))
 
 from components.work_tab_qt import WorkTab
+from utils.receive_data_utils import ReceiveArrivals, ReceiveHexFormatter, ReceiveLogFormatter
+from utils.transaction_engine import TransactionResult, TransactionTimeoutError
 
 
 class WorkTabBehaviorTests(unittest.TestCase):
@@ -19,21 +23,86 @@ class WorkTabBehaviorTests(unittest.TestCase):
         tab.send_text = Mock()
         tab._send_data = Mock()
         WorkTab.send_data(tab, "快捷指令", "TEXT")
-        tab.send_text.setPlainText.assert_called_once_with("快捷指令")
-        tab._send_data.assert_called_once_with("TEXT", add_to_history=True)
+        tab.send_text.setPlainText.assert_not_called()
+        tab._send_data.assert_called_once_with("TEXT", add_to_history=True, data="快捷指令")
+
+    def test_external_send_submits_cached_payload_without_editor(self):
+        tab = WorkTab.__new__(WorkTab)
+        tab._loop_send_cancelled = tab._send_in_flight = False
+        tab.loop_timer = Mock(isActive=Mock(return_value=False))
+        tab.send_text = Mock()
+        tab.send_settings = Mock(get_settings=Mock(return_value={"mode": "TEXT", "line_ending": "LF"}))
+        tab.receive_settings = Mock(get_settings=Mock(return_value={"encoding": "UTF-8"}))
+        tab.serial_manager = Mock(is_open=Mock(return_value=True))
+        tab.payload_cache = Mock(get=Mock(return_value=b"AT\n"))
+
+        WorkTab.send_data(tab, "AT\r\n", "TEXT")
+
+        tab.send_text.toPlainText.assert_not_called()
+        tab.payload_cache.get.assert_called_once_with("AT\r\n", "TEXT", "UTF-8", "LF")
+        tab.serial_manager.send_bytes_async.assert_called_once_with(b"AT\n")
+        self.assertEqual(tab._pending_send[:4], ("AT\r\n", "TEXT", 3, True))
 
     def test_rx_count_includes_dropped_display_bytes(self):
         tab = WorkTab.__new__(WorkTab)
-        tab.serial_manager = Mock(drain=Mock(return_value=(b"", 7)))
-        tab.log_writer = Mock(take_dropped_bytes=Mock(return_value=0), take_errors=Mock(return_value=[]))
-        tab._log_generation = 0
+        tab.serial_manager = Mock(drain=Mock(return_value=(b"", 7, [])), backlog=Mock(return_value=(0, 0)), take_spill_error=Mock(return_value=None))
+        tab.backlog_label = Mock(text=Mock(return_value=""))
+        tab.log_writer = Mock(take_dropped_bytes=Mock(return_value=0), take_errors=Mock(return_value=[]), take_notices=Mock(return_value=[]))
+        tab.capture_writer = Mock(take_dropped_bytes=Mock(return_value=0), take_errors=Mock(return_value=[]))
+        tab._log_generation = tab._capture_generation = 0
         tab.rx_count = 0
+        tab._transactions = []
+        tab._frame_decoding = False
         tab._update_counts = Mock()
         tab._append_text = Mock()
         WorkTab._flush_receive(tab)
         self.assertEqual(tab.rx_count, 7)
         tab._update_counts.assert_called_once()
 
+    def test_hex_log_mode_stamps_chunk_arrival_times(self):
+        tab = WorkTab.__new__(WorkTab)
+        tab.receive_settings = Mock(get_settings=Mock(return_value={"mode": "HEX", "log_mode": True, "hex_bytes_per_line": 0, "hex_show_offset": False, "hex_show_ascii": False}))
+        tab.receive_decoder, tab.receive_text_segmenter = Mock(), Mock()
+        tab.receive_hex_formatter, tab.receive_log_formatter = ReceiveHexFormatter(), ReceiveLogFormatter()
+        tab._append_text = Mock()
+        # 两块数据相隔 1 秒到达，时间戳应来自到达记录而非刷新时刻。
+        first = ReceiveArrivals.from_unix_ns([0], [1_700_000_000_000_000_000]).times_ns[0]
+        WorkTab._display_received(tab, b"\x01\x02\x03", ReceiveArrivals(array("Q", [0, 2]), array("q", [first, first + 1_000_000_000])))
+        text = tab._append_text.call_args.args[0]
+        expected = [tab.receive_log_formatter._timestamp_prefix(ReceiveArrivals.to_unix_seconds(value)) for value in (first, first + 1_000_000_000)]
+        self.assertEqual(text, f"{expected[0]}01 02 \n{expected[1]}03 ")
+        self.assertEqual(tab._append_text.call_args.kwargs, {"format_log": False})
+
+    def test_quick_command_transaction_reports_latency_and_timeout(self):
+        tab = WorkTab.__new__(WorkTab)
+        tab.serial_manager = Mock(is_open=Mock(return_value=True))
+        tab.send_settings = Mock(get_settings=Mock(return_value={"line_ending": "LF"}))
+        tab.receive_settings = Mock(get_settings=Mock(return_value={"encoding": "UTF-8"}))
+        tab.payload_cache = Mock(get=Mock(return_value=b"AT\n"))
+        tab.config_manager, tab.on_data_sent = Mock(), None
+        tab.transactions = Mock()
+        tab._transactions, tab.tx_count = [], 0
+        tab._append_system, tab._update_counts = Mock(), Mock()
+        answered, timed_out = Future(), Future()
+        tab.transactions.request.side_effect = [answered, timed_out]
+        reply = {"type": "delimiter", "value": "OK\\r\\n", "timeout_ms": 200, "retries": 1}
+
+        WorkTab.send_transaction(tab, {"name": "查询", "data": "AT\r\n", "mode": "TEXT", "reply": reply})
+        WorkTab.send_transaction(tab, {"name": "复位", "data": "AT\r\n", "mode": "TEXT", "reply": reply})
+        payload, matcher, timeout, retries, name = tab.transactions.request.call_args_list[0].args
+        self.assertEqual((payload, timeout, retries, name), (b"AT\n", 0.2, 1, "查询"))
+        self.assertEqual(matcher.match(bytearray(b"AT\nOK\r\n")), 7)
+        tab.config_manager.add_send_history.assert_called_with("AT\r\n", "TEXT")
+
+        answered.set_result(TransactionResult("查询", b"OK\r\n", 12.345, 2))
+        WorkTab._process_transactions(tab, b"", ReceiveArrivals())
+        tab._append_system.assert_called_once_with("[事务] 查询: 应答 4 字节，延迟 12.35 ms（第 2 次发送）\n", "success")
+        self.assertEqual((len(tab._transactions), tab.tx_count), (1, 6))
+        timed_out.set_exception(TransactionTimeoutError("复位", 2))
+        WorkTab._process_transactions(tab, b"", ReceiveArrivals())
+        self.assertIn("等待应答超时", tab._append_system.call_args.args[0])
+        self.assertEqual((tab._transactions, tab.tx_count), ([], 12))
+
     def test_close_failure_is_shown_to_user(self):
         tab = WorkTab.__new__(WorkTab)
         tab._connection_in_flight = True
@@ -83,8 +152,10 @@ class WorkTabBehaviorTests(unittest.TestCase):
         tab.reconnect_timer = Mock()
         tab._reset_receive_session = Mock()
         tab._close_log_writer = Mock()
+        tab._close_capture_writer = Mock()
         tab.receive_settings = Mock()
         tab.receive_settings.save_log_check.isChecked.return_value = True
+        tab.receive_settings.save_capture_check.isChecked.return_value = True
         tab.serial_manager = Mock(is_open=Mock(return_value=False))
         tab._connection_in_flight = False
         tab._set_connection_state = Mock()
@@ -93,4 +164,6 @@ class WorkTabBehaviorTests(unittest.TestCase):
 
         self.assertTrue(tab._manual_close)
         tab.receive_settings.save_log_check.setChecked.assert_called_once_with(False)
+        tab.receive_settings.save_capture_check.setChecked.assert_called_once_with(False)
+        tab._close_capture_writer.assert_called_once()
         tab._set_connection_state.assert_called_once_with(False)